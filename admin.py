@@ -1815,7 +1815,16 @@ def operations_status():
 
 @app.route('/api/database/all')
 def get_all_database_data():
-    """Get all data from all database tables (PUBLIC READ-ONLY - Game data only, no sensitive info)"""
+    """
+    Get all data from all database tables (PUBLIC READ-ONLY - Game data only, no sensitive info)
+    
+    Without parameters returns every table in one JSON document. For large
+    exports use one of the incremental modes (core/export.py):
+        ?format=ndjson        stream one JSON line per table header/row
+        ?format=stream        stream the same document shape as the default
+        ?table=<name>         one keyset-paginated page (&after=<cursor>&limit=)
+    All modes accept &updated_since=<epoch> to only include rows changed since.
+    """
     try:
         import sys
         sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -1823,6 +1832,11 @@ def get_all_database_data():
         
         db = DatabaseManager()
         
+        export_format = request.args.get('format')
+        page_table = request.args.get('table')
+        if export_format or page_table or request.args.get('updated_since'):
+            return _export_database(db, export_format, page_table)
+        
         # Get all table data - ONLY PUBLIC GAME DATA (no credentials, sessions, or admin data)
         tables = {}
         table_names = [
@@ -1923,6 +1937,7 @@ def get_all_database_data():
                         ORDER BY s.category, s.key
                     """)
                 # Special handling for spectrum_snapshots - add statistics from JSON
+                # (keyframes and delta headers both carry them; positions is left out)
                 elif table_name == 'spectrum_snapshots':
                     cursor = db.execute("""
                         SELECT id, epoch, operation, total_dreamers, snapshot_data, created_at, notes
@@ -1985,6 +2000,72 @@ def get_all_database_data():
             'error': str(e)
         }), 500
 
+def _export_database(db, export_format, page_table):
+    """Serve the paginated / streamed modes of /api/database/all"""
+    from core.export import EXPORT_TABLES, PAGE_SIZE_DEFAULT, fetch_page, stream_tables
+    
+    try:
+        updated_since = request.args.get('updated_since')
+        updated_since = int(updated_since) if updated_since else None
+        limit = int(request.args.get('limit', PAGE_SIZE_DEFAULT))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'updated_since and limit must be integers'}), 400
+    
+    if page_table:
+        if page_table not in EXPORT_TABLES:
+            return jsonify({'success': False, 'error': 'Invalid table name'}), 400
+        try:
+            page = fetch_page(db, page_table, request.args.get('after'), limit, updated_since)
+        except ValueError:
+            return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+        return jsonify({'success': True, 'updated_since': updated_since, **page})
+    
+    if export_format not in (None, 'ndjson', 'stream'):
+        return jsonify({'success': False, 'error': 'format must be ndjson or stream'}), 400
+    
+    def dumps(value):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    
+    def footer():
+        return {
+            'stats': db.get_table_stats(),
+            'schema_version': db.get_schema_version(),
+            'updated_since': updated_since,
+            'timestamp': int(time.time())
+        }
+    
+    def generate_ndjson():
+        for kind, table, payload in stream_tables(db, updated_since=updated_since):
+            if kind == 'table':
+                yield dumps({'type': 'table', 'table': table, 'incremental': payload}) + '\n'
+            elif kind == 'rows':
+                for row in payload:
+                    yield dumps({'type': 'row', 'table': table, 'row': row}) + '\n'
+            else:
+                yield dumps({'type': 'error', 'table': table, 'error': payload}) + '\n'
+        yield dumps({'type': 'end', **footer()}) + '\n'
+    
+    def generate_document():
+        # Same shape as the default response, written table by table
+        yield '{"success": true, "tables": {'
+        first_table = True
+        open_table = False
+        for kind, table, payload in stream_tables(db, updated_since=updated_since):
+            if kind == 'table':
+                yield ('' if first_table else '], ') + dumps(table) + ': ['
+                first_table = False
+                open_table = True
+                first_row = True
+            elif kind == 'rows':
+                for row in payload:
+                    yield ('' if first_row else ', ') + dumps(row)
+                    first_row = False
+        yield (']' if open_table else '') + '}, ' + dumps(footer())[1:]
+    
+    if export_format == 'stream' or export_format is None:
+        return Response(generate_document(), mimetype='application/json')
+    return Response(generate_ndjson(), mimetype='application/x-ndjson')
+
 @app.route('/api/database/table/<table_name>')
 def get_table_data(table_name):
     """Get data from a specific table (PUBLIC READ-ONLY)"""
@@ -2004,13 +2085,31 @@ def get_table_data(table_name):
             return jsonify({'error': 'Invalid table name'}), 400
         
         db = DatabaseManager()
-        cursor = db.execute(f"SELECT * FROM {table_name}")
-        rows = cursor.fetchall()
+        if table_name == 'spectrum_snapshots':
+            # Stored rows may be packed deltas - return every snapshot materialised
+            import json
+            from core.snapshots import SnapshotStore
+            bounds = db.execute("SELECT MIN(id) AS first, MAX(id) AS last FROM spectrum_snapshots").fetchone()
+            rows = []
+            if bounds and bounds['first'] is not None:
+                for snapshot in SnapshotStore(db).iter_snapshots(bounds['first'], bounds['last']):
+                    rows.append({
+                        'id': snapshot['id'],
+                        'epoch': snapshot['epoch'],
+                        'operation': snapshot['operation'],
+                        'total_dreamers': snapshot['data']['total_dreamers'],
+                        'snapshot_data': json.dumps(snapshot['data']),
+                        'created_at': snapshot['created_at'],
+                        'notes': snapshot['notes'],
+                    })
+        else:
+            cursor = db.execute(f"SELECT * FROM {table_name}")
+            rows = [dict(row) for row in cursor.fetchall()]
         
         return jsonify({
             'success': True,
             'table': table_name,
-            'data': [dict(row) for row in rows],
+            'data': rows,
             'count': len(rows)
         })
         
@@ -2069,59 +2168,72 @@ def dreamer_names():
 def get_snapshot(snapshot_id):
     """Get full data for a single spectrum snapshot (PUBLIC READ-ONLY)"""
     try:
-        from core.database import DatabaseManager
-        import json as _json
-        db = DatabaseManager()
-        cursor = db.execute("""
-            SELECT id, epoch, operation, snapshot_data, created_at, notes
-            FROM spectrum_snapshots WHERE id = %s
-        """, (snapshot_id,))
-        row = cursor.fetchone()
-        if not row:
+        from core.snapshots import SnapshotStore
+        snapshot = SnapshotStore().get_snapshot(snapshot_id)
+        if not snapshot:
             return jsonify({'error': 'Snapshot not found'}), 404
-        data = _json.loads(row['snapshot_data'])
         return jsonify({
-            'id': row['id'],
-            'epoch': row['epoch'],
-            'operation': row['operation'],
-            'notes': row['notes'],
-            'data': data,
+            'id': snapshot['id'],
+            'epoch': snapshot['epoch'],
+            'operation': snapshot['operation'],
+            'notes': snapshot['notes'],
+            'data': snapshot['data'],
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/snapshots/stream')
+def stream_snapshots():
+    """
+    Stream a range of spectrum snapshots as NDJSON for timeline playback (PUBLIC READ-ONLY)
+    
+    Query params:
+        start: first snapshot id (required)
+        end: last snapshot id (default: start + 500)
+    
+    One materialised snapshot per line, in id order.
+    """
+    try:
+        start = int(request.args.get('start', ''))
+        end = int(request.args.get('end', start + 500))
+    except ValueError:
+        return jsonify({'error': 'start and end must be snapshot ids'}), 400
+    
+    if end < start or end - start > 5000:
+        return jsonify({'error': 'Invalid range (max 5000 snapshots)'}), 400
+    
+    from core.snapshots import SnapshotStore
+    store = SnapshotStore()
+    
+    def generate():
+        for snapshot in store.iter_snapshots(start, end):
+            yield json.dumps(snapshot, ensure_ascii=False) + '\n'
+    
+    return Response(generate(), mimetype='application/x-ndjson')
+
+
 @app.route('/api/database/snapshot/<int:snapshot_id>')
 def get_snapshot_detail(snapshot_id):
     """Get detailed data for a specific spectrum snapshot (PUBLIC READ-ONLY)"""
     try:
         import sys
         sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-        from core.database import DatabaseManager
+        from core.snapshots import SnapshotStore
         
-        db = DatabaseManager()
-        cursor = db.execute("""
-            SELECT id, epoch, operation, snapshot_data, created_at, notes
-            FROM spectrum_snapshots
-            WHERE id = %s
-        """, (snapshot_id,))
-        
-        row = cursor.fetchone()
+        # Rebuilds delta snapshots from their keyframe
+        snapshot = SnapshotStore().get_snapshot(snapshot_id)
         
-        if not row:
+        if not snapshot:
             return jsonify({'error': 'Snapshot not found'}), 404
         
-        # Parse the snapshot data
-        import json
-        snapshot_data = json.loads(row['snapshot_data'])
-        
         return jsonify({
-            'id': row['id'],
-            'epoch': row['epoch'],
-            'operation': row['operation'],
-            'created_at': row['created_at'],
-            'notes': row['notes'],
-            'data': snapshot_data
+            'id': snapshot['id'],
+            'epoch': snapshot['epoch'],
+            'operation': snapshot['operation'],
+            'created_at': snapshot['created_at'],
+            'notes': snapshot['notes'],
+            'data': snapshot['data']
         })
         
     except Exception as e:
@@ -2137,6 +2249,7 @@ def get_snapshot_detail(snapshot_id):
 
 _story_feed_cache = {'data': None, 'timestamp': 0, 'filter': None}
 _STORY_FEED_TTL = 60  # 1 minute cache (was 5min — too slow for label removal)
+_story_hydrator = None  # Per-URI post/record/label cache, created on first use
 _story_priority_uris = {}  # {uri: {'expires': ts, 'added': ts}}
 _STORY_PRIORITY_TTL = 5 * 60  # 5 minutes fast-path visibility window
 
@@ -2195,17 +2308,27 @@ def story_priority_add():
         print(f"Error in /api/story/priority: {e}")
         return jsonify({'error': str(e)}), 500
 
+def _get_story_hydrator():
+    global _story_hydrator
+    if _story_hydrator is None:
+        from core.story_hydration import StoryHydrator
+        _story_hydrator = StoryHydrator(BSKY_CACHE, _is_safe_pds_endpoint)
+    return _story_hydrator
+
+
 @app.route('/api/story/feed')
 def story_feed():
     """Serve enriched story feed from local label data.
     
     Queries the feed_posts table (populated by feed generator's label sync)
-    joined with dreamers for author info. Batch-enriches from Bluesky's
-    getPosts API for embed/engagement data, cached server-side.
+    joined with dreamers for author info. Embed/engagement data, lore.farm
+    labels and long-form records come from the per-URI hydration cache
+    (core/story_hydration.py), which refreshes stale entries in the background.
     
     Query params:
         filter: 'canon' (default) or 'all'
         limit: max posts (default 100, max 200)
+        fresh: skip the assembled-feed cache and re-read labels from lore.farm
     """
     try:
         from core.database import DatabaseManager
@@ -2228,6 +2351,7 @@ def story_feed():
             return jsonify(_story_feed_cache['data'])
         
         db = DatabaseManager()
+        hydrator = _get_story_hydrator()
         
         # Query labeled posts joined with dreamer info
         if filter_type == 'canon':
@@ -2297,13 +2421,7 @@ def story_feed():
             supplemental_types = ['canon'] if filter_type == 'canon' else ['content', 'canon']
 
             for feed_type in supplemental_types:
-                endpoint = f'https://lore.farm/api/worlds/reverie.house/{feed_type}/indexed'
-                resp = requests.get(endpoint, params={'limit': limit}, timeout=15)
-                if resp.status_code != 200:
-                    continue
-
-                payload = resp.json()
-                items = payload.get('canon', []) if feed_type == 'canon' else payload.get('content', [])
+                items = hydrator.get_indexed(feed_type, limit, force=fresh)
 
                 for item in items:
                     if not item.get('valid', True):
@@ -2348,6 +2466,7 @@ def story_feed():
                     continue
                 supplemental_by_uri[uri] = meta
 
+            record_uris = []
             for subject_uri, meta in supplemental_by_uri.items():
                 if not subject_uri.startswith('at://'):
                     continue
@@ -2397,145 +2516,26 @@ def story_feed():
                     uris_to_enrich.append(subject_uri)
                     continue
 
-                pds = None
-                did_doc = None
-
-                try:
-                    if did.startswith('did:plc:'):
-                        did_resp = requests.get(f'https://plc.directory/{did}', timeout=10)
-                        if did_resp.ok:
-                            did_doc = did_resp.json()
-                            services = did_doc.get('service', [])
-                            for service in services:
-                                if service.get('type') == 'AtprotoPersonalDataServer':
-                                    pds = service.get('serviceEndpoint')
-                                    break
-                    elif did.startswith('did:web:'):
-                        host = did.replace('did:web:', '').replace('%3A', ':')
-                        did_resp = requests.get(f'https://{host}/.well-known/did.json', timeout=10)
-                        if did_resp.ok:
-                            did_doc = did_resp.json()
-                            services = did_doc.get('service', [])
-                            for service in services:
-                                if service.get('type') == 'AtprotoPersonalDataServer':
-                                    pds = service.get('serviceEndpoint')
-                                    break
-                except Exception:
-                    pds = None
-
-                if not pds or not _is_safe_pds_endpoint(pds):
-                    continue
-
-                try:
-                    rec_resp = requests.get(
-                        f'{pds}/xrpc/com.atproto.repo.getRecord',
-                        params={'repo': did, 'collection': collection, 'rkey': rkey},
-                        timeout=10
-                    )
-                    if not rec_resp.ok:
-                        continue
-                    rec_data = rec_resp.json()
-                    record = rec_data.get('value', {}) if isinstance(rec_data, dict) else {}
-                except Exception:
-                    continue
-
-                text = ((record.get('text', '') or record.get('textContent', '')) if isinstance(record, dict) else '')
-                title = record.get('title', '') if isinstance(record, dict) else ''
-                formatting = record.get('formatting', []) if isinstance(record, dict) else []
-                title_formatting = record.get('titleFormatting', []) if isinstance(record, dict) else []
-                record_type = record.get('$type', collection) if isinstance(record, dict) else collection
-                created_at = (record.get('createdAt', '') or record.get('publishedAt', '') if isinstance(record, dict) else '') or meta.get('createdAt', '')
-
-                handle = ''
-                display_name = ''
-                avatar = ''
-                color_hex = '#734ba1'
-
-                dreamer = db.fetch_one(
-                    'SELECT handle, name, avatar, color_hex FROM dreamers WHERE did = %s LIMIT 1',
-                    (did,)
-                )
-                if dreamer:
-                    handle = dreamer.get('handle') or handle
-                    display_name = dreamer.get('name') or display_name
-                    avatar = dreamer.get('avatar') or avatar
-                    color_hex = dreamer.get('color_hex') or color_hex
-
-                try:
-                    profile_resp = requests.get(
-                        f'{BSKY_CACHE}/xrpc/app.bsky.actor.getProfile',
-                        params={'actor': did},
-                        timeout=8
-                    )
-                    if profile_resp.ok:
-                        profile = profile_resp.json()
-                        handle = profile.get('handle') or handle
-                        display_name = profile.get('displayName') or display_name
-                        avatar = profile.get('avatar') or avatar
-                except Exception:
-                    pass
+                record_uris.append(subject_uri)
 
-                if not handle and isinstance(did_doc, dict):
-                    aka = did_doc.get('alsoKnownAs', [])
-                    if aka:
-                        handle = aka[0].replace('at://', '')
-
-                if not display_name:
-                    if handle:
-                        display_name = handle.split('.')[0]
-                    else:
-                        display_name = did[:20] + '...'
-
-                if record_type == 'app.bsky.feed.post':
-                    post_url = f'https://bsky.app/profile/{handle or did}/post/{rkey}'
-                else:
-                    post_url = f'https://pds.ls/{subject_uri}'
-
-                stories.append({
-                    'uri': subject_uri,
-                    'cid': meta.get('cid') or (rec_data.get('cid', '') if isinstance(rec_data, dict) else ''),
-                    'isCanon': bool(meta.get('isCanon')),
-                    'isLore': bool(meta.get('isLore')) or bool(meta.get('isCanon')),
-                    'recordType': record_type,
-                    'title': title,
-                    'titleFormatting': title_formatting if isinstance(title_formatting, list) else [],
-                    'isLongForm': record_type != 'app.bsky.feed.post',
-                    'formatting': formatting if isinstance(formatting, list) else [],
-                    'text': text,
-                    'createdAt': created_at,
-                    'author': {
-                        'did': did,
-                        'handle': handle,
-                        'displayName': display_name,
-                        'avatar': avatar,
-                        'color': color_hex,
-                    },
-                    'url': post_url,
-                    'embed': None,
-                    'likeCount': 0,
-                    'repostCount': 0,
-                    'replyCount': 0,
-                })
+            # Long-form / non-Bluesky records, resolved through the author's PDS
+            for subject_uri, story in hydrator.get_records(record_uris).items():
+                meta = supplemental_by_uri[subject_uri]
+                story['cid'] = meta.get('cid') or story['cid']
+                story['createdAt'] = story['createdAt'] or meta.get('createdAt', '')
+                story['isCanon'] = bool(meta.get('isCanon'))
+                story['isLore'] = bool(meta.get('isLore')) or bool(meta.get('isCanon'))
+                stories.append(story)
         except Exception as supplemental_error:
             print(f"⚠️ Story feed supplemental ATProto fetch error: {supplemental_error}")
         
-        # Batch-enrich from Bluesky (up to 25 per request)
+        # Enrich from Bluesky via the hydration cache (getPosts, 25 per call, concurrent)
         enriched = {}
-        enrichment_checked_uris = set()
+        missing_uris = set()
         try:
-            for i in range(0, len(uris_to_enrich), 25):
-                batch = uris_to_enrich[i:i+25]
-                resp = requests.get(
-                    f'{BSKY_CACHE}/xrpc/app.bsky.feed.getPosts',
-                    params={'uris': batch},
-                    timeout=15
-                )
-                if resp.status_code == 200:
-                    # These URIs were checked against the appview. If one is missing
-                    # from the response payload, it is likely deleted/unavailable.
-                    enrichment_checked_uris.update(batch)
-                    for post in resp.json().get('posts', []):
-                        enriched[post['uri']] = post
+            # missing_uris were checked against the appview and not returned -
+            # likely deleted/unavailable.
+            enriched, missing_uris = hydrator.get_posts(uris_to_enrich)
             
             # Merge enriched data into stories
             for story in stories:
@@ -2616,7 +2616,7 @@ def story_feed():
             uri = story.get('uri', '')
 
             # If appview checked this Bluesky URI and did not return it, treat as removed.
-            if is_bsky_post and uri in enrichment_checked_uris and uri not in enriched:
+            if is_bsky_post and uri in missing_uris:
                 continue
 
             if story.get('text') or uri in enriched or not is_bsky_post:
@@ -2626,136 +2626,14 @@ def story_feed():
         # label/feed pipelines, hydrate it directly for a short window.
         if has_priority_lane:
             existing_story_uris = set(s.get('uri', '') for s in valid_stories)
-            for priority_uri in priority_uris:
-                if priority_uri in existing_story_uris:
-                    continue
-                if not priority_uri.startswith('at://'):
-                    continue
-
-                parts = priority_uri.replace('at://', '').split('/')
-                if len(parts) < 3:
-                    continue
-
-                did, collection, rkey = parts[0], parts[1], parts[2]
-                pds = None
-                did_doc = None
-
-                try:
-                    if did.startswith('did:plc:'):
-                        did_resp = requests.get(f'https://plc.directory/{did}', timeout=10)
-                        if did_resp.ok:
-                            did_doc = did_resp.json()
-                            services = did_doc.get('service', [])
-                            for service in services:
-                                if service.get('type') == 'AtprotoPersonalDataServer':
-                                    pds = service.get('serviceEndpoint')
-                                    break
-                    elif did.startswith('did:web:'):
-                        host = did.replace('did:web:', '').replace('%3A', ':')
-                        did_resp = requests.get(f'https://{host}/.well-known/did.json', timeout=10)
-                        if did_resp.ok:
-                            did_doc = did_resp.json()
-                            services = did_doc.get('service', [])
-                            for service in services:
-                                if service.get('type') == 'AtprotoPersonalDataServer':
-                                    pds = service.get('serviceEndpoint')
-                                    break
-                except Exception:
-                    pds = None
-
-                if not pds or not _is_safe_pds_endpoint(pds):
-                    continue
-
-                try:
-                    rec_resp = requests.get(
-                        f'{pds}/xrpc/com.atproto.repo.getRecord',
-                        params={'repo': did, 'collection': collection, 'rkey': rkey},
-                        timeout=10
-                    )
-                    if not rec_resp.ok:
-                        continue
-                    rec_data = rec_resp.json()
-                    record = rec_data.get('value', {}) if isinstance(rec_data, dict) else {}
-                except Exception:
-                    continue
-
-                text = record.get('text', '') if isinstance(record, dict) else ''
-                title = record.get('title', '') if isinstance(record, dict) else ''
-                formatting = record.get('formatting', []) if isinstance(record, dict) else []
-                title_formatting = record.get('titleFormatting', []) if isinstance(record, dict) else []
-                record_type = record.get('$type', collection) if isinstance(record, dict) else collection
-                created_at = record.get('createdAt', '') if isinstance(record, dict) else ''
-
-                handle = ''
-                display_name = ''
-                avatar = ''
-                color_hex = '#734ba1'
-
-                dreamer = db.fetch_one(
-                    'SELECT handle, name, avatar, color_hex FROM dreamers WHERE did = %s LIMIT 1',
-                    (did,)
-                )
-                if dreamer:
-                    handle = dreamer.get('handle') or handle
-                    display_name = dreamer.get('name') or display_name
-                    avatar = dreamer.get('avatar') or avatar
-                    color_hex = dreamer.get('color_hex') or color_hex
-
-                try:
-                    profile_resp = requests.get(
-                        f'{BSKY_CACHE}/xrpc/app.bsky.actor.getProfile',
-                        params={'actor': did},
-                        timeout=8
-                    )
-                    if profile_resp.ok:
-                        profile = profile_resp.json()
-                        handle = profile.get('handle') or handle
-                        display_name = profile.get('displayName') or display_name
-                        avatar = profile.get('avatar') or avatar
-                except Exception:
-                    pass
-
-                if not handle and isinstance(did_doc, dict):
-                    aka = did_doc.get('alsoKnownAs', [])
-                    if aka:
-                        handle = aka[0].replace('at://', '')
-
-                if not display_name:
-                    if handle:
-                        display_name = handle.split('.')[0]
-                    else:
-                        display_name = did[:20] + '...'
-
-                if record_type == 'app.bsky.feed.post':
-                    post_url = f'https://bsky.app/profile/{handle or did}/post/{rkey}'
-                else:
-                    post_url = f'https://pds.ls/{priority_uri}'
-
-                valid_stories.append({
-                    'uri': priority_uri,
-                    'cid': rec_data.get('cid', '') if isinstance(rec_data, dict) else '',
-                    'isCanon': False,
-                    'isLore': True,
-                    'recordType': record_type,
-                    'title': title,
-                    'titleFormatting': title_formatting if isinstance(title_formatting, list) else [],
-                    'isLongForm': record_type != 'app.bsky.feed.post',
-                    'formatting': formatting if isinstance(formatting, list) else [],
-                    'text': text,
-                    'createdAt': created_at,
-                    'author': {
-                        'did': did,
-                        'handle': handle,
-                        'displayName': display_name,
-                        'avatar': avatar,
-                        'color': color_hex,
-                    },
-                    'url': post_url,
-                    'embed': None,
-                    'likeCount': 0,
-                    'repostCount': 0,
-                    'replyCount': 0,
-                })
+            pending_priority = [
+                uri for uri in priority_uris
+                if uri not in existing_story_uris and uri.startswith('at://')
+            ]
+            for priority_uri, story in hydrator.get_records(pending_priority).items():
+                story['isCanon'] = False
+                story['isLore'] = True
+                valid_stories.append(story)
 
         valid_stories.sort(key=lambda s: s.get('createdAt', ''), reverse=True)
         
@@ -2782,16 +2660,47 @@ def story_feed():
 
 @app.route('/api/canon')
 def get_canon():
-    """Get all canon entries from database"""
+    """
+    Get canon entries from database, newest first
+    
+    Returns the whole history by default. Pass limit (and optionally type, did,
+    before) for keyset pages; the X-Next-Cursor header then holds the cursor to
+    pass as ?before= for the next page.
+    """
     try:
         import sys
         sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
         from core.database import DatabaseManager
+        from core.events import MAX_EVENTS_PAGE, encode_event_cursor, keyset_clause, keyset_order, parse_event_cursor
         
         db = DatabaseManager()
         
-        # Get all canon entries with dreamer names and avatars, plus reactions (like /api/database/all)
-        cursor = db.execute("""
+        try:
+            limit = request.args.get('limit')
+            limit = max(1, min(int(limit), MAX_EVENTS_PAGE)) if limit else None
+            before = request.args.get('before')
+            before = parse_event_cursor(before) if before else None
+        except ValueError:
+            return jsonify({'success': False, 'error': 'Invalid limit or cursor'}), 400
+        
+        filters = ''
+        params = []
+        if request.args.get('type'):
+            filters += ' AND c.type = %s'
+            params.append(request.args.get('type'))
+        if request.args.get('did'):
+            filters += ' AND c.did = %s'
+            params.append(request.args.get('did'))
+        clause, clause_params = keyset_clause(before, alias='c')
+        filters += clause
+        params.extend(clause_params)
+        page_clause = ''
+        if limit:
+            page_clause = 'LIMIT %s'
+            params.append(limit)
+        
+        # Get canon entries with dreamer names and avatars, plus reactions (like /api/database/all)
+        cursor = db.execute(f"""
             SELECT c.id, c.epoch, c.did, c.event, c.url, c.uri, c.type, c.key, c.created_at, 
                    c.color_source, c.color_intensity, c.reaction_to, c.others,
                    d.name, d.avatar, d.color_hex,
@@ -2799,8 +2708,10 @@ def get_canon():
             FROM events c
             LEFT JOIN dreamers d ON c.did = d.did
             LEFT JOIN spectrum s ON c.did = s.did
-            ORDER BY c.epoch DESC
-        """)
+            WHERE 1=1{filters}
+            ORDER BY {keyset_order('c')}
+            {page_clause}
+        """, tuple(params))
         canon_entries = cursor.fetchall()
         
         # Build a lookup for others' dreamer data (batch-fetch all unique DIDs from others arrays)
@@ -2865,7 +2776,10 @@ def get_canon():
             }
             result.append(canon_dict)
         
-        return jsonify(result)
+        response = jsonify(result)
+        if limit and len(canon_entries) >= limit:
+            response.headers['X-Next-Cursor'] = encode_event_cursor(canon_entries[-1])
+        return response
         
     except Exception as e:
         print(f"Error in /api/canon: {e}")
@@ -6606,7 +6520,7 @@ def mark_dialogue_seen(db, user_did, dialogue_key):
 def get_message_count():
     """Get unread message count for current user"""
     try:
-        from core.messages import get_inbox
+        from core.messages import get_message_counts
         from core.database import DatabaseManager
         
         # Get user DID from query param or cookie (prioritize query param for OAuth users)
@@ -6624,7 +6538,7 @@ def get_message_count():
                 }
             })
         
-        inbox_data = get_inbox(user_did, limit=1)
+        inbox_data = get_message_counts(user_did)
         
         print(f"[COUNT] User {user_did[:30]}... has {inbox_data['unread']} unread messages")
         
@@ -6693,12 +6607,15 @@ def get_single_message(message_id):
         
         print(f"📬 [MESSAGE] Fetching message {message_id} for {user_did[:30]}...")
         
+        from core.messages import MESSAGES_JSON_COLUMN, PAYLOAD_JOIN
+        
         db = DatabaseManager()
-        cursor = db.execute('''
-            SELECT id, user_did, dialogue_key, title, messages_json, source, priority, 
-                   status, created_at, read_at, dismissed_at, expires_at
-            FROM messages
-            WHERE id = %s AND user_did = %s
+        cursor = db.execute(f'''
+            SELECT m.id, m.user_did, m.dialogue_key, m.title, {MESSAGES_JSON_COLUMN}, m.source, m.priority, 
+                   m.status, m.created_at, m.read_at, m.dismissed_at, m.expires_at
+            FROM messages m
+            {PAYLOAD_JOIN}
+            WHERE m.id = %s AND m.user_did = %s
         ''', (message_id, user_did))
         
         row = cursor.fetchone()
@@ -6863,7 +6780,7 @@ def bulk_dismiss_messages():
 def send_message_admin():
     """Admin: Send message to specific user(s) or broadcast to all"""
     try:
-        from core.messages import create_message
+        from core.messages import broadcast_message
         import json
         
         data = request.get_json()
@@ -6932,20 +6849,15 @@ def send_message_admin():
                 expires_in_hours = 1  # Minimum 1 hour
             print(f"⏰ [SEND] Expiration set to {expires_in_hours} hours")
         
-        # Send to all recipients
-        message_ids = []
-        for did in recipients:
-            print(f"📤 [SEND] Sending to {did[:30]}...")
-            msg_id = create_message(
-                user_did=did,
-                dialogue_key=dialogue_key,
-                messages_data=messages,
-                source='admin',
-                priority=priority,
-                expires_in_hours=expires_in_hours
-            )
-            if msg_id:
-                message_ids.append(msg_id)
+        # Send to all recipients (one shared payload, one insert)
+        message_ids = broadcast_message(
+            user_dids=recipients,
+            dialogue_key=dialogue_key,
+            messages_data=messages,
+            source='admin',
+            priority=priority,
+            expires_in_hours=expires_in_hours
+        )
         
         print(f"[SEND] Admin {request.admin_handle} sent {dialogue_key} to {len(message_ids)} users")
         
@@ -7122,11 +7034,14 @@ def get_messages_for_dreamer():
         
         db = DatabaseManager()
         
+        from core.messages import MESSAGES_JSON_COLUMN, PAYLOAD_JOIN
+        
         # Get recent dialogue messages for this dreamer
-        cursor = db.execute('''
-            SELECT m.id, m.user_did, m.dialogue_key, m.messages_json, m.created_at,
+        cursor = db.execute(f'''
+            SELECT m.id, m.user_did, m.dialogue_key, {MESSAGES_JSON_COLUMN}, m.created_at,
                    m.status, m.priority, m.title
             FROM messages m
+            {PAYLOAD_JOIN}
             WHERE m.user_did = %s
             ORDER BY m.created_at DESC
             LIMIT %s
@@ -7766,11 +7681,9 @@ def get_conditionals():
         # Message count
         message_count = 0
         if user_did:
-            from core.messages import get_inbox
+            from core.messages import get_message_counts
             try:
-                inbox = get_inbox(user_did, db)
-                if inbox and 'messages' in inbox:
-                    message_count = len([m for m in inbox['messages'] if not m.get('read', False)])
+                message_count = get_message_counts(user_did, db)['unread']
             except Exception:
                 pass
         
@@ -622,6 +622,9 @@ def create_account():
         access_jwt = result.get('accessJwt')
         print(f"   ✅ PDS account created: {did}")
         
+        from core.pds import get_account_index
+        get_account_index().invalidate()
+        
         # Initialize PDS profile with default avatar and capitalized display name
         # This uses the user's password to authenticate and set the profile properly
         try:
@@ -4,7 +4,6 @@ Handles dreamer data, profiles, spectrum, and related operations
 """
 
 from flask import Blueprint, request, jsonify, current_app, Response, redirect
-from collections import defaultdict
 import os
 import re
 import sys
@@ -56,112 +55,46 @@ def rate_limit(requests_per_minute=100):
 
 @bp.route('/dreamers')
 def get_dreamers():
-    """Get all dreamers with spectrum, souvenirs, and kindred in dreamers.json format"""
+    """
+    Get all dreamers with spectrum, souvenirs, and kindred in dreamers.json format
+    
+    The roster is served pre-serialised from core.roster and versioned by
+    database triggers. Supports conditional GET (ETag / If-None-Match) and
+    ?since=<version> to fetch only dreamers changed after a version
+    (returned in the X-Roster-Version header).
+    """
     try:
         import sys
         import os
         sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
         from core.database import DatabaseManager
+        from core.roster import roster_cache
         
         db = DatabaseManager()
         
-        # OPTIMIZED: Get dreamers with spectrum data
-        cursor = db.execute("""
-            SELECT 
-                d.did, d.handle, d.name, d.display_name, d.description,
-                d.server, d.avatar, d.banner,
-                d.followers_count, d.follows_count, d.posts_count,
-                d.created_at, d.arrival, d.heading, d.color_hex, d.phanera,
-                d.status, d.designation, d.alts,
-                d.canon_score, d.lore_score, d.patron_score, d.contribution_score,
-                d.community_shield, d.shield_unlocked,
-                s.oblivion, s.authority, s.skeptic, s.receptive, 
-                s.liberty, s.entropy, s.octant,
-                s.origin_oblivion, s.origin_authority, s.origin_skeptic,
-                s.origin_receptive, s.origin_liberty, s.origin_entropy, s.origin_octant
-            FROM dreamers d
-            LEFT JOIN spectrum s ON d.did = s.did
-            ORDER BY d.arrival DESC
-        """)
-        dreamers = cursor.fetchall()
-        
-        # OPTIMIZED: Get all souvenirs in one query
-        cursor = db.execute("SELECT did, souvenir_key, earned_epoch FROM awards ORDER BY did")
-        souvenirs_data = cursor.fetchall()
-        
-        # OPTIMIZED: Organize souvenirs by DID using defaultdict
-        souvenirs_by_did = defaultdict(dict)
-        for row in souvenirs_data:
-            souvenirs_by_did[row['did']][row['souvenir_key']] = row['earned_epoch']
-        
-        # OPTIMIZED: Get kindred for all dreamers in one query (bidirectional)
-        cursor = db.execute("""
-            SELECT did_a as did, did_b as kindred_did, discovered_epoch
-            FROM kindred
-            UNION
-            SELECT did_b as did, did_a as kindred_did, discovered_epoch
-            FROM kindred
-            ORDER BY did, discovered_epoch
-        """)
-        kindred_data = cursor.fetchall()
-        
-        # OPTIMIZED: Organize kindred by DID using defaultdict
-        kindred_by_did = defaultdict(list)
-        for row in kindred_data:
-            kindred_by_did[row['did']].append(row['kindred_did'])
-        
-        # OPTIMIZED: Format dreamers data using list comprehension
-        dreamers_list = [
-            {
-                'name': dreamer['name'],
-                'handle': dreamer['handle'],
-                'did': dreamer['did'],
-                'server': dreamer['server'] or '',
-                'souvenirs': souvenirs_by_did.get(dreamer['did'], {}),
-                'kindred': kindred_by_did.get(dreamer['did'], []),
-                'display_name': dreamer['display_name'] or dreamer['name'],
-                'description': dreamer['description'] or '',
-                'avatar': dreamer['avatar'] or '',
-                'banner': dreamer['banner'] or '',
-                'followers_count': dreamer['followers_count'] or 0,
-                'follows_count': dreamer['follows_count'] or 0,
-                'posts_count': dreamer['posts_count'] or 0,
-                'patronage': dreamer['patron_score'] or 0,  # Legacy field name
-                'patron_score': dreamer['patron_score'] or 0,  # New field name (used by profile.js/sidebar.js)
-                'canon_score': dreamer['canon_score'] or 0,
-                'lore_score': dreamer['lore_score'] or 0,
-                'contribution_score': dreamer['contribution_score'] or 0,
-                'created_at': dreamer['created_at'] or '',
-                'arrival': dreamer['arrival'] or 0,
-                'color_hex': dreamer['color_hex'],
-                'phanera': dreamer['phanera'],
-                'status': dreamer['status'],
-                'designation': dreamer['designation'],
-                'alt_names': dreamer['alts'] or '',
-                'community_shield': dreamer['community_shield'] if dreamer['community_shield'] is not None else True,
-                'shield_unlocked': dreamer['shield_unlocked'] if dreamer['shield_unlocked'] is not None else False,
-                'spectrum': {
-                    'entropy': dreamer['entropy'] or 0,
-                    'oblivion': dreamer['oblivion'] or 0,
-                    'liberty': dreamer['liberty'] or 0,
-                    'authority': dreamer['authority'] or 0,
-                    'receptive': dreamer['receptive'] or 0,
-                    'skeptic': dreamer['skeptic'] or 0,
-                    'octant': dreamer['octant'],
-                    'origin_entropy': dreamer['origin_entropy'] or 0,
-                    'origin_oblivion': dreamer['origin_oblivion'] or 0,
-                    'origin_liberty': dreamer['origin_liberty'] or 0,
-                    'origin_authority': dreamer['origin_authority'] or 0,
-                    'origin_receptive': dreamer['origin_receptive'] or 0,
-                    'origin_skeptic': dreamer['origin_skeptic'] or 0,
-                    'origin_octant': dreamer['origin_octant']
-                },
-                'heading': dreamer['heading']
-            }
-            for dreamer in dreamers
-        ]
-        
-        return jsonify(dreamers_list)
+        since = request.args.get('since')
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                return jsonify({'success': False, 'error': 'since must be a roster version'}), 400
+            changes = roster_cache.get_changes(db, since)
+            response = jsonify(changes)
+            response.headers['X-Roster-Version'] = str(changes['version'])
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        
+        body, version = roster_cache.get(db)
+        etag = roster_cache.etag(version)
+        
+        if etag in request.headers.get('If-None-Match', ''):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype='application/json')
+        response.headers['ETag'] = etag
+        response.headers['X-Roster-Version'] = str(version[0])
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
         
     except Exception as e:
         print(f"Error in /api/dreamers: {e}")
@@ -607,7 +540,13 @@ def get_former_by_identifier(identifier):
 
 @bp.route('/events')
 def get_events_api():
-    """Return events, optionally filtered by DID. Query params: did, limit, type"""
+    """
+    Return events newest first, optionally filtered by DID.
+    Query params: did, limit, type, before
+    
+    When a full page is returned, the X-Next-Cursor header holds the cursor
+    to pass as ?before= for the next page.
+    """
     try:
         did = request.args.get('did')
         limit = int(request.args.get('limit', '20'))
@@ -615,11 +554,24 @@ def get_events_api():
 
         # Use EventsManager to fetch events
         sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-        from core.events import EventsManager
+        from core.events import EventsManager, MAX_EVENTS_PAGE, encode_event_cursor, parse_event_cursor
+        
+        # Clamp here too, so a full (capped) page still gets a next cursor
+        limit = max(1, min(limit, MAX_EVENTS_PAGE))
+        
+        before = request.args.get('before')
+        try:
+            before = parse_event_cursor(before) if before else None
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        
         em = EventsManager()
 
-        events = em.get_events(limit=limit, event_type=event_type, did=did)
-        return jsonify(events)
+        events = em.get_events(limit=limit, event_type=event_type, did=did, before=before)
+        response = jsonify(events)
+        if events and len(events) >= limit:
+            response.headers['X-Next-Cursor'] = encode_event_cursor(events[-1])
+        return response
     except Exception as e:
         print(f"Error in /api/events: {e}")
         import traceback
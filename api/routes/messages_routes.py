@@ -13,7 +13,7 @@ bp = Blueprint('messages', __name__, url_prefix='/api/messages')
 # Import shared dependencies
 from core.admin_auth import require_auth
 from core.database import DatabaseManager
-from core.messages import create_message
+from core.messages import create_message, MESSAGES_JSON_COLUMN, PAYLOAD_JOIN
 
 
 # ============================================================================
@@ -111,13 +111,14 @@ def get_recent_messages():
         
         db = DatabaseManager()
         
-        query = '''
+        query = f'''
             SELECT 
-                m.id, m.user_did, m.dialogue_key, m.messages_json,
+                m.id, m.user_did, m.dialogue_key, {MESSAGES_JSON_COLUMN},
                 m.source, m.priority, m.status, m.title,
                 m.created_at, m.read_at, m.dismissed_at, m.expires_at,
                 d.handle, d.name, d.display_name, d.avatar
             FROM messages m
+            {PAYLOAD_JOIN}
             LEFT JOIN dreamers d ON m.user_did = d.did
         '''
         
@@ -262,13 +263,14 @@ def get_message(message_id):
         
         db = DatabaseManager()
         # Only return message if it belongs to the requesting user
-        cursor = db.execute('''
+        cursor = db.execute(f'''
             SELECT 
-                m.id, m.user_did, m.dialogue_key, m.messages_json,
+                m.id, m.user_did, m.dialogue_key, {MESSAGES_JSON_COLUMN},
                 m.source, m.priority, m.status, m.title,
                 m.created_at, m.read_at, m.dismissed_at, m.expires_at,
                 d.handle, d.name, d.display_name
             FROM messages m
+            {PAYLOAD_JOIN}
             LEFT JOIN dreamers d ON m.user_did = d.did
             WHERE m.id = %s AND m.user_did = %s
         ''', (message_id, user_did))
@@ -4,7 +4,7 @@ Handles user-specific account operations including deletion
 """
 
 from flask import Blueprint, request, jsonify
-from core.admin_auth import validate_user_token, get_client_ip
+from core.admin_auth import auth, validate_user_token, get_client_ip
 from core.rate_limiter import PersistentRateLimiter
 from functools import wraps
 import os
@@ -389,6 +389,8 @@ def delete_user_account():
                 print(f"     stdout: {result.stdout}")
                 print(f"     Handle {handle} is now available for reuse")
                 pds_deleted = True
+                from core.pds import get_account_index
+                get_account_index().invalidate()
             else:
                 print(f"  ❌ PDS account deletion failed!")
                 print(f"     Return code: {result.returncode}")
@@ -435,6 +437,7 @@ def delete_user_account():
         # Clear admin sessions (force logout)
         try:
             db.execute("DELETE FROM sessions WHERE admin_did = %s", (target_did,))
+            auth.invalidate_sessions_for(target_did)
             logger.info(f"  ✓ Cleared active sessions")
         except Exception as e:
             logger.debug(f"  Note: Could not clear sessions: {e}")
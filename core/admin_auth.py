@@ -4,7 +4,9 @@ Admin Authentication System for Reverie House
 PDS-based authentication with session management
 """
 
+import atexit
 import secrets
+import threading
 import time
 import requests
 from functools import wraps
@@ -13,6 +15,7 @@ import os
 
 # Import DatabaseManager for PostgreSQL
 from core.database import DatabaseManager
+from core.signing_keys import signing_keys, VerifiedTokenCache
 
 # Authorized admin DID (reverie.house)
 AUTHORIZED_ADMIN_DID = "did:plc:yauphjufk7phkwurn266ybx2"
@@ -21,6 +24,13 @@ AUTHORIZED_ADMIN_HANDLE = "reverie.house"
 # Session expiry: 24 hours
 SESSION_EXPIRY_SECONDS = 24 * 60 * 60
 
+# Validated sessions are reused for this long before re-reading the sessions table
+SESSION_CACHE_TTL = 30
+SESSION_CACHE_MAX = 10000
+
+# last_activity is recorded in memory and written in one batch this often
+ACTIVITY_FLUSH_SECONDS = 60
+
 # Rate limiting: 5 failures = 15 minute lockout
 MAX_LOGIN_ATTEMPTS = 5
 LOCKOUT_DURATION_SECONDS = 15 * 60
@@ -32,6 +42,12 @@ class AdminAuth:
     def __init__(self, db=None):
         self.db = db or DatabaseManager()
         self._init_tables()
+        # token -> (cached_at, did, handle, expires_at); did is None for unknown tokens
+        self._session_cache = {}
+        self._session_lock = threading.Lock()
+        # token -> latest activity epoch not yet written to sessions.last_activity
+        self._pending_activity = {}
+        self._activity_flusher = None
     
     def _init_tables(self):
         """Create admin tables if they don't exist (tables already exist in PostgreSQL)"""
@@ -239,53 +255,122 @@ class AdminAuth:
         """
         Validate a session token
         Returns: (valid, did, handle)
+        
+        Results are cached for SESSION_CACHE_TTL seconds, and last_activity
+        is queued for the next batched flush instead of written per request.
         """
         if not token:
             return False, None, None
         
+        now = int(time.time())
+        with self._session_lock:
+            cached = self._session_cache.get(token)
+        
+        if cached and now - cached[0] < SESSION_CACHE_TTL:
+            _, did, handle, expires_at = cached
+            if did is None:
+                return False, None, None
+            if now <= expires_at:
+                self._record_activity(token, now)
+                return True, did, handle
+        
         # LEFT JOIN with admins (not all sessions are admin sessions)
-        # For regular users, we'll fetch handle from dreamers table if needed
+        # For regular users, fetch handle from dreamers in the same query
         row = self.db.fetch_one("""
-            SELECT s.admin_did as did, a.handle as admin_handle, s.expires_at 
+            SELECT s.admin_did as did, a.handle as admin_handle, d.handle as dreamer_handle, s.expires_at 
             FROM sessions s
             LEFT JOIN admins a ON s.admin_did = a.did
+            LEFT JOIN dreamers d ON s.admin_did = d.did AND a.handle IS NULL
             WHERE s.token = %s
         """, (token,))
         
         if not row:
+            self._cache_session(token, now, None, None, 0)
             return False, None, None
         
         # Check expiry
-        now = int(time.time())
         if now > row['expires_at']:
             # Session expired - clean it up
             self.db.execute("DELETE FROM sessions WHERE token = %s", (token,))
+            self._forget_session(token)
             return False, None, None
         
-        # Update last activity
-        self.db.execute("""
-            UPDATE sessions 
-            SET last_activity = %s 
-            WHERE token = %s
-        """, (now, token))
-        
         # Get handle (from authorized_admins for admins, or from dreamers for users)
         did = row['did']
-        handle = row['admin_handle']  # Will be None for non-admin users
+        handle = row['admin_handle'] or row['dreamer_handle']
         
-        if not handle:
-            # Not an admin - try to get handle from dreamers table
-            dreamer_row = self.db.fetch_one("SELECT handle FROM dreamers WHERE did = %s", (did,))
-            if dreamer_row:
-                handle = dreamer_row['handle']
+        self._cache_session(token, now, did, handle, row['expires_at'])
+        self._record_activity(token, now)
         
         return True, did, handle
     
+    def _cache_session(self, token, now, did, handle, expires_at):
+        with self._session_lock:
+            if len(self._session_cache) >= SESSION_CACHE_MAX:
+                # Drop entries past their TTL; if that isn't enough, start over
+                self._session_cache = {
+                    t: entry for t, entry in self._session_cache.items()
+                    if now - entry[0] < SESSION_CACHE_TTL
+                }
+                if len(self._session_cache) >= SESSION_CACHE_MAX:
+                    self._session_cache.clear()
+            self._session_cache[token] = (now, did, handle, expires_at)
+    
+    def _forget_session(self, token):
+        with self._session_lock:
+            self._session_cache.pop(token, None)
+            self._pending_activity.pop(token, None)
+    
+    def invalidate_sessions_for(self, did):
+        """Drop cached sessions of a DID (after deleting its sessions directly)."""
+        with self._session_lock:
+            for token in [t for t, entry in self._session_cache.items() if entry[1] == did]:
+                self._session_cache.pop(token, None)
+                self._pending_activity.pop(token, None)
+    
+    def _record_activity(self, token, now):
+        with self._session_lock:
+            self._pending_activity[token] = now
+            if self._activity_flusher is None:
+                self._activity_flusher = threading.Thread(
+                    target=self._activity_flush_loop, name='session-activity', daemon=True
+                )
+                self._activity_flusher.start()
+    
+    def _activity_flush_loop(self):
+        while True:
+            time.sleep(ACTIVITY_FLUSH_SECONDS)
+            self.flush_activity()
+    
+    def flush_activity(self):
+        """Write queued last_activity times in one UPDATE."""
+        with self._session_lock:
+            pending = self._pending_activity
+            self._pending_activity = {}
+        if not pending:
+            return
+        
+        tokens = list(pending)
+        try:
+            self.db.execute("""
+                UPDATE sessions s
+                SET last_activity = GREATEST(COALESCE(s.last_activity, 0), v.ts)
+                FROM unnest(%s::text[], %s::bigint[]) AS v(token, ts)
+                WHERE s.token = v.token
+            """, (tokens, [pending[t] for t in tokens]))
+        except Exception as e:
+            print(f"⚠️ Session activity flush failed: {e}")
+            with self._session_lock:
+                for token, ts in pending.items():
+                    if self._pending_activity.get(token, 0) < ts:
+                        self._pending_activity[token] = ts
+    
     def destroy_session(self, token):
         """Destroy a session (logout)"""
         if not token:
             return
         
+        self._forget_session(token)
         self.db.execute("DELETE FROM sessions WHERE token = %s", (token,))
     
     def log_action(self, did, handle, action, target=None, details=None, ip_address=None, user_agent=None):
@@ -309,12 +394,19 @@ class AdminAuth:
         """Remove expired sessions"""
         now = int(time.time())
         self.db.execute("DELETE FROM sessions WHERE expires_at < %s", (now,))
+        with self._session_lock:
+            for token in [t for t, entry in self._session_cache.items() if entry[3] < now]:
+                self._session_cache.pop(token, None)
         # Note: Cannot get rowcount with connection pooling
         return None
 
 
+# OAuth JWTs whose signature has been verified, until their exp
+_verified_tokens = VerifiedTokenCache()
+
 # Global auth instance
 auth = AdminAuth()
+atexit.register(auth.flush_activity)
 
 
 def require_auth(require_superadmin=False):
@@ -424,6 +516,18 @@ def get_client_ip():
     return request.remote_addr
 
 
+def _get_issuer_jwks(iss, force_refresh=False):
+    """An OAuth issuer's JWKS, from the shared signing key cache or fetched."""
+    import json
+    
+    def fetch():
+        response = requests.get(f"{iss}/.well-known/jwks.json", timeout=5)
+        response.raise_for_status()
+        return json.dumps(response.json())
+    
+    return json.loads(signing_keys.get(f"jwks:{iss}", fetch, force_refresh=force_refresh) or '{}')
+
+
 def verify_pds_jwt(token):
     """
     Verify a PDS JWT token by fetching the public key from the PDS.
@@ -511,49 +615,47 @@ def verify_pds_jwt(token):
             logger.warning(f"❌ [verify_pds_jwt] No issuer in OAuth JWT")
             return False, None, None
         
-        jwks_url = f"{iss}/.well-known/jwks.json"
-        logger.info(f"   Fetching JWKS from: {jwks_url}")
-        
-        try:
-            response = requests.get(jwks_url, timeout=5)
-            logger.info(f"   JWKS response status: {response.status_code}")
-            response.raise_for_status()
-            jwks = response.json()
-            logger.info(f"   JWKS keys found: {len(jwks.get('keys', []))}")
-        except requests.RequestException as e:
-            logger.error(f"❌ [verify_pds_jwt] Failed to fetch JWKS: {e}")
-            return False, None, None
-        except json.JSONDecodeError as e:
-            logger.error(f"❌ [verify_pds_jwt] Failed to parse JWKS JSON: {e}")
-            return False, None, None
-        
-        # Find the key
-        logger.info(f"   Looking for key with kid={kid}")
-        public_key = None
-        for key in jwks.get('keys', []):
-            if key.get('kid') == kid:
-                logger.info(f"   ✅ Found matching key!")
-                public_key = jwt.algorithms.RSAAlgorithm.from_jwk(json.dumps(key))
-                break
-        
-        if not public_key:
-            logger.warning(f"❌ [verify_pds_jwt] No matching public key found")
-            logger.info(f"      Available kids: {[k.get('kid') for k in jwks.get('keys', [])]}")
-            return False, None, None
-        
-        # Verify the JWT
-        logger.info(f"   Verifying JWT signature...")
-        try:
-            verified = jwt.decode(token, public_key, algorithms=['RS256'], issuer=iss)
-            logger.info(f"   ✅ JWT signature valid!")
-        except jwt.InvalidTokenError as e:
-            logger.error(f"❌ [verify_pds_jwt] JWT signature verification failed: {e}")
-            return False, None, None
-        
-        # Additional validation
-        if verified.get('sub') != sub:
-            logger.warning(f"❌ [verify_pds_jwt] Subject mismatch after verification")
-            return False, None, None
+        if _verified_tokens.get(token) is not None:
+            logger.info(f"   ✅ JWT signature verified earlier (cached)")
+        else:
+            # Find the key, re-fetching the issuer's JWKS once if the kid is new (key rotation)
+            logger.info(f"   Looking for key with kid={kid}")
+            public_key = None
+            for force_refresh in (False, True):
+                try:
+                    jwks = _get_issuer_jwks(iss, force_refresh)
+                except (requests.RequestException, json.JSONDecodeError) as e:
+                    logger.error(f"❌ [verify_pds_jwt] Failed to fetch JWKS: {e}")
+                    return False, None, None
+                logger.info(f"   JWKS keys found: {len(jwks.get('keys', []))}")
+                for key in jwks.get('keys', []):
+                    if key.get('kid') == kid:
+                        logger.info(f"   ✅ Found matching key!")
+                        public_key = jwt.algorithms.RSAAlgorithm.from_jwk(json.dumps(key))
+                        break
+                if public_key:
+                    break
+            
+            if not public_key:
+                logger.warning(f"❌ [verify_pds_jwt] No matching public key found")
+                logger.info(f"      Available kids: {[k.get('kid') for k in jwks.get('keys', [])]}")
+                return False, None, None
+            
+            # Verify the JWT
+            logger.info(f"   Verifying JWT signature...")
+            try:
+                verified = jwt.decode(token, public_key, algorithms=['RS256'], issuer=iss)
+                logger.info(f"   ✅ JWT signature valid!")
+            except jwt.InvalidTokenError as e:
+                logger.error(f"❌ [verify_pds_jwt] JWT signature verification failed: {e}")
+                return False, None, None
+            
+            # Additional validation
+            if verified.get('sub') != sub:
+                logger.warning(f"❌ [verify_pds_jwt] Subject mismatch after verification")
+                return False, None, None
+            
+            _verified_tokens.put(token, {'sub': sub, 'iss': iss}, exp)
         
         logger.info(f"   ✅ JWT fully verified for DID: {sub}")
         
@@ -3,25 +3,90 @@
 🔒 Audit Logging System
 Hyper-secure logging of all sensitive operations with geolocation
 
-Uses PostgreSQL for audit logging
+Uses PostgreSQL for audit logging. Events are queued in-process and written
+in batches by a background thread, so request handlers never wait on the
+database or on IP geolocation.
 """
 
 import time
 import json
 import os
+import queue
+import atexit
+import threading
 import requests
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, List, Tuple
 from core.database import DatabaseManager
 
 
+# Background writer tuning
+AUDIT_QUEUE_MAX = 10000
+AUDIT_BATCH_SIZE = 100
+AUDIT_FLUSH_INTERVAL = 2.0
+
+# Stored for events logged without a client IP (user_ip is NOT NULL)
+UNKNOWN_IP = 'unknown'
+
+# Geolocation cache tuning
+GEO_CACHE_SIZE = 4096
+GEO_CACHE_TTL = 24 * 3600
+
+
+class GeoCache:
+    """
+    LRU cache of IP geolocation results with a per-entry TTL.
+    
+    Thread-safe; entries older than ttl seconds are treated as missing.
+    """
+    
+    def __init__(self, max_size: int = GEO_CACHE_SIZE, ttl: int = GEO_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, ip: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(ip)
+            if entry is None:
+                return None
+            stored_at, info = entry
+            if time.time() - stored_at > self.ttl:
+                del self._entries[ip]
+                return None
+            self._entries.move_to_end(ip)
+            return info
+    
+    def set(self, ip: str, info: Dict[str, Any]):
+        with self._lock:
+            self._entries[ip] = (time.time(), info)
+            self._entries.move_to_end(ip)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
 class AuditLogger:
     """Secure audit logging system with geolocation"""
     
-    def __init__(self, db_path: str = None):
-        # db_path parameter kept for compatibility but not used
+    def __init__(self, db_path: str = None, offline_lookup: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None):
+        """
+        Args:
+            db_path: Kept for compatibility, not used
+            offline_lookup: Optional callable returning geolocation info for an IP
+                from a local source (e.g. a GeoIP database), or None if unknown.
+                Consulted before falling back to ip-api.com.
+        """
         self.db = DatabaseManager()
+        self.offline_lookup = offline_lookup
+        self.geo_cache = GeoCache()
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=AUDIT_QUEUE_MAX)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._dropped = 0
         self._ensure_database()
+        atexit.register(self.flush)
     
     def _ensure_database(self):
         """Create audit database and tables if they don't exist"""
@@ -118,7 +183,9 @@ class AuditLogger:
     def get_ip_info(self, ip: str) -> Dict[str, Any]:
         """
         Get geolocation and threat info for IP address
-        Uses ip-api.com (free, no key required, 45 req/min limit)
+        
+        Checks the in-memory cache, then the offline lookup source, then
+        ip-api.com (free, no key required, 45 req/min limit).
         """
         if ip in ['127.0.0.1', 'localhost'] or ip.startswith('192.168.') or ip.startswith('10.'):
             return {
@@ -134,6 +201,43 @@ class AuditLogger:
                 'threat_level': 'none'
             }
         
+        cached = self.geo_cache.get(ip)
+        if cached is not None:
+            return cached
+        
+        info = None
+        if self.offline_lookup:
+            try:
+                info = self.offline_lookup(ip)
+            except Exception as e:
+                print(f"Offline IP lookup failed for {ip}: {e}")
+        
+        if info is None:
+            info = self._lookup_ip_api(ip)
+        
+        if info is not None:
+            self.geo_cache.set(ip, info)
+            return info
+        
+        return self._unknown_ip_info()
+    
+    @staticmethod
+    def _unknown_ip_info() -> Dict[str, Any]:
+        return {
+            'country': 'Unknown',
+            'city': 'Unknown',
+            'region': 'Unknown',
+            'timezone': 'Unknown',
+            'isp': 'Unknown',
+            'asn': 'Unknown',
+            'is_proxy': False,
+            'is_vpn': False,
+            'is_tor': False,
+            'threat_level': 'unknown'
+        }
+    
+    def _lookup_ip_api(self, ip: str) -> Optional[Dict[str, Any]]:
+        """Look up an IP with ip-api.com, returning None on failure"""
         try:
             resp = requests.get(
                 f'http://ip-api.com/json/{ip}',
@@ -160,18 +264,7 @@ class AuditLogger:
         except Exception as e:
             print(f"IP lookup failed for {ip}: {e}")
         
-        return {
-            'country': 'Unknown',
-            'city': 'Unknown',
-            'region': 'Unknown',
-            'timezone': 'Unknown',
-            'isp': 'Unknown',
-            'asn': 'Unknown',
-            'is_proxy': False,
-            'is_vpn': False,
-            'is_tor': False,
-            'threat_level': 'unknown'
-        }
+        return None
     
     def log(
         self,
@@ -190,9 +283,12 @@ class AuditLogger:
         error_message: Optional[str] = None,
         extra_data: Optional[Dict] = None
     ):
-        """Log an event to audit database with geolocation"""
+        """
+        Queue an event for the audit database.
         
-        ip_info = self.get_ip_info(user_ip)
+        Returns immediately; geolocation and the insert happen on the background
+        writer. If the queue is full the event is dropped and counted.
+        """
         
         if request_body and len(request_body) > 10000:
             request_body = request_body[:10000] + '... [truncated]'
@@ -200,7 +296,132 @@ class AuditLogger:
         if user_agent and len(user_agent) > 500:
             user_agent = user_agent[:500]
         
-        self.db.execute("""
+        event = {
+            'timestamp': int(time.time()),
+            'event_type': event_type,
+            'endpoint': endpoint,
+            'method': method,
+            'user_did': user_did,
+            'user_ip': user_ip,
+            'user_agent': user_agent,
+            'request_id': request_id,
+            'request_body': request_body,
+            'response_status': response_status,
+            'response_size': response_size,
+            'query_duration_ms': query_duration_ms,
+            'rows_affected': rows_affected,
+            'error_message': error_message,
+            'extra_data': extra_data
+        }
+        
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._dropped += 1
+            if self._dropped % 100 == 1:
+                print(f"⚠️ Audit queue full, dropped {self._dropped} events so far")
+    
+    def flush(self, timeout: float = 10.0):
+        """Write all queued events now (used at shutdown and by tools/tests)"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            batch = self._drain(AUDIT_BATCH_SIZE, block=False)
+            if not batch:
+                return
+            self._write_batch(batch)
+    
+    def _ensure_writer(self):
+        """Start the background writer thread on first use"""
+        if self._writer and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer and self._writer.is_alive():
+                return
+            self._writer = threading.Thread(target=self._writer_loop, daemon=True, name='audit-writer')
+            self._writer.start()
+    
+    def _writer_loop(self):
+        """Drain the queue forever, writing a batch whenever it fills or the interval passes"""
+        while True:
+            batch = self._drain(AUDIT_BATCH_SIZE, block=True)
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except Exception as e:
+                    print(f"❌ Audit batch write failed ({len(batch)} events): {e}")
+    
+    def _drain(self, max_items: int, block: bool) -> List[Dict[str, Any]]:
+        """Collect up to max_items queued events, waiting up to the flush interval if block"""
+        batch = []
+        deadline = time.time() + AUDIT_FLUSH_INTERVAL
+        while len(batch) < max_items:
+            try:
+                if block:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def _safe_ip_info(self, ip: str) -> Dict[str, Any]:
+        """get_ip_info that never raises, so one bad IP can't sink a batch"""
+        if ip == UNKNOWN_IP:
+            return self._unknown_ip_info()
+        try:
+            return self.get_ip_info(ip)
+        except Exception as e:
+            print(f"IP lookup failed for {ip!r}: {e}")
+            return self._unknown_ip_info()
+    
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        """
+        Resolve geolocation for a batch of events and insert them in one transaction.
+        
+        If the batch insert fails, the rows are retried one by one so a single
+        bad event only loses itself.
+        """
+        for event in batch:
+            if not event['user_ip']:
+                event['user_ip'] = UNKNOWN_IP
+        ip_infos = {ip: self._safe_ip_info(ip) for ip in {event['user_ip'] for event in batch}}
+        
+        rows = []
+        for event in batch:
+            ip_info = ip_infos[event['user_ip']]
+            rows.append((
+                event['timestamp'],
+                event['event_type'],
+                event['endpoint'],
+                event['method'],
+                event['user_did'],
+                event['user_ip'],
+                event['user_agent'],
+                event['request_id'],
+                event['request_body'],
+                event['response_status'],
+                event['response_size'],
+                event['query_duration_ms'],
+                event['rows_affected'],
+                event['error_message'],
+                ip_info['country'],
+                ip_info['city'],
+                ip_info['region'],
+                ip_info['timezone'],
+                ip_info['isp'],
+                ip_info['asn'],
+                1 if ip_info['is_proxy'] else 0,
+                1 if ip_info['is_vpn'] else 0,
+                1 if ip_info['is_tor'] else 0,
+                ip_info['threat_level'],
+                json.dumps(event['extra_data'], default=str) if event['extra_data'] else None
+            ))
+        
+        insert = """
             INSERT INTO audit_log (
                 timestamp, event_type, endpoint, method,
                 user_did, user_ip, user_agent, request_id,
@@ -210,33 +431,18 @@ class AuditLogger:
                 ip_isp, ip_asn, ip_is_proxy, ip_is_vpn, ip_is_tor,
                 ip_threat_level, extra_data
             ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            int(time.time()),
-            event_type,
-            endpoint,
-            method,
-            user_did,
-            user_ip,
-            user_agent,
-            request_id,
-            request_body,
-            response_status,
-            response_size,
-            query_duration_ms,
-            rows_affected,
-            error_message,
-            ip_info['country'],
-            ip_info['city'],
-            ip_info['region'],
-            ip_info['timezone'],
-            ip_info['isp'],
-            ip_info['asn'],
-            1 if ip_info['is_proxy'] else 0,
-            1 if ip_info['is_vpn'] else 0,
-            1 if ip_info['is_tor'] else 0,
-            ip_info['threat_level'],
-            json.dumps(extra_data) if extra_data else None
-        ))
+        """
+        try:
+            self.db.execute_many(insert, rows)
+            return
+        except Exception as e:
+            print(f"⚠️ Audit batch insert failed ({len(rows)} events), retrying individually: {e}")
+        
+        for event, row in zip(batch, rows):
+            try:
+                self.db.execute(insert, row)
+            except Exception as e:
+                print(f"❌ Audit event dropped ({event['event_type']} {event['endpoint']}): {e}")
     
     def get_recent_logs(self, limit: int = 100, event_type: Optional[str] = None) -> list:
         """Get recent audit log entries"""
@@ -474,6 +680,7 @@ if __name__ == '__main__':
         user_agent='Mozilla/5.0',
         request_id='test_123'
     )
+    logger.flush()
     
     print("✅ Test event logged")
     
@@ -5,45 +5,104 @@ import json
 import os
 import time
 import datetime
+import threading
 import requests
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Dict
 from config import Config
 
 BSKY_CACHE = 'http://127.0.0.1:2847'
 
+# Tokens closer than this to expiry are refreshed before use
+TOKEN_EXPIRY_BUFFER = 300
+# Tokens closer than this to expiry are still used, but refreshed in the background
+TOKEN_PROACTIVE_REFRESH = 900
+
+
+class _SessionHolder:
+    """
+    Process-wide in-memory copy of a session cache file.
+    
+    Every AuthManager pointing at the same cache file shares one holder, so the
+    file is read once per process and only written when the session changes.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.data: Optional[Dict] = None
+        self.loaded = False
+        # Incremented on every successful refresh, for single-flight checks
+        self.generation = 0
+        self.refreshing_in_background = False
+    
+    def get(self) -> Dict:
+        """Return the current session data, loading it from disk on first use."""
+        with self.lock:
+            if not self.loaded:
+                self.data = self._load()
+                self.loaded = True
+            return self.data or {}
+    
+    def set(self, data: Optional[Dict]) -> bool:
+        """Replace the session data. Returns False if nothing changed."""
+        with self.lock:
+            if self.loaded and self.data == data:
+                return False
+            self.data = data
+            self.loaded = True
+            return True
+    
+    def _load(self) -> Optional[Dict]:
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error reading token cache: {e}")
+            return None
+
+
+_holders: Dict[str, _SessionHolder] = {}
+_holders_lock = threading.Lock()
+
+
+def _get_session_holder(path: str) -> _SessionHolder:
+    with _holders_lock:
+        holder = _holders.get(path)
+        if holder is None:
+            holder = _holders[path] = _SessionHolder(path)
+        return holder
+
+
 class AuthManager:
     """Manages Bluesky authentication with token caching and multi-server fallback."""
     
     def __init__(self):
         self.session_cache = Config.SESSION_CACHE
+        self._session = _get_session_holder(self.session_cache)
         
     def get_token(self, force_refresh: bool = False) -> Optional[str]:
-        """Get valid authentication token, refreshing if necessary."""
-        pass
+        """
+        Get valid authentication token, refreshing if necessary.
         
-        if force_refresh:
-            pass
-        else:
-            token, expires_at = self._get_cached_token_and_expiry()
-            pass
+        The token is served from memory. Tokens nearing expiry are refreshed in a
+        background thread while still being handed out; expired ones are refreshed
+        inline, with concurrent callers sharing a single refresh.
+        """
+        if not force_refresh:
+            token, expires_epoch = self._get_cached_token_and_expiry_epoch()
             
-            if token and expires_at:
-                try:
-                    from datetime import datetime, timezone
-                    dt = datetime.fromisoformat(expires_at.replace('Z', '+00:00'))
-                    expires_epoch = int(dt.timestamp())
-                    now = int(time.time())
-                    
-                    if now < expires_epoch - 300:
-                        pass
-                        return token
-                    else:
-                        if Config.DEBUG:
-                            print("🔑 Token expired or about to expire, will refresh.")
-                except Exception as e:
-                    if Config.DEBUG:
-                        print(f"🔑 Could not parse expiration, will refresh: {e}")
-            elif token and not expires_at:
+            if token and expires_epoch:
+                now = int(time.time())
+                if now < expires_epoch - TOKEN_EXPIRY_BUFFER:
+                    if now >= expires_epoch - TOKEN_PROACTIVE_REFRESH:
+                        self._refresh_in_background()
+                    return token
+                if Config.DEBUG:
+                    print("🔑 Token expired or about to expire, will refresh.")
+            elif token:
                 if Config.DEBUG:
                     print("🔑 No expiration info in cache, will refresh to ensure validity.")
             else:
@@ -53,7 +112,7 @@ class AuthManager:
         if Config.DEBUG:
             print("🔑 Attempting to refresh token...")
         if self.refresh_token():
-            token, expires_at = self._get_cached_token_and_expiry()
+            token, _ = self._get_cached_token_and_expiry()
             if token:
                 if Config.DEBUG:
                     print("🔑 Refreshed token successfully")
@@ -65,23 +124,56 @@ class AuthManager:
         return None
 
     def _get_cached_token_and_expiry(self) -> tuple:
-        """Return (token, expires_at) from cache, or (None, None) if missing."""
-        import os, json
-        if not os.path.exists(self.session_cache):
-            return None, None
-        try:
-            with open(self.session_cache, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            token = data.get('accessJwt') or data.get('token')
-            expires_at = data.get('accessJwtExpiresAt') or data.get('expiresAt') or data.get('expires_at')
-            return token, expires_at
-        except Exception as e:
-            print(f"Error reading token cache: {e}")
-            return None, None
-
+        """Return (token, expires_at) from the in-memory session, or (None, None) if missing."""
+        data = self._session.get()
+        token = data.get('accessJwt') or data.get('token')
+        expires_at = data.get('accessJwtExpiresAt') or data.get('expiresAt') or data.get('expires_at')
+        return token, expires_at
+    
+    def _get_cached_token_and_expiry_epoch(self) -> Tuple[Optional[str], Optional[int]]:
+        """Return (token, expires_epoch) from the in-memory session."""
+        data = self._session.get()
+        token, expires_at = self._get_cached_token_and_expiry()
+        expires_epoch = data.get('expiresEpoch')
+        if not expires_epoch and expires_at:
+            expires_epoch = self._parse_iso8601_to_epoch(expires_at)
+        return token, int(expires_epoch) if expires_epoch else None
+    
+    def _refresh_in_background(self) -> None:
+        """Start a background refresh unless one is already running."""
+        with self._session.lock:
+            if self._session.refreshing_in_background:
+                return
+            self._session.refreshing_in_background = True
+        
+        def _refresh():
+            try:
+                self.refresh_token()
+            finally:
+                with self._session.lock:
+                    self._session.refreshing_in_background = False
+        
+        threading.Thread(target=_refresh, daemon=True, name='auth-refresh').start()
     
     def refresh_token(self) -> bool:
-        """Refresh authentication token from server."""
+        """
+        Refresh authentication token from server.
+        
+        Single-flight: callers that queue behind an in-progress refresh reuse
+        its result instead of logging in again.
+        """
+        generation = self._session.generation
+        with self._session.refresh_lock:
+            if self._session.generation != generation and self._get_cached_token_and_expiry()[0]:
+                return True
+            refreshed = self._refresh_token_locked()
+            if refreshed:
+                with self._session.lock:
+                    self._session.generation += 1
+            return refreshed
+    
+    def _refresh_token_locked(self) -> bool:
+        """Log in and store a new session. Caller must hold the refresh lock."""
         print("🔄 AuthManager.refresh_token() called")
         
         # Try to get internal account credentials from database first
@@ -203,6 +295,7 @@ class AuthManager:
     
     def clear_cache(self) -> None:
         """Clear cached authentication token."""
+        self._session.set(None)
         try:
             if os.path.exists(self.session_cache):
                 os.remove(self.session_cache)
@@ -216,91 +309,35 @@ class AuthManager:
     
     def get_user_did(self) -> Optional[str]:
         """Get the current user's DID from cache."""
-        if not os.path.exists(self.session_cache):
-            return None
-        try:
-            with open(self.session_cache, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            return data.get('did')
-        except Exception:
-            return None
+        return self._session.get().get('did')
     
     def get_user_handle(self) -> Optional[str]:
         """Get the current user's handle from cache."""
-        if not os.path.exists(self.session_cache):
-            return None
-        try:
-            with open(self.session_cache, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            return data.get('handle')
-        except Exception:
-            return None
+        return self._session.get().get('handle')
+    
+    def get_pds_url(self) -> Optional[str]:
+        """Get the PDS URL of the current session from cache."""
+        return self._session.get().get('pdsUrl')
     
     def _get_cached_token(self) -> Optional[str]:
         """Load and validate cached token."""
-        if Config.DEBUG:
-            print("📂 Checking cached token...")
+        token, expires_epoch = self._get_cached_token_and_expiry_epoch()
         
-        if not os.path.exists(self.session_cache):
+        if not token:
             if Config.DEBUG:
-                print("📂 No session cache file found")
+                print("📂 ❌ No token found in cache")
             return None
-            
-        try:
-            with open(self.session_cache, 'r') as f:
-                data = json.load(f)
-                
-            token = data.get("accessJwt")
-            expires_epoch = data.get("expiresEpoch")
-            expires_at_str = data.get("expiresAt")
-            
-            if Config.DEBUG:
-                print(f"📂 Cache data loaded - token: {'Present' if token else 'Missing'}")
-                print(f"📂 Expires epoch: {expires_epoch}")
-                print(f"📂 Expires at: {expires_at_str}")
-            
-            if not expires_epoch and not expires_at_str:
-                if Config.DEBUG:
-                    print("📂 ⚠️ No expiration data - assuming token is valid")
-                if token:
-                    if Config.DEBUG:
-                        print("📂 ✅ Using token without expiration check")
-                    return token
-                else:
-                    if Config.DEBUG:
-                        print("📂 ❌ No token found in cache")
-                    return None
-            
-            if not expires_epoch and expires_at_str:
-                expires_epoch = self._parse_iso8601_to_epoch(expires_at_str)
-                if Config.DEBUG:
-                    print(f"📂 Parsed expiration epoch: {expires_epoch}")
-                
-            if token and expires_epoch:
-                current_time = int(time.time())
-                buffer_time = current_time + 60
-                
-                if Config.DEBUG:
-                    print(f"📂 Current time: {current_time}")
-                    print(f"📂 Token expires: {expires_epoch}")
-                    print(f"📂 Buffer time: {buffer_time}")
-                
-                if int(expires_epoch) > buffer_time:
-                    if Config.DEBUG:
-                        print("📂 ✅ Cached token is valid")
-                    return token
-                else:
-                    if Config.DEBUG:
-                        print("📂 ❌ Cached token has expired")
-            else:
-                if Config.DEBUG:
-                    print("📂 ❌ Incomplete token data in cache")
-                    
-        except Exception as e:
+        
+        if not expires_epoch:
             if Config.DEBUG:
-                print(f"📂 ❌ Error reading cache: {e}")
-            self.clear_cache()
-            
+                print("📂 ⚠️ No expiration data - assuming token is valid")
+            return token
+        
+        if expires_epoch > int(time.time()) + 60:
+            return token
+        
+        if Config.DEBUG:
+            print("📂 ❌ Cached token has expired")
         return None
     
     def _authenticate_with_server(self, server_url: str, handle: str = None, password: str = None) -> bool:
@@ -395,6 +432,10 @@ class AuthManager:
         if refresh_jwt:
             cache_data["refreshJwt"] = refresh_jwt
         
+        if not self._session.set(cache_data):
+            print("💾 Session unchanged, skipping write")
+            return
+        
         print(f"💾 Cache data prepared: expires_epoch={expires_epoch}")
         
         temp_file = self.session_cache + ".tmp"
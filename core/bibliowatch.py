@@ -23,10 +23,12 @@ from typing import Dict, List, Set
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from ops.quests import QuestManager
+from ops.quest_registry import quest_registry
 from ops.quest_hooks import process_quest_reply
 from ops.conditions import evaluate_conditions
 from ops.command_executor import execute_quest_commands
 from ops.triggers import get_trigger_handler, BibliohoseTrigger
+from ops.quest_jobs import enqueue_job, record_key, start_workers
 
 BSKY_CACHE = 'http://127.0.0.1:2847'
 
@@ -50,37 +52,37 @@ class BibliohoseMonitor:
         self.quest_triggers: Dict[int, BibliohoseTrigger] = {}  # quest_id -> trigger handler
         self.monitored_lists: Set[str] = set()  # List rkeys we care about
         self._load_biblio_quests()
+        quest_registry.subscribe(self._load_biblio_quests)
     
-    def _load_biblio_quests(self):
+    def _load_biblio_quests(self, snapshot=None):
         """Load quests that use bibliohose trigger type."""
-        all_quests = self.quest_manager.get_enabled_quests()
+        snapshot = snapshot or quest_registry.snapshot()
         
-        self.biblio_quests = []
-        self.quest_triggers = {}
-        self.monitored_lists = set()
+        biblio_quests = []
+        quest_triggers = {}
+        monitored_lists = set()
         
-        for quest in all_quests:
-            # Only load quests with bibliohose trigger type
-            trigger_type = quest.get('trigger_type', 'bsky_reply')
-            
-            if trigger_type != 'bibliohose':
-                continue
-            
+        for compiled in snapshot.by_trigger.get('bibliohose', ()):
+            quest = compiled.as_dict()
             try:
                 # Create trigger handler for this quest
                 trigger = get_trigger_handler('bibliohose', quest)
                 
-                self.biblio_quests.append(quest)
-                self.quest_triggers[quest['id']] = trigger
+                biblio_quests.append(quest)
+                quest_triggers[quest['id']] = trigger
                 
                 # Track which lists we need to monitor
                 monitored = trigger.get_monitored_lists()
-                self.monitored_lists.update(monitored)
+                monitored_lists.update(monitored)
                 
             except Exception as e:
                 print(f"⚠️  Error loading bibliohose quest '{quest.get('title')}': {e}")
                 continue
         
+        self.quest_triggers = quest_triggers
+        self.monitored_lists = monitored_lists
+        self.biblio_quests = biblio_quests
+        
         if self.verbose:
             print(f"📚 Loaded {len(self.biblio_quests)} bibliohose quests")
             if self.monitored_lists:
@@ -141,11 +143,8 @@ class BibliohoseMonitor:
                 if self.verbose:
                     print(f"   ✅ Quest '{quest['title']}' triggered!")
                 
-                # Get evaluation context from trigger
-                eval_context = trigger.get_evaluation_context(record)
-                
-                # Trigger quest for the reader
-                self._trigger_quest_for_user(quest, trigger, eval_context)
+                # Queue the quest for the reader
+                self._queue_quest(quest, record)
     
     def _process_book_record(self, record: Dict, author_did: str, author_handle: str):
         """Process a biblio.bond book/reading record."""
@@ -169,67 +168,80 @@ class BibliohoseMonitor:
                 if self.verbose:
                     print(f"   ✅ Quest '{quest['title']}' triggered!")
                 
-                # Get evaluation context from trigger
-                eval_context = trigger.get_evaluation_context(record)
-                
-                # Trigger quest for the book reader
-                self._trigger_quest_for_user(quest, trigger, eval_context)
+                # Queue the quest for the book reader
+                self._queue_quest(quest, record)
     
-    def _trigger_quest_for_user(self, quest: Dict, trigger: BibliohoseTrigger, 
-                                  eval_context: Dict):
+    def _queue_quest(self, quest: Dict, record: Dict):
         """
-        Trigger a specific quest using the provided evaluation context.
+        Queue a quest job for a record that activated it.
         
-        Args:
-            quest: Quest configuration dict
-            trigger: The trigger handler instance
-            eval_context: Evaluation context from trigger.get_evaluation_context()
+        The quest workers (ops.quest_jobs) rebuild the evaluation context
+        from the record and run trigger_quest_for_context.
         """
+        key = f"biblio:{quest['title']}:{record_key(record)}"
         try:
-            # Get user info from context
-            user_handle = eval_context.get('user_handle', 'unknown')
-            
-            # Evaluate conditions
-            conditions = quest.get('conditions', [])
-            condition_operator = quest.get('condition_operator', 'AND')
-            
-            condition_result = evaluate_conditions(
-                conditions,
-                condition_operator,
-                eval_context,
-                quest
-            )
-            
-            if not condition_result['success']:
-                if self.verbose:
-                    print(f"   ⏭️  Conditions not met for @{user_handle}")
-                return
-            
-            # Execute commands
-            custom_commands = condition_result.get('custom_commands', [])
-            common_commands = quest.get('commands', [])
-            all_commands = custom_commands + common_commands
+            enqueue_job('biblio', quest['title'], key, {
+                'quest_title': quest['title'],
+                'record': record,
+            })
+        except Exception as e:
+            print(f"❌ Failed to queue quest '{quest['title']}': {e}")
 
-            replies = eval_context.get('replies', [])
 
-            command_result = execute_quest_commands(
-                all_commands,
-                replies,
-                quest,
-                verbose=self.verbose
-            )
-            
-            if command_result['success']:
-                print(f"✅ Quest '{quest['title']}' completed for @{user_handle}")
-                if self.verbose:
-                    print(f"   Commands: {', '.join(command_result['commands_executed'])}")
+def trigger_quest_for_context(quest: Dict, eval_context: Dict, verbose: bool = False):
+    """
+    Evaluate a bibliohose quest for one evaluation context and run its commands.
+    
+    Condition errors propagate so the quest job is retried; command errors
+    are logged, since commands may already have partly run.
+    
+    Args:
+        quest: Quest configuration dict
+        eval_context: Evaluation context from trigger.get_evaluation_context()
+    """
+    user_handle = eval_context.get('user_handle', 'unknown')
+    
+    # Evaluate conditions
+    conditions = quest.get('conditions', [])
+    condition_operator = quest.get('condition_operator', 'AND')
+    
+    condition_result = evaluate_conditions(
+        conditions,
+        condition_operator,
+        eval_context,
+        quest
+    )
+    
+    if not condition_result['success']:
+        if verbose:
+            print(f"   ⏭️  Conditions not met for @{user_handle}")
+        return
+    
+    try:
+        # Execute commands
+        custom_commands = condition_result.get('custom_commands', [])
+        common_commands = quest.get('commands', [])
+        all_commands = custom_commands + common_commands
+
+        replies = eval_context.get('replies', [])
+
+        command_result = execute_quest_commands(
+            all_commands,
+            replies,
+            quest,
+            verbose=verbose
+        )
         
-        except Exception as e:
-            user_handle = eval_context.get('user_handle', 'unknown')
-            print(f"❌ Error processing quest '{quest['title']}' for @{user_handle}: {e}")
-            if self.verbose:
-                import traceback
-                traceback.print_exc()
+        if command_result['success']:
+            print(f"✅ Quest '{quest['title']}' completed for @{user_handle}")
+            if verbose:
+                print(f"   Commands: {', '.join(command_result['commands_executed'])}")
+    
+    except Exception as e:
+        print(f"❌ Error processing quest '{quest['title']}' for @{user_handle}: {e}")
+        if verbose:
+            import traceback
+            traceback.print_exc()
 
 
 def monitor_firehose_simulation(bibliohose: BibliohoseMonitor):
@@ -360,6 +372,7 @@ def main():
     print("="*60)
     
     bibliohose = BibliohoseMonitor(verbose=args.verbose)
+    start_workers(args.verbose)
     
     if not bibliohose.biblio_quests:
         print("⚠️  No biblio.bond quests found!")
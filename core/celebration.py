@@ -23,16 +23,18 @@ import math
 import sys
 import time
 import random
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Tuple
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from atproto import Client
 from core.database import DatabaseManager
-from core.encryption import decrypt_password
+from core.worker_sessions import worker_sessions
 from core.log import get_logger, set_verbose
 
 log = get_logger('celebration')
@@ -46,7 +48,11 @@ MAX_CHEERS_PER_USER_PER_WEEK = 50
 
 # Processing
 PROCESS_INTERVAL_SECONDS = 30
-LIKE_DELAY_SECONDS = 2
+LIKE_DELAY_SECONDS = 2          # Minimum gap between two likes from the same worker
+CLAIM_BATCH_SIZE = 20           # Queue items claimed per cycle
+CLAIM_TIMEOUT_MINUTES = 15      # 'processing' items older than this lost their processor
+MAX_CONCURRENT_WORKERS = 8      # Worker accounts liking at the same time
+REASON_CACHE_SECONDS = 300
 
 
 def queue_celebration(
@@ -146,6 +152,42 @@ class CelebrationProcessor:
             'errors': 0,
             'start_time': datetime.now()
         }
+        self._stats_lock = threading.Lock()
+        self._reasons: Dict[str, Dict] = {}
+        self._reasons_loaded_at = 0.0
+        self._ensure_pacing_table()
+    
+    def _ensure_pacing_table(self):
+        """Create the per-worker pacing table and the queue claim column if they don't exist."""
+        try:
+            db = DatabaseManager()
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS cheer_worker_pacing (
+                    cheerful_did TEXT PRIMARY KEY,
+                    next_available_at DOUBLE PRECISION NOT NULL
+                )
+            """)
+            db.execute("ALTER TABLE cheer_queue ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMP")
+        except Exception as e:
+            log.error(f"Creating cheer_worker_pacing: {e}")
+    
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+    
+    def _get_reasons(self) -> Dict[str, Dict]:
+        """Return cheer_reasons keyed by reason_key, reloading every REASON_CACHE_SECONDS."""
+        if self._reasons and time.time() - self._reasons_loaded_at < REASON_CACHE_SECONDS:
+            return self._reasons
+        
+        try:
+            db = DatabaseManager()
+            cursor = db.execute("SELECT reason_key, cheerful_percent, enabled FROM cheer_reasons")
+            self._reasons = {row['reason_key']: dict(row) for row in cursor.fetchall()}
+            self._reasons_loaded_at = time.time()
+        except Exception as e:
+            log.error(f"Loading reasons: {e}")
+        return self._reasons
     
     def _load_workers(self) -> int:
         """Load all cheerful workers with credentials from user_roles + user_credentials."""
@@ -189,18 +231,11 @@ class CelebrationProcessor:
             return worker['client']
         
         try:
-            password = decrypt_password(worker['passhash'])
-            if not password:
+            client = worker_sessions.atproto_client(
+                worker['did'], worker['handle'], worker.get('pds_url'), worker['passhash']
+            )
+            if not client:
                 return None
-            
-            pds_url = worker.get('pds_url')
-            if 'reverie.house' in (pds_url or ''):
-                pds_url = 'https://reverie.house'
-            elif not pds_url:
-                pds_url = 'https://bsky.social'
-            
-            client = Client(base_url=pds_url)
-            client.login(worker['handle'], password)
             worker['client'] = client
             return client
             
@@ -208,12 +243,15 @@ class CelebrationProcessor:
             log.warning(f"Auth failed for {worker['handle']}: {e}")
             return None
     
-    def _select_workers(self, cheerful_percent: int, target_did: str) -> List[Dict]:
+    def _select_workers(self, cheerful_percent: int, target_did: str,
+                        planned: Optional[Dict[Tuple[str, str], int]] = None) -> List[Dict]:
         """
         Select workers based on percentage, skipping rate-limited ones.
         Formula: max(1, ceil(total * percent / 100))
         
         If a worker is rate-limited for this target, skip them and try another.
+        Likes already planned in the current batch (planned, keyed by
+        (worker did, target did)) count towards the limit.
         Also skips the target user themselves (no self-liking).
         """
         total = len(self.workers)
@@ -227,12 +265,17 @@ class CelebrationProcessor:
             count = max(1, math.ceil(total * cheerful_percent / 100))
         count = min(count, total)  # Can't exceed total
         
-        # Get rate-limited worker DIDs for this target
+        # Likes each worker has given this target today, logged or planned this batch
         db = DatabaseManager()
-        rate_limited = self._get_rate_limited_workers(db, target_did)
+        cheers_today = self._get_cheers_today(db, target_did)
+        planned = planned or {}
         
         # Filter out rate-limited workers AND the target themselves (no self-liking)
-        available = [w for w in self.workers if w['did'] not in rate_limited and w['did'] != target_did]
+        available = [
+            w for w in self.workers
+            if w['did'] != target_did
+            and cheers_today.get(w['did'], 0) + planned.get((w['did'], target_did), 0) < MAX_CHEERS_PER_USER_PER_DAY
+        ]
         
         if not available:
             log.debug(f"All workers rate-limited or target is self for {target_did[:20]}")
@@ -241,11 +284,10 @@ class CelebrationProcessor:
         # Select from available workers
         return random.sample(available, min(count, len(available)))
     
-    def _get_rate_limited_workers(self, db: DatabaseManager, target_did: str) -> Set[str]:
-        """Get set of worker DIDs that have hit their daily limit for this target."""
+    def _get_cheers_today(self, db: DatabaseManager, target_did: str) -> Dict[str, int]:
+        """Count how many times each worker has cheered this target today."""
         today = datetime.now().date()
         
-        # Count how many times each worker has cheered this target today
         cursor = db.execute("""
             SELECT cheerful_did, COUNT(*) as count
             FROM cheer_log
@@ -253,10 +295,9 @@ class CelebrationProcessor:
               AND success = TRUE
               AND liked_at::date = %s
             GROUP BY cheerful_did
-            HAVING COUNT(*) >= %s
-        """, (target_did, today, MAX_CHEERS_PER_USER_PER_DAY))
+        """, (target_did, today))
         
-        return {row['cheerful_did'] for row in cursor.fetchall()}
+        return {row['cheerful_did']: row['count'] for row in cursor.fetchall()}
     
     def _perform_like(self, worker: Dict, post_uri: str, post_cid: str,
                       reason_key: str, target_did: str, target_handle: str) -> bool:
@@ -283,7 +324,7 @@ class CelebrationProcessor:
                 VALUES (%s, %s, %s, %s, %s, %s, %s)
             """, (reason_key, target_did, target_handle, post_uri, worker['did'], worker['handle'], True))
             
-            self.stats['likes_sent'] += 1
+            self._count('likes_sent')
             log.info(f"💖 @{worker['handle']} → @{target_handle or target_did[:15]} ({reason_key})")
             return True
             
@@ -299,7 +340,7 @@ class CelebrationProcessor:
             except Exception:
                 pass
             
-            self.stats['errors'] += 1
+            self._count('errors')
             log.warning(f"Like failed: {e}")
             return False
     
@@ -317,82 +358,175 @@ class CelebrationProcessor:
         except Exception:
             return None
     
-    def _process_queue_item(self, item: Dict) -> bool:
-        """Process a single queue item."""
-        db = DatabaseManager()
+    def _plan_queue_item(self, item: Dict, planned: Dict[Tuple[str, str], int]) -> Optional[List[Dict]]:
+        """
+        Decide which workers should like a queue item.
+        
+        planned holds likes already assigned earlier in the batch, which
+        cheer_log doesn't show yet.
         
+        Returns the selected workers (possibly empty, meaning nothing to do),
+        or None if the item cannot be processed.
+        """
+        # For any_post reason, 30% chance we skip entirely (adds natural variability)
+        if item['reason_key'] == 'any_post' and random.random() < 0.30:
+            log.debug(f"Skipping any_post for {item.get('target_handle', item['target_did'][:15])} (30% skip)")
+            return []  # Marked as processed, not retried
+        
+        reason = self._get_reasons().get(item['reason_key'])
+        if not reason:
+            return None
+        
+        # Select workers (passes target_did for rate limit filtering, excludes self-liking)
+        workers = self._select_workers(reason['cheerful_percent'], item['target_did'], planned)
+        if not workers:
+            log.debug(f"No available workers for {item.get('target_handle', item['target_did'][:15])}")
+        return workers  # No workers available (all rate-limited or self) - mark as done, don't retry
+    
+    def _load_pacing(self, db: DatabaseManager, worker_dids: List[str]) -> Dict[str, float]:
+        """Load persisted next-available times for workers."""
         try:
-            # For any_post reason, 30% chance we skip entirely (adds natural variability)
-            if item['reason_key'] == 'any_post' and random.random() < 0.30:
-                log.debug(f"Skipping any_post for {item.get('target_handle', item['target_did'][:15])} (30% skip)")
-                return True  # Return True so it's marked as processed, not retried
-            
-            # Get reason config
             cursor = db.execute("""
-                SELECT cheerful_percent FROM cheer_reasons WHERE reason_key = %s
-            """, (item['reason_key'],))
-            reason = cursor.fetchone()
-            
-            if not reason:
-                return False
-            
-            # Select workers (passes target_did for rate limit filtering, excludes self-liking)
-            workers = self._select_workers(reason['cheerful_percent'], item['target_did'])
-            if not workers:
-                log.debug(f"No available workers for {item.get('target_handle', item['target_did'][:15])}")
-                return True  # No workers available (all rate-limited or self) - mark as done, don't retry
-            
-            # Perform likes
-            success_count = 0
-            for worker in workers:
-                if self._perform_like(
-                    worker, item['post_uri'], item.get('post_cid'),
-                    item['reason_key'], item['target_did'],
-                    item.get('target_handle') or ''
-                ):
-                    success_count += 1
-                    time.sleep(LIKE_DELAY_SECONDS)
-            
-            # Update user rate limits if any likes succeeded
-            if success_count > 0:
-                _update_user_rate_limit(db, item['target_did'])
-            
-            return success_count > 0
-            
+                SELECT cheerful_did, next_available_at FROM cheer_worker_pacing
+                WHERE cheerful_did = ANY(%s)
+            """, (worker_dids,))
+            return {row['cheerful_did']: row['next_available_at'] for row in cursor.fetchall()}
         except Exception as e:
-            log.error(f"Processing item: {e}")
-            return False
+            log.warning(f"Loading worker pacing: {e}")
+            return {}
     
-    def _process_queue(self):
-        """Process pending queue items."""
+    def _save_pacing(self, worker_did: str, next_available_at: float):
+        """Persist a worker's next-available time."""
+        try:
+            db = DatabaseManager()
+            db.execute("""
+                INSERT INTO cheer_worker_pacing (cheerful_did, next_available_at)
+                VALUES (%s, %s)
+                ON CONFLICT (cheerful_did) DO UPDATE SET next_available_at = EXCLUDED.next_available_at
+            """, (worker_did, next_available_at))
+        except Exception as e:
+            log.warning(f"Saving pacing for {worker_did[:20]}: {e}")
+    
+    def _run_worker_likes(self, worker: Dict, likes: List[Dict], next_available_at: float) -> List[Tuple[int, bool]]:
+        """
+        Perform one worker's likes in order, at most one every LIKE_DELAY_SECONDS.
+        
+        Runs on the dispatch pool; different workers run concurrently.
+        Returns (queue item id, success) pairs.
+        """
+        results = []
+        for item in likes:
+            wait = next_available_at - time.time()
+            if wait > 0:
+                time.sleep(min(wait, LIKE_DELAY_SECONDS))
+            
+            success = self._perform_like(
+                worker, item['post_uri'], item.get('post_cid'),
+                item['reason_key'], item['target_did'],
+                item.get('target_handle') or ''
+            )
+            if success:
+                next_available_at = time.time() + LIKE_DELAY_SECONDS
+            results.append((item['id'], success))
+        
+        self._save_pacing(worker['did'], next_available_at)
+        return results
+    
+    def _claim_items(self, db: DatabaseManager, limit: int) -> List[Dict]:
+        """Claim pending queue items, skipping rows another processor has locked."""
+        with db.transaction() as conn:
+            cursor = conn.cursor()
+            # Items left 'processing' by a processor that died go back to the queue
+            cursor.execute("""
+                UPDATE cheer_queue SET status = 'pending', claimed_at = NULL
+                WHERE status = 'processing'
+                  AND (claimed_at IS NULL OR claimed_at < CURRENT_TIMESTAMP - %s * INTERVAL '1 minute')
+            """, (CLAIM_TIMEOUT_MINUTES,))
+            if cursor.rowcount:
+                log.warning(f"Requeued {cursor.rowcount} stale celebration item(s)")
+            cursor.execute("""
+                UPDATE cheer_queue SET status = 'processing', claimed_at = CURRENT_TIMESTAMP
+                WHERE id IN (
+                    SELECT id FROM cheer_queue
+                    WHERE status = 'pending'
+                    ORDER BY queued_at ASC
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING *
+            """, (limit,))
+            items = [dict(row) for row in cursor.fetchall()]
+        return sorted(items, key=lambda item: item['queued_at'])
+    
+    def _process_queue(self) -> int:
+        """
+        Claim and process a batch of pending queue items.
+        
+        Likes are grouped by worker account and each worker's group runs on the
+        dispatch pool, so different workers like concurrently while each one
+        keeps its own pacing. Returns the number of items claimed.
+        """
         total_workers = self._load_workers()
         
         if total_workers == 0:
-            return
+            return 0
         
         db = DatabaseManager()
-        
-        # Get pending items
-        cursor = db.execute("""
-            SELECT * FROM cheer_queue
-            WHERE status = 'pending'
-            ORDER BY queued_at ASC
-            LIMIT 5
-        """)
-        items = cursor.fetchall()
+        items = self._claim_items(db, CLAIM_BATCH_SIZE)
         
         if not items:
-            return
+            return 0
         
         log.debug(f"Processing {len(items)} items with {total_workers} workers")
         
+        outcomes: Dict[int, Optional[bool]] = {}   # item id -> None (no likes needed) / any like succeeded
+        by_worker: Dict[str, Tuple[Dict, List[Dict]]] = {}
+        planned: Dict[Tuple[str, str], int] = {}   # (worker did, target did) -> likes assigned this batch
+        
         for item in items:
-            # Mark as processing
-            db.execute("UPDATE cheer_queue SET status = 'processing' WHERE id = %s", (item['id'],))
+            try:
+                workers = self._plan_queue_item(item, planned)
+            except Exception as e:
+                log.error(f"Processing item: {e}")
+                workers = None
             
-            success = self._process_queue_item(dict(item))
+            if workers is None:
+                outcomes[item['id']] = False
+                continue
+            
+            outcomes[item['id']] = None if not workers else False
+            for worker in workers:
+                by_worker.setdefault(worker['did'], (worker, []))[1].append(item)
+                key = (worker['did'], item['target_did'])
+                planned[key] = planned.get(key, 0) + 1
+        
+        if by_worker:
+            pacing = self._load_pacing(db, list(by_worker.keys()))
+            with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_WORKERS, len(by_worker)),
+                                    thread_name_prefix='cheer-') as pool:
+                futures = [
+                    pool.submit(self._run_worker_likes, worker, likes, pacing.get(did, 0.0))
+                    for did, (worker, likes) in by_worker.items()
+                ]
+                for future in futures:
+                    try:
+                        for item_id, success in future.result():
+                            if success:
+                                outcomes[item_id] = True
+                    except Exception as e:
+                        log.error(f"Worker dispatch: {e}")
+        
+        for item in items:
+            outcome = outcomes.get(item['id'])
+            success = outcome is None or outcome
+            
+            # Update user rate limits if any likes succeeded
+            if outcome:
+                try:
+                    _update_user_rate_limit(db, item['target_did'])
+                except Exception as e:
+                    log.error(f"Updating rate limit: {e}")
             
-            # Update status
             new_status = 'completed' if success else 'failed'
             db.execute("""
                 UPDATE cheer_queue 
@@ -400,7 +534,9 @@ class CelebrationProcessor:
                 WHERE id = %s
             """, (new_status, item['id']))
             
-            self.stats['processed'] += 1
+            self._count('processed')
+        
+        return len(items)
     
     def run(self):
         """Main loop."""
@@ -409,8 +545,10 @@ class CelebrationProcessor:
         
         while self.running:
             try:
-                self._process_queue()
-                time.sleep(PROCESS_INTERVAL_SECONDS)
+                claimed = self._process_queue()
+                # A full batch means there is likely more waiting - go again straight away
+                if claimed < CLAIM_BATCH_SIZE:
+                    time.sleep(PROCESS_INTERVAL_SECONDS)
             except KeyboardInterrupt:
                 log.info(f"Stopped - {self.stats}")
                 break
@@ -17,7 +17,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 import requests
 from atproto import Client
 from core.database import DatabaseManager
-from core.encryption import decrypt_password
+from core.worker_sessions import worker_sessions
 
 # AppView cache proxy (local)
 BSKY_CACHE = 'http://127.0.0.1:2847'
@@ -64,16 +64,7 @@ class CheerfulWorker:
         if self._client:
             return self._client
         try:
-            app_password = decrypt_password(self.passhash)
-            if not app_password:
-                return None
-            pds_url = self.pds_url
-            if 'reverie.house' in (pds_url or ''):
-                pds_url = 'https://reverie.house'
-            elif not pds_url:
-                pds_url = 'https://bsky.social'
-            self._client = Client(base_url=pds_url)
-            self._client.login(self.handle, app_password)
+            self._client = worker_sessions.atproto_client(self.did, self.handle, self.pds_url, self.passhash)
             return self._client
         except Exception as e:
             log.warning(f"auth failed @{self.handle}: {e}")
@@ -2,13 +2,23 @@
 """
 Courier Service - Clockwork post sender
 Runs as a background service to deliver scheduled Bluesky posts
+
+Pending posts' due times are kept in a heap and the service sleeps until the
+earliest one. A trigger on the courier table sends NOTIFY courier_changed
+whenever a post is scheduled or rescheduled, which wakes the service early,
+so posts go out on time rather than on the next poll. Due posts are sent
+concurrently across users, one at a time per user.
 """
 
+import heapq
+import select
+import threading
 import time
 import json
 import sys
 import os
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Add parent directory to path
@@ -16,17 +26,47 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.database import DatabaseManager
 from core.encryption import decrypt_password
+from core.worker_sessions import worker_sessions
 
 BSKY_CACHE = 'http://127.0.0.1:2847'
 
+NOTIFY_CHANNEL = 'courier_changed'
+COURIER_WORKERS = 8             # users whose posts are sent at the same time
+USER_POST_GAP_SECONDS = 2       # between consecutive posts of one user
+BUSY_RECHECK_SECONDS = 1        # re-check soon when a due post waits on a busy user
+
+COURIER_NOTIFY_SCHEMA = f"""
+    CREATE OR REPLACE FUNCTION courier_notify() RETURNS trigger AS $$
+    BEGIN
+        IF NEW.status = 'pending' THEN
+            PERFORM pg_notify('{NOTIFY_CHANNEL}', NEW.id::text || ':' || COALESCE(NEW.scheduled_for, 0)::text);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+
+def ensure_notify_trigger(db):
+    """Install the trigger that announces scheduled posts (idempotent)."""
+    existing = db.fetch_one("SELECT 1 AS found FROM pg_trigger WHERE tgname = 'courier_notify'")
+    if existing:
+        return
+    db.execute(COURIER_NOTIFY_SCHEMA)
+    db.execute("""
+        CREATE TRIGGER courier_notify
+        AFTER INSERT OR UPDATE OF scheduled_for, status ON courier
+        FOR EACH ROW EXECUTE FUNCTION courier_notify()
+    """)
+
 
-def get_pending_posts():
-    """Get all posts that are ready to be sent"""
+def get_pending_posts(limit=50):
+    """Get posts that are ready to be sent, earliest first"""
     db = DatabaseManager()
     now = int(time.time())
     
     cursor = db.execute('''
-        SELECT c.id, c.did, c.post_text_encrypted, c.post_images,
+        SELECT c.id, c.did, c.post_text_encrypted, c.post_images, c.scheduled_for,
                c.is_lore, c.lore_type, c.canon_id,
                d.handle, uc.app_password_hash, uc.pds_url
         FROM courier c
@@ -36,8 +76,8 @@ def get_pending_posts():
           AND c.scheduled_for <= ?
           AND uc.app_password_hash IS NOT NULL
         ORDER BY c.scheduled_for ASC
-        LIMIT 50
-    ''', (now,))
+        LIMIT ?
+    ''', (now, limit))
     
     return cursor.fetchall()
 
@@ -105,35 +145,21 @@ def send_post(post):
         # Decrypt post text
         post_text = decrypt_password(post['post_text_encrypted'])
         
-        # Decrypt app password (it's encrypted in the database)
-        app_password = decrypt_password(post['app_password_hash'])
-        
-        # Determine PDS URL
-        pds_url = post['pds_url'] if post.get('pds_url') else 'https://bsky.social'
-        
         print(f"📤 [COURIER] Sending post {post['id']} for @{post['handle']}")
         print(f"   Text: {post_text[:50]}...")
-        print(f"   PDS: {pds_url}")
         
-        # Create Bluesky session
-        session_response = requests.post(
-            f'{pds_url}/xrpc/com.atproto.server.createSession',
-            json={
-                'identifier': post['handle'],
-                'password': app_password
-            },
-            timeout=10
+        # Shared Bluesky session (app password is only used if it can't be refreshed)
+        session, status = worker_sessions.get(
+            post['did'], post['handle'], post.get('pds_url'), post['app_password_hash']
         )
         
-        if session_response.status_code != 200:
-            raise Exception(f"Failed to create session: {session_response.status_code}")
+        if not session:
+            raise Exception(f"Failed to create session: {401 if status == 'invalid' else status}")
         
-        session_data = session_response.json()
-        access_jwt = session_data.get('accessJwt')
-        user_did = session_data.get('did')
-        
-        if not access_jwt:
-            raise Exception("No access token in session response")
+        pds_url = session['pds_url']
+        access_jwt = session['access_jwt']
+        user_did = session['did']
+        print(f"   PDS: {pds_url}")
         
         # Detect facets in text
         facets = detect_facets_in_text(post_text)
@@ -229,6 +255,9 @@ def send_post(post):
         )
         
         if post_response.status_code != 200:
+            if post_response.status_code == 401:
+                # Revoked session - the next attempt signs in again
+                worker_sessions.invalidate(user_did)
             raise Exception(f"Failed to create post: {post_response.status_code} - {post_response.text}")
         
         result = post_response.json()
@@ -335,63 +364,184 @@ def create_lore_entry(post_uri, post_cid, pds_url, access_jwt, user_did):
         raise Exception(f"Lore record creation failed: {response.status_code}")
 
 
-def run_courier_service(interval=60):
-    """Main service loop - check for pending posts every interval seconds"""
-    print("📬 [COURIER] Service starting...")
-    print(f"   Check interval: {interval} seconds")
+class CourierScheduler:
+    """
+    Sends scheduled posts when they fall due.
+    
+    The heap holds (scheduled_for, id) hints; the database stays the source
+    of truth, so a cancelled or rescheduled post whose old hint surfaces is
+    simply not returned by get_pending_posts.
+    """
+    
+    def __init__(self, interval=60, workers=COURIER_WORKERS):
+        self.interval = interval            # full resync / fallback poll
+        self.db = DatabaseManager()
+        self._heap = []
+        self._lock = threading.Lock()
+        self._in_flight = set()             # post ids being sent
+        self._busy_dids = set()             # users with a send running
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='courier')
+        self._synced_at = 0.0
     
-    iteration = 0
+    # ------------------------------------------------------------------
+    # Schedule
+    # ------------------------------------------------------------------
     
-    while True:
+    def resync(self):
+        """Rebuild the heap from every pending post."""
+        rows = self.db.fetch_all("SELECT id, scheduled_for FROM courier WHERE status = 'pending'")
+        heap = [(int(row['scheduled_for'] or 0), row['id']) for row in rows or []]
+        heapq.heapify(heap)
+        with self._lock:
+            self._heap = heap
+        self._synced_at = time.time()
+        print(f"📬 [COURIER] {len(heap)} pending post(s) scheduled")
+    
+    def schedule(self, post_id, scheduled_for):
+        with self._lock:
+            heapq.heappush(self._heap, (int(scheduled_for), post_id))
+    
+    def _next_wait(self):
+        """Seconds until the earliest post is due (capped at the resync interval)."""
+        now = time.time()
+        wait = self.interval - (now - self._synced_at)
+        with self._lock:
+            if self._heap:
+                wait = min(wait, self._heap[0][0] - now)
+        return max(0.0, wait)
+    
+    # ------------------------------------------------------------------
+    # Sending
+    # ------------------------------------------------------------------
+    
+    def dispatch_due(self):
+        """Hand every due post to a per-user sender."""
+        now = int(time.time())
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                heapq.heappop(self._heap)
+        
+        posts = get_pending_posts(limit=500)
+        by_did = {}
+        waiting = []
+        with self._lock:
+            for post in posts:
+                if post['id'] in self._in_flight:
+                    continue
+                if post['did'] in self._busy_dids:
+                    waiting.append(post)
+                    continue
+                by_did.setdefault(post['did'], []).append(post)
+            for did, user_posts in by_did.items():
+                self._busy_dids.add(did)
+                self._in_flight.update(p['id'] for p in user_posts)
+            # Posts queued behind a busy user are retried shortly
+            for post in waiting:
+                heapq.heappush(self._heap, (now + BUSY_RECHECK_SECONDS, post['id']))
+        
+        if by_did:
+            print(f"📬 [COURIER] Sending {sum(len(p) for p in by_did.values())} post(s) for {len(by_did)} user(s)")
+        for did, user_posts in by_did.items():
+            self._executor.submit(self._send_user_posts, did, user_posts)
+    
+    def _send_user_posts(self, did, posts):
+        """Send one user's due posts in order."""
         try:
-            iteration += 1
-            print(f"\n{'='*60}")
-            print(f"📬 [COURIER] Check iteration #{iteration} - {datetime.now().isoformat()}")
-            print(f"{'='*60}")
-            
-            # Get pending posts
-            pending = get_pending_posts()
-            
-            if pending:
-                print(f"📬 [COURIER] Found {len(pending)} posts ready to send")
-                
-                for idx, post in enumerate(pending, 1):
-                    print(f"\n--- Post {idx}/{len(pending)} ---")
-                    print(f"   ID: {post['id']}")
-                    print(f"   User: @{post['handle']}")
-                    print(f"   Scheduled: {post.get('scheduled_for')}")
-                    print(f"   Is lore: {post.get('is_lore')}")
-                    
+            for idx, post in enumerate(posts):
+                if idx:
+                    time.sleep(USER_POST_GAP_SECONDS)
+                print(f"   ID: {post['id']} | User: @{post['handle']} | Scheduled: {post.get('scheduled_for')} | Is lore: {post.get('is_lore')}")
+                try:
                     send_post(post)
-                    
-                    # Small delay between posts to avoid rate limiting
-                    if idx < len(pending):
-                        print(f"⏱️  [COURIER] Waiting 2 seconds before next post...")
-                        time.sleep(2)
-            else:
-                print(f"📬 [COURIER] No pending posts at this time")
+                finally:
+                    with self._lock:
+                        self._in_flight.discard(post['id'])
+        finally:
+            with self._lock:
+                self._busy_dids.discard(did)
+    
+    # ------------------------------------------------------------------
+    # Main loop
+    # ------------------------------------------------------------------
+    
+    def run(self):
+        """Run forever, listening for schedule changes when possible."""
+        try:
+            ensure_notify_trigger(self.db)
+        except Exception as e:
+            print(f"⚠️ [COURIER] Could not install notify trigger: {e}")
+        
+        while True:
+            conn = None
+            try:
+                conn = self.db._get_connection()
+                conn.autocommit = True
+                conn.cursor().execute(f"LISTEN {NOTIFY_CHANNEL}")
+                print(f"👂 [COURIER] Listening on {NOTIFY_CHANNEL}")
+                self.resync()
+                self._loop(conn)
+            except KeyboardInterrupt:
+                print("\n📬 [COURIER] Service stopped by user")
+                return
+            except Exception as e:
+                print(f"❌ [COURIER] Service error: {e}")
+                import traceback
+                traceback.print_exc()
+            finally:
+                if conn is not None:
+                    try:
+                        self.db.pg_pool.putconn(conn, close=True)
+                    except Exception:
+                        pass
             
-            # Wait before next check
-            print(f"\n⏱️  [COURIER] Sleeping for {interval} seconds until next check...")
-            print(f"{'='*60}\n")
-            time.sleep(interval)
+            # Listener down: poll until it can be re-established
+            print(f"⏱️  [COURIER] Polling for {self.interval} seconds before reconnecting...")
+            deadline = time.time() + self.interval
+            try:
+                self.resync()
+                while time.time() < deadline:
+                    self.dispatch_due()
+                    time.sleep(max(0.0, min(self._next_wait(), deadline - time.time())))
+            except KeyboardInterrupt:
+                print("\n📬 [COURIER] Service stopped by user")
+                return
+            except Exception as e:
+                print(f"❌ [COURIER] Poll error: {e}")
+                time.sleep(self.interval)
+    
+    def _loop(self, conn):
+        while True:
+            self.dispatch_due()
             
-        except KeyboardInterrupt:
-            print("\n📬 [COURIER] Service stopped by user")
-            break
-        except Exception as e:
-            print(f"❌ [COURIER] Service error: {e}")
-            import traceback
-            traceback.print_exc()
-            print(f"⏱️  [COURIER] Waiting {interval} seconds before retry...")
-            time.sleep(interval)
+            if time.time() - self._synced_at >= self.interval:
+                self.resync()
+                continue
+            
+            readable, _, _ = select.select([conn], [], [], self._next_wait())
+            if not readable:
+                continue
+            conn.poll()
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                try:
+                    post_id, scheduled_for = notify.payload.split(':', 1)
+                    self.schedule(int(post_id), int(scheduled_for))
+                except ValueError:
+                    self.resync()
+
+
+def run_courier_service(interval=60):
+    """Main service loop - send posts as they fall due, resyncing every interval seconds"""
+    print("📬 [COURIER] Service starting...")
+    print(f"   Resync interval: {interval} seconds")
+    CourierScheduler(interval=interval).run()
 
 
 if __name__ == '__main__':
     # Check for interval argument
     import argparse
     parser = argparse.ArgumentParser(description='Courier service for scheduled Bluesky posts')
-    parser.add_argument('--interval', type=int, default=60, help='Check interval in seconds')
+    parser.add_argument('--interval', type=int, default=60, help='Resync (and fallback poll) interval in seconds')
     args = parser.parse_args()
     
     run_courier_service(interval=args.interval)
@@ -11,7 +11,7 @@ All events (arrivals, orders, souvenirs, reactions, etc.) go into the events tab
 
 import time
 import logging
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, Tuple
 from core.database import DatabaseManager
 from core.utils import number_to_words
 
@@ -23,6 +23,43 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Columns returned by timeline queries (explicit rather than e.* so new or
+# wide columns don't ride along on every page)
+EVENT_COLUMNS = """
+    e.id, e.did, e.event, e.type, e.key, e.uri, e.url, e.epoch, e.created_at,
+    e.quantities, e.color_source, e.color_intensity, e.reaction_to, e.others
+"""
+
+# Timelines page newest-first on (COALESCE(epoch, 0), id), served by the
+# idx_events_*_epoch_id indexes: sql/init/03_schema_corrected.sql creates them
+# for new databases, sql/events_timeline_indexes.sql adds them to existing ones.
+# epoch can be NULL; ordering, cursors and the keyset condition all treat it
+# as 0, so a page ending on such an event still leads to the next one.
+MAX_EVENTS_PAGE = 500
+
+
+def keyset_order(alias: str = 'e') -> str:
+    """ORDER BY expression matching keyset_clause and the timeline indexes."""
+    return f'COALESCE({alias}.epoch, 0) DESC, {alias}.id DESC'
+
+
+def encode_event_cursor(event: Dict) -> str:
+    """Cursor pointing just past an event in (epoch, id) DESC order."""
+    return f"{event['epoch'] or 0}:{event['id']}"
+
+
+def parse_event_cursor(cursor: str) -> Tuple[int, int]:
+    """Parse an 'epoch:id' cursor. Raises ValueError if malformed."""
+    epoch, _, event_id = cursor.partition(':')
+    return int(epoch), int(event_id)
+
+
+def keyset_clause(before: Optional[Tuple[int, int]], alias: str = 'e') -> Tuple[str, list]:
+    """SQL condition (with leading AND) selecting events older than a cursor."""
+    if not before:
+        return '', []
+    return f' AND (COALESCE({alias}.epoch, 0), {alias}.id) < (%s, %s)', [before[0], before[1]]
+
 
 class EventsManager:
     """
@@ -287,14 +324,19 @@ class EventsManager:
             return None
     
     def get_events(self, limit: int = 100, event_type: Optional[str] = None, 
-                   did: Optional[str] = None) -> list[Dict]:
+                   did: Optional[str] = None, before: Optional[Tuple[int, int]] = None) -> list[Dict]:
         """
-        Fetch events from the database.
+        Fetch events from the database, newest first.
+        
+        Pages are keyset-paginated on (epoch, id): pass the cursor of the last
+        event of a page (see encode_event_cursor) as before to get the next one,
+        so deep pages cost the same as the first.
         
         Args:
-            limit: Maximum number of events to return
+            limit: Maximum number of events to return (capped at MAX_EVENTS_PAGE)
             event_type: Filter by event type (optional)
             did: Filter by dreamer DID (optional)
+            before: (epoch, id) cursor; only events older than it are returned
             
         Returns:
             List of event dictionaries
@@ -302,8 +344,8 @@ class EventsManager:
         try:
             with self.db.get_connection() as conn:
                 with conn.cursor() as cursor:
-                    query = '''
-                        SELECT e.*, d.name, d.handle
+                    query = f'''
+                        SELECT {EVENT_COLUMNS}, d.name, d.handle
                         FROM events e 
                         LEFT JOIN dreamers d ON e.did = d.did 
                         WHERE 1=1
@@ -318,8 +360,12 @@ class EventsManager:
                         query += ' AND e.did = %s'
                         params.append(did)
                     
-                    query += ' ORDER BY e.epoch DESC LIMIT %s'
-                    params.append(limit)
+                    clause, clause_params = keyset_clause(before)
+                    query += clause
+                    params.extend(clause_params)
+                    
+                    query += f' ORDER BY {keyset_order()} LIMIT %s'
+                    params.append(max(1, min(limit, MAX_EVENTS_PAGE)))
                     
                     cursor.execute(query, params)
                     rows = cursor.fetchall()
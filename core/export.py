@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Database Export
+Incremental export of the public game tables behind /api/database/all.
+
+Two ways to read the tables without materialising them in memory:
+- stream_tables(): every table through server-side cursors inside one
+  read-only REPEATABLE READ transaction, yielded row batch by row batch
+- fetch_page(): one keyset-paginated page of a single table, with an
+  opaque cursor for the next page
+
+Both accept updated_since (unix epoch) to only return rows changed since a
+previous export. Tables with no change timestamp (books, chapters) are
+always returned in full and reported as non-incremental.
+"""
+
+import base64
+import json
+from typing import Dict, Iterator, List, Optional, Tuple
+from core.database import DatabaseManager
+
+
+EXPORT_BATCH_SIZE = 500
+PAGE_SIZE_DEFAULT = 500
+PAGE_SIZE_MAX = 5000
+
+UNKNOWN_OTHER = {'name': 'unknown', 'handle': '', 'avatar': '', 'color_hex': '#888888'}
+
+# select: base query (no WHERE/ORDER); key: keyset columns as (sql expr, row field);
+# changed: sql expression of the row's last-change epoch, or None if untracked
+EXPORT_TABLES: Dict[str, Dict] = {
+    'dreamers': {
+        'select': """
+            SELECT
+                d.did, d.handle, d.name, d.display_name, d.description,
+                d.avatar, d.banner, d.followers_count, d.follows_count, d.posts_count,
+                d.server, d.arrival, d.created_at, d.updated_at, d.heading, d.heading_changed_at,
+                d.alts, d.color_hex, d.phanera, d.status, d.designation,
+                d.dream_pair_did, d.dream_pair_since, d.collab_partner_did, d.collab_partner_since,
+                s.entropy, s.oblivion, s.liberty,
+                s.authority, s.receptive, s.skeptic, s.octant
+            FROM dreamers d
+            LEFT JOIN spectrum s ON d.did = s.did
+        """,
+        'key': [('d.did', 'did')],
+        'changed': "GREATEST(COALESCE(d.updated_at, 0), COALESCE(s.updated_at, 0))",
+    },
+    'spectrum': {
+        'select': "SELECT * FROM spectrum",
+        'key': [('did', 'did')],
+        'changed': "updated_at",
+    },
+    'kindred': {
+        'select': "SELECT * FROM kindred",
+        'key': [('did_a', 'did_a'), ('did_b', 'did_b')],
+        'changed': "GREATEST(discovered_epoch, COALESCE(paired_epoch, 0))",
+    },
+    'awards': {
+        'select': "SELECT * FROM awards",
+        'key': [('did', 'did'), ('souvenir_key', 'souvenir_key')],
+        'changed': "earned_epoch",
+    },
+    'events': {
+        'select': """
+            SELECT
+                c.*,
+                d.name,
+                d.avatar,
+                d.color_hex,
+                s.octant,
+                s.origin_octant
+            FROM events c
+            LEFT JOIN dreamers d ON c.did = d.did
+            LEFT JOIN spectrum s ON c.did = s.did
+        """,
+        'key': [('c.id', 'id')],
+        'changed': "COALESCE(c.created_at, c.epoch)",
+    },
+    'souvenirs': {
+        'select': """
+            SELECT
+                s.*,
+                (SELECT COUNT(*) FROM awards a WHERE a.souvenir_key = s.key) AS keepers
+            FROM souvenirs s
+        """,
+        'key': [('s.key', 'key')],
+        'changed': "s.created_at",
+    },
+    'books': {
+        'select': "SELECT * FROM books",
+        'key': [('id', 'id')],
+        'changed': None,
+    },
+    'chapters': {
+        'select': "SELECT * FROM chapters",
+        'key': [('id', 'id')],
+        'changed': None,
+    },
+    'world': {
+        'select': "SELECT * FROM world",
+        'key': [('key', 'key')],
+        'changed': "updated_at",
+    },
+    'spectrum_snapshots': {
+        # Summary only - full snapshots come from /api/snapshots/<id>
+        'select': """
+            SELECT id, epoch, operation, total_dreamers, created_at, notes, kind, snapshot_data
+            FROM spectrum_snapshots
+        """,
+        'key': [('id', 'id')],
+        'changed': "created_at",
+    },
+    'quests': {
+        'select': "SELECT * FROM quests",
+        'key': [('id', 'id')],
+        'changed': "updated_at",
+    },
+}
+
+
+def _build_query(table: str, updated_since: Optional[int] = None,
+                 after: Optional[List] = None, limit: Optional[int] = None) -> Tuple[str, Tuple]:
+    spec = EXPORT_TABLES[table]
+    key_exprs = [expr for expr, _ in spec['key']]
+    conditions = []
+    params: List = []
+
+    if updated_since is not None and spec['changed']:
+        conditions.append(f"{spec['changed']} >= %s")
+        params.append(updated_since)
+
+    if after is not None:
+        placeholders = ', '.join(['%s'] * len(key_exprs))
+        conditions.append(f"({', '.join(key_exprs)}) > ({placeholders})")
+        params.extend(after)
+
+    query = spec['select']
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY " + ", ".join(key_exprs)
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+
+    return query, tuple(params)
+
+
+def _resolve_others(cursor, rows: List[Dict]):
+    """Attach others_data (dreamer summaries for others[]) to a batch of events."""
+    other_dids = {did for row in rows for did in (row.get('others') or []) if did}
+    lookup = {}
+    if other_dids:
+        cursor.execute("""
+            SELECT did, name, handle, avatar, color_hex FROM dreamers WHERE did = ANY(%s)
+        """, (list(other_dids),))
+        for other in cursor.fetchall():
+            lookup[other['did']] = {
+                'did': other['did'],
+                'name': other['name'] or 'unknown',
+                'handle': other['handle'] or '',
+                'avatar': other['avatar'] or '',
+                'color_hex': other['color_hex'] or '#888888'
+            }
+
+    for row in rows:
+        row['others_data'] = [
+            lookup.get(did) or dict(UNKNOWN_OTHER, did=did)
+            for did in (row.get('others') or []) if did
+        ]
+
+
+def _summarize_snapshots(rows: List[Dict]):
+    """Replace snapshot_data with the statistics the database viewer lists."""
+    for row in rows:
+        try:
+            data = json.loads(row['snapshot_data']) if row['snapshot_data'] else {}
+        except (TypeError, ValueError):
+            data = {}
+        stats = data.get('statistics', {})
+        row['dreamer_count'] = data.get('total_dreamers', row['total_dreamers'] or 0)
+        row['dreamers_with_spectrum'] = data.get('dreamers_with_spectrum', 0)
+        row['total_distance_from_origin'] = stats.get('total_distance_from_origin', 0)
+        row['avg_distance_from_origin'] = stats.get('avg_distance_from_origin', 0)
+        row['total_distance_traveled'] = stats.get('total_distance_traveled', 0)
+        del row['snapshot_data']
+
+
+def _finish_batch(table: str, cursor, rows: List[Dict]) -> List[Dict]:
+    rows = [dict(row) for row in rows]
+    if table == 'events':
+        _resolve_others(cursor, rows)
+    elif table == 'spectrum_snapshots':
+        _summarize_snapshots(rows)
+    return rows
+
+
+def encode_cursor(row: Dict, table: str) -> str:
+    """Opaque page cursor holding the keyset values of the last row."""
+    values = [row[field] for _, field in EXPORT_TABLES[table]['key']]
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(token: str) -> List:
+    values = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def stream_tables(db: DatabaseManager, tables: Optional[List[str]] = None,
+                  updated_since: Optional[int] = None) -> Iterator[Tuple[str, str, object]]:
+    """
+    Yield the export as ('table', name, incremental), ('rows', name, [rows...])
+    and ('error', name, message) items.
+
+    All tables are read in one read-only REPEATABLE READ transaction so the
+    export is a consistent snapshot, each through a server-side cursor that
+    only holds EXPORT_BATCH_SIZE rows in memory at a time. A failing table is
+    rolled back to a savepoint and reported without aborting the rest.
+    """
+    tables = tables or list(EXPORT_TABLES)
+
+    with db.get_connection() as conn:
+        helper = conn.cursor()
+        helper.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+
+        for table in tables:
+            incremental = updated_since is not None and EXPORT_TABLES[table]['changed'] is not None
+            yield 'table', table, incremental
+
+            helper.execute("SAVEPOINT export_table")
+            try:
+                query, params = _build_query(table, updated_since)
+                cursor = conn.cursor(name=f"export_{table}")
+                cursor.itersize = EXPORT_BATCH_SIZE
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+                    if not rows:
+                        break
+                    yield 'rows', table, _finish_batch(table, helper, rows)
+                cursor.close()
+                helper.execute("RELEASE SAVEPOINT export_table")
+            except Exception as e:
+                print(f"Error exporting {table}: {e}")
+                helper.execute("ROLLBACK TO SAVEPOINT export_table")
+                yield 'error', table, str(e)
+
+
+def fetch_page(db: DatabaseManager, table: str, after: Optional[str] = None,
+               limit: int = PAGE_SIZE_DEFAULT, updated_since: Optional[int] = None) -> Dict:
+    """
+    Fetch one keyset-paginated page of a table.
+
+    Returns:
+        {'table', 'rows', 'next_cursor', 'incremental'}; next_cursor is None
+        on the last page
+    """
+    limit = max(1, min(limit, PAGE_SIZE_MAX))
+    after_values = decode_cursor(after) if after else None
+    query, params = _build_query(table, updated_since, after_values, limit)
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        raw = cursor.fetchall()
+        next_cursor = encode_cursor(raw[-1], table) if len(raw) == limit else None
+        rows = _finish_batch(table, cursor, raw)
+
+    return {
+        'table': table,
+        'rows': rows,
+        'next_cursor': next_cursor,
+        'incremental': updated_since is not None and EXPORT_TABLES[table]['changed'] is not None,
+    }
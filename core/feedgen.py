@@ -25,6 +25,7 @@ from typing import Optional, List, Dict, Any
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from core.database import DatabaseManager
+from core.follow_graph import follow_graph
 from core.auth import AuthManager
 from core.network import NetworkClient
 
@@ -486,10 +487,18 @@ class FeedGenerator:
 
     def _get_viewer_follows(self, viewer_did: str) -> set:
         """
-        Fetch all DIDs that viewer_did follows via bsky-cache.
-        Paginates up to 2 000 follows to keep latency bounded.
+        Fetch all DIDs that viewer_did follows.
+        Dreamers' follows come from the local follow graph; anyone else is
+        paged from bsky-cache, up to 2 000 follows to keep latency bounded.
         Returns a set of DID strings (empty on error).
         """
+        try:
+            indexed = follow_graph.follows_of(viewer_did)
+            if indexed is not None:
+                return indexed
+        except Exception as e:
+            print(f"[quiet-mindscape] ⚠️  follow graph error: {e}")
+
         follows = set()
         cursor = None
         max_pages = 20  # 100 per page × 20 = 2 000
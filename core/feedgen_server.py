@@ -22,6 +22,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from core.feedgen import FeedGenerator
 from core.rate_limiter import PersistentRateLimiter
+from core.signing_keys import signing_keys, VerifiedTokenCache
 
 # ── AT Protocol JWT verification ─────────────────────────────────────────────
 try:
@@ -34,9 +35,17 @@ try:
 
     _did_cache = _SafeDidCache()
     _id_resolver = IdResolver(cache=_did_cache)
+    _verified_tokens = VerifiedTokenCache()
 
     def _get_signing_key(did: str, force_refresh: bool) -> str:
-        return _id_resolver.did.resolve_atproto_key(did, force_refresh=force_refresh)
+        # Shared with other processes through signing_keys, so a restart doesn't
+        # re-resolve every viewer's DID document. verify_jwt retries with
+        # force_refresh=True when the signature doesn't match a cached key.
+        return signing_keys.get(
+            did,
+            lambda: _id_resolver.did.resolve_atproto_key(did, force_refresh=True),
+            force_refresh=force_refresh,
+        )
 
     def verify_feed_token(auth_header: str) -> str | None:
         """
@@ -46,11 +55,15 @@ try:
         if not auth_header or not auth_header.startswith('Bearer '):
             return None
         token = auth_header[len('Bearer '):]
+        cached = _verified_tokens.get(token)
+        if cached is not None:
+            return cached['iss']
         try:
             payload = verify_jwt(token, _get_signing_key, own_did='did:web:reverie.house')
-            return payload.iss
         except Exception:
             return None
+        _verified_tokens.put(token, {'iss': payload.iss}, payload.exp)
+        return payload.iss
 
 except ImportError:
     def verify_feed_token(auth_header: str) -> str | None:  # type: ignore[misc]
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Follow Graph
+Local index of follow edges for accounts the Jetstream hub tracks.
+
+follow_edges holds one row per app.bsky.graph.follow record (actor follows
+subject, keyed by the record's rkey so deletes can be applied). The hub's
+KindredHandler writes create/delete events as they arrive, and each tracked
+actor's existing follows are backfilled once from listRecords, then again
+every BACKFILL_MAX_AGE to heal anything missed while the hub was down.
+
+Deletes also leave a tombstone in follow_deletions, so a backfill whose
+listRecords snapshot was taken before an unfollow doesn't put the edge back.
+
+An actor's outgoing follows are only answered from the index once its
+backfill has finished (follow_index_actors). Lookups return None otherwise,
+and callers fall back to paging getFollows.
+"""
+
+import threading
+import time
+from typing import Iterable, Optional, Set
+
+import requests
+
+from core.database import DatabaseManager
+
+
+# AppView cache proxy (local)
+BSKY_CACHE = 'http://127.0.0.1:2847'
+
+FOLLOW_COLLECTION = 'app.bsky.graph.follow'
+BACKFILL_MAX_AGE = 7 * 24 * 60 * 60
+BACKFILL_MAX_PAGES = 200            # 100 records per page
+BACKFILL_PAUSE_SECONDS = 0.5        # between actors, to go easy on the cache
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def _ensure_schema(db: DatabaseManager):
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS follow_edges (
+                actor TEXT NOT NULL,
+                rkey TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                created_at INTEGER NOT NULL,
+                PRIMARY KEY (actor, rkey)
+            )
+        """)
+        db.execute("CREATE INDEX IF NOT EXISTS idx_follow_edges_actor_subject ON follow_edges (actor, subject)")
+        db.execute("CREATE INDEX IF NOT EXISTS idx_follow_edges_subject ON follow_edges (subject)")
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS follow_index_actors (
+                did TEXT PRIMARY KEY,
+                backfilled_at INTEGER NOT NULL
+            )
+        """)
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS follow_deletions (
+                actor TEXT NOT NULL,
+                rkey TEXT NOT NULL,
+                deleted_at INTEGER NOT NULL,
+                PRIMARY KEY (actor, rkey)
+            )
+        """)
+        _schema_ready = True
+
+
+class FollowGraph:
+    """Follow edges of tracked actors, answered from the local index."""
+
+    def __init__(self, db: Optional[DatabaseManager] = None):
+        self._db = db
+        self._backfill_lock = threading.Lock()
+        self._backfill_thread: Optional[threading.Thread] = None
+        self._backfill_queue: Set[str] = set()
+
+    def _get_db(self) -> DatabaseManager:
+        if self._db is None:
+            self._db = DatabaseManager()
+        _ensure_schema(self._db)
+        return self._db
+
+    # ------------------------------------------------------------------
+    # Jetstream events
+    # ------------------------------------------------------------------
+
+    def record_follow(self, actor: str, subject: str, rkey: str):
+        """Apply a follow create event."""
+        self._get_db().execute("""
+            INSERT INTO follow_edges (actor, rkey, subject, created_at)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (actor, rkey) DO UPDATE SET subject = EXCLUDED.subject
+        """, (actor, rkey, subject, int(time.time())))
+
+    def remove_follow(self, actor: str, rkey: str) -> Optional[str]:
+        """Apply a follow delete event. Returns the unfollowed subject, if known."""
+        with self._get_db().transaction() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "DELETE FROM follow_edges WHERE actor = %s AND rkey = %s RETURNING subject",
+                (actor, rkey)
+            )
+            row = cur.fetchone()
+            cur.execute("""
+                INSERT INTO follow_deletions (actor, rkey, deleted_at) VALUES (%s, %s, %s)
+                ON CONFLICT (actor, rkey) DO UPDATE SET deleted_at = EXCLUDED.deleted_at
+            """, (actor, rkey, int(time.time())))
+        return row['subject'] if row else None
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def is_indexed(self, actor: str) -> bool:
+        row = self._get_db().fetch_one("SELECT 1 AS found FROM follow_index_actors WHERE did = %s", (actor,))
+        return bool(row)
+
+    def follows(self, actor: str, subject: str) -> Optional[bool]:
+        """Whether actor follows subject, or None if actor isn't indexed."""
+        row = self._get_db().fetch_one("""
+            SELECT EXISTS (SELECT 1 FROM follow_index_actors WHERE did = %s) AS indexed,
+                   EXISTS (SELECT 1 FROM follow_edges WHERE actor = %s AND subject = %s) AS follows
+        """, (actor, actor, subject))
+        if not row or not row['indexed']:
+            return None
+        return bool(row['follows'])
+
+    def is_mutual(self, did_a: str, did_b: str) -> Optional[bool]:
+        """Whether two actors follow each other, or None if either isn't indexed."""
+        a_follows = self.follows(did_a, did_b)
+        if a_follows is None:
+            return None
+        b_follows = self.follows(did_b, did_a)
+        if b_follows is None:
+            return None
+        return a_follows and b_follows
+
+    def follows_of(self, actor: str) -> Optional[Set[str]]:
+        """DIDs actor follows, or None if actor isn't indexed."""
+        if not self.is_indexed(actor):
+            return None
+        rows = self._get_db().fetch_all("SELECT DISTINCT subject FROM follow_edges WHERE actor = %s", (actor,))
+        return {row['subject'] for row in rows or []}
+
+    def followers_of(self, subject: str) -> Set[str]:
+        """Indexed actors that follow subject."""
+        rows = self._get_db().fetch_all("""
+            SELECT DISTINCT e.actor FROM follow_edges e
+            JOIN follow_index_actors a ON a.did = e.actor
+            WHERE e.subject = %s
+        """, (subject,))
+        return {row['actor'] for row in rows or []}
+
+    # ------------------------------------------------------------------
+    # Backfill
+    # ------------------------------------------------------------------
+
+    def backfill(self, actor: str) -> bool:
+        """Load an actor's existing follow records. Returns True on success."""
+        started = int(time.time())
+        edges = {}
+        cursor = None
+        for _ in range(BACKFILL_MAX_PAGES):
+            params = {'repo': actor, 'collection': FOLLOW_COLLECTION, 'limit': 100}
+            if cursor:
+                params['cursor'] = cursor
+            try:
+                response = requests.get(f'{BSKY_CACHE}/xrpc/com.atproto.repo.listRecords', params=params, timeout=10)
+            except requests.exceptions.RequestException as e:
+                print(f"⚠️ Follow backfill failed for {actor[:20]}...: {e}")
+                return False
+            if response.status_code != 200:
+                print(f"⚠️ Follow backfill failed for {actor[:20]}...: {response.status_code}")
+                return False
+            data = response.json()
+            for record in data.get('records', []):
+                subject = (record.get('value') or {}).get('subject')
+                rkey = (record.get('uri') or '').rsplit('/', 1)[-1]
+                if subject and rkey:
+                    edges[rkey] = subject
+            cursor = data.get('cursor')
+            if not cursor or not data.get('records'):
+                break
+        else:
+            print(f"⚠️ Follow backfill for {actor[:20]}... stopped at {len(edges)} follows")
+            return False
+
+        db = self._get_db()
+        with db.transaction() as conn:
+            cur = conn.cursor()
+            # Edges written by live events since the backfill started are kept
+            cur.execute("""
+                DELETE FROM follow_edges
+                WHERE actor = %s AND created_at < %s AND NOT (rkey = ANY(%s::text[]))
+            """, (actor, started, list(edges)))
+            if edges:
+                # ...and so are deletes: the snapshot may predate them
+                cur.execute("""
+                    INSERT INTO follow_edges (actor, rkey, subject, created_at)
+                    SELECT %s, t.rkey, t.subject, %s FROM unnest(%s::text[], %s::text[]) AS t(rkey, subject)
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM follow_deletions d
+                        WHERE d.actor = %s AND d.rkey = t.rkey AND d.deleted_at >= %s
+                    )
+                    ON CONFLICT (actor, rkey) DO NOTHING
+                """, (actor, started, list(edges), list(edges.values()), actor, started))
+            # Older tombstones are already reflected in the snapshot
+            cur.execute(
+                "DELETE FROM follow_deletions WHERE actor = %s AND deleted_at < %s",
+                (actor, started)
+            )
+            cur.execute("""
+                INSERT INTO follow_index_actors (did, backfilled_at) VALUES (%s, %s)
+                ON CONFLICT (did) DO UPDATE SET backfilled_at = EXCLUDED.backfilled_at
+            """, (actor, started))
+        return True
+
+    def ensure_indexed(self, actors: Iterable[str]):
+        """
+        Backfill, in the background, tracked actors that were never indexed
+        or whose backfill is older than BACKFILL_MAX_AGE. Actors no longer
+        tracked are dropped from the index, since their edges would go stale.
+        """
+        actors = set(actors)
+        db = self._get_db()
+        rows = db.fetch_all("SELECT did, backfilled_at FROM follow_index_actors")
+        indexed = {row['did']: row['backfilled_at'] for row in rows or []}
+
+        untracked = [did for did in indexed if did not in actors]
+        if untracked:
+            db.execute("DELETE FROM follow_index_actors WHERE did = ANY(%s)", (untracked,))
+            db.execute("DELETE FROM follow_edges WHERE actor = ANY(%s)", (untracked,))
+            db.execute("DELETE FROM follow_deletions WHERE actor = ANY(%s)", (untracked,))
+
+        cutoff = time.time() - BACKFILL_MAX_AGE
+        pending = {did for did in actors if indexed.get(did, 0) < cutoff}
+        if not pending:
+            return
+        with self._backfill_lock:
+            self._backfill_queue |= pending
+            if self._backfill_thread is None or not self._backfill_thread.is_alive():
+                self._backfill_thread = threading.Thread(
+                    target=self._backfill_loop, name='follow-backfill', daemon=True
+                )
+                self._backfill_thread.start()
+
+    def _backfill_loop(self):
+        done = 0
+        while True:
+            with self._backfill_lock:
+                if not self._backfill_queue:
+                    self._backfill_thread = None
+                    break
+                actor = self._backfill_queue.pop()
+            try:
+                if self.backfill(actor):
+                    done += 1
+            except Exception as e:
+                print(f"❌ Follow backfill error for {actor[:20]}...: {e}")
+            time.sleep(BACKFILL_PAUSE_SECONDS)
+        if done:
+            print(f"🕸️ Follow graph: backfilled {done} actor(s)")
+
+
+follow_graph = FollowGraph()
@@ -252,12 +252,18 @@ class KindredHandler(EventHandler):
     3. If mutual, create a kindred relationship
     
     This replaces the old quest-based add_kindred command.
+    
+    Every follow create/delete from a tracked dreamer is also written to the
+    local follow graph (core.follow_graph), so follow checks are indexed
+    lookups instead of paging getFollows. Graph writes run on a single
+    thread so a follow and a quick unfollow apply in order.
     """
     
     def __init__(self, verbose: bool = False):
         super().__init__('kindred', verbose)
         self.tracked_dids: Set[str] = set()
         self.dreamer_by_did: Dict[str, Dict] = {}
+        self.graph_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='kindred-graph-')
         self._load_dreamers()
     
     def _load_dreamers(self):
@@ -275,6 +281,13 @@ class KindredHandler(EventHandler):
         except Exception as e:
             print(f"[kindred] ❌ Error loading dreamers: {e}")
             self.tracked_dids = set()
+            return
+        
+        try:
+            from core.follow_graph import follow_graph
+            follow_graph.ensure_indexed(self.tracked_dids)
+        except Exception as e:
+            print(f"[kindred] ⚠️ Error scheduling follow graph backfill: {e}")
     
     def get_wanted_dids(self) -> Set[str]:
         return self.tracked_dids
@@ -310,19 +323,8 @@ class KindredHandler(EventHandler):
             # Build the AT-URI for this follow record
             follow_uri = f"at://{follower_did}/app.bsky.graph.follow/{rkey}" if rkey else None
             
-            # Only care if they're following another dreamer
-            if subject_did not in self.tracked_dids:
-                return
-            
-            self.stats['events_processed'] += 1
-            
-            follower_handle = self.dreamer_by_did.get(follower_did, {}).get('handle', follower_did[:20])
-            subject_handle = self.dreamer_by_did.get(subject_did, {}).get('handle', subject_did[:20])
-            
-            self.log(f"👀 @{follower_handle} followed @{subject_handle}")
-            
-            # Check for mutual follow in background (pass the follow URI in case this completes a mutual)
-            self.executor.submit(self._check_mutual_follow, follower_did, subject_did, follow_uri)
+            # Record the edge (any subject), then check kindred if it's a dreamer
+            self.graph_executor.submit(self._on_follow_created, follower_did, subject_did, rkey, follow_uri)
         
         elif operation == 'delete':
             # Someone we track unfollowed someone
@@ -331,14 +333,83 @@ class KindredHandler(EventHandler):
             follower_handle = self.dreamer_by_did.get(follower_did, {}).get('handle', follower_did[:20])
             self.log(f"👋 @{follower_handle} unfollowed someone - checking kindred...")
             
-            # Re-check all kindred relationships for this user
-            self.executor.submit(self._verify_user_kindred, follower_did)
+            # Drop the edge, then re-check all kindred relationships for this user
+            self.graph_executor.submit(self._on_follow_deleted, follower_did, commit.get('rkey', ''))
+    
+    def _on_follow_created(self, follower_did: str, subject_did: str, rkey: str, follow_uri: str = None):
+        """Graph thread: index a new follow and check for a mutual with another dreamer."""
+        try:
+            from core.follow_graph import follow_graph
+            if subject_did and rkey:
+                follow_graph.record_follow(follower_did, subject_did, rkey)
+        except Exception as e:
+            self.log(f"   ⚠️ Error recording follow: {e}")
+        
+        # Only care if they're following another dreamer
+        if subject_did not in self.tracked_dids:
+            return
+        
+        self.stats['events_processed'] += 1
+        
+        follower_handle = self.dreamer_by_did.get(follower_did, {}).get('handle', follower_did[:20])
+        subject_handle = self.dreamer_by_did.get(subject_did, {}).get('handle', subject_did[:20])
+        
+        self.log(f"👀 @{follower_handle} followed @{subject_handle}")
+        
+        # Check for mutual follow in background (pass the follow URI in case this completes a mutual)
+        self.executor.submit(self._check_mutual_follow, follower_did, subject_did, follow_uri)
+    
+    def _on_follow_deleted(self, follower_did: str, rkey: str):
+        """Graph thread: remove an unfollowed edge and re-verify the user's kindred."""
+        try:
+            from core.follow_graph import follow_graph
+            if rkey:
+                follow_graph.remove_follow(follower_did, rkey)
+        except Exception as e:
+            self.log(f"   ⚠️ Error removing follow: {e}")
+        
+        self.executor.submit(self._verify_user_kindred, follower_did)
+    
+    def _fetch_follows(self, actor_did: str) -> Optional[Set[str]]:
+        """DIDs actor follows, from the follow graph or (if not indexed) getFollows. None on API error."""
+        import requests
+        from core.follow_graph import follow_graph
+        
+        try:
+            indexed = follow_graph.follows_of(actor_did)
+            if indexed is not None:
+                return indexed
+        except Exception as e:
+            self.log(f"   ⚠️ Follow graph lookup failed: {e}")
+        
+        follows: Set[str] = set()
+        url = f"{BSKY_CACHE}/xrpc/app.bsky.graph.getFollows"
+        params = {'actor': actor_did, 'limit': 100}
+        api_cursor = None
+        
+        for _ in range(10):  # Max 10 pages
+            if api_cursor:
+                params['cursor'] = api_cursor
+            
+            response = requests.get(url, params=params, timeout=10)
+            if response.status_code != 200:
+                self.log(f"   ⚠️ API error checking follows: {response.status_code}")
+                return None
+            
+            data = response.json()
+            for follow in data.get('follows', []):
+                follows.add(follow.get('did', ''))
+            
+            api_cursor = data.get('cursor')
+            if not api_cursor:
+                break
+        
+        return follows
     
     def _verify_user_kindred(self, user_did: str):
         """Background: verify all kindred relationships for a user after an unfollow."""
         try:
             from core.database import DatabaseManager
-            import requests
             import time
             
             db = DatabaseManager()
@@ -355,27 +426,9 @@ class KindredHandler(EventHandler):
                 return
             
             # Get who this user currently follows
-            user_follows: set = set()
-            url = f"{BSKY_CACHE}/xrpc/app.bsky.graph.getFollows"
-            params = {'actor': user_did, 'limit': 100}
-            api_cursor = None
-            
-            for _ in range(10):  # Max 10 pages
-                if api_cursor:
-                    params['cursor'] = api_cursor
-                
-                response = requests.get(url, params=params, timeout=10)
-                if response.status_code != 200:
-                    self.log(f"   ⚠️ API error checking follows: {response.status_code}")
-                    return
-                
-                data = response.json()
-                for follow in data.get('follows', []):
-                    user_follows.add(follow.get('did', ''))
-                
-                api_cursor = data.get('cursor')
-                if not api_cursor:
-                    break
+            user_follows = self._fetch_follows(user_did)
+            if user_follows is None:
+                return
             
             # Check each kindred relationship
             for row in kindred_rows:
@@ -399,6 +452,11 @@ class KindredHandler(EventHandler):
         """Check if actor follows target."""
         try:
             import requests
+            from core.follow_graph import follow_graph
+            
+            indexed = follow_graph.follows(actor_did, target_did)
+            if indexed is not None:
+                return indexed
             
             url = f"{BSKY_CACHE}/xrpc/app.bsky.graph.getFollows"
             params = {'actor': actor_did, 'limit': 100}
@@ -485,40 +543,45 @@ class KindredHandler(EventHandler):
             subject_name = subject_info.get('name') or subject_handle
             
             # Check if subject follows back the follower
-            # Use getFollows API to check if subject follows follower
-            url = f"{BSKY_CACHE}/xrpc/app.bsky.graph.getFollows"
-            params = {
-                'actor': subject_did,
-                'limit': 100
-            }
-            
-            # Paginate through follows to find if subject follows follower
-            cursor = None
-            mutual = False
-            
-            while True:
-                if cursor:
-                    params['cursor'] = cursor
+            # Indexed lookup when the subject's follows are in the follow graph
+            from core.follow_graph import follow_graph
+            mutual = follow_graph.follows(subject_did, follower_did)
+            
+            if mutual is None:
+                # Use getFollows API to check if subject follows follower
+                url = f"{BSKY_CACHE}/xrpc/app.bsky.graph.getFollows"
+                params = {
+                    'actor': subject_did,
+                    'limit': 100
+                }
                 
-                response = requests.get(url, params=params, timeout=10)
-                if response.status_code != 200:
-                    self.log(f"   ⚠️ API error checking follows: {response.status_code}")
-                    return
+                # Paginate through follows to find if subject follows follower
+                cursor = None
+                mutual = False
                 
-                data = response.json()
-                follows = data.get('follows', [])
-                
-                for follow in follows:
-                    if follow.get('did') == follower_did:
-                        mutual = True
+                while True:
+                    if cursor:
+                        params['cursor'] = cursor
+                    
+                    response = requests.get(url, params=params, timeout=10)
+                    if response.status_code != 200:
+                        self.log(f"   ⚠️ API error checking follows: {response.status_code}")
+                        return
+                    
+                    data = response.json()
+                    follows = data.get('follows', [])
+                    
+                    for follow in follows:
+                        if follow.get('did') == follower_did:
+                            mutual = True
+                            break
+                    
+                    if mutual:
+                        break
+                    
+                    cursor = data.get('cursor')
+                    if not cursor:
                         break
-                
-                if mutual:
-                    break
-                
-                cursor = data.get('cursor')
-                if not cursor:
-                    break
             
             if mutual:
                 # mutual=True means subject was already following follower
@@ -677,8 +740,16 @@ class QuestHandler(EventHandler):
         self.tracked_dids: Set[str] = set()
         self.dreamer_by_did: Dict[str, Dict] = {}
         self.quest_uris: Set[str] = set()
+        self.quest_titles: Dict[str, str] = {}
         self._load_dreamers()
         self._load_quests()
+        
+        from ops.quest_jobs import start_workers
+        start_workers(verbose)
+        
+        # Pick up quest edits as soon as QuestManager announces them
+        from ops.quest_registry import quest_registry
+        quest_registry.subscribe(self._load_quests)
     
     def _load_dreamers(self):
         """Load tracked dreamers."""
@@ -695,30 +766,24 @@ class QuestHandler(EventHandler):
         except Exception as e:
             print(f"[quest] ❌ Error loading dreamers: {e}")
     
-    def _load_quests(self):
+    def _load_quests(self, snapshot=None):
         """Load quest URIs to monitor (excluding questhose quests handled by phrase_scanner)."""
         try:
-            from ops.quests import QuestManager
-            manager = QuestManager()
-            all_quests = manager.get_enabled_quests()
+            from ops.quest_registry import quest_registry
+            snapshot = snapshot or quest_registry.snapshot()
             
-            self.quest_uris = set()
-            for quest in all_quests:
-                trigger_type = quest.get('trigger_type', 'bsky_reply')
-                if trigger_type != 'bsky_reply':
-                    continue
-                # Skip quests handled by phrase_scanner (questhose)
-                hose_service = quest.get('hose_service', '')
-                if hose_service == 'questhose':
-                    continue
-                uri = quest.get('uri', '')
-                if uri:
-                    self.quest_uris.add(uri)
+            # Skip quests handled by phrase_scanner (questhose)
+            self.quest_titles = {
+                quest.uri: quest.title for quest in snapshot.by_trigger.get('bsky_reply', ())
+                if quest.uri and quest.hose_service != 'questhose'
+            }
+            self.quest_uris = set(self.quest_titles)
             
             self.log(f"📜 Monitoring {len(self.quest_uris)} quest posts (excluding questhose)")
         except Exception as e:
             print(f"[quest] ❌ Error loading quests: {e}")
             self.quest_uris = set()
+            self.quest_titles = {}
     
     def refresh_dreamers(self):
         """Reload dreamer list and quest URIs (call when community changes)."""
@@ -779,38 +844,22 @@ class QuestHandler(EventHandler):
         handle = self.dreamer_by_did.get(did, {}).get('handle', did[:20])
         self.log(f"🔍 Quest reply from @{handle}: {post_text[:50]}...")
         
-        # Process in background
-        self.executor.submit(
-            self._async_process_quest_reply,
-            post_uri, did, post_text, post_created_at, quest_uri
-        )
-    
-    def _async_process_quest_reply(self, post_uri: str, author_did: str,
-                                    post_text: str, post_created_at: str, quest_uri: str):
-        """Background: process quest reply."""
+        # Queue for the quest job workers (durable, deduplicated by reply URI)
         try:
-            from ops.quest_hooks import process_quest_reply
-            
-            author_handle = self.dreamer_by_did.get(author_did, {}).get('handle', 'unknown')
-            
-            result = process_quest_reply(
-                reply_uri=post_uri,
-                author_did=author_did,
-                author_handle=author_handle,
-                post_text=post_text,
-                post_created_at=post_created_at,
-                quest_uri=quest_uri,
-                verbose=self.verbose
-            )
-            
-            if result.get('success'):
-                commands = result.get('commands_executed', [])
-                if commands and not result.get('skipped'):
-                    quest_title = result.get('quest_title', 'unknown')
-                    self.log(f"✨ Quest '{quest_title}': {', '.join(commands)} for @{author_handle}")
-                    
+            from ops.quest_jobs import enqueue_job
+            quest = self.quest_titles.get(quest_uri, quest_uri)
+            enqueue_job('reply', quest, f"reply:{quest_uri}:{post_uri}", {
+                'reply_uri': post_uri,
+                'author_did': did,
+                'author_handle': self.dreamer_by_did.get(did, {}).get('handle', 'unknown'),
+                'post_text': post_text,
+                'post_created_at': post_created_at,
+                'quest_uri': quest_uri,
+                'reply_cid': commit.get('cid'),
+            })
         except Exception as e:
-            self.log(f"❌ Quest processing failed: {e}")
+            self.stats['errors'] += 1
+            print(f"[quest] ❌ Failed to queue quest reply {post_uri}: {e}")
 
 
 # ============================================================================
@@ -1614,37 +1663,39 @@ class JetstreamHub:
 # Main Entry Point
 # ============================================================================
 
+HANDLER_CLASSES = {
+    'dreamer': DreamerHandler,
+    'quest': QuestHandler,
+    'biblio': BiblioHandler,
+    'feed': FeedHandler,
+    'kindred': KindredHandler,
+    'postfreq': PostFreqHandler,
+}
+
+DEFAULT_HANDLERS = ['dreamer', 'quest', 'feed', 'kindred']
+
+
+def build_hub(handler_names, verbose: bool = False) -> JetstreamHub:
+    """Create a hub with the named handlers registered, in HANDLER_CLASSES order."""
+    hub = JetstreamHub(verbose=verbose)
+    for name, handler_class in HANDLER_CLASSES.items():
+        if name in handler_names:
+            hub.register(handler_class(verbose=verbose))
+    return hub
+
+
 def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='Jetstream Hub - Unified ATProto Event Consumer')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
-    parser.add_argument('--handlers', nargs='+', default=['dreamer', 'quest', 'feed', 'kindred'],
-                        choices=['dreamer', 'quest', 'biblio', 'feed', 'kindred', 'postfreq'],
+    parser.add_argument('--handlers', nargs='+', default=DEFAULT_HANDLERS,
+                        choices=list(HANDLER_CLASSES),
                         help='Which handlers to enable (biblio excluded — bibliohose.service runs separately; postfreq excluded — feedgen_updater polls instead)')
     args = parser.parse_args()
     
-    # Create hub
-    hub = JetstreamHub(verbose=args.verbose)
-    
-    # Register handlers
-    if 'dreamer' in args.handlers:
-        hub.register(DreamerHandler(verbose=args.verbose))
-    
-    if 'quest' in args.handlers:
-        hub.register(QuestHandler(verbose=args.verbose))
-    
-    if 'biblio' in args.handlers:
-        hub.register(BiblioHandler(verbose=args.verbose))
-    
-    if 'feed' in args.handlers:
-        hub.register(FeedHandler(verbose=args.verbose))
-    
-    if 'kindred' in args.handlers:
-        hub.register(KindredHandler(verbose=args.verbose))
-
-    if 'postfreq' in args.handlers:
-        hub.register(PostFreqHandler(verbose=args.verbose))
+    # Create hub and register handlers
+    hub = build_hub(args.handlers, verbose=args.verbose)
     
     # Handle signals
     def signal_handler(sig, frame):
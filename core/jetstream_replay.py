@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Jetstream Replay - capture and benchmark harness
+
+Records raw Jetstream messages to a gzip file and replays them through the
+Jetstream hub's handlers or the phrase scanner, so their throughput can be
+measured (and compared across changes) without the live network.
+
+    # Capture 10 minutes of what the hub subscribes to
+    python3 core/jetstream_replay.py capture hub.jsonl.gz --duration 600
+
+    # Capture the network-wide post stream the phrase scanner reads
+    python3 core/jetstream_replay.py capture posts.jsonl.gz --target phrase --max-events 200000
+
+    # Replay as fast as possible, or at 1x/10x of the recorded pace
+    python3 core/jetstream_replay.py replay hub.jsonl.gz
+    python3 core/jetstream_replay.py replay hub.jsonl.gz --pace realtime --speed 10
+
+Replay reports events/sec, dispatch latency percentiles (overall and per
+handler), the time to drain the handlers' background executors, and SQL
+statement counts by verb.
+
+Replay writes to whatever database POSTGRES_* points at - use a local copy,
+not production. Cursor saving is disabled during replay, and quest jobs are
+only enqueued (QUEST_WORKERS_EXTERNAL=1), so replayed quests never post.
+Neither capture nor replay starts the kindred follow-graph backfill.
+Handlers still make their usual read-only HTTP lookups (bsky-cache, PLC).
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add parent to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+# ============================================================================
+# Measurement
+# ============================================================================
+
+class StatementCounter:
+    """Counts SQL statements sent through psycopg2 RealDictCursor (all DatabaseManager traffic)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts: Counter = Counter()
+        self._installed = False
+
+    def install(self):
+        if self._installed:
+            return
+        from psycopg2.extras import RealDictCursor
+
+        counter = self
+        original_execute = RealDictCursor.execute
+        original_executemany = RealDictCursor.executemany
+
+        def execute(cursor, query, vars=None):
+            counter.record(query)
+            return original_execute(cursor, query, vars)
+
+        def executemany(cursor, query, vars_list):
+            counter.record(query)
+            return original_executemany(cursor, query, vars_list)
+
+        RealDictCursor.execute = execute
+        RealDictCursor.executemany = executemany
+        self._installed = True
+
+    def record(self, query):
+        if isinstance(query, bytes):
+            query = query.decode('utf-8', 'replace')
+        words = str(query).split(None, 1)
+        verb = words[0].upper() if words else '?'
+        with self._lock:
+            self.counts[verb] += 1
+
+    def snapshot(self) -> Counter:
+        with self._lock:
+            return Counter(self.counts)
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50/p90/p99/max of samples in seconds, returned in milliseconds."""
+    if not samples:
+        return {'p50': 0.0, 'p90': 0.0, 'p99': 0.0, 'max': 0.0}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+
+    def pick(p):
+        return ordered[min(last, int(round(p / 100 * last)))] * 1000
+
+    return {'p50': pick(50), 'p90': pick(90), 'p99': pick(99), 'max': ordered[-1] * 1000}
+
+
+def _timed(handle_event, samples: List[float]):
+    """Wrap a handler's handle_event to record its in-loop latency."""
+    async def wrapper(event):
+        started = time.perf_counter()
+        try:
+            return await handle_event(event)
+        finally:
+            samples.append(time.perf_counter() - started)
+    return wrapper
+
+
+def _enqueue_quests_only():
+    """Keep quest workers from starting in this process; nothing posts from a benchmark."""
+    # ops.quest_jobs reads this at import, so it must be set before any handler loads it
+    os.environ['QUEST_WORKERS_EXTERNAL'] = '1'
+
+
+def _build_hub(handlers: List[str], verbose: bool = False):
+    """build_hub without starting quest workers or the follow-graph backfill."""
+    _enqueue_quests_only()
+    from core.follow_graph import follow_graph
+    from core.jetstream_hub import build_hub
+
+    follow_graph.ensure_indexed = lambda actors: None
+    try:
+        return build_hub(handlers, verbose=verbose)
+    finally:
+        del follow_graph.ensure_indexed
+
+
+# ============================================================================
+# Capture
+# ============================================================================
+
+def _capture_url(target: str, handlers: List[str], cursor: Optional[int]) -> str:
+    if target == 'phrase':
+        from core.phrase_scanner import PhraseScanner
+        url = f"{PhraseScanner.JETSTREAM_URLS[0]}?wantedCollections=app.bsky.feed.post"
+        if cursor:
+            url += f"&cursor={cursor}"
+        return url
+
+    hub = _build_hub(handlers)
+    hub.cursor = cursor
+    return hub._build_subscribe_url()
+
+
+async def capture(path: Path, url: str, duration: Optional[float], max_events: Optional[int]) -> int:
+    """Write raw Jetstream messages to a gzip file, one per line."""
+    import websockets
+
+    count = 0
+    deadline = time.time() + duration if duration else None
+    print(f"🎙️ Capturing to {path}")
+
+    with gzip.open(path, 'wt', encoding='utf-8') as out:
+        async with websockets.connect(url, ping_interval=30, ping_timeout=10,
+                                      max_size=10 * 1024 * 1024) as ws:
+            while True:
+                timeout = None
+                if deadline:
+                    timeout = deadline - time.time()
+                    if timeout <= 0:
+                        break
+                try:
+                    message = await asyncio.wait_for(ws.recv(), timeout)
+                except asyncio.TimeoutError:
+                    break
+
+                if isinstance(message, bytes):
+                    message = message.decode('utf-8')
+                if '\n' in message:
+                    message = json.dumps(json.loads(message), separators=(',', ':'))
+                out.write(message)
+                out.write('\n')
+
+                count += 1
+                if count % 10000 == 0:
+                    print(f"   📨 {count:,} events captured")
+                if max_events and count >= max_events:
+                    break
+
+    print(f"✅ Captured {count:,} events")
+    return count
+
+
+# ============================================================================
+# Replay
+# ============================================================================
+
+def load_capture(path: Path) -> List[Dict]:
+    """Parse a capture file into events (parsing is kept out of the timed replay)."""
+    events = []
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                events.append(json.loads(line))
+    return events
+
+
+def _build_target(target: str, handlers: List[str], verbose: bool):
+    """Returns (dispatch coroutine function, {name: samples}, executors to drain)."""
+    if target == 'phrase':
+        from core.phrase_scanner import PhraseScanner
+        scanner = PhraseScanner(verbose=verbose)
+        scanner._save_cursor = lambda *args, **kwargs: None
+        samples: List[float] = []
+        return _timed(scanner.handle_event, samples), {'phrase': samples}, []
+
+    hub = _build_hub(handlers, verbose=verbose)
+    hub._save_cursor = lambda *args, **kwargs: None
+
+    handler_samples = {}
+    executors = []
+    for handler in hub.handlers:
+        handler_samples[handler.name] = []
+        handler.handle_event = _timed(handler.handle_event, handler_samples[handler.name])
+        executors.append(handler.executor)
+        if hasattr(handler, 'graph_executor'):
+            executors.append(handler.graph_executor)
+    return hub._dispatch_event, handler_samples, executors
+
+
+async def replay(events: List[Dict], dispatch, pace: str, speed: float) -> List[float]:
+    """Feed events to dispatch, returning per-event dispatch latencies."""
+    latencies: List[float] = []
+    first_time_us = None
+    started = time.perf_counter()
+
+    for event in events:
+        if pace == 'realtime' and isinstance(event, dict) and event.get('time_us'):
+            if first_time_us is None:
+                first_time_us = event['time_us']
+            due = (event['time_us'] - first_time_us) / 1_000_000 / speed
+            delay = due - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        t0 = time.perf_counter()
+        try:
+            await dispatch(event)
+        except Exception as e:
+            print(f"❌ Dispatch error: {e}")
+        latencies.append(time.perf_counter() - t0)
+
+    return latencies
+
+
+def _print_latency(label: str, samples: List[float]):
+    p = percentiles(samples)
+    print(f"   {label:<12} n={len(samples):<8,} p50={p['p50']:.3f}ms  p90={p['p90']:.3f}ms  "
+          f"p99={p['p99']:.3f}ms  max={p['max']:.1f}ms")
+
+
+def run_replay(path: Path, target: str, handlers: List[str], pace: str, speed: float, verbose: bool):
+    _enqueue_quests_only()
+
+    counter = StatementCounter()
+    counter.install()
+
+    print(f"📂 Loading {path}...")
+    events = load_capture(path)
+    print(f"   {len(events):,} events")
+    print(f"   Database: {os.environ.get('POSTGRES_HOST', 'localhost')}/"
+          f"{os.environ.get('POSTGRES_DB', 'reverie_house')}")
+
+    dispatch, handler_samples, executors = _build_target(target, handlers, verbose)
+    baseline = counter.snapshot()
+
+    print(f"\n▶️  Replaying ({pace}{f' x{speed:g}' if pace == 'realtime' else ''})...")
+    started = time.perf_counter()
+    latencies = asyncio.run(replay(events, dispatch, pace, speed))
+    dispatch_elapsed = time.perf_counter() - started
+
+    for executor in executors:
+        executor.shutdown(wait=True)
+    total_elapsed = time.perf_counter() - started
+
+    statements = counter.snapshot()
+    statements.subtract(baseline)
+    statements = Counter({verb: n for verb, n in statements.items() if n > 0})
+    total_statements = sum(statements.values())
+
+    print("\n📊 REPLAY RESULTS")
+    print("=" * 70)
+    print(f"Capture:          {path.name} ({len(events):,} events)")
+    print(f"Target:           {target}{'' if target == 'phrase' else ' [' + ', '.join(handler_samples) + ']'}")
+    print(f"Dispatch time:    {dispatch_elapsed:.2f}s "
+          f"({len(events) / dispatch_elapsed if dispatch_elapsed else 0:,.0f} events/sec)")
+    print(f"Including drain:  {total_elapsed:.2f}s "
+          f"({len(events) / total_elapsed if total_elapsed else 0:,.0f} events/sec)")
+    print("\nDispatch latency:")
+    _print_latency('all', latencies)
+    for name, samples in handler_samples.items():
+        _print_latency(name, samples)
+    print(f"\nSQL statements:   {total_statements:,} "
+          f"({total_statements * 1000 / len(events) if events else 0:.1f} per 1k events)")
+    for verb, n in statements.most_common():
+        print(f"   {verb:<10} {n:,}")
+    print("=" * 70)
+
+
+# ============================================================================
+# Main Entry Point
+# ============================================================================
+
+def main():
+    import argparse
+    from core.jetstream_hub import HANDLER_CLASSES, DEFAULT_HANDLERS
+
+    parser = argparse.ArgumentParser(description='Jetstream capture and replay benchmark')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    cap = sub.add_parser('capture', help='Record raw Jetstream messages to a gzip file')
+    cap.add_argument('output', type=Path)
+    cap.add_argument('--target', choices=['hub', 'phrase'], default='hub',
+                     help="Subscription to record: the hub's DID/collection filters, or all posts")
+    cap.add_argument('--handlers', nargs='+', default=DEFAULT_HANDLERS, choices=list(HANDLER_CLASSES))
+    cap.add_argument('--duration', type=float, help='Stop after this many seconds')
+    cap.add_argument('--max-events', type=int, help='Stop after this many events')
+    cap.add_argument('--cursor', type=int, help='Start from this Jetstream cursor (time_us) instead of live')
+
+    rep = sub.add_parser('replay', help='Replay a capture and report throughput')
+    rep.add_argument('capture', type=Path)
+    rep.add_argument('--target', choices=['hub', 'phrase'], default='hub')
+    rep.add_argument('--handlers', nargs='+', default=DEFAULT_HANDLERS, choices=list(HANDLER_CLASSES))
+    rep.add_argument('--pace', choices=['max', 'realtime'], default='max')
+    rep.add_argument('--speed', type=float, default=1.0, help='Realtime multiplier (e.g. 10 = 10x)')
+
+    args = parser.parse_args()
+
+    if args.command == 'capture':
+        if not args.duration and not args.max_events:
+            parser.error('capture needs --duration or --max-events')
+        url = _capture_url(args.target, args.handlers, args.cursor)
+        try:
+            asyncio.run(capture(args.output, url, args.duration, args.max_events))
+        except KeyboardInterrupt:
+            print(f"\n🛑 Capture stopped ({datetime.now().strftime('%H:%M:%S')})")
+    else:
+        if args.speed <= 0:
+            parser.error('--speed must be positive')
+        run_replay(args.capture, args.target, args.handlers, args.pace, args.speed, args.verbose)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,7 @@ Handles creation, delivery, and management of user messages.
 Messages are user-specific instances of dialogue templates.
 """
 
+import hashlib
 import json
 import time
 import asyncio
@@ -14,6 +15,153 @@ from core.database import DatabaseManager
 from core.notifications import notify_new_message
 
 
+# Broadcast rows share one stored copy of the message sequence in
+# message_payloads (messages.payload_key) instead of each carrying its own
+# messages_json. Readers select MESSAGES_JSON_COLUMN with PAYLOAD_JOIN.
+MESSAGES_JSON_COLUMN = 'COALESCE(m.messages_json, mp.messages_json) AS messages_json'
+PAYLOAD_JOIN = 'LEFT JOIN message_payloads mp ON mp.payload_key = m.payload_key'
+
+PREVIEW_LENGTH = 100
+PAYLOAD_GRACE_SECONDS = 60 * 60   # Unreferenced payloads are kept this long after their last broadcast
+
+MESSAGE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS message_payloads (
+        payload_key TEXT PRIMARY KEY,
+        messages_json TEXT NOT NULL,
+        created_at INTEGER
+    );
+
+    ALTER TABLE messages
+        ADD COLUMN IF NOT EXISTS payload_key TEXT,
+        ADD COLUMN IF NOT EXISTS preview TEXT,
+        ADD COLUMN IF NOT EXISTS message_count INTEGER;
+
+    CREATE INDEX IF NOT EXISTS idx_messages_payload_key ON messages(payload_key)
+        WHERE payload_key IS NOT NULL;
+
+    CREATE TABLE IF NOT EXISTS message_counts (
+        user_did TEXT PRIMARY KEY,
+        total INTEGER NOT NULL DEFAULT 0,
+        unread INTEGER NOT NULL DEFAULT 0,
+        read INTEGER NOT NULL DEFAULT 0,
+        dismissed INTEGER NOT NULL DEFAULT 0
+    );
+
+    CREATE OR REPLACE FUNCTION message_counts_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP <> 'INSERT' THEN
+            UPDATE message_counts c
+            SET total = c.total - o.total,
+                unread = c.unread - o.unread,
+                read = c.read - o.read,
+                dismissed = c.dismissed - o.dismissed
+            FROM (
+                SELECT user_did, COUNT(*) AS total,
+                       COUNT(*) FILTER (WHERE status = 'unread') AS unread,
+                       COUNT(*) FILTER (WHERE status = 'read') AS read,
+                       COUNT(*) FILTER (WHERE status = 'dismissed') AS dismissed
+                FROM old_rows WHERE user_did IS NOT NULL GROUP BY user_did
+            ) o
+            WHERE c.user_did = o.user_did;
+        END IF;
+
+        IF TG_OP <> 'DELETE' THEN
+            INSERT INTO message_counts (user_did, total, unread, read, dismissed)
+            SELECT user_did, COUNT(*),
+                   COUNT(*) FILTER (WHERE status = 'unread'),
+                   COUNT(*) FILTER (WHERE status = 'read'),
+                   COUNT(*) FILTER (WHERE status = 'dismissed')
+            FROM new_rows WHERE user_did IS NOT NULL GROUP BY user_did
+            ON CONFLICT (user_did) DO UPDATE SET
+                total = message_counts.total + EXCLUDED.total,
+                unread = message_counts.unread + EXCLUDED.unread,
+                read = message_counts.read + EXCLUDED.read,
+                dismissed = message_counts.dismissed + EXCLUDED.dismissed;
+        END IF;
+
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+# Statement-level, so a broadcast of N rows updates each counter once
+MESSAGE_COUNT_TRIGGERS = """
+    CREATE TRIGGER messages_counts_insert AFTER INSERT ON messages
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION message_counts_apply();
+    CREATE TRIGGER messages_counts_update AFTER UPDATE ON messages
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION message_counts_apply();
+    CREATE TRIGGER messages_counts_delete AFTER DELETE ON messages
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION message_counts_apply();
+"""
+
+_schema_ready = False
+
+
+def _get_db() -> DatabaseManager:
+    """DatabaseManager with the payload/counter schema in place."""
+    global _schema_ready
+    db = DatabaseManager()
+    if _schema_ready:
+        return db
+    
+    db.execute(MESSAGE_SCHEMA)
+    
+    installed = db.fetch_one(
+        "SELECT 1 FROM pg_trigger WHERE tgname = 'messages_counts_insert'"
+    )
+    if not installed:
+        # Triggers and seed in one transaction: creating the triggers locks
+        # messages against writes until the counters are seeded.
+        try:
+            with db.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute(MESSAGE_COUNT_TRIGGERS)
+                cursor.execute('DELETE FROM message_counts')
+                cursor.execute('''
+                    INSERT INTO message_counts (user_did, total, unread, read, dismissed)
+                    SELECT user_did, COUNT(*),
+                           COUNT(*) FILTER (WHERE status = 'unread'),
+                           COUNT(*) FILTER (WHERE status = 'read'),
+                           COUNT(*) FILTER (WHERE status = 'dismissed')
+                    FROM messages WHERE user_did IS NOT NULL GROUP BY user_did
+                ''')
+            print("✉️ [Messages] Installed message counters")
+        except Exception:
+            # Another process may have installed them first
+            if not db.fetch_one("SELECT 1 FROM pg_trigger WHERE tgname = 'messages_counts_insert'"):
+                raise
+        
+        # Stored previews for rows written before the columns existed
+        try:
+            db.execute('''
+                UPDATE messages SET
+                    message_count = json_array_length(messages_json::json),
+                    preview = CASE
+                        WHEN length(messages_json::json->0->>'text') > %s
+                            THEN left(messages_json::json->0->>'text', %s) || '...'
+                        ELSE COALESCE(messages_json::json->0->>'text', '')
+                    END
+                WHERE message_count IS NULL AND messages_json IS NOT NULL
+            ''', (PREVIEW_LENGTH, PREVIEW_LENGTH))
+        except Exception as e:
+            print(f"⚠️ [Messages] Could not backfill message previews: {e}")
+    
+    _schema_ready = True
+    return db
+
+
+def _summarize(messages_data: List[Dict]) -> tuple:
+    """(preview, message_count) stored alongside a message sequence."""
+    if not messages_data:
+        return '', 0
+    text = messages_data[0].get('text') or ''
+    preview = text[:PREVIEW_LENGTH] + '...' if len(text) > PREVIEW_LENGTH else text
+    return preview, len(messages_data)
+
+
 def create_message(
     user_did: str,
     dialogue_key: str,
@@ -36,19 +184,21 @@ def create_message(
     Returns:
         int: Created message ID
     """
-    db = DatabaseManager()
+    db = _get_db()
     
     now = int(time.time())
     expires_at = None
     if expires_in_hours:
         expires_at = now + (expires_in_hours * 3600)
     
+    preview, message_count = _summarize(messages_data)
+    
     row = db.fetch_one('''
         INSERT INTO messages (
             user_did, dialogue_key, messages_json,
             source, priority, status,
-            created_at, expires_at
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            created_at, expires_at, preview, message_count
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         RETURNING id
     ''', (
         user_did,
@@ -58,7 +208,9 @@ def create_message(
         priority,
         'unread',
         now,
-        expires_at
+        expires_at,
+        preview,
+        message_count
     ))
     
     message_id = row['id'] if row else None
@@ -93,7 +245,7 @@ def get_inbox(
     Returns:
         Dict with messages array and counts
     """
-    db = DatabaseManager()
+    db = _get_db()
     
     # Build query
     where_clauses = ['user_did = %s']
@@ -111,8 +263,9 @@ def get_inbox(
     # Get messages with dialogue titles
     cursor = db.execute(f'''
         SELECT 
-            m.id, m.dialogue_key, m.messages_json, m.source, m.priority, m.status,
+            m.id, m.dialogue_key, m.source, m.priority, m.status,
             m.created_at, m.read_at, m.dismissed_at, m.expires_at,
+            m.preview, m.message_count,
             d.title as dialogue_title
         FROM messages m
         LEFT JOIN dialogues d ON d.key = m.dialogue_key AND d.sequence = 0
@@ -123,10 +276,6 @@ def get_inbox(
     
     messages = []
     for row in cursor.fetchall():
-        # Parse messages_json to get preview
-        msgs = json.loads(row['messages_json'])
-        preview = msgs[0]['text'][:100] + '...' if msgs and len(msgs[0]['text']) > 100 else msgs[0]['text'] if msgs else ''
-        
         messages.append({
             'id': row['id'],
             'dialogue_key': row['dialogue_key'],
@@ -138,29 +287,34 @@ def get_inbox(
             'read_at': row['read_at'],
             'dismissed_at': row['dismissed_at'],
             'expires_at': row['expires_at'],
-            'preview': preview,
-            'message_count': len(msgs)
+            'preview': row['preview'] or '',
+            'message_count': row['message_count'] or 0
         })
     
-    # Get counts
-    cursor = db.execute('''
-        SELECT 
-            COUNT(*) as total,
-            SUM(CASE WHEN status = 'unread' THEN 1 ELSE 0 END) as unread,
-            SUM(CASE WHEN status = 'read' THEN 1 ELSE 0 END) as read,
-            SUM(CASE WHEN status = 'dismissed' THEN 1 ELSE 0 END) as dismissed
-        FROM messages
-        WHERE user_did = %s
-    ''', (user_did,))
+    return {'messages': messages, **get_message_counts(user_did, db)}
+
+
+def get_message_counts(user_did: str, db: Optional[DatabaseManager] = None) -> Dict[str, int]:
+    """
+    Get a user's message counts by status.
     
-    counts = dict(cursor.fetchone())
+    Read from the message_counts row kept current by triggers on messages,
+    so this is a single primary-key lookup however many messages exist.
+    
+    Returns:
+        Dict with total, unread, read and dismissed counts
+    """
+    db = db or _get_db()
+    
+    row = db.fetch_one('''
+        SELECT total, unread, read, dismissed FROM message_counts WHERE user_did = %s
+    ''', (user_did,))
     
     return {
-        'messages': messages,
-        'total': counts['total'] or 0,
-        'unread': counts['unread'] or 0,
-        'read': counts['read'] or 0,
-        'dismissed': counts['dismissed'] or 0
+        'total': row['total'] if row else 0,
+        'unread': row['unread'] if row else 0,
+        'read': row['read'] if row else 0,
+        'dismissed': row['dismissed'] if row else 0
     }
 
 
@@ -175,14 +329,15 @@ def get_message(message_id: int, user_did: str) -> Optional[Dict]:
     Returns:
         Message dict or None if not found/unauthorized
     """
-    db = DatabaseManager()
+    db = _get_db()
     
-    cursor = db.execute('''
+    cursor = db.execute(f'''
         SELECT 
-            id, user_did, dialogue_key, messages_json, source, priority, status,
-            created_at, read_at, dismissed_at, expires_at
-        FROM messages
-        WHERE id = %s AND user_did = %s
+            m.id, m.user_did, m.dialogue_key, {MESSAGES_JSON_COLUMN}, m.source, m.priority, m.status,
+            m.created_at, m.read_at, m.dismissed_at, m.expires_at
+        FROM messages m
+        {PAYLOAD_JOIN}
+        WHERE m.id = %s AND m.user_did = %s
     ''', (message_id, user_did))
     
     row = cursor.fetchone()
@@ -214,7 +369,7 @@ def mark_read(message_id: int, user_did: str) -> bool:
     Returns:
         True if updated, False if not found/unauthorized
     """
-    db = DatabaseManager()
+    db = _get_db()
     
     now = int(time.time())
     
@@ -225,8 +380,6 @@ def mark_read(message_id: int, user_did: str) -> bool:
         WHERE id = %s AND user_did = %s AND status IN ('unread', 'dismissed')
     ''', (now, message_id, user_did))
     
-    db.commit()
-    
     success = cursor.rowcount > 0
     if success:
         # Track interaction
@@ -246,7 +399,7 @@ def mark_dismissed(message_id: int, user_did: str) -> bool:
     Returns:
         True if updated, False if not found/unauthorized
     """
-    db = DatabaseManager()
+    db = _get_db()
     
     now = int(time.time())
     
@@ -256,8 +409,6 @@ def mark_dismissed(message_id: int, user_did: str) -> bool:
         WHERE id = %s AND user_did = %s
     ''', (now, message_id, user_did))
     
-    db.commit()
-    
     success = cursor.rowcount > 0
     if success:
         track_interaction(message_id, 'dismissed')
@@ -276,7 +427,7 @@ def bulk_dismiss(user_did: str, status_filter: str = 'read') -> int:
     Returns:
         Number of messages dismissed
     """
-    db = DatabaseManager()
+    db = _get_db()
     
     now = int(time.time())
     
@@ -286,8 +437,6 @@ def bulk_dismiss(user_did: str, status_filter: str = 'read') -> int:
         WHERE user_did = %s AND status = %s
     ''', (now, user_did, status_filter))
     
-    db.commit()
-    
     return cursor.rowcount
 
 
@@ -298,7 +447,7 @@ def cleanup_expired() -> int:
     Returns:
         Number of messages deleted
     """
-    db = DatabaseManager()
+    db = _get_db()
     
     now = int(time.time())
     
@@ -307,11 +456,18 @@ def cleanup_expired() -> int:
         WHERE expires_at IS NOT NULL AND expires_at < %s
     ''', (now,))
     
-    db.commit()
-    
     deleted = cursor.rowcount
     if deleted > 0:
         print(f"🗑️ [Messages] Cleaned up {deleted} expired messages")
+        
+        # Drop broadcast payloads no message refers to any more. A broadcast
+        # reusing a payload bumps its created_at under a row lock, so one
+        # that is mid-insert is never deleted from under it.
+        db.execute('''
+            DELETE FROM message_payloads p
+            WHERE p.created_at < %s
+              AND NOT EXISTS (SELECT 1 FROM messages m WHERE m.payload_key = p.payload_key)
+        ''', (now - PAYLOAD_GRACE_SECONDS,))
     
     return deleted
 
@@ -331,7 +487,7 @@ def track_interaction(
         button_index: Index of clicked button (optional)
         button_text: Text of clicked button (optional)
     """
-    db = DatabaseManager()
+    db = _get_db()
     
     now = int(time.time())
     
@@ -340,8 +496,6 @@ def track_interaction(
             message_id, interaction_type, button_index, button_text, timestamp
         ) VALUES (%s, %s, %s, %s, %s)
     ''', (message_id, interaction_type, button_index, button_text, now))
-    
-    db.commit()
 
 
 def get_message_stats(dialogue_key: Optional[str] = None) -> Dict[str, Any]:
@@ -354,7 +508,7 @@ def get_message_stats(dialogue_key: Optional[str] = None) -> Dict[str, Any]:
     Returns:
         Dict with statistics (total, unread, read, dismissed counts)
     """
-    db = DatabaseManager()
+    db = _get_db()
     
     where_clause = ''
     params = []
@@ -383,7 +537,6 @@ def get_message_stats(dialogue_key: Optional[str] = None) -> Dict[str, Any]:
     }
 
 
-# Convenience function for sending to multiple users
 def broadcast_message(
     user_dids: List[str],
     dialogue_key: str,
@@ -395,6 +548,10 @@ def broadcast_message(
     """
     Send a message to multiple users.
     
+    The message sequence is stored once in message_payloads (keyed by its
+    hash) and every recipient's row is inserted in a single statement that
+    references it.
+    
     Args:
         user_dids: List of user DIDs
         dialogue_key: Dialogue template key
@@ -406,17 +563,47 @@ def broadcast_message(
     Returns:
         List of created message IDs
     """
-    message_ids = []
-    for user_did in user_dids:
-        msg_id = create_message(
-            user_did=user_did,
-            dialogue_key=dialogue_key,
-            messages_data=messages_data,
-            source=source,
-            priority=priority,
-            expires_in_hours=expires_in_hours
-        )
-        message_ids.append(msg_id)
-    
-    print(f"📬 [Messages] Broadcast {dialogue_key} to {len(user_dids)} users")
-    return message_ids
+    user_dids = [did for did in dict.fromkeys(user_dids) if did]
+    if not user_dids:
+        return []
+    
+    db = _get_db()
+    
+    now = int(time.time())
+    expires_at = None
+    if expires_in_hours:
+        expires_at = now + (expires_in_hours * 3600)
+    
+    payload = json.dumps(messages_data)
+    payload_key = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    preview, message_count = _summarize(messages_data)
+    
+    with db.transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO message_payloads (payload_key, messages_json, created_at)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (payload_key) DO UPDATE SET created_at = EXCLUDED.created_at
+        ''', (payload_key, payload, now))
+        cursor.execute('''
+            INSERT INTO messages (
+                user_did, dialogue_key, payload_key,
+                source, priority, status,
+                created_at, expires_at, preview, message_count
+            )
+            SELECT recipient, %s, %s, %s, %s, 'unread', %s, %s, %s, %s
+            FROM unnest(%s::text[]) AS recipient
+            RETURNING id, user_did
+        ''', (dialogue_key, payload_key, source, priority, now, expires_at,
+              preview, message_count, user_dids))
+        created = cursor.fetchall()
+    
+    print(f"📬 [Messages] Broadcast {dialogue_key} to {len(created)} users")
+    
+    for row in created:
+        try:
+            notify_new_message(row['user_did'], row['id'], dialogue_key)
+        except Exception as e:
+            print(f"⚠️ [Messages] Failed to send notification: {e}")
+    
+    return [row['id'] for row in created]
@@ -10,11 +10,11 @@ This module handles:
 """
 
 import sys
-import json
 import time
 from typing import Dict, List, Optional
 from collections import Counter
 from core.database import DatabaseManager
+from core.snapshots import SnapshotStore
 from utils.spectrum import SpectrumManager
 
 
@@ -53,6 +53,9 @@ class HeadingManager:
         """
         Capture a snapshot of every dreamer's spectrum position.
         
+        Stored through SnapshotStore, usually as a delta of only the dreamers
+        who changed since the previous snapshot.
+        
         Args:
             operation: Label for what triggered this snapshot (e.g. 'world_tick')
             epoch: Optional timestamp (defaults to now)
@@ -91,19 +94,7 @@ class HeadingManager:
                 entry['octant'] = row['octant']
             dreamers.append(entry)
         
-        snapshot = {
-            'epoch': epoch,
-            'total_dreamers': len(dreamers),
-            'dreamers': dreamers,
-        }
-        
-        cursor = self.db.execute("""
-            INSERT INTO spectrum_snapshots (epoch, operation, total_dreamers, snapshot_data, created_at, notes)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            RETURNING id
-        """, (epoch, operation, len(dreamers), json.dumps(snapshot), epoch, notes))
-        row = cursor.fetchone()
-        return row['id'] if row else None
+        return SnapshotStore(self.db).save(operation, dreamers, epoch=epoch, notes=notes)
     
     def parse_heading(self, heading: Optional[str]) -> Dict:
         """
@@ -40,8 +40,11 @@ class NetworkClient:
     def extract_replies_from_thread(self, thread_data: Dict) -> List[Dict]:
         return self.threads.extract_replies_from_thread(thread_data)
     
-    def get_thread_replies(self, post_uri: str, max_depth: int = 10, include_metadata: bool = True) -> Dict:
-        return self.threads.get_thread_replies(post_uri, max_depth, include_metadata)
+    def get_thread_replies(self, post_uri: str, max_depth: int = 10, include_metadata: bool = True, max_age: float = 0) -> Dict:
+        return self.threads.get_thread_replies(post_uri, max_depth, include_metadata, max_age)
+    
+    def get_replies_since(self, post_uri: str, since: Optional[str] = None, max_depth: int = 10) -> List[Dict]:
+        return self.threads.get_replies_since(post_uri, since, max_depth)
     
     
     def get_post_likes(self, post_uri: str, cursor: Optional[str] = None, limit: int = 100) -> Optional[Dict]:
@@ -5,18 +5,189 @@ PDS Administration Interface
 
 Access local PDS account information for reverie.house server.
 Requires sudo access to pdsadmin command.
+
+The account list is read once into an in-memory index (by DID and handle)
+shared across the process and refreshed every ACCOUNT_INDEX_TTL seconds or on
+demand, so lookups don't fork pdsadmin. Set PDS_ACCOUNTS_FILE to serve the
+index from a saved listing instead (tests, machines without pdsadmin).
 """
 
+import json
+import os
 import subprocess
 import re
-from typing import List, Dict, Optional
+import threading
+import time
+from typing import Callable, List, Dict, Optional
+
+
+# How long an account listing is trusted before `pdsadmin account list` runs again
+ACCOUNT_INDEX_TTL = 5 * 60
+# After a failed listing, keep serving the last good one and retry after this long
+ACCOUNT_INDEX_RETRY = 30
+
+# Point at a saved account listing (JSON list of {handle, email, did}, or the
+# text output of `pdsadmin account list`) to use it instead of running pdsadmin
+ACCOUNTS_FILE_ENV = 'PDS_ACCOUNTS_FILE'
+
+
+def parse_account_list(output: str) -> List[Dict[str, str]]:
+    """Parse the table printed by `pdsadmin account list` (header line first)."""
+    accounts = []
+    lines = output.strip().split('\n')
+    
+    if len(lines) < 2:
+        return []
+    
+    for line in lines[1:]:
+        parts = line.split()
+        if len(parts) >= 3:
+            accounts.append({
+                'handle': parts[0],
+                'email': parts[1],
+                'did': parts[2]
+            })
+    
+    return accounts
+
+
+def pdsadmin_accounts(pds_command: str = 'pdsadmin') -> Optional[List[Dict[str, str]]]:
+    """
+    List accounts by running `sudo pdsadmin account list`.
+    
+    Returns:
+        List of dicts with keys: handle, email, did; None if the command failed
+    """
+    try:
+        result = subprocess.run(
+            ['sudo', pds_command, 'account', 'list'],
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+        
+        if result.returncode != 0:
+            print(f"⚠️ PDS command failed: {result.stderr}")
+            return None
+        
+        return parse_account_list(result.stdout)
+        
+    except subprocess.TimeoutExpired:
+        print("⚠️ PDS command timed out")
+        return None
+    except Exception as e:
+        print(f"⚠️ Error accessing PDS: {e}")
+        return None
+
+
+def file_accounts_source(path: str) -> Callable[[], Optional[List[Dict[str, str]]]]:
+    """Account source reading a saved listing (JSON or pdsadmin text) from a file."""
+    def load() -> Optional[List[Dict[str, str]]]:
+        try:
+            with open(path, 'r') as f:
+                content = f.read()
+        except OSError as e:
+            print(f"⚠️ Could not read PDS accounts file {path}: {e}")
+            return None
+        if content.lstrip().startswith('['):
+            return [
+                {'handle': acc['handle'], 'email': acc.get('email', ''), 'did': acc['did']}
+                for acc in json.loads(content)
+            ]
+        return parse_account_list(content)
+    return load
+
+
+class AccountIndex:
+    """
+    In-memory index of PDS accounts by DID and handle.
+    
+    Built from one account listing and reused until ACCOUNT_INDEX_TTL passes
+    or invalidate() is called, so lookups don't run pdsadmin each time.
+    """
+    
+    def __init__(self, source: Callable[[], Optional[List[Dict[str, str]]]], ttl: int = ACCOUNT_INDEX_TTL):
+        self.source = source
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._accounts: List[Dict[str, str]] = []
+        self._by_did: Dict[str, Dict[str, str]] = {}
+        self._by_handle: Dict[str, Dict[str, str]] = {}
+        self._expires_at = 0.0
+    
+    def _current(self):
+        if time.time() >= self._expires_at:
+            with self._lock:
+                if time.time() >= self._expires_at:
+                    self._load()
+        return self._accounts, self._by_did, self._by_handle
+    
+    def _load(self):
+        """Rebuild from the source (lock held); keeps the old index if it fails."""
+        accounts = self.source()
+        if accounts is None:
+            self._expires_at = time.time() + min(ACCOUNT_INDEX_RETRY, self.ttl)
+            return
+        # Swap in whole so readers never see a half-built index
+        self._by_did = {acc['did']: acc for acc in accounts}
+        self._by_handle = {acc['handle']: acc for acc in accounts}
+        self._accounts = accounts
+        self._expires_at = time.time() + self.ttl
+    
+    def refresh(self):
+        """Reload from the source now."""
+        with self._lock:
+            self._load()
+    
+    def invalidate(self):
+        """Reload on the next lookup (e.g. after creating or deleting an account)."""
+        self._expires_at = 0.0
+    
+    def all(self) -> List[Dict[str, str]]:
+        return [dict(acc) for acc in self._current()[0]]
+    
+    def by_did(self, did: str) -> Optional[Dict[str, str]]:
+        account = self._current()[1].get(did)
+        return dict(account) if account else None
+    
+    def by_handle(self, handle: str) -> Optional[Dict[str, str]]:
+        account = self._current()[2].get(handle)
+        return dict(account) if account else None
+
+
+def _default_source() -> Callable[[], Optional[List[Dict[str, str]]]]:
+    accounts_file = os.environ.get(ACCOUNTS_FILE_ENV)
+    if accounts_file:
+        return file_accounts_source(accounts_file)
+    return pdsadmin_accounts
+
+
+_account_index: Optional[AccountIndex] = None
+_account_index_lock = threading.Lock()
+
+
+def get_account_index() -> AccountIndex:
+    """Process-wide account index shared by every PDSAdmin()."""
+    global _account_index
+    if _account_index is None:
+        with _account_index_lock:
+            if _account_index is None:
+                _account_index = AccountIndex(_default_source())
+    return _account_index
 
 
 class PDSAdmin:
     """Interface to PDS admin commands."""
     
-    def __init__(self):
+    def __init__(self, source: Optional[Callable[[], Optional[List[Dict[str, str]]]]] = None):
+        """
+        Args:
+            source: Optional callable returning the account list (e.g.
+                    file_accounts_source(path)); uses its own index instead
+                    of the shared pdsadmin-backed one
+        """
         self.pds_command = "pdsadmin"
+        self.accounts = AccountIndex(source) if source else get_account_index()
     
     def list_accounts(self) -> List[Dict[str, str]]:
         """
@@ -25,65 +196,29 @@ class PDSAdmin:
         Returns:
             List of dicts with keys: handle, email, did
         """
-        try:
-            result = subprocess.run(
-                ['sudo', self.pds_command, 'account', 'list'],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            if result.returncode != 0:
-                print(f"⚠️ PDS command failed: {result.stderr}")
-                return []
-            
-            accounts = []
-            lines = result.stdout.strip().split('\n')
-            
-            if len(lines) < 2:
-                return []
-            
-            for line in lines[1:]:
-                parts = line.split()
-                if len(parts) >= 3:
-                    accounts.append({
-                        'handle': parts[0],
-                        'email': parts[1],
-                        'did': parts[2]
-                    })
-            
-            return accounts
-            
-        except subprocess.TimeoutExpired:
-            print("⚠️ PDS command timed out")
-            return []
-        except Exception as e:
-            print(f"⚠️ Error accessing PDS: {e}")
-            return []
+        return self.accounts.all()
+    
+    def refresh_accounts(self):
+        """Re-read the account list now instead of waiting for the TTL."""
+        self.accounts.refresh()
+    
+    def invalidate_accounts(self):
+        """Re-read the account list on the next lookup."""
+        self.accounts.invalidate()
     
     def get_account_by_did(self, did: str) -> Optional[Dict[str, str]]:
         """Get account information for a specific DID."""
-        accounts = self.list_accounts()
-        for account in accounts:
-            if account['did'] == did:
-                return account
-        return None
+        return self.accounts.by_did(did)
     
     def get_account_by_handle(self, handle: str) -> Optional[Dict[str, str]]:
         """Get account information for a specific handle."""
-        accounts = self.list_accounts()
         if not handle.endswith('.reverie.house') and handle != 'reverie.house':
             handle = f"{handle}.reverie.house"
-        
-        for account in accounts:
-            if account['handle'] == handle:
-                return account
-        return None
+        return self.accounts.by_handle(handle)
     
     def get_all_reverie_house_dids(self) -> List[str]:
         """Get all DIDs for reverie.house accounts."""
-        accounts = self.list_accounts()
-        return [acc['did'] for acc in accounts]
+        return [acc['did'] for acc in self.accounts.all()]
     
     def get_handle_for_did(self, did: str) -> Optional[str]:
         """Get the authoritative handle from PDS for a given DID."""
@@ -102,8 +237,7 @@ class PDSAdmin:
         Returns:
             bool: True if account exists, False otherwise
         """
-        accounts = self.list_accounts()
-        return any(acc['handle'] == handle for acc in accounts)
+        return self.accounts.by_handle(handle) is not None
     
     def get_identity_status(self, dreamers=None):
         """
@@ -125,8 +259,6 @@ class PDSAdmin:
         accounts = self.list_accounts()
         
         if dreamers is None:
-            import json
-            import os
             dreamers_file = '/srv/site/data/dreamers.json'
             dreamers = []
             if os.path.exists(dreamers_file):
@@ -136,12 +268,17 @@ class PDSAdmin:
                 except Exception:
                     pass
         
+        # One pass over the dreamers instead of a scan per account
+        dreamers_by_did = {}
+        for d in dreamers:
+            dreamers_by_did.setdefault(d.get('did'), d)
+        
         results = []
         for acc in accounts:
             did = acc['did']
             pds_handle = acc['handle']
             
-            dreamer = next((d for d in dreamers if d.get('did') == did), None)
+            dreamer = dreamers_by_did.get(did)
             
             result = {
                 'handle': pds_handle,
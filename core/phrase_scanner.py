@@ -27,7 +27,6 @@ import time
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Set, Optional, Any
-from concurrent.futures import ThreadPoolExecutor
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
@@ -64,14 +63,15 @@ class PhraseScanner:
             'total_events': 0,
             'posts_scanned': 0,
             'phrase_matches': 0,
-            'quests_triggered': 0,
+            'quests_queued': 0,
             'errors': 0,
             'start_time': datetime.now(),
             'reconnects': 0
         }
         
-        # Thread pool for background processing
-        self.executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix='phrase-')
+        # Matches are queued as quest jobs (ops.quest_jobs) and run by its workers
+        from ops.quest_jobs import start_workers
+        start_workers(verbose)
         
         # Phrase monitoring
         self.phrase_quests: List[Dict] = []
@@ -87,6 +87,9 @@ class PhraseScanner:
         self._load_phrase_quests()
         self._load_reply_quests()
         
+        from ops.quest_registry import quest_registry
+        quest_registry.subscribe(self.reload_quests)
+        
         # Signal handling
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
@@ -155,61 +158,42 @@ class PhraseScanner:
             if self.verbose:
                 print(f"⚠️ DB cursor save failed: {e}")
     
-    def _load_phrase_quests(self):
+    def _load_phrase_quests(self, snapshot=None):
         """Load quests with firehose_phrase trigger type."""
         try:
-            from ops.quests import QuestManager
+            from ops.quest_registry import quest_registry
             
-            manager = QuestManager()
-            all_quests = manager.get_enabled_quests()
+            snapshot = snapshot or quest_registry.snapshot()
             
-            self.phrase_quests = []
-            self.all_phrases = set()
-            self.phrase_config = {}
+            phrase_quests = []
+            all_phrases = set()
+            phrase_config = {}
             
-            for quest in all_quests:
-                trigger_type = quest.get('trigger_type', 'bsky_reply')
-                
-                if trigger_type != 'firehose_phrase':
+            for compiled in snapshot.by_trigger.get('firehose_phrase', ()):
+                if not compiled.phrases:
+                    print(f"⚠️  Quest '{compiled.title}' has no phrases configured")
                     continue
                 
-                # Parse trigger config
-                trigger_config = quest.get('trigger_config', {})
-                if isinstance(trigger_config, str):
-                    try:
-                        trigger_config = json.loads(trigger_config)
-                    except Exception:
-                        trigger_config = {}
-                
-                phrases = trigger_config.get('phrases', [])
-                if isinstance(phrases, str):
-                    phrases = [p.strip() for p in phrases.split(',') if p.strip()]
+                quest = compiled.as_dict()
+                phrase_quests.append(quest)
                 
-                case_sensitive = trigger_config.get('case_sensitive', False)
-                exclude_reposts = trigger_config.get('exclude_reposts', True)
-                
-                if not phrases:
-                    print(f"⚠️  Quest '{quest['title']}' has no phrases configured")
-                    continue
-                
-                self.phrase_quests.append(quest)
-                
-                for phrase in phrases:
+                for phrase in compiled.phrases:
                     # Store phrase (lowercase for case-insensitive matching)
-                    phrase_key = phrase if case_sensitive else phrase.lower()
-                    self.all_phrases.add(phrase_key)
+                    phrase_key = phrase if compiled.case_sensitive else phrase.lower()
+                    all_phrases.add(phrase_key)
                     
-                    # Store config for this phrase
-                    if phrase_key not in self.phrase_config:
-                        self.phrase_config[phrase_key] = []
-                    
-                    self.phrase_config[phrase_key].append({
+                    phrase_config.setdefault(phrase_key, []).append({
                         'quest': quest,
                         'original_phrase': phrase,
-                        'case_sensitive': case_sensitive,
-                        'exclude_reposts': exclude_reposts
+                        'case_sensitive': compiled.case_sensitive,
+                        'exclude_reposts': compiled.exclude_reposts
                     })
             
+            # Swap in whole so the event loop never sees a half-built index
+            self.phrase_config = phrase_config
+            self.all_phrases = all_phrases
+            self.phrase_quests = phrase_quests
+            
             print(f"📜 Loaded {len(self.phrase_quests)} phrase-triggered quests")
             if self.all_phrases:
                 sample = list(self.all_phrases)[:3]
@@ -222,32 +206,26 @@ class PhraseScanner:
             import traceback
             traceback.print_exc()
     
-    def _load_reply_quests(self):
+    def _load_reply_quests(self, snapshot=None):
         """Load bsky_reply quests assigned to questhose for reply monitoring."""
         try:
-            from ops.quests import QuestManager
+            from ops.quest_registry import quest_registry
             
-            manager = QuestManager()
-            all_quests = manager.get_enabled_quests()
+            snapshot = snapshot or quest_registry.snapshot()
             
-            self.reply_quests = []
-            self.quest_uri_map = {}
+            reply_quests = []
+            quest_uri_map = {}
             
-            for quest in all_quests:
-                trigger_type = quest.get('trigger_type', 'bsky_reply')
-                if trigger_type != 'bsky_reply':
+            for compiled in snapshot.by_trigger.get('bsky_reply', ()):
+                if compiled.hose_service != 'questhose' or not compiled.uri:
                     continue
                 
-                hose_service = quest.get('hose_service', '')
-                if hose_service != 'questhose':
-                    continue
-                
-                uri = quest.get('uri', '')
-                if not uri:
-                    continue
-                
-                self.reply_quests.append(quest)
-                self.quest_uri_map[uri] = quest
+                quest = compiled.as_dict()
+                reply_quests.append(quest)
+                quest_uri_map[compiled.uri] = quest
+            
+            self.quest_uri_map = quest_uri_map
+            self.reply_quests = reply_quests
             
             print(f"🎯 Loaded {len(self.reply_quests)} reply-triggered quests")
             for q in self.reply_quests:
@@ -258,12 +236,12 @@ class PhraseScanner:
             import traceback
             traceback.print_exc()
     
-    def reload_quests(self):
-        """Reload quest configuration (called periodically)."""
+    def reload_quests(self, snapshot=None):
+        """Reload quest configuration (called when the quest registry changes)."""
         old_phrase_count = len(self.phrase_quests)
         old_reply_count = len(self.reply_quests)
-        self._load_phrase_quests()
-        self._load_reply_quests()
+        self._load_phrase_quests(snapshot)
+        self._load_reply_quests(snapshot)
         if len(self.phrase_quests) != old_phrase_count:
             print(f"🔄 Quest reload: {old_phrase_count} → {len(self.phrase_quests)} phrase quests")
         if len(self.reply_quests) != old_reply_count:
@@ -289,7 +267,7 @@ class PhraseScanner:
             print(f"📊 Events: {self.stats['total_events']:,} | "
                   f"Posts: {self.stats['posts_scanned']:,} | "
                   f"Matches: {self.stats['phrase_matches']} | "
-                  f"Triggered: {self.stats['quests_triggered']} | "
+                  f"Queued: {self.stats['quests_queued']} | "
                   f"Rate: {rate:.0f}/sec")
         
         # Only process commits
@@ -376,61 +354,22 @@ class PhraseScanner:
                     }
                 }
                 
-                # Process in background
-                self.executor.submit(
-                    self._process_phrase_quest,
-                    quest, reply_obj, config['original_phrase']
-                )
+                self._enqueue('phrase', quest.get('title', 'unknown'),
+                              f"phrase:{quest.get('title')}:{post_uri}", {
+                                  'quest_title': quest.get('title'),
+                                  'reply': reply_obj,
+                                  'matched_phrase': config['original_phrase'],
+                              })
     
-    def _process_phrase_quest(self, quest: Dict, reply_obj: Dict, matched_phrase: str):
-        """Process a phrase-triggered quest."""
+    def _enqueue(self, kind: str, quest_title: str, key: str, payload: Dict):
+        """Queue a quest job for the quest workers."""
         try:
-            from ops.conditions import evaluate_conditions
-            from ops.command_executor import execute_quest_commands
-            
-            quest_title = quest.get('title', 'unknown')
-            author_did = reply_obj['author']['did']
-            
-            # Evaluate conditions
-            conditions = quest.get('conditions', [])
-            condition_operator = quest.get('condition_operator', 'AND')
-            
-            thread_result = {'replies': [reply_obj]}
-            
-            if conditions:
-                cond_result = evaluate_conditions(
-                    conditions, condition_operator, thread_result, quest
-                )
-                
-                if not cond_result.get('success'):
-                    if self.verbose:
-                        reason = cond_result.get('reason', 'unknown')
-                        print(f"   ⏭️  Conditions not met: {reason}")
-                    return
-            
-            # Execute commands
-            commands = quest.get('commands', [])
-            
-            if commands:
-                if self.verbose:
-                    print(f"   🎯 Executing quest '{quest_title}' commands")
-                
-                result = execute_quest_commands(
-                    commands, [reply_obj], quest, verbose=self.verbose
-                )
-                
-                if result.get('success'):
-                    self.stats['quests_triggered'] += 1
-                    print(f"✅ Quest '{quest_title}' triggered for {author_did[:30]}...")
-                else:
-                    errors = result.get('errors', [])
-                    print(f"❌ Quest execution errors: {errors}")
-            
+            from ops.quest_jobs import enqueue_job
+            if enqueue_job(kind, quest_title, key, payload):
+                self.stats['quests_queued'] += 1
         except Exception as e:
-            print(f"⚠️  Error processing quest '{quest.get('title')}': {e}")
-            if self.verbose:
-                import traceback
-                traceback.print_exc()
+            self.stats['errors'] += 1
+            print(f"⚠️  Failed to queue quest '{quest_title}': {e}")
     
     async def _check_reply_quests(self, author_did: str, rkey: str, cid: str,
                                    record: Dict, text: str):
@@ -460,46 +399,15 @@ class PhraseScanner:
             print(f"   Quest: {quest.get('title', 'unknown')}")
             print(f"   Text: {text[:80]}...")
         
-        # Process in background
-        self.executor.submit(
-            self._process_reply_quest,
-            post_uri, author_did, text, post_created_at, parent_uri, cid
-        )
-    
-    def _process_reply_quest(self, reply_uri: str, author_did: str, post_text: str,
-                              post_created_at: str, quest_uri: str, reply_cid: str = None):
-        """Process a reply-triggered quest via quest_hooks."""
-        try:
-            from ops.quest_hooks import process_quest_reply
-            
-            result = process_quest_reply(
-                reply_uri=reply_uri,
-                author_did=author_did,
-                author_handle='unknown',  # register_if_needed resolves this
-                post_text=post_text,
-                post_created_at=post_created_at,
-                quest_uri=quest_uri,
-                verbose=self.verbose,
-                reply_cid=reply_cid
-            )
-            
-            if result.get('success') and not result.get('skipped'):
-                self.stats['quests_triggered'] += 1
-                quest_title = result.get('quest_title', 'unknown')
-                commands = result.get('commands_executed', [])
-                print(f"✅ Quest '{quest_title}' triggered for {author_did[:30]}...")
-                if self.verbose and commands:
-                    print(f"   Commands: {', '.join(commands)}")
-            elif result.get('skipped') and self.verbose:
-                print(f"   ⏭️  Skipped: {result.get('skip_reason', 'unknown')}")
-            elif result.get('errors'):
-                print(f"⚠️  Quest errors: {result['errors']}")
-                
-        except Exception as e:
-            print(f"⚠️  Error processing quest reply: {e}")
-            if self.verbose:
-                import traceback
-                traceback.print_exc()
+        self._enqueue('reply', quest.get('title', 'unknown'), f"reply:{parent_uri}:{post_uri}", {
+            'reply_uri': post_uri,
+            'author_did': author_did,
+            'author_handle': 'unknown',  # register_if_needed resolves this
+            'post_text': text,
+            'post_created_at': post_created_at,
+            'quest_uri': parent_uri,
+            'reply_cid': cid,
+        })
     
     def _build_url(self) -> str:
         """Build Jetstream URL with cursor if available."""
@@ -581,7 +489,7 @@ class PhraseScanner:
             self._print_stats()
     
     async def _periodic_reload(self):
-        """Reload quest config periodically."""
+        """Reload quest config periodically (backstop; edits arrive through the quest registry)."""
         while self.running:
             await asyncio.sleep(300)  # 5 minutes
             if self.running:
@@ -599,7 +507,7 @@ class PhraseScanner:
         print(f"Total events:     {self.stats['total_events']:,}")
         print(f"Posts scanned:    {self.stats['posts_scanned']:,}")
         print(f"Phrase matches:   {self.stats['phrase_matches']:,}")
-        print(f"Quests triggered: {self.stats['quests_triggered']:,}")
+        print(f"Quests queued:    {self.stats['quests_queued']:,}")
         print(f"Errors:           {self.stats['errors']:,}")
         print(f"Reconnects:       {self.stats['reconnects']:,}")
         print(f"Event rate:       {rate:.0f}/sec")
@@ -610,7 +518,6 @@ class PhraseScanner:
         self.running = False
         if self.cursor:
             self._save_cursor(self.cursor)
-        self.executor.shutdown(wait=False)
 
 
 def main():
@@ -1,7 +1,5 @@
 from typing import Optional, Dict, List
 import requests
-import json
-import os
 from urllib.parse import quote
 from config import Config
 from .auth import AuthManager
@@ -1054,16 +1052,9 @@ class ReactionsManager:
         """Get the PDS URL for the authenticated user."""
         from config import Config
         
-        try:
-            session_cache = Config.SESSION_CACHE
-            if os.path.exists(session_cache):
-                with open(session_cache, 'r') as f:
-                    data = json.load(f)
-                    pds_url = data.get('pdsUrl')
-                    if pds_url:
-                        return pds_url
-        except Exception:
-            pass
+        pds_url = self.auth.get_pds_url()
+        if pds_url:
+            return pds_url
         
         resolved_pds = self.auth._resolve_pds_for_handle(Config.BLUESKY_HANDLE)
         return resolved_pds
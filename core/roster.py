@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Dreamer Roster Cache
+Versioned, pre-serialised copy of the /api/dreamers roster.
+
+Database triggers on dreamers, spectrum, awards and kindred record a per-DID
+version in roster_versions each time a row touching that dreamer changes, so
+every process that writes those tables (admin, hub, world tick...) invalidates
+the roster without knowing about it. Readers compare the current version with
+their cached one, rebuild only the dreamers that changed, and can hand clients
+a delta of dreamers changed since a version they already hold.
+"""
+
+import json
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from core.database import DatabaseManager
+
+
+# Versions are taken from a sequence when the row changes but only become
+# visible at commit, so a slow transaction can commit a version lower than one
+# already seen. Deltas look back this many versions to pick those up.
+VERSION_OVERLAP = 100
+
+ROSTER_SCHEMA = """
+    CREATE SEQUENCE IF NOT EXISTS roster_version_seq;
+
+    CREATE TABLE IF NOT EXISTS roster_versions (
+        did TEXT PRIMARY KEY,
+        version BIGINT NOT NULL
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_roster_versions_version ON roster_versions(version);
+
+    CREATE OR REPLACE FUNCTION bump_roster_version() RETURNS trigger AS $$
+    DECLARE
+        changed RECORD;
+        next_version BIGINT := nextval('roster_version_seq');
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            changed := OLD;
+        ELSE
+            changed := NEW;
+        END IF;
+
+        IF TG_TABLE_NAME = 'kindred' THEN
+            INSERT INTO roster_versions (did, version) VALUES (changed.did_a, next_version)
+            ON CONFLICT (did) DO UPDATE SET version = EXCLUDED.version;
+            INSERT INTO roster_versions (did, version) VALUES (changed.did_b, next_version)
+            ON CONFLICT (did) DO UPDATE SET version = EXCLUDED.version;
+        ELSE
+            INSERT INTO roster_versions (did, version) VALUES (changed.did, next_version)
+            ON CONFLICT (did) DO UPDATE SET version = EXCLUDED.version;
+        END IF;
+
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+ROSTER_TABLES = ['dreamers', 'spectrum', 'awards', 'kindred']
+
+DREAMERS_QUERY = """
+    SELECT
+        d.did, d.handle, d.name, d.display_name, d.description,
+        d.server, d.avatar, d.banner,
+        d.followers_count, d.follows_count, d.posts_count,
+        d.created_at, d.arrival, d.heading, d.color_hex, d.phanera,
+        d.status, d.designation, d.alts,
+        d.canon_score, d.lore_score, d.patron_score, d.contribution_score,
+        d.community_shield, d.shield_unlocked,
+        s.oblivion, s.authority, s.skeptic, s.receptive,
+        s.liberty, s.entropy, s.octant,
+        s.origin_oblivion, s.origin_authority, s.origin_skeptic,
+        s.origin_receptive, s.origin_liberty, s.origin_entropy, s.origin_octant
+    FROM dreamers d
+    LEFT JOIN spectrum s ON d.did = s.did
+"""
+
+
+def format_dreamer(dreamer: Dict, souvenirs: Dict, kindred: List[str]) -> Dict:
+    """Format a dreamers⋈spectrum row in dreamers.json format."""
+    return {
+        'name': dreamer['name'],
+        'handle': dreamer['handle'],
+        'did': dreamer['did'],
+        'server': dreamer['server'] or '',
+        'souvenirs': souvenirs,
+        'kindred': kindred,
+        'display_name': dreamer['display_name'] or dreamer['name'],
+        'description': dreamer['description'] or '',
+        'avatar': dreamer['avatar'] or '',
+        'banner': dreamer['banner'] or '',
+        'followers_count': dreamer['followers_count'] or 0,
+        'follows_count': dreamer['follows_count'] or 0,
+        'posts_count': dreamer['posts_count'] or 0,
+        'patronage': dreamer['patron_score'] or 0,  # Legacy field name
+        'patron_score': dreamer['patron_score'] or 0,  # New field name (used by profile.js/sidebar.js)
+        'canon_score': dreamer['canon_score'] or 0,
+        'lore_score': dreamer['lore_score'] or 0,
+        'contribution_score': dreamer['contribution_score'] or 0,
+        'created_at': dreamer['created_at'] or '',
+        'arrival': dreamer['arrival'] or 0,
+        'color_hex': dreamer['color_hex'],
+        'phanera': dreamer['phanera'],
+        'status': dreamer['status'],
+        'designation': dreamer['designation'],
+        'alt_names': dreamer['alts'] or '',
+        'community_shield': dreamer['community_shield'] if dreamer['community_shield'] is not None else True,
+        'shield_unlocked': dreamer['shield_unlocked'] if dreamer['shield_unlocked'] is not None else False,
+        'spectrum': {
+            'entropy': dreamer['entropy'] or 0,
+            'oblivion': dreamer['oblivion'] or 0,
+            'liberty': dreamer['liberty'] or 0,
+            'authority': dreamer['authority'] or 0,
+            'receptive': dreamer['receptive'] or 0,
+            'skeptic': dreamer['skeptic'] or 0,
+            'octant': dreamer['octant'],
+            'origin_entropy': dreamer['origin_entropy'] or 0,
+            'origin_oblivion': dreamer['origin_oblivion'] or 0,
+            'origin_liberty': dreamer['origin_liberty'] or 0,
+            'origin_authority': dreamer['origin_authority'] or 0,
+            'origin_receptive': dreamer['origin_receptive'] or 0,
+            'origin_skeptic': dreamer['origin_skeptic'] or 0,
+            'origin_octant': dreamer['origin_octant']
+        },
+        'heading': dreamer['heading']
+    }
+
+
+class RosterCache:
+    """Process-wide cache of the serialised dreamer roster."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self._entries: Dict[str, Dict] = {}
+        self._body: Optional[bytes] = None
+        self._version: Tuple[int, int] = (-1, -1)
+
+    def ensure_schema(self, db: DatabaseManager):
+        """Install the version table and triggers (idempotent)."""
+        if self._schema_ready:
+            return
+        existing = {
+            row['tgname'] for row in db.execute("""
+                SELECT tgname FROM pg_trigger WHERE tgname LIKE '%%_roster_version'
+            """).fetchall()
+        }
+        if existing != {f"{table}_roster_version" for table in ROSTER_TABLES}:
+            db.execute(ROSTER_SCHEMA)
+        for table in ROSTER_TABLES:
+            if f"{table}_roster_version" in existing:
+                continue
+            db.execute(f"""
+                CREATE TRIGGER {table}_roster_version
+                AFTER INSERT OR UPDATE OR DELETE ON {table}
+                FOR EACH ROW EXECUTE FUNCTION bump_roster_version()
+            """)
+        self._schema_ready = True
+
+    def current_version(self, db: DatabaseManager) -> Tuple[int, int]:
+        """
+        Return (latest version, checksum) for the roster.
+
+        The checksum (sum of all per-DID versions) changes when a late-committing
+        transaction lands below the latest version, which the maximum alone misses.
+        """
+        row = db.execute("""
+            SELECT COALESCE(MAX(version), 0) AS version, COALESCE(SUM(version), 0) AS checksum
+            FROM roster_versions
+        """).fetchone()
+        return int(row['version']), int(row['checksum'])
+
+    @staticmethod
+    def etag(version: Tuple[int, int]) -> str:
+        return f'"roster-{version[0]}-{version[1]}"'
+
+    def get(self, db: DatabaseManager) -> Tuple[bytes, Tuple[int, int]]:
+        """Return the serialised roster and its version, rebuilding what changed."""
+        self.ensure_schema(db)
+        version = self.current_version(db)
+
+        with self._lock:
+            if version == self._version and self._body is not None:
+                return self._body, version
+
+            if self._body is None:
+                self._entries = self._load_entries(db)
+            else:
+                changed = self._changed_dids(db, self._version[0])
+                fresh = self._load_entries(db, changed)
+                for did in changed:
+                    if did in fresh:
+                        self._entries[did] = fresh[did]
+                    else:
+                        self._entries.pop(did, None)
+
+            roster = sorted(self._entries.values(), key=lambda d: d['arrival'] or 0, reverse=True)
+            self._body = json.dumps(roster, ensure_ascii=False).encode('utf-8')
+            self._version = version
+            return self._body, version
+
+    def get_changes(self, db: DatabaseManager, since: int) -> Dict:
+        """Return dreamers changed since a version, plus DIDs that no longer exist."""
+        self.ensure_schema(db)
+        version = self.current_version(db)
+        changed = self._changed_dids(db, since)
+        entries = self._load_entries(db, changed) if changed else {}
+        return {
+            'version': version[0],
+            'changed': sorted(entries.values(), key=lambda d: d['arrival'] or 0, reverse=True),
+            'removed': [did for did in changed if did not in entries],
+        }
+
+    def _changed_dids(self, db: DatabaseManager, since: int) -> List[str]:
+        rows = db.execute("""
+            SELECT did FROM roster_versions WHERE version > %s
+        """, (max(0, since - VERSION_OVERLAP),)).fetchall()
+        return [row['did'] for row in rows]
+
+    def _load_entries(self, db: DatabaseManager, dids: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Build formatted roster entries for all dreamers, or only the given DIDs."""
+        if dids is None:
+            dreamers = db.execute(DREAMERS_QUERY).fetchall()
+            awards = db.execute("SELECT did, souvenir_key, earned_epoch FROM awards ORDER BY did").fetchall()
+            kindred = db.execute("""
+                SELECT did_a as did, did_b as kindred_did, discovered_epoch
+                FROM kindred
+                UNION
+                SELECT did_b as did, did_a as kindred_did, discovered_epoch
+                FROM kindred
+                ORDER BY did, discovered_epoch
+            """).fetchall()
+        else:
+            dreamers = db.execute(DREAMERS_QUERY + " WHERE d.did = ANY(%s)", (dids,)).fetchall()
+            awards = db.execute("""
+                SELECT did, souvenir_key, earned_epoch FROM awards WHERE did = ANY(%s) ORDER BY did
+            """, (dids,)).fetchall()
+            kindred = db.execute("""
+                SELECT did_a as did, did_b as kindred_did, discovered_epoch
+                FROM kindred WHERE did_a = ANY(%s)
+                UNION
+                SELECT did_b as did, did_a as kindred_did, discovered_epoch
+                FROM kindred WHERE did_b = ANY(%s)
+                ORDER BY did, discovered_epoch
+            """, (dids, dids)).fetchall()
+
+        souvenirs_by_did = defaultdict(dict)
+        for row in awards:
+            souvenirs_by_did[row['did']][row['souvenir_key']] = row['earned_epoch']
+
+        kindred_by_did = defaultdict(list)
+        for row in kindred:
+            kindred_by_did[row['did']].append(row['kindred_did'])
+
+        return {
+            dreamer['did']: format_dreamer(
+                dreamer,
+                souvenirs_by_did.get(dreamer['did'], {}),
+                kindred_by_did.get(dreamer['did'], [])
+            )
+            for dreamer in dreamers
+        }
+
+
+roster_cache = RosterCache()
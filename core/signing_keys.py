@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Signing Keys
+Caches for bearer-token verification shared by the admin API and the feed
+generator.
+
+- SigningKeyCache: resolved verification keys (an atproto DID's signing key,
+  an OAuth issuer's JWKS) kept in memory and in the signing_keys table, so
+  every process and every restart reuses keys another process already
+  resolved instead of hitting plc.directory / the issuer again.
+- VerifiedTokenCache: token hash -> verified claims, kept until the token's
+  exp, so a client repeating the same bearer token is verified once.
+
+Keys rotate rarely; callers pass force_refresh=True when a signature fails to
+verify against a cached key, which re-resolves and overwrites the stored copy.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from core.database import DatabaseManager
+
+
+KEY_TTL = 24 * 60 * 60          # re-resolve stored keys after a day
+KEY_MEMORY_TTL = 10 * 60        # re-read the shared table after this long
+TOKEN_CACHE_MAX = 5000
+TOKEN_MAX_AGE = 15 * 60         # cap for tokens without an exp claim
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def _ensure_schema(db: DatabaseManager):
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS signing_keys (
+                subject TEXT PRIMARY KEY,
+                key_data TEXT NOT NULL,
+                resolved_at INTEGER NOT NULL
+            )
+        """)
+        _schema_ready = True
+
+
+class SigningKeyCache:
+    """Verification keys by subject, shared across processes through the database."""
+
+    def __init__(self, db: Optional[DatabaseManager] = None):
+        self._db = db
+        self._lock = threading.Lock()
+        # subject -> (read_at, resolved_at, key_data)
+        self._keys: Dict[str, Tuple[float, int, str]] = {}
+
+    def _get_db(self) -> DatabaseManager:
+        if self._db is None:
+            self._db = DatabaseManager()
+        _ensure_schema(self._db)
+        return self._db
+
+    def get(self, subject: str, resolve: Callable[[], Optional[str]], force_refresh: bool = False) -> Optional[str]:
+        """
+        Key data for a subject, calling resolve() only when no fresh copy
+        is cached here or in the signing_keys table.
+        """
+        now = time.time()
+        if not force_refresh:
+            with self._lock:
+                entry = self._keys.get(subject)
+            if entry and now - entry[0] < KEY_MEMORY_TTL and now - entry[1] < KEY_TTL:
+                return entry[2]
+
+            try:
+                row = self._get_db().fetch_one(
+                    "SELECT key_data, resolved_at FROM signing_keys WHERE subject = %s", (subject,)
+                )
+            except Exception as e:
+                print(f"⚠️ Signing key cache read failed: {e}")
+                row = None
+            if row and now - row['resolved_at'] < KEY_TTL:
+                with self._lock:
+                    self._keys[subject] = (now, row['resolved_at'], row['key_data'])
+                return row['key_data']
+
+        key_data = resolve()
+        if not key_data:
+            return None
+
+        resolved_at = int(now)
+        with self._lock:
+            self._keys[subject] = (now, resolved_at, key_data)
+        try:
+            self._get_db().execute("""
+                INSERT INTO signing_keys (subject, key_data, resolved_at)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (subject) DO UPDATE SET
+                    key_data = EXCLUDED.key_data, resolved_at = EXCLUDED.resolved_at
+            """, (subject, key_data, resolved_at))
+        except Exception as e:
+            print(f"⚠️ Signing key cache write failed: {e}")
+        return key_data
+
+
+class VerifiedTokenCache:
+    """Bounded map of token hash -> verified claims, honouring exp."""
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_MAX):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._tokens: 'OrderedDict[str, Tuple[float, Dict]]' = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._tokens.get(key)
+            if entry is None:
+                return None
+            if time.time() >= entry[0]:
+                del self._tokens[key]
+                return None
+            self._tokens.move_to_end(key)
+            return entry[1]
+
+    def put(self, token: str, claims: Dict, exp: Optional[float] = None):
+        """Remember verified claims until exp (capped at TOKEN_MAX_AGE from now)."""
+        now = time.time()
+        expires = now + TOKEN_MAX_AGE
+        if exp:
+            expires = min(float(exp), expires)
+        if expires <= now:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._tokens[key] = (expires, claims)
+            self._tokens.move_to_end(key)
+            while len(self._tokens) > self.max_entries:
+                self._tokens.popitem(last=False)
+
+
+signing_keys = SigningKeyCache()
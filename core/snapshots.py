@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+📸 REVERIE SPECTRUM SNAPSHOTS
+Keyframe + delta storage for the spectrum_snapshots table.
+
+Every KEYFRAME_INTERVAL snapshots a full JSON document is stored (kind='key').
+Snapshots in between are stored as deltas against the snapshot before them
+(kind='delta'):
+- positions: packed records of (roster index, 6 axis values) for dreamers
+  whose spectrum changed, as fixed-width little-endian integers
+- snapshot_data: a small JSON header with dreamers added/removed, any
+  handle/heading/octant changes, and fields that were dropped ('unset')
+
+Both kinds carry the snapshot's summary figures (dreamers_with_spectrum and
+statistics) in snapshot_data, so listings can read them from either kind of
+row without replaying anything.
+
+The roster is the keyframe's dreamer list in stored order, with dreamers added
+by later deltas appended. Rows written before deltas existed (kind='full') are
+plain JSON documents and act as keyframes.
+"""
+
+import json
+import math
+import struct
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+from core.database import DatabaseManager
+
+
+AXES = ['entropy', 'oblivion', 'liberty', 'authority', 'receptive', 'skeptic']
+KEYFRAME_INTERVAL = 48
+REPLAY_PAGE_SIZE = 200
+
+# roster index (uint32) followed by one int16 per axis
+POSITION_RECORD = struct.Struct('<I6h')
+
+# Fields carried in the delta header when they change. Keys a dreamer no
+# longer has (including spectrum) are listed under 'unset'.
+META_FIELDS = ['handle', 'heading', 'octant']
+
+SAVE_LOCK_KEY = 'spectrum_snapshots:save'
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def _distance(a: Dict, b: Optional[Dict] = None) -> float:
+    return math.sqrt(sum((a.get(axis, 0) - (b.get(axis, 0) if b else 0)) ** 2 for axis in AXES))
+
+
+def summarize_dreamers(dreamers: List[Dict], previous: Optional[List[Optional[Dict]]] = None) -> Dict:
+    """
+    Summary figures for a snapshot: how many dreamers have a spectrum, their
+    distance from the origin, and how far they moved since the previous
+    snapshot's roster (0 when there is none).
+    """
+    previous_by_did = {entry['did']: entry for entry in previous or [] if entry}
+    with_spectrum = [dreamer for dreamer in dreamers if dreamer.get('spectrum')]
+
+    total_from_origin = sum(_distance(dreamer['spectrum']) for dreamer in with_spectrum)
+    traveled = 0.0
+    for dreamer in with_spectrum:
+        before = (previous_by_did.get(dreamer['did']) or {}).get('spectrum')
+        if before:
+            traveled += _distance(dreamer['spectrum'], before)
+
+    return {
+        'dreamers_with_spectrum': len(with_spectrum),
+        'statistics': {
+            'total_distance_from_origin': round(total_from_origin, 2),
+            'avg_distance_from_origin': round(total_from_origin / len(with_spectrum), 2) if with_spectrum else 0,
+            'total_distance_traveled': round(traveled, 2),
+        },
+    }
+
+
+class SnapshotStore:
+    """Reads and writes spectrum snapshots as keyframes plus binary deltas."""
+
+    def __init__(self, db: DatabaseManager = None):
+        self.db = db or DatabaseManager()
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        """Add the keyframe/delta columns if they don't exist (once per process)."""
+        global _schema_ready
+        if _schema_ready:
+            return
+        with _schema_lock:
+            if _schema_ready:
+                return
+            self.db.execute("""
+                ALTER TABLE spectrum_snapshots
+                    ADD COLUMN IF NOT EXISTS kind TEXT NOT NULL DEFAULT 'full',
+                    ADD COLUMN IF NOT EXISTS base_id INTEGER,
+                    ADD COLUMN IF NOT EXISTS positions BYTEA
+            """)
+            self.db.execute("""
+                CREATE INDEX IF NOT EXISTS idx_spectrum_snapshots_keyframes
+                ON spectrum_snapshots(id) WHERE kind <> 'delta'
+            """)
+            _schema_ready = True
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def save(self, operation: str, dreamers: List[Dict], epoch: int = None, notes: str = None) -> Optional[int]:
+        """
+        Store a snapshot of the given dreamer entries.
+
+        Writes a delta against the latest snapshot when possible, or a keyframe
+        when there is no usable base or the keyframe interval has elapsed.
+        Concurrent saves are serialized, so every delta's base is the row
+        directly before it.
+
+        Returns:
+            The snapshot row id, or None on failure
+        """
+        epoch = epoch or int(time.time())
+
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (SAVE_LOCK_KEY,))
+
+            latest = self._query(cursor, """
+                SELECT id FROM spectrum_snapshots ORDER BY id DESC LIMIT 1
+            """).fetchone()
+
+            roster = None
+            if latest:
+                for _, roster in self._replay(latest['id'], latest['id'], cursor):
+                    pass
+            summary = summarize_dreamers(dreamers, roster)
+
+            if roster is not None:
+                keyframe = self._keyframe_at_or_before(latest['id'], cursor)
+                since_keyframe = self._query(cursor, """
+                    SELECT COUNT(*) AS count FROM spectrum_snapshots WHERE id > %s
+                """, (keyframe['id'],)).fetchone()['count']
+
+                if since_keyframe + 1 < KEYFRAME_INTERVAL:
+                    try:
+                        header, positions = self._encode_delta(roster, dreamers)
+                    except (struct.error, TypeError):
+                        header = None  # Values don't fit the packed format - store a keyframe
+                    if header is not None:
+                        header['epoch'] = epoch
+                        header['total_dreamers'] = len(dreamers)
+                        header.update(summary)
+                        return self._insert(epoch, operation, len(dreamers), json.dumps(header),
+                                            notes, 'delta', latest['id'], positions, cursor)
+
+            snapshot = {
+                'epoch': epoch,
+                'total_dreamers': len(dreamers),
+                'dreamers': dreamers,
+                **summary,
+            }
+            return self._insert(epoch, operation, len(dreamers), json.dumps(snapshot), notes,
+                                'key', None, None, cursor)
+
+    def _query(self, cursor, query: str, params: Tuple = ()):
+        """Run a query on the given transaction cursor, or through the pool when there is none."""
+        if cursor is None:
+            return self.db.execute(query, params)
+        cursor.execute(query, params)
+        return cursor
+
+    def _insert(self, epoch: int, operation: str, total: int, snapshot_data: str, notes: Optional[str],
+                kind: str, base_id: Optional[int], positions: Optional[bytes], cursor=None) -> Optional[int]:
+        cursor = self._query(cursor, """
+            INSERT INTO spectrum_snapshots
+                (epoch, operation, total_dreamers, snapshot_data, created_at, notes, kind, base_id, positions)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            RETURNING id
+        """, (epoch, operation, total, snapshot_data, epoch, notes, kind, base_id, positions))
+        row = cursor.fetchone()
+        return row['id'] if row else None
+
+    def _encode_delta(self, roster: List[Optional[Dict]], dreamers: List[Dict]) -> Tuple[Dict, bytes]:
+        """Describe how to turn the roster into the given dreamer entries."""
+        index_by_did = {entry['did']: i for i, entry in enumerate(roster) if entry}
+        seen = set()
+        added = []
+        meta = {}
+        unset = {}
+        positions = bytearray()
+
+        for dreamer in dreamers:
+            seen.add(dreamer['did'])
+            i = index_by_did.get(dreamer['did'])
+            if i is None:
+                added.append(dreamer)
+                continue
+
+            previous = roster[i]
+            changes = {
+                field: dreamer[field]
+                for field in META_FIELDS
+                if field in dreamer and (field not in previous or dreamer[field] != previous[field])
+            }
+            dropped = [field for field in META_FIELDS if field in previous and field not in dreamer]
+            spectrum = dreamer.get('spectrum')
+            if not spectrum and 'spectrum' in previous:
+                dropped.append('spectrum')
+            if changes:
+                meta[str(i)] = changes
+            if dropped:
+                unset[str(i)] = dropped
+
+            if spectrum and spectrum != previous.get('spectrum'):
+                positions += POSITION_RECORD.pack(i, *(spectrum[axis] for axis in AXES))
+
+        removed = [i for did, i in index_by_did.items() if did not in seen]
+
+        return {'added': added, 'removed': removed, 'meta': meta, 'unset': unset}, bytes(positions)
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def get_snapshot(self, snapshot_id: int) -> Optional[Dict]:
+        """Materialise one snapshot, or None if it doesn't exist."""
+        for snapshot in self.iter_snapshots(snapshot_id, snapshot_id):
+            return snapshot
+        return None
+
+    def iter_snapshots(self, start_id: int, end_id: int) -> Iterator[Dict]:
+        """
+        Materialise every snapshot with start_id <= id <= end_id, in order.
+
+        The roster is replayed forward once, so streaming a range costs one
+        keyframe plus the deltas in it rather than a full document per snapshot.
+        """
+        for row, roster in self._replay(start_id, end_id):
+            yield {
+                'id': row['id'],
+                'epoch': row['epoch'],
+                'operation': row['operation'],
+                'created_at': row['created_at'],
+                'notes': row['notes'],
+                'data': {
+                    'epoch': row['epoch'],
+                    'total_dreamers': row['total_dreamers'],
+                    'dreamers': sorted(
+                        (dict(entry) for entry in roster if entry),
+                        key=lambda entry: entry.get('handle') or ''
+                    ),
+                },
+            }
+
+    def _keyframe_at_or_before(self, snapshot_id: int, cursor=None) -> Optional[Dict]:
+        return self._query(cursor, """
+            SELECT id FROM spectrum_snapshots
+            WHERE id <= %s AND kind <> 'delta'
+            ORDER BY id DESC
+            LIMIT 1
+        """, (snapshot_id,)).fetchone()
+
+    def _replay(self, start_id: int, end_id: int, cursor=None) -> Iterator[Tuple[Dict, List[Optional[Dict]]]]:
+        """
+        Yield (row, roster) for each snapshot in [start_id, end_id].
+
+        The roster list is updated in place between yields; copy it if it
+        needs to outlive the next iteration.
+        """
+        keyframe = self._keyframe_at_or_before(start_id, cursor)
+        if not keyframe:
+            return
+
+        roster: List[Optional[Dict]] = []
+        previous_id = None
+        after_id = keyframe['id'] - 1
+
+        while True:
+            rows = self._query(cursor, """
+                SELECT id, epoch, operation, total_dreamers, snapshot_data, created_at, notes,
+                       kind, base_id, positions
+                FROM spectrum_snapshots
+                WHERE id > %s AND id <= %s
+                ORDER BY id ASC
+                LIMIT %s
+            """, (after_id, end_id, REPLAY_PAGE_SIZE)).fetchall()
+
+            if not rows:
+                return
+
+            for row in rows:
+                if row['kind'] == 'delta':
+                    if row['base_id'] != previous_id:
+                        raise ValueError(
+                            f"Snapshot {row['id']} is a delta of {row['base_id']}, "
+                            f"but follows {previous_id}"
+                        )
+                    self._apply_delta(roster, json.loads(row['snapshot_data']), row['positions'])
+                else:
+                    data = json.loads(row['snapshot_data'])
+                    roster = [dict(entry) for entry in data.get('dreamers', [])]
+
+                previous_id = row['id']
+                if row['id'] >= start_id:
+                    yield row, roster
+
+            after_id = rows[-1]['id']
+
+    def _apply_delta(self, roster: List[Optional[Dict]], header: Dict, positions: Optional[bytes]):
+        """Apply a delta header and packed positions to the roster in place."""
+        for i in header.get('removed', []):
+            roster[i] = None
+
+        for i, changes in header.get('meta', {}).items():
+            roster[int(i)].update(changes)
+
+        for i, fields in header.get('unset', {}).items():
+            entry = roster[int(i)]
+            for field in fields:
+                entry.pop(field, None)
+
+        if positions:
+            for record in POSITION_RECORD.iter_unpack(bytes(positions)):
+                roster[record[0]]['spectrum'] = dict(zip(AXES, record[1:]))
+
+        roster.extend(dict(entry) for entry in header.get('added', []))
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Story Feed Hydration
+Per-URI cache of everything /api/story/feed fetches from outside the database.
+
+- posts: appview getPosts results (embed, counts, author), TTL POST_TTL
+- records: long-form / non-Bluesky records resolved through the author's PDS
+  (plc.directory + getRecord + getProfile), TTL RECORD_TTL
+- labels: lore.farm indexed canon/content listings, TTL LABEL_TTL
+
+Cold misses are fetched concurrently (getPosts in chunks of 25) and waited on
+for at most MISS_WAIT_SECONDS. Stale entries are served as-is and refreshed in
+the background, so a warm feed request never waits on the network. Concurrent
+requests for the same URI share one fetch.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import requests
+
+from core.database import DatabaseManager
+
+
+POST_TTL = 5 * 60
+RECORD_TTL = 15 * 60
+LABEL_TTL = 30              # label removals should show up quickly
+MISSING_TTL = 2 * 60        # retry URIs the appview didn't return after this long
+MISS_WAIT_SECONDS = 3
+GET_POSTS_CHUNK = 25
+HYDRATE_WORKERS = 6
+CACHE_MAX_ENTRIES = 5000
+
+
+class StoryHydrator:
+    """Cached, concurrent hydration of story feed entries."""
+
+    def __init__(self, appview_url: str, is_safe_pds: Callable[[str], bool]):
+        self.appview_url = appview_url
+        self.is_safe_pds = is_safe_pds
+        self._lock = threading.Lock()
+        self._posts: 'OrderedDict[str, Tuple[float, Optional[Dict]]]' = OrderedDict()
+        self._records: 'OrderedDict[str, Tuple[float, Optional[Dict]]]' = OrderedDict()
+        self._labels: Dict[Tuple[str, int], Tuple[float, List[Dict]]] = {}
+        self._post_inflight: Dict[str, Future] = {}
+        self._record_inflight: Dict[str, Future] = {}
+        self._label_inflight: Dict[Tuple[str, int], Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=HYDRATE_WORKERS, thread_name_prefix='story-hydrate')
+
+    # ------------------------------------------------------------------
+    # Posts (appview getPosts)
+    # ------------------------------------------------------------------
+
+    def get_posts(self, uris: List[str], wait_seconds: float = MISS_WAIT_SECONDS) -> Tuple[Dict[str, Dict], Set[str]]:
+        """
+        Return (posts by URI, URIs the appview is known not to have).
+
+        URIs not yet cached are fetched and waited on for up to wait_seconds;
+        any still outstanding are simply left out of both results.
+        """
+        now = time.time()
+        misses, stale = [], []
+        with self._lock:
+            for uri in dict.fromkeys(uris):
+                entry = self._posts.get(uri)
+                if entry is None:
+                    misses.append(uri)
+                elif now - entry[0] > (POST_TTL if entry[1] is not None else MISSING_TTL):
+                    stale.append(uri)
+            futures = self._schedule_posts(misses + stale)
+
+        pending = [futures[uri] for uri in misses if uri in futures]
+        if pending:
+            wait(pending, timeout=wait_seconds)
+
+        posts, missing = {}, set()
+        with self._lock:
+            for uri in uris:
+                entry = self._posts.get(uri)
+                if entry is None:
+                    continue
+                if entry[1] is None:
+                    missing.add(uri)
+                else:
+                    posts[uri] = entry[1]
+        return posts, missing
+
+    def _schedule_posts(self, uris: List[str]) -> Dict[str, Future]:
+        """Start getPosts fetches for URIs not already in flight (lock held)."""
+        futures = {uri: self._post_inflight[uri] for uri in uris if uri in self._post_inflight}
+        todo = [uri for uri in uris if uri not in futures]
+        for i in range(0, len(todo), GET_POSTS_CHUNK):
+            chunk = todo[i:i + GET_POSTS_CHUNK]
+            future = self._executor.submit(self._fetch_posts, chunk)
+            for uri in chunk:
+                self._post_inflight[uri] = future
+                futures[uri] = future
+        return futures
+
+    def _fetch_posts(self, chunk: List[str]):
+        try:
+            resp = requests.get(
+                f'{self.appview_url}/xrpc/app.bsky.feed.getPosts',
+                params={'uris': chunk},
+                timeout=15
+            )
+            if resp.status_code != 200:
+                return
+            found = {post['uri']: post for post in resp.json().get('posts', [])}
+            fetched_at = time.time()
+            with self._lock:
+                # The appview checked every URI in the chunk; absent ones are
+                # likely deleted and are remembered as missing.
+                for uri in chunk:
+                    self._store(self._posts, uri, (fetched_at, found.get(uri)))
+        except Exception as e:
+            print(f"⚠️ Story hydration getPosts error: {e}")
+        finally:
+            with self._lock:
+                for uri in chunk:
+                    self._post_inflight.pop(uri, None)
+
+    # ------------------------------------------------------------------
+    # Records (PDS getRecord for long-form and priority stories)
+    # ------------------------------------------------------------------
+
+    def get_records(self, uris: List[str], wait_seconds: float = MISS_WAIT_SECONDS) -> Dict[str, Dict]:
+        """
+        Return story dicts for records resolved through their author's PDS.
+
+        Each value is a fresh copy the caller may modify.
+        """
+        now = time.time()
+        misses = []
+        futures = {}
+        with self._lock:
+            for uri in dict.fromkeys(uris):
+                entry = self._records.get(uri)
+                if entry is not None and now - entry[0] <= (RECORD_TTL if entry[1] is not None else MISSING_TTL):
+                    continue
+                if entry is None:
+                    misses.append(uri)
+                if uri not in self._record_inflight:
+                    self._record_inflight[uri] = self._executor.submit(self._fetch_record, uri)
+                futures[uri] = self._record_inflight[uri]
+
+        pending = [futures[uri] for uri in misses]
+        if pending:
+            wait(pending, timeout=wait_seconds)
+
+        records = {}
+        with self._lock:
+            for uri in uris:
+                entry = self._records.get(uri)
+                if entry is not None and entry[1] is not None:
+                    records[uri] = copy.deepcopy(entry[1])
+        return records
+
+    def _fetch_record(self, uri: str):
+        try:
+            story = self._resolve_record(uri)
+            with self._lock:
+                self._store(self._records, uri, (time.time(), story))
+        except Exception as e:
+            print(f"⚠️ Story hydration record error for {uri}: {e}")
+        finally:
+            with self._lock:
+                self._record_inflight.pop(uri, None)
+
+    def _resolve_record(self, uri: str) -> Optional[Dict]:
+        """Fetch a record from its author's PDS and build a story entry for it."""
+        parts = uri.replace('at://', '').split('/')
+        if len(parts) < 3:
+            return None
+        did, collection, rkey = parts[0], parts[1], parts[2]
+
+        pds = None
+        did_doc = None
+        try:
+            if did.startswith('did:plc:'):
+                did_resp = requests.get(f'https://plc.directory/{did}', timeout=10)
+            elif did.startswith('did:web:'):
+                host = did.replace('did:web:', '').replace('%3A', ':')
+                did_resp = requests.get(f'https://{host}/.well-known/did.json', timeout=10)
+            else:
+                did_resp = None
+            if did_resp is not None and did_resp.ok:
+                did_doc = did_resp.json()
+                for service in did_doc.get('service', []):
+                    if service.get('type') == 'AtprotoPersonalDataServer':
+                        pds = service.get('serviceEndpoint')
+                        break
+        except Exception:
+            pds = None
+
+        if not pds or not self.is_safe_pds(pds):
+            return None
+
+        try:
+            rec_resp = requests.get(
+                f'{pds}/xrpc/com.atproto.repo.getRecord',
+                params={'repo': did, 'collection': collection, 'rkey': rkey},
+                timeout=10
+            )
+            if not rec_resp.ok:
+                return None
+            rec_data = rec_resp.json()
+            record = rec_data.get('value', {}) if isinstance(rec_data, dict) else {}
+        except Exception:
+            return None
+
+        if not isinstance(record, dict):
+            record = {}
+        record_type = record.get('$type', collection)
+        formatting = record.get('formatting', [])
+        title_formatting = record.get('titleFormatting', [])
+
+        handle = ''
+        display_name = ''
+        avatar = ''
+        color_hex = '#734ba1'
+
+        dreamer = DatabaseManager().fetch_one(
+            'SELECT handle, name, avatar, color_hex FROM dreamers WHERE did = %s LIMIT 1',
+            (did,)
+        )
+        if dreamer:
+            handle = dreamer.get('handle') or handle
+            display_name = dreamer.get('name') or display_name
+            avatar = dreamer.get('avatar') or avatar
+            color_hex = dreamer.get('color_hex') or color_hex
+
+        try:
+            profile_resp = requests.get(
+                f'{self.appview_url}/xrpc/app.bsky.actor.getProfile',
+                params={'actor': did},
+                timeout=8
+            )
+            if profile_resp.ok:
+                profile = profile_resp.json()
+                handle = profile.get('handle') or handle
+                display_name = profile.get('displayName') or display_name
+                avatar = profile.get('avatar') or avatar
+        except Exception:
+            pass
+
+        if not handle and isinstance(did_doc, dict):
+            aka = did_doc.get('alsoKnownAs', [])
+            if aka:
+                handle = aka[0].replace('at://', '')
+
+        if not display_name:
+            display_name = handle.split('.')[0] if handle else did[:20] + '...'
+
+        if record_type == 'app.bsky.feed.post':
+            post_url = f'https://bsky.app/profile/{handle or did}/post/{rkey}'
+        else:
+            post_url = f'https://pds.ls/{uri}'
+
+        return {
+            'uri': uri,
+            'cid': rec_data.get('cid', '') if isinstance(rec_data, dict) else '',
+            'isCanon': False,
+            'isLore': False,
+            'recordType': record_type,
+            'title': record.get('title', ''),
+            'titleFormatting': title_formatting if isinstance(title_formatting, list) else [],
+            'isLongForm': record_type != 'app.bsky.feed.post',
+            'formatting': formatting if isinstance(formatting, list) else [],
+            'text': record.get('text', '') or record.get('textContent', ''),
+            'createdAt': record.get('createdAt', '') or record.get('publishedAt', ''),
+            'author': {
+                'did': did,
+                'handle': handle,
+                'displayName': display_name,
+                'avatar': avatar,
+                'color': color_hex,
+            },
+            'url': post_url,
+            'embed': None,
+            'likeCount': 0,
+            'repostCount': 0,
+            'replyCount': 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Labels (lore.farm indexed listings)
+    # ------------------------------------------------------------------
+
+    def get_indexed(self, feed_type: str, limit: int, force: bool = False) -> List[Dict]:
+        """
+        Return lore.farm indexed items for 'canon' or 'content'.
+
+        Fetched inline on first use or when force is set; otherwise a stale
+        listing is returned while a refresh runs in the background.
+        """
+        key = (feed_type, limit)
+        with self._lock:
+            entry = self._labels.get(key)
+            if entry is not None and not force:
+                if time.time() - entry[0] > LABEL_TTL and key not in self._label_inflight:
+                    self._label_inflight[key] = self._executor.submit(self._fetch_indexed, key)
+                return entry[1]
+            future = self._label_inflight.get(key)
+            if future is None:
+                future = self._executor.submit(self._fetch_indexed, key)
+                self._label_inflight[key] = future
+
+        wait([future], timeout=15)
+        with self._lock:
+            entry = self._labels.get(key)
+        return entry[1] if entry else []
+
+    def _fetch_indexed(self, key: Tuple[str, int]):
+        feed_type, limit = key
+        try:
+            resp = requests.get(
+                f'https://lore.farm/api/worlds/reverie.house/{feed_type}/indexed',
+                params={'limit': limit},
+                timeout=15
+            )
+            if resp.status_code != 200:
+                return
+            payload = resp.json()
+            items = payload.get('canon', []) if feed_type == 'canon' else payload.get('content', [])
+            with self._lock:
+                self._labels[key] = (time.time(), items)
+        except Exception as e:
+            print(f"⚠️ Story hydration lore.farm error ({feed_type}): {e}")
+        finally:
+            with self._lock:
+                self._label_inflight.pop(key, None)
+
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _store(cache: 'OrderedDict', key: str, value):
+        """Insert into an LRU-bounded cache (lock held)."""
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > CACHE_MAX_ENTRIES:
+            cache.popitem(last=False)
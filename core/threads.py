@@ -1,6 +1,8 @@
+import copy
 import requests
-import json
 import time
+from datetime import datetime
+from threading import Lock, Event
 from typing import Optional, Dict, List, Set, Tuple
 from config import Config
 from .auth import AuthManager
@@ -8,6 +10,15 @@ from .auth import AuthManager
 # AppView cache proxy (local)
 BSKY_CACHE = 'http://127.0.0.1:2847'
 
+# Thread snapshots are shared by every ThreadsManager in the process, so quest
+# evaluation and the watchers hitting the same hot thread reuse one another's work.
+SNAPSHOT_MAX_ENTRIES = 256
+COALESCE_WAIT_SECONDS = 60
+
+_snapshots: Dict[Tuple[str, int, bool], Dict] = {}
+_inflight: Dict[Tuple[str, int, bool], Event] = {}
+_snapshot_lock = Lock()
+
 class ThreadsManager:
     """Handles thread operations including fetching posts and processing replies."""
     
@@ -41,27 +52,118 @@ class ThreadsManager:
         print(f"🔍 Extracted {len(flat_replies)} replies from thread")
         return flat_replies
 
-    def get_thread_replies(self, post_uri: str, max_depth: int = 10, include_metadata: bool = True) -> Dict:
+    def get_thread_replies(self, post_uri: str, max_depth: int = 10, include_metadata: bool = True, max_age: float = 0) -> Dict:
         """
         Get all replies to a post using getPostThread with comprehensive pagination support.
         Returns detailed statistics and all unique reply authors.
+        
+        A snapshot of the last result is kept per post URI. If it is younger than
+        max_age seconds it is returned without fetching; otherwise the thread is
+        re-fetched and unchanged subtrees are reused from the snapshot. Concurrent
+        callers for the same thread share a single fetch. Callers get their own
+        copy of the result, so they may modify it.
+        """
+        key = (post_uri, max_depth, include_metadata)
+        
+        with _snapshot_lock:
+            snapshot = _snapshots.get(key)
+            if snapshot and max_age and time.time() - snapshot['fetched_at'] < max_age:
+                return copy.deepcopy(snapshot['result'])
+            
+            pending = _inflight.get(key)
+            if pending is None:
+                _inflight[key] = Event()
+        
+        if pending is not None:
+            # Another caller is already fetching this thread - wait for its snapshot
+            pending.wait(COALESCE_WAIT_SECONDS)
+            with _snapshot_lock:
+                snapshot = _snapshots.get(key)
+            if snapshot:
+                return copy.deepcopy(snapshot['result'])
+            return self._empty_reply_result()
+        
+        try:
+            result, subtrees = self._fetch_thread_replies(
+                post_uri, max_depth, include_metadata,
+                snapshot['subtrees'] if snapshot else None
+            )
+            if result['stats']['api_calls_made']:
+                self._store_snapshot(key, result, subtrees)
+                return copy.deepcopy(result)
+            return result
+        finally:
+            with _snapshot_lock:
+                done = _inflight.pop(key, None)
+            if done:
+                done.set()
+    
+    def get_replies_since(self, post_uri: str, since: Optional[str] = None, max_depth: int = 10) -> List[Dict]:
         """
-        pass
+        Get replies to a post that are new since a point in time.
         
+        With an ISO8601 `since`, returns replies created after it. Without one,
+        returns replies not present in this thread's previous snapshot (all
+        replies on the first call).
+        """
+        key = (post_uri, max_depth, True)
+        with _snapshot_lock:
+            previous = _snapshots.get(key)
+        known_uris = previous['uris'] if previous else set()
+        
+        thread = self.get_thread_replies(post_uri, max_depth=max_depth, include_metadata=True)
+        replies = thread.get('replies', [])
+        
+        if since:
+            since_epoch = self._parse_timestamp(since)
+            if since_epoch is None:
+                return replies
+            return [
+                reply for reply in replies
+                if (self._parse_timestamp(reply.get('metadata', {}).get('created_at', '')) or 0) > since_epoch
+            ]
+        
+        return [reply for reply in replies if reply['uri'] not in known_uris]
+    
+    def clear_snapshot(self, post_uri: Optional[str] = None) -> None:
+        """Drop cached thread snapshots for one post, or all of them."""
+        with _snapshot_lock:
+            if post_uri is None:
+                _snapshots.clear()
+            else:
+                for key in [k for k in _snapshots if k[0] == post_uri]:
+                    del _snapshots[key]
+    
+    def _store_snapshot(self, key: Tuple[str, int, bool], result: Dict, subtrees: Dict[str, Dict]) -> None:
+        """Store a thread snapshot, evicting the oldest when the cache is full."""
+        with _snapshot_lock:
+            _snapshots[key] = {
+                "fetched_at": time.time(),
+                "result": result,
+                "subtrees": subtrees,
+                "uris": {reply['uri'] for reply in result['replies']}
+            }
+            if len(_snapshots) > SNAPSHOT_MAX_ENTRIES:
+                oldest = min(_snapshots, key=lambda k: _snapshots[k]['fetched_at'])
+                del _snapshots[oldest]
+    
+    def _fetch_thread_replies(self, post_uri: str, max_depth: int, include_metadata: bool, known_subtrees: Optional[Dict[str, Dict]]) -> Tuple[Dict, Dict[str, Dict]]:
+        """Fetch and walk every page of a thread, reusing known subtrees where unchanged."""
         all_replies = []
         unique_authors = {}
         processed_uris = set()
+        subtrees = {}
         api_calls_made = 0
         max_depth_reached = 0
         
         thread_data = self._fetch_thread_with_fallback(post_uri, max_depth)
         if not thread_data:
-            return self._empty_reply_result()
+            return self._empty_reply_result(), subtrees
         
         api_calls_made += 1
         
         replies, authors, depth_reached = self._process_thread_data(
-            thread_data, processed_uris, max_depth, include_metadata
+            thread_data, processed_uris, max_depth, include_metadata, known_subtrees, subtrees
         )
         
         all_replies.extend(replies)
@@ -82,7 +184,7 @@ class ThreadsManager:
             page_count += 1
             
             page_replies, page_authors, page_depth = self._process_thread_data(
-                paginated_data, processed_uris, max_depth, include_metadata
+                paginated_data, processed_uris, max_depth, include_metadata, known_subtrees, subtrees
             )
             
             all_replies.extend(page_replies)
@@ -99,16 +201,15 @@ class ThreadsManager:
             "unique_authors": len(unique_authors),
             "max_depth_reached": max_depth_reached,
             "api_calls_made": api_calls_made,
-            "pages_processed": page_count
+            "pages_processed": page_count,
+            "subtrees_reused": sum(1 for entry in subtrees.values() if entry.get('reused'))
         }
         
-        pass
-        
         return {
             "replies": all_replies,
             "authors": list(unique_authors.values()),
             "stats": stats
-        }
+        }, subtrees
     
     def _fetch_thread_with_fallback(self, post_uri: str, max_depth: int = 10) -> Optional[Dict]:
         """Fetch thread data with comprehensive fallback strategy."""
@@ -203,7 +304,8 @@ class ThreadsManager:
             print(f"❌ Network error on {server}: {e}")
             return None
     
-    def _process_thread_data(self, thread_data: Dict, processed_uris: Set[str], max_depth: int, include_metadata: bool) -> Tuple[List[Dict], Dict[str, Dict], int]:
+    def _process_thread_data(self, thread_data: Dict, processed_uris: Set[str], max_depth: int, include_metadata: bool,
+                             known_subtrees: Optional[Dict[str, Dict]] = None, subtrees: Optional[Dict[str, Dict]] = None) -> Tuple[List[Dict], Dict[str, Dict], int]:
         """Process thread data and extract replies with metadata."""
         if not thread_data:
             return [], {}, 0
@@ -219,7 +321,7 @@ class ThreadsManager:
         replies = thread.get('replies', [])
         if replies:
             processed_replies, processed_authors, depth = self._process_replies_recursive(
-                replies, processed_uris, 1, max_depth, include_metadata
+                replies, processed_uris, 1, max_depth, include_metadata, known_subtrees, subtrees
             )
             all_replies.extend(processed_replies)
             all_authors.update(processed_authors)
@@ -227,8 +329,16 @@ class ThreadsManager:
         
         return all_replies, all_authors, max_depth_reached
     
-    def _process_replies_recursive(self, replies: List[Dict], processed_uris: Set[str], current_depth: int, max_depth: int, include_metadata: bool) -> Tuple[List[Dict], Dict[str, Dict], int]:
-        """Recursively process replies at all depths."""
+    def _process_replies_recursive(self, replies: List[Dict], processed_uris: Set[str], current_depth: int, max_depth: int, include_metadata: bool,
+                                   known_subtrees: Optional[Dict[str, Dict]] = None, subtrees: Optional[Dict[str, Dict]] = None) -> Tuple[List[Dict], Dict[str, Dict], int]:
+        """
+        Recursively process replies at all depths.
+        
+        When a reply's descendant URIs match the previous snapshot, its processed
+        descendants are taken from known_subtrees instead of being rebuilt (their
+        metadata counts are those of the earlier fetch). Every processed reply's
+        descendants are recorded into subtrees for next time.
+        """
         if not replies or current_depth > max_depth:
             return [], {}, current_depth - 1
         
@@ -283,16 +393,63 @@ class ThreadsManager:
             processed_replies.append(reply_entry)
             
             nested_replies = reply_item.get('replies', [])
-            if nested_replies and current_depth < max_depth:
-                nested_processed, nested_authors, nested_depth = self._process_replies_recursive(
-                    nested_replies, processed_uris, current_depth + 1, max_depth, include_metadata
-                )
-                processed_replies.extend(nested_processed)
-                processed_authors.update(nested_authors)
-                max_depth_reached = max(max_depth_reached, nested_depth)
+            known = known_subtrees.get(uri) if known_subtrees else None
+            descendant_uris = None
+            if known is not None:
+                descendant_uris = self._collect_subtree_uris(nested_replies, current_depth + 1, max_depth)
+            
+            if known is not None and known['descendants'] == descendant_uris:
+                nested_processed = [entry for entry in known['entries'] if entry['uri'] not in processed_uris]
+                processed_uris.update(entry['uri'] for entry in nested_processed)
+                nested_authors = known['authors']
+                nested_depth = known['depth']
+                if subtrees is not None:
+                    for entry in nested_processed:
+                        if entry['uri'] in known_subtrees:
+                            subtrees[entry['uri']] = known_subtrees[entry['uri']]
+                reused = True
+            else:
+                nested_processed, nested_authors, nested_depth = [], {}, current_depth
+                if nested_replies and current_depth < max_depth:
+                    nested_processed, nested_authors, nested_depth = self._process_replies_recursive(
+                        nested_replies, processed_uris, current_depth + 1, max_depth, include_metadata,
+                        known_subtrees, subtrees
+                    )
+                reused = False
+            
+            if subtrees is not None:
+                subtrees[uri] = {
+                    "descendants": frozenset(entry['uri'] for entry in nested_processed),
+                    "entries": nested_processed,
+                    "authors": nested_authors,
+                    "depth": nested_depth,
+                    "reused": reused
+                }
+            
+            processed_replies.extend(nested_processed)
+            for author_key, author_info in nested_authors.items():
+                processed_authors.setdefault(author_key, author_info)
+            max_depth_reached = max(max_depth_reached, nested_depth)
         
         return processed_replies, processed_authors, max_depth_reached
     
+    def _collect_subtree_uris(self, replies: List[Dict], current_depth: int, max_depth: int) -> frozenset:
+        """Collect the URIs in a raw reply subtree without building reply entries."""
+        uris = set()
+        stack = [(replies, current_depth)]
+        while stack:
+            reply_list, depth = stack.pop()
+            if depth > max_depth:
+                continue
+            for reply_item in reply_list:
+                uri = (reply_item.get('post') or {}).get('uri')
+                if uri:
+                    uris.add(uri)
+                    nested = reply_item.get('replies', [])
+                    if nested and depth < max_depth:
+                        stack.append((nested, depth + 1))
+        return frozenset(uris)
+    
     def _extract_cursor(self, thread_data: Dict) -> Optional[str]:
         """Extract pagination cursor from thread data."""
         if not thread_data:
@@ -310,15 +467,19 @@ class ThreadsManager:
         
         return None
     
-    def _get_cached_pds_url(self) -> Optional[str]:
-        """Get cached PDS URL from auth session."""
+    def _parse_timestamp(self, value: str) -> Optional[float]:
+        """Parse an ISO8601 timestamp to epoch seconds."""
+        if not value:
+            return None
         try:
-            with open(self.auth.session_cache, 'r') as f:
-                cache_data = json.load(f)
-                return cache_data.get('pdsUrl')
-        except Exception:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        except ValueError:
             return None
     
+    def _get_cached_pds_url(self) -> Optional[str]:
+        """Get cached PDS URL from auth session."""
+        return self.auth.get_pds_url()
+    
     def _empty_reply_result(self) -> Dict:
         """Return empty result structure."""
         return {
@@ -329,6 +490,7 @@ class ThreadsManager:
                 "unique_authors": 0,
                 "max_depth_reached": 0,
                 "api_calls_made": 0,
-                "pages_processed": 0
+                "pages_processed": 0,
+                "subtrees_reused": 0
             }
         }
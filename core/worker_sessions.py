@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Worker Sessions
+Shared store of authenticated PDS sessions for accounts with stored app
+passwords (workers, courier senders, wretched profiles).
+
+Every service used to decrypt the app password and call createSession each
+time it needed a client. Full logins are slow and tightly rate-limited by
+PDSes, so sessions now live here instead:
+
+- access/refresh JWTs per DID, encrypted in the worker_sessions table and
+  mirrored in memory, so every process reuses the same session
+- an expiring access token is renewed with refreshSession; createSession is
+  only used when there is no session or the refresh token is rejected
+- renewals take a per-DID advisory lock, so two processes never rotate the
+  same refresh token at once
+
+get() reports 'valid', 'invalid' (the PDS rejected the password) or 'skip'
+(network error, rate limit, server error), the same classification
+workerwatch uses to decide whether to purge a credential.
+"""
+
+import base64
+import json
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import requests
+
+from core.database import DatabaseManager
+from core.encryption import decrypt_password, encrypt_password
+
+
+ACCESS_REFRESH_MARGIN = 5 * 60      # renew access tokens this long before exp
+ACCESS_FALLBACK_TTL = 60 * 60       # when a token's exp can't be read
+REQUEST_TIMEOUT = 10
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def _ensure_schema(db: DatabaseManager):
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS worker_sessions (
+                did TEXT PRIMARY KEY,
+                handle TEXT,
+                pds_url TEXT NOT NULL,
+                access_jwt TEXT NOT NULL,
+                refresh_jwt TEXT NOT NULL,
+                access_expires_at INTEGER NOT NULL,
+                refresh_expires_at INTEGER,
+                updated_at INTEGER NOT NULL
+            )
+        """)
+        _schema_ready = True
+
+
+def resolve_pds_url(pds_url: Optional[str]) -> str:
+    """PDS endpoint to authenticate against for a stored pds_url."""
+    if not pds_url:
+        return 'https://bsky.social'
+    # The local PDS is reached through its public URL; the internal Docker
+    # address isn't reachable from every container
+    if 'reverie.house' in pds_url:
+        return 'https://reverie.house'
+    return pds_url.rstrip('/')
+
+
+def _jwt_exp(token: str) -> Optional[int]:
+    """exp claim of a JWT, read without verification."""
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+    except Exception:
+        return None
+
+
+def _classify_status(status_code: int) -> str:
+    if status_code in (400, 401):
+        return 'invalid'
+    return 'skip'
+
+
+class WorkerSessionStore:
+    """Access/refresh JWTs per DID, shared across processes through the database."""
+
+    def __init__(self, db: Optional[DatabaseManager] = None):
+        self._db = db
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Dict] = {}
+        self._did_locks: Dict[str, threading.Lock] = {}
+
+    def _get_db(self) -> DatabaseManager:
+        if self._db is None:
+            self._db = DatabaseManager()
+        _ensure_schema(self._db)
+        return self._db
+
+    def _did_lock(self, did: str) -> threading.Lock:
+        with self._lock:
+            return self._did_locks.setdefault(did, threading.Lock())
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _fresh(session: Optional[Dict], pds_url: str) -> bool:
+        return bool(
+            session
+            and session['pds_url'] == pds_url
+            and session['access_expires_at'] - ACCESS_REFRESH_MARGIN > time.time()
+        )
+
+    def get(self, did: str, handle: str, pds_url: Optional[str], passhash: Optional[str],
+            app_password: Optional[str] = None) -> Tuple[Optional[Dict], str]:
+        """
+        Session for an account as (session, status).
+
+        session has did, handle, pds_url, access_jwt and refresh_jwt. status
+        is 'valid', 'invalid' or 'skip'; session is None unless it's 'valid'.
+        app_password is an already-decoded password for callers whose stored
+        credential isn't Fernet-encrypted.
+        """
+        pds_url = resolve_pds_url(pds_url)
+
+        with self._lock:
+            session = self._sessions.get(did)
+        if self._fresh(session, pds_url):
+            return session, 'valid'
+
+        with self._did_lock(did):
+            with self._lock:
+                session = self._sessions.get(did)
+            if self._fresh(session, pds_url):
+                return session, 'valid'
+            try:
+                return self._renew(did, handle, pds_url, passhash, app_password)
+            except requests.exceptions.RequestException as e:
+                print(f"⚠️ Worker session for {did[:20]}... unavailable: {e}")
+                return None, 'skip'
+            except Exception as e:
+                print(f"❌ Worker session error for {did[:20]}...: {e}")
+                return None, 'skip'
+
+    def has_session(self, did: str, pds_url: Optional[str]) -> bool:
+        """Whether this process holds an unexpired session for the account."""
+        with self._lock:
+            session = self._sessions.get(did)
+        return self._fresh(session, resolve_pds_url(pds_url))
+
+    def session(self, did: str, handle: str, pds_url: Optional[str], passhash: Optional[str]) -> Optional[Dict]:
+        """Valid session for an account, or None."""
+        return self.get(did, handle, pds_url, passhash)[0]
+
+    def verify(self, did: str, handle: str, pds_url: Optional[str], passhash: Optional[str]) -> str:
+        """
+        Whether an account's credentials still work: 'valid', 'invalid' or
+        'skip'. A live session is checked with getSession; the password is
+        only tried when the session and refresh token are both rejected.
+        """
+        session, status = self.get(did, handle, pds_url, passhash)
+        if status != 'valid':
+            return status
+        try:
+            response = requests.get(
+                f"{session['pds_url']}/xrpc/com.atproto.server.getSession",
+                headers={'Authorization': f"Bearer {session['access_jwt']}"},
+                timeout=REQUEST_TIMEOUT
+            )
+        except requests.exceptions.RequestException:
+            return 'skip'
+        if response.ok:
+            return 'valid'
+        if response.status_code in (400, 401):
+            # Session revoked (e.g. app password deleted) - try the password itself
+            self.invalidate(did)
+            return self.get(did, handle, pds_url, passhash)[1]
+        return 'skip'
+
+    def invalidate(self, did: str):
+        """Forget an account's session (e.g. the PDS rejected its access token)."""
+        with self._lock:
+            self._sessions.pop(did, None)
+        try:
+            self._get_db().execute("DELETE FROM worker_sessions WHERE did = %s", (did,))
+        except Exception as e:
+            print(f"⚠️ Worker session delete failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Renewal
+    # ------------------------------------------------------------------
+
+    def _renew(self, did: str, handle: str, pds_url: str, passhash: Optional[str],
+               app_password: Optional[str]) -> Tuple[Optional[Dict], str]:
+        """Reuse, refresh or create the session under a cross-process lock."""
+        db = self._get_db()
+        with db.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (f"worker_session:{did}",))
+
+            # Another process may have renewed it while we waited
+            cursor.execute("SELECT * FROM worker_sessions WHERE did = %s", (did,))
+            session = self._load_row(cursor.fetchone())
+            if self._fresh(session, pds_url):
+                self._remember(session)
+                return session, 'valid'
+
+            status = 'invalid'
+            renewed = None
+            if session and session['pds_url'] == pds_url and (
+                    not session['refresh_expires_at'] or session['refresh_expires_at'] > time.time()):
+                renewed, status = self._refresh(session)
+            if renewed is None and status != 'skip':
+                renewed, status = self._login(did, handle, pds_url, passhash, app_password)
+
+            if renewed is None:
+                if status == 'invalid':
+                    cursor.execute("DELETE FROM worker_sessions WHERE did = %s", (did,))
+                    with self._lock:
+                        self._sessions.pop(did, None)
+                return None, status
+
+            cursor.execute("""
+                INSERT INTO worker_sessions
+                    (did, handle, pds_url, access_jwt, refresh_jwt,
+                     access_expires_at, refresh_expires_at, updated_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (did) DO UPDATE SET
+                    handle = EXCLUDED.handle,
+                    pds_url = EXCLUDED.pds_url,
+                    access_jwt = EXCLUDED.access_jwt,
+                    refresh_jwt = EXCLUDED.refresh_jwt,
+                    access_expires_at = EXCLUDED.access_expires_at,
+                    refresh_expires_at = EXCLUDED.refresh_expires_at,
+                    updated_at = EXCLUDED.updated_at
+            """, (did, renewed['handle'], pds_url,
+                  encrypt_password(renewed['access_jwt']), encrypt_password(renewed['refresh_jwt']),
+                  renewed['access_expires_at'], renewed['refresh_expires_at'], int(time.time())))
+        self._remember(renewed)
+        return renewed, 'valid'
+
+    def _refresh(self, session: Dict) -> Tuple[Optional[Dict], str]:
+        response = requests.post(
+            f"{session['pds_url']}/xrpc/com.atproto.server.refreshSession",
+            headers={'Authorization': f"Bearer {session['refresh_jwt']}"},
+            timeout=REQUEST_TIMEOUT
+        )
+        if response.status_code != 200:
+            # A rejected refresh token falls back to a full login
+            return None, _classify_status(response.status_code)
+        return self._build(session['did'], session['handle'], session['pds_url'], response.json())
+
+    def _login(self, did: str, handle: str, pds_url: str, passhash: Optional[str],
+               app_password: Optional[str] = None) -> Tuple[Optional[Dict], str]:
+        # Only the PDS rejecting the password (401) makes a credential 'invalid';
+        # a missing or undecryptable password is our problem, not the account's
+        if not app_password:
+            if not passhash:
+                print(f"⚠️ No stored password for {did[:20]}...")
+                return None, 'skip'
+            try:
+                app_password = decrypt_password(passhash)
+            except Exception as e:
+                print(f"❌ Failed to decrypt password for {did[:20]}...: {e}")
+                return None, 'skip'
+        if not app_password:
+            return None, 'skip'
+
+        response = requests.post(
+            f"{pds_url}/xrpc/com.atproto.server.createSession",
+            json={'identifier': handle or did, 'password': app_password},
+            timeout=REQUEST_TIMEOUT
+        )
+        if response.status_code != 200:
+            return None, 'invalid' if response.status_code == 401 else 'skip'
+        return self._build(did, handle, pds_url, response.json())
+
+    @staticmethod
+    def _build(did: str, handle: str, pds_url: str, data: Dict) -> Tuple[Optional[Dict], str]:
+        access_jwt = data.get('accessJwt')
+        refresh_jwt = data.get('refreshJwt')
+        if not access_jwt or not refresh_jwt:
+            return None, 'skip'
+        if data.get('did') and data['did'] != did:
+            print(f"❌ DID mismatch: expected {did}, got {data['did']}")
+            return None, 'skip'
+        return {
+            'did': did,
+            'handle': data.get('handle') or handle,
+            'pds_url': pds_url,
+            'access_jwt': access_jwt,
+            'refresh_jwt': refresh_jwt,
+            'access_expires_at': _jwt_exp(access_jwt) or int(time.time()) + ACCESS_FALLBACK_TTL,
+            'refresh_expires_at': _jwt_exp(refresh_jwt),
+        }, 'valid'
+
+    @staticmethod
+    def _load_row(row: Optional[Dict]) -> Optional[Dict]:
+        if not row:
+            return None
+        try:
+            return {
+                'did': row['did'],
+                'handle': row['handle'],
+                'pds_url': row['pds_url'],
+                'access_jwt': decrypt_password(row['access_jwt']),
+                'refresh_jwt': decrypt_password(row['refresh_jwt']),
+                'access_expires_at': row['access_expires_at'],
+                'refresh_expires_at': row['refresh_expires_at'],
+            }
+        except Exception as e:
+            print(f"⚠️ Stored worker session for {row['did'][:20]}... unreadable: {e}")
+            return None
+
+    def _remember(self, session: Dict):
+        with self._lock:
+            self._sessions[session['did']] = session
+
+    # ------------------------------------------------------------------
+    # atproto clients
+    # ------------------------------------------------------------------
+
+    def atproto_client(self, did: str, handle: str, pds_url: Optional[str], passhash: Optional[str]):
+        """
+        atproto Client signed in with the shared session instead of a
+        password login. Tokens the client refreshes itself are written back
+        to the store.
+        """
+        from atproto import Client, SessionEvent
+
+        session = self.session(did, handle, pds_url, passhash)
+        if not session:
+            return None
+
+        client = Client(base_url=session['pds_url'])
+
+        def _on_session_change(event, changed):
+            if event in (SessionEvent.CREATE, SessionEvent.REFRESH):
+                self._save_client_session(session, changed)
+
+        client.on_session_change(_on_session_change)
+        client.login(session_string=':::'.join([
+            session['handle'] or did, did, session['access_jwt'], session['refresh_jwt'], session['pds_url']
+        ]))
+        return client
+
+    def _save_client_session(self, session: Dict, changed):
+        """Store tokens an atproto Client rotated on its own."""
+        renewed, status = self._build(session['did'], session['handle'], session['pds_url'], {
+            'accessJwt': changed.access_jwt,
+            'refreshJwt': changed.refresh_jwt,
+        })
+        if status != 'valid':
+            return
+        self._remember(renewed)
+        try:
+            self._get_db().execute("""
+                UPDATE worker_sessions
+                SET access_jwt = %s, refresh_jwt = %s,
+                    access_expires_at = %s, refresh_expires_at = %s, updated_at = %s
+                WHERE did = %s
+            """, (encrypt_password(renewed['access_jwt']), encrypt_password(renewed['refresh_jwt']),
+                  renewed['access_expires_at'], renewed['refresh_expires_at'], int(time.time()),
+                  renewed['did']))
+        except Exception as e:
+            print(f"⚠️ Worker session write failed: {e}")
+
+
+worker_sessions = WorkerSessionStore()
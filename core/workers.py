@@ -14,6 +14,7 @@ import base64
 from typing import Optional, Dict, List
 from datetime import datetime, timezone
 from .encryption import decrypt_password
+from .worker_sessions import worker_sessions
 
 
 class WorkerNetworkClient:
@@ -50,14 +51,18 @@ class WorkerNetworkClient:
         """
         Authenticate worker and obtain session token.
         
+        Reuses (or refreshes) the worker's shared session from the session
+        store; a full login only happens when there is no usable session.
+        
         Returns:
             bool: True if authentication successful
         """
         try:
-            # Decrypt app password (with fallback to base64 for migration)
+            # Encrypted passwords are decrypted by the session store if it
+            # needs to log in; legacy base64 passwords are decoded here
+            app_password = None
             try:
-                # Try decryption first (new encrypted passwords)
-                app_password = decrypt_password(self.app_password_base64)
+                decrypt_password(self.app_password_base64)
             except Exception:
                 # Fallback to base64 decode (legacy passwords during migration)
                 try:
@@ -98,28 +103,18 @@ class WorkerNetworkClient:
             
             print(f"🔐 Authenticating with PDS: {self.pds_url}")
             
-            # Create session with worker's credentials
-            response = requests.post(
-                f"{self.pds_url}/xrpc/com.atproto.server.createSession",
-                json={
-                    "identifier": self.worker_handle,
-                    "password": app_password
-                },
-                timeout=10
+            # Shared session for the worker's credentials (checks the DID matches)
+            session, status = worker_sessions.get(
+                self.worker_did, self.worker_handle, self.pds_url,
+                self.app_password_base64, app_password=app_password
             )
             
-            if response.status_code != 200:
-                print(f"❌ Worker auth failed: {response.status_code}")
+            if not session:
+                print(f"❌ Worker auth failed: {status}")
                 return False
             
-            session_data = response.json()
-            self.session_token = session_data.get('accessJwt')
-            verified_did = session_data.get('did')
-            
-            # Verify DID matches
-            if verified_did != self.worker_did:
-                print(f"❌ DID mismatch: expected {self.worker_did}, got {verified_did}")
-                return False
+            self.session_token = session['access_jwt']
+            self.pds_url = session['pds_url']
             
             return True
             
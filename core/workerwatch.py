@@ -3,6 +3,8 @@
 Workerhose - Worker Role & Credential Monitor
 
 This service monitors worker roles and app password validity every 3 minutes.
+Validity is checked against the shared worker session (core.worker_sessions),
+so a healthy credential costs a getSession call rather than a full login.
 If a user's app password becomes invalid, they are automatically removed from
 any role that requires an app password.
 
@@ -24,16 +26,23 @@ credentials can perform automated actions.
 
 import json
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Set
+from typing import Dict, Optional, Set
+from urllib.parse import urlparse
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from atproto import Client
 from core.database import DatabaseManager
-from core.encryption import decrypt_password
+from core.worker_sessions import worker_sessions, resolve_pds_url
+
+
+VALIDATION_WORKERS = 16         # credentials validated at the same time
+PER_PDS_CONCURRENCY = 4         # ...of which at most this many against one PDS
+REVERIFY_SECONDS = 30 * 60      # re-check a worker with a live session this often
 
 
 class WorkerhoseMonitor:
@@ -47,8 +56,14 @@ class WorkerhoseMonitor:
             'workers_validated': 0,
             'credentials_invalidated': 0,
             'workers_removed': 0,
+            'validations_skipped': 0,
             'start_time': datetime.now()
         }
+        
+        self._executor = ThreadPoolExecutor(max_workers=VALIDATION_WORKERS, thread_name_prefix='workerhose')
+        self._pds_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._pds_lock = threading.Lock()
+        self._verified_at: Dict[str, float] = {}
     
     def _get_roles_config(self) -> Dict:
         """
@@ -84,108 +99,68 @@ class WorkerhoseMonitor:
             traceback.print_exc()
             return {}
     
-    def _validate_credential(self, did: str) -> str:
+    def _pds_limit(self, pds_url: Optional[str]) -> threading.BoundedSemaphore:
+        """Semaphore capping concurrent validations against one PDS host."""
+        host = urlparse(resolve_pds_url(pds_url)).netloc
+        with self._pds_lock:
+            if host not in self._pds_limits:
+                self._pds_limits[host] = threading.BoundedSemaphore(PER_PDS_CONCURRENCY)
+            return self._pds_limits[host]
+    
+    def _needs_validation(self, did: str, pds_url: Optional[str]) -> bool:
+        """Workers with a live session that was verified recently are skipped."""
+        verified_at = self._verified_at.get(did)
+        if verified_at is None or time.time() - verified_at >= REVERIFY_SECONDS:
+            return True
+        return not worker_sessions.has_session(did, pds_url)
+    
+    def _validate_credential(self, did: str, credential: Optional[Dict] = None) -> str:
         """
-        Validate a user's Bluesky app password by attempting login.
+        Validate a user's Bluesky app password.
+        
+        Uses the shared worker session: a live session is checked with
+        getSession and an expired one is refreshed, so the app password is
+        only used for a full login when the session itself was rejected.
         
         Args:
             did: User's DID
+            credential: Row with handle, app_password_hash and pds_url, if
+                already loaded
             
         Returns:
             'valid' - credential works
             'invalid' - credential is definitely wrong (401 auth error)
             'skip' - temporary error (network, rate limit), should not purge
         """
-        import requests
-        
         try:
-            db = DatabaseManager()
-            cursor = db.execute(
-                "SELECT d.handle, uc.app_password_hash, uc.pds_url FROM dreamers d JOIN user_credentials uc ON d.did = uc.did WHERE d.did = %s",
-                (did,)
-            )
-            result = cursor.fetchone()
+            result = credential
+            if result is None:
+                db = DatabaseManager()
+                cursor = db.execute(
+                    "SELECT d.handle, uc.app_password_hash, uc.pds_url FROM dreamers d JOIN user_credentials uc ON d.did = uc.did WHERE d.did = %s",
+                    (did,)
+                )
+                result = cursor.fetchone()
             
             if not result or not result['app_password_hash']:
                 return 'invalid'
             
-            # Decrypt password
-            app_password = decrypt_password(result['app_password_hash'])
-            if not app_password:
-                return 'invalid'
-            
-            handle = result['handle']
-            pds_url = result.get('pds_url', 'https://bsky.social')
-            
-            # Use the stored PDS URL for local accounts (like reverie.house)
-            # This is critical for accounts on self-hosted PDSs
-            if not pds_url:
-                pds_url = 'https://bsky.social'
-            
-            # For local reverie.house PDS, use the public external URL
-            # (internal Docker network may not be accessible from all containers)
-            if pds_url and 'reverie.house' in pds_url:
-                pds_url = 'https://reverie.house'
-            
             if self.verbose:
-                print(f"      🔐 Validating against PDS: {pds_url}")
-            
-            # Use direct HTTP request instead of atproto Client
-            # This allows us to specify the correct PDS URL
-            login_response = requests.post(
-                f'{pds_url}/xrpc/com.atproto.server.createSession',
-                json={
-                    'identifier': handle,
-                    'password': app_password
-                },
-                timeout=10
-            )
-            
-            if login_response.ok:
-                return 'valid'
-            
-            # Check response status for classification
-            status_code = login_response.status_code
-            
-            if status_code == 401:
-                if self.verbose:
-                    print(f"      ❌ Auth failed (401) for {did[:20]}...")
-                return 'invalid'
-            
-            if status_code == 429:
-                if self.verbose:
-                    print(f"      ⏳ Rate limited for {did[:20]}..., skipping")
-                return 'skip'
+                print(f"      🔐 Validating against PDS: {result.get('pds_url') or 'https://bsky.social'}")
             
-            if status_code >= 500:
-                if self.verbose:
-                    print(f"      🌐 Server error ({status_code}) for {did[:20]}..., skipping")
-                return 'skip'
-            
-            # Other 4xx errors - could be various issues, skip to be safe
-            if self.verbose:
-                print(f"      ⚠️  HTTP {status_code} for {did[:20]}..., skipping")
-            return 'skip'
+            with self._pds_limit(result.get('pds_url')):
+                validation_result = worker_sessions.verify(
+                    did, result['handle'], result.get('pds_url'), result['app_password_hash']
+                )
             
-        except requests.exceptions.Timeout:
-            if self.verbose:
-                print(f"      🌐 Timeout for {did[:20]}..., skipping")
-            return 'skip'
+            if self.verbose and validation_result == 'invalid':
+                print(f"      ❌ Auth failed for {did[:20]}...")
+            elif self.verbose and validation_result == 'skip':
+                print(f"      🌐 Temporary error for {did[:20]}..., skipping")
             
-        except requests.exceptions.ConnectionError as e:
-            if self.verbose:
-                print(f"      🌐 Connection error for {did[:20]}..., skipping: {e}")
-            return 'skip'
+            return validation_result
             
         except Exception as e:
-            error_str = str(e).lower()
-            
-            # Check for definite authentication failures
-            if '401' in error_str or 'unauthorized' in error_str:
-                if self.verbose:
-                    print(f"      ❌ Auth failed for {did[:20]}...: {e}")
-                return 'invalid'
-            
             # Unknown error - be conservative and skip rather than purge
             if self.verbose:
                 print(f"      ⚠️  Unknown error for {did[:20]}..., skipping: {e}")
@@ -206,6 +181,7 @@ class WorkerhoseMonitor:
                 "UPDATE user_credentials SET app_password_hash = NULL, password_hash = NULL WHERE did = %s",
                 (did,)
             )
+            worker_sessions.invalidate(did)
             self.stats['credentials_invalidated'] += 1
             print(f"      🗑️ Purged credential for {did[:20]}...")
             
@@ -259,15 +235,18 @@ class WorkerhoseMonitor:
         """
         Check all active workers and validate their credentials.
         
-        For any worker with an invalid credential, remove them from
-        roles that require app passwords.
+        Each worker's credential is validated once per cycle (however many
+        roles they hold), concurrently and capped per PDS. Workers verified
+        recently whose session is still live are skipped. last_verified is
+        written back in one update; for any worker with an invalid
+        credential, remove them from roles that require app passwords.
         """
         try:
             db = DatabaseManager()
             
             # Get all active workers with valid credentials (password hash exists)
             cursor = db.execute("""
-                SELECT DISTINCT ur.did, ur.role, d.handle, uc.app_password_hash
+                SELECT DISTINCT ur.did, ur.role, d.handle, uc.app_password_hash, uc.pds_url
                 FROM user_roles ur
                 JOIN dreamers d ON ur.did = d.did
                 JOIN user_credentials uc ON ur.did = uc.did
@@ -283,39 +262,54 @@ class WorkerhoseMonitor:
                     print("   No active workers found")
                 return
             
-            if self.verbose:
-                print(f"   📋 Checking {len(workers)} active workers...")
-            
+            # One credential per DID, however many roles it covers
+            credentials: Dict[str, Dict] = {}
+            roles: Dict[str, list] = {}
             for worker in workers:
-                did = worker['did']
-                role = worker['role']
-                handle = worker['handle']
-                
-                self.stats['workers_validated'] += 1
-                
-                if self.verbose:
-                    print(f"   👤 @{handle} ({role})")
-                
-                # Validate credential by attempting login
-                # Returns: 'valid', 'invalid', or 'skip'
-                validation_result = self._validate_credential(did)
+                credentials.setdefault(worker['did'], worker)
+                roles.setdefault(worker['did'], []).append(worker['role'])
+            
+            to_validate = [did for did, cred in credentials.items()
+                           if self._needs_validation(did, cred.get('pds_url'))]
+            skipped = len(credentials) - len(to_validate)
+            self.stats['validations_skipped'] += skipped
+            
+            if self.verbose:
+                print(f"   📋 Checking {len(to_validate)} of {len(credentials)} active workers "
+                      f"({len(workers)} role assignments, {skipped} recently verified)...")
+            
+            # Validate concurrently: 'valid', 'invalid', or 'skip'
+            results = dict(zip(to_validate, self._executor.map(
+                lambda did: self._validate_credential(did, credentials[did]), to_validate
+            )))
+            self.stats['workers_validated'] += len(to_validate)
+            
+            now = time.time()
+            valid_dids = [did for did, result in results.items() if result == 'valid']
+            for did in valid_dids:
+                self._verified_at[did] = now
+            
+            if valid_dids:
+                # Update last_verified timestamps in one statement
+                db.execute(
+                    "UPDATE user_credentials SET last_verified = %s WHERE did = ANY(%s)",
+                    (int(now), valid_dids)
+                )
+            
+            for did, validation_result in results.items():
+                handle = credentials[did]['handle']
                 
                 if validation_result == 'valid':
                     if self.verbose:
-                        print(f"      ✅ Credential valid")
-                    
-                    # Update last_verified timestamp
-                    import time
-                    db.execute(
-                        "UPDATE user_credentials SET last_verified = %s WHERE did = %s",
-                        (int(time.time()), did)
-                    )
+                        print(f"   👤 @{handle} ({', '.join(roles[did])}) ✅ Credential valid")
                 elif validation_result == 'invalid':
-                    print(f"      ❌ Credential INVALID - removing from {role}")
+                    self._verified_at.pop(did, None)
+                    print(f"   👤 @{handle} ❌ Credential INVALID - removing from {', '.join(roles[did])}")
                     self._mark_credential_invalid(did)
-                    self._remove_worker_from_role(did, role)
+                    for role in roles[did]:
+                        self._remove_worker_from_role(did, role)
                 else:  # 'skip' - temporary error, don't touch
-                    print(f"      ⏭️  Skipping {handle} due to temporary error")
+                    print(f"   ⏭️  Skipping {handle} due to temporary error")
             
         except Exception as e:
             print(f"❌ Error checking workers: {e}")
@@ -400,6 +394,7 @@ class WorkerhoseMonitor:
             print(f"Runtime: {elapsed:.0f} seconds ({elapsed/3600:.1f} hours)")
             print(f"Total checks: {self.stats['total_checks']}")
             print(f"Workers validated: {self.stats['workers_validated']}")
+            print(f"Validations skipped (recently verified): {self.stats['validations_skipped']}")
             print(f"Credentials invalidated: {self.stats['credentials_invalidated']}")
             print(f"Workers removed: {self.stats['workers_removed']}")
             print("=" * 70)
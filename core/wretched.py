@@ -25,6 +25,7 @@ import json
 
 from core.database import DatabaseManager
 from core.encryption import decrypt_password
+from core.worker_sessions import worker_sessions
 
 
 WRETCHED_AVATARS_DIR = Path("/srv/reverie.house/site/assets/wretched")
@@ -132,14 +133,18 @@ class WretchedTransformer:
     # CREDENTIAL HELPERS
     # =========================================================================
     
-    def get_credentials(self, did: str) -> tuple:
-        """Get app password and PDS URL for a user. Returns (password, pds_url)."""
-        row = self.db.fetch_one("""
+    def _credential_row(self, did: str) -> Optional[Dict]:
+        """Stored (encrypted) app password and PDS URL for a user."""
+        return self.db.fetch_one("""
             SELECT uc.app_password_hash, COALESCE(uc.pds_url, d.server, 'https://bsky.social') as pds
             FROM user_credentials uc
             JOIN dreamers d ON uc.did = d.did
             WHERE uc.did = %s AND uc.app_password_hash IS NOT NULL
         """, (did,))
+    
+    def get_credentials(self, did: str) -> tuple:
+        """Get app password and PDS URL for a user. Returns (password, pds_url)."""
+        row = self._credential_row(did)
         
         if not row or not row['app_password_hash']:
             return None, None
@@ -258,8 +263,6 @@ class WretchedTransformer:
         Execute full wretch transformation.
         Uses atproto library for Bluesky API calls.
         """
-        from atproto import Client
-        
         result = {"success": False, "did": did}
         
         # Get dreamer info
@@ -280,8 +283,8 @@ class WretchedTransformer:
             return result
         
         # Get credentials
-        password, pds = self.get_credentials(did)
-        if not password:
+        credentials = self._credential_row(did)
+        if not credentials:
             result["error"] = "No app password stored for this user"
             return result
         
@@ -293,9 +296,13 @@ class WretchedTransformer:
             return result
         
         try:
-            # Login to Bluesky
-            client = Client(base_url=pds)
-            client.login(handle, password)
+            # Login to Bluesky (shared session, refreshed rather than re-created)
+            client = worker_sessions.atproto_client(
+                did, handle, credentials['pds'], credentials['app_password_hash']
+            )
+            if not client:
+                result["error"] = "Could not sign in with the stored app password"
+                return result
             
             # Get current profiles for backup
             rh_profile = self.get_rh_profile(did)
@@ -4,12 +4,18 @@
 Quest Commands - Command execution for quest actions
 
 Executes commands when quest conditions are met.
+
+Commands are looked up in COMMAND_REGISTRY. A quest's database writes commit
+in one transaction; likes, replies and other outbound actions run
+concurrently after it commits.
 """
 
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple
 from core.database import DatabaseManager
 from core.network import NetworkClient
 from utils.names import NameManager
@@ -113,13 +119,140 @@ def iso_to_unix(iso_timestamp: str) -> int:
         return int(time.time())
 
 
+# ============================================================================
+# Command registry
+# ============================================================================
+#
+# Every quest command is registered with the way it touches the world:
+#
+#   TRANSACTION   database writes only. All consecutive transactional commands
+#                 of one quest run in a single transaction on one connection,
+#                 so the quest's writes commit together. Each command runs in
+#                 its own savepoint: a command that fails is rolled back alone
+#                 and reported as failed, and the others still commit.
+#   STANDALONE    commands that register dreamers (register_dreamer fetches a
+#                 profile and commits on its own connection); they run in
+#                 order between transactions.
+#   AFTER_COMMIT  outbound actions (likes, replies, greetings, disabling the
+#                 quest). They run once the database work has committed,
+#                 concurrently, and never if it rolled back.
+#
+# Transactional and standalone commands may also hand follow-up network work
+# (liking the reply, rebuilding Caddy) to `defer`; it runs after commit too.
+
+TRANSACTION = 'transaction'
+STANDALONE = 'standalone'
+AFTER_COMMIT = 'after_commit'
+
+SIDE_EFFECT_WORKERS = 4
+
+_side_effect_pool = ThreadPoolExecutor(max_workers=SIDE_EFFECT_WORKERS, thread_name_prefix='quest-effect')
+
+
+@dataclass(frozen=True)
+class QuestCommand:
+    """A registered quest command."""
+    name: str
+    run: Callable[..., Dict]
+    mode: str
+    min_args: int = 0
+
+
+COMMAND_REGISTRY: Dict[str, QuestCommand] = {}
+
+
+def quest_command(name: str, mode: str, min_args: int = 0):
+    """
+    Register a quest command.
+    
+    The function is called as run(replies, quest_config, args, db=..., defer=..., verbose=...)
+    and returns {'success': bool, 'errors': [...]}. `db` is the shared
+    transaction for TRANSACTION commands and None otherwise.
+    """
+    def decorator(func):
+        COMMAND_REGISTRY[name] = QuestCommand(name, func, mode, min_args)
+        return func
+    return decorator
+
+
+class _TransactionDB:
+    """
+    DatabaseManager-shaped view of the executor's open transaction.
+    
+    Transactional commands receive it as `db`, so their queries join the
+    quest transaction instead of committing on their own. The first failed
+    statement is remembered even if the command swallows the error, and
+    the executor then rolls back to the command's savepoint.
+    """
+    
+    def __init__(self, conn):
+        self._cursor = conn.cursor()
+        self.failed: Optional[Exception] = None
+    
+    def savepoint(self):
+        self.failed = None
+        self._cursor.execute("SAVEPOINT quest_command")
+    
+    def release(self):
+        self._cursor.execute("RELEASE SAVEPOINT quest_command")
+    
+    def rollback_to_savepoint(self):
+        self._cursor.execute("ROLLBACK TO SAVEPOINT quest_command")
+        self.failed = None
+    
+    def execute(self, query: str, params: Tuple = ()):
+        if self.failed is not None:
+            raise self.failed
+        if '?' in query and '%s' not in query:
+            query = query.replace('?', '%s')
+        try:
+            self._cursor.execute(query, params)
+        except Exception as e:
+            self.failed = e
+            raise
+        return self._cursor
+    
+    def fetch_one(self, query: str, params: Tuple = ()):
+        return self.execute(query, params).fetchone()
+    
+    def fetch_all(self, query: str, params: Tuple = ()):
+        return self.execute(query, params).fetchall()
+    
+    def rollback(self):
+        """Called by commands on error; the executor does the actual rollback."""
+        if self.failed is None:
+            self.failed = RuntimeError('command aborted the quest transaction')
+
+
+class _Deferred:
+    """Outbound actions collected while the quest's database work runs."""
+    
+    def __init__(self):
+        self.actions: List[Tuple[Optional[str], Callable, tuple]] = []
+    
+    def __call__(self, func: Callable, *args, key: Optional[str] = None):
+        """Queue func(*args) for after commit; actions sharing a key run once."""
+        if key is not None and any(k == key for k, _, _ in self.actions):
+            return
+        self.actions.append((key, func, args))
+    
+    def mark(self) -> int:
+        return len(self.actions)
+    
+    def discard_from(self, mark: int):
+        del self.actions[mark:]
+
+
 def execute_quest_commands(commands: List[str], replies: List[Dict], 
                           quest_config: Dict, verbose: bool = False) -> Dict:
     """
     Execute a list of quest commands.
     
+    Database commands run in one transaction, then outbound actions run
+    concurrently (see the command registry above).
+    
     Args:
-        commands: List of command strings (e.g., ['name_dreamer', 'like_post'])
+        commands: List of command dicts (e.g., [{'cmd': 'name_dreamer', 'args': []}])
         replies: List of reply objects that matched the condition
         quest_config: Quest configuration dictionary
         verbose: Whether to print output
@@ -137,6 +270,8 @@ def execute_quest_commands(commands: List[str], replies: List[Dict],
         'errors': []
     }
     
+    # Resolve every command before anything runs
+    planned = []
     for command in commands:
         # New canonical format: command must be a dict {'cmd': 'name', 'args': [...]}
         if not isinstance(command, dict):
@@ -144,80 +279,44 @@ def execute_quest_commands(commands: List[str], replies: List[Dict],
                 "Legacy command strings are no longer supported. Run the migration tool to convert quests to canonical commands: tools/migrate_quests_to_canonical.py"
             )
         cmd_name = command.get('cmd')
-        param_list = command.get('args', [])
-        try:
-            param = param_list[0] if param_list else None
-
-            if cmd_name == 'name_dreamer':
-                forced_name = param if param else None
-                cmd_result = name_dreamer(replies, quest_config, forced_name=forced_name, verbose=verbose)
-            elif cmd_name == 'add_kindred':
-                # DEPRECATED: Kindred is now detected automatically via mutual follows in jetstream_hub.py
-                # Keeping this as a no-op for backward compatibility with existing quests
-                cmd_result = {'success': True, 'deprecated': True}
-                if verbose:
-                    print(f"   ℹ️ add_kindred is deprecated - kindred now detected via mutual follows")
-            elif cmd_name == 'mod_spectrum':
-                multiplier = float(param) if param else 1.0
-                cmd_result = mod_spectrum(replies, quest_config, multiplier=multiplier, verbose=verbose)
-            elif cmd_name == 'like_post':
-                cmd_result = like_post(replies, quest_config, verbose=verbose)
-            elif cmd_name == 'add_canon':
-                # Expect args: [key, event, type, rowstyle?]
-                if len(param_list) >= 2:
-                    canon_key = param_list[0]
-                    canon_event = param_list[1] if len(param_list) > 1 else 'event occurred'
-                    canon_type = param_list[2] if len(param_list) > 2 else 'event'
-                    canon_rowstyle = param_list[3] if len(param_list) > 3 else None
-                    cmd_result = add_canon(replies, quest_config, canon_key, canon_event, canon_type, canon_rowstyle, verbose=verbose)
-                else:
-                    result['errors'].append(f"Invalid add_canon format: {command}")
-                    result['success'] = False
-                    continue
-            elif cmd_name == 'add_name':
-                new_name = param if param else None
-                if new_name:
-                    cmd_result = add_name(replies, quest_config, new_name, verbose=verbose)
-                else:
-                    result['errors'].append(f"Invalid add_name format: {command}")
-                    result['success'] = False
-                    continue
-            elif cmd_name == 'register_if_needed':
-                cmd_result = register_if_needed(replies, quest_config, verbose=verbose)
-            elif cmd_name == 'award_souvenir':
-                souvenir_key = param if param else None
-                if souvenir_key:
-                    cmd_result = award_souvenir(replies, quest_config, souvenir_key, verbose=verbose)
-                else:
-                    result['errors'].append(f"Invalid award_souvenir format: {command}")
-                    result['success'] = False
-                    continue
-            elif cmd_name == 'disable_quest':
-                cmd_result = disable_quest(replies, quest_config, verbose=verbose)
-            elif cmd_name == 'reply_origin_spectrum':
-                cmd_result = reply_origin_spectrum(replies, quest_config, verbose=verbose)
-            elif cmd_name == 'declare_origin':
-                # Alias for reply_origin_spectrum - replies to user with their spectrum coordinates
-                cmd_result = reply_origin_spectrum(replies, quest_config, verbose=verbose)
-            elif cmd_name == 'greet_newcomer':
-                from ops.commands.greet_newcomer import greet_newcomer
-                cmd_result = greet_newcomer(replies, quest_config, verbose=verbose)
-            elif cmd_name == 'record_trespass':
-                cmd_result = record_trespass(replies, quest_config, verbose=verbose)
-            else:
-                result['errors'].append(f"Unknown command: {cmd_name}")
-                result['success'] = False
-                continue
-            
-            if cmd_result.get('success'):
-                result['commands_executed'].append(cmd_name)
-            else:
-                result['errors'].extend(cmd_result.get('errors', []))
-                result['success'] = False
-                
-        except Exception as e:
-            result['errors'].append(f"Error executing {command}: {e}")
+        spec = COMMAND_REGISTRY.get(cmd_name)
+        if spec is None:
+            result['errors'].append(f"Unknown command: {cmd_name}")
             result['success'] = False
+            continue
+        args = command.get('args', [])
+        if len(args) < spec.min_args or (spec.min_args and not args[0]):
+            result['errors'].append(f"Invalid {cmd_name} format: {command}")
+            result['success'] = False
+            continue
+        planned.append((spec, args))
+    
+    defer = _Deferred()
+    after_commit = []
+    transaction = []
+    committed = True
+    
+    for spec, args in planned:
+        if spec.mode == TRANSACTION:
+            transaction.append((spec, args))
+            continue
+        committed &= _run_transaction(transaction, replies, quest_config, defer, result, verbose)
+        transaction = []
+        if spec.mode == STANDALONE:
+            try:
+                cmd_result = spec.run(replies, quest_config, args, db=None, defer=defer, verbose=verbose)
+            except Exception as e:
+                cmd_result = {'success': False, 'errors': [f"Error executing {spec.name}: {e}"]}
+            _record_command(result, spec.name, cmd_result)
+        else:
+            after_commit.append((spec, args))
+    committed &= _run_transaction(transaction, replies, quest_config, defer, result, verbose)
+    
+    if not committed:
+        for spec, _ in after_commit:
+            result['errors'].append(f"Skipped {spec.name}: quest transaction rolled back")
+        after_commit = []
+    _run_after_commit(after_commit, defer, replies, quest_config, result, verbose)
     
     # Queue celebration for successful quest completion
     if result['success'] and result['commands_executed']:
@@ -226,6 +325,183 @@ def execute_quest_commands(commands: List[str], replies: List[Dict],
     return result
 
 
+def _record_command(result: Dict, name: str, cmd_result: Dict):
+    if cmd_result.get('success'):
+        result['commands_executed'].append(name)
+    else:
+        result['errors'].extend(cmd_result.get('errors', []))
+        result['success'] = False
+
+
+def _run_transaction(group: List, replies: List[Dict], quest_config: Dict,
+                     defer: _Deferred, result: Dict, verbose: bool) -> bool:
+    """
+    Run transactional commands on one connection and commit them together.
+    A command that fails is rolled back to its savepoint and recorded as
+    failed without undoing the others. Returns False if the transaction as
+    a whole was rolled back.
+    """
+    if not group:
+        return True
+    
+    mark = defer.mark()
+    staged = []
+    try:
+        with DatabaseManager().transaction() as conn:
+            tx = _TransactionDB(conn)
+            for spec, args in group:
+                command_mark = defer.mark()
+                tx.savepoint()
+                try:
+                    cmd_result = spec.run(replies, quest_config, args, db=tx, defer=defer, verbose=verbose)
+                    if tx.failed is not None:
+                        raise tx.failed
+                except Exception as e:
+                    tx.rollback_to_savepoint()
+                    defer.discard_from(command_mark)
+                    cmd_result = {'success': False, 'errors': [f"Error executing {spec.name} (rolled back): {e}"]}
+                    if verbose:
+                        print(f"   ❌ Rolled back {spec.name}: {e}")
+                else:
+                    tx.release()
+                staged.append((spec.name, cmd_result))
+    except Exception as e:
+        defer.discard_from(mark)
+        names = ', '.join(spec.name for spec, _ in group)
+        result['errors'].append(f"Quest transaction rolled back ({names}): {e}")
+        result['success'] = False
+        if verbose:
+            print(f"   ❌ Rolled back: {names}: {e}")
+        return False
+    
+    for name, cmd_result in staged:
+        _record_command(result, name, cmd_result)
+    return True
+
+
+def _run_after_commit(commands: List, defer: _Deferred, replies: List[Dict],
+                      quest_config: Dict, result: Dict, verbose: bool):
+    """Run outbound commands and deferred actions concurrently and wait for them."""
+    futures = [
+        (spec, _side_effect_pool.submit(spec.run, replies, quest_config, args, db=None, defer=None, verbose=verbose))
+        for spec, args in commands
+    ]
+    followups = [_side_effect_pool.submit(func, *args) for _, func, args in defer.actions]
+    
+    for spec, future in futures:
+        try:
+            cmd_result = future.result()
+        except Exception as e:
+            cmd_result = {'success': False, 'errors': [f"Error executing {spec.name}: {e}"]}
+        _record_command(result, spec.name, cmd_result)
+    
+    for future in followups:
+        try:
+            future.result()
+        except Exception as e:
+            if verbose:
+                print(f"   ⚠️  Follow-up action failed: {e}")
+
+
+@quest_command('name_dreamer', STANDALONE)
+def _cmd_name_dreamer(replies, quest_config, args, db=None, defer=None, verbose=False):
+    return name_dreamer(replies, quest_config, forced_name=args[0] if args and args[0] else None,
+                        verbose=verbose, defer=defer)
+
+
+@quest_command('add_name', STANDALONE, min_args=1)
+def _cmd_add_name(replies, quest_config, args, db=None, defer=None, verbose=False):
+    return add_name(replies, quest_config, args[0], verbose=verbose, defer=defer)
+
+
+@quest_command('register_if_needed', STANDALONE)
+def _cmd_register_if_needed(replies, quest_config, args, db=None, defer=None, verbose=False):
+    return register_if_needed(replies, quest_config, verbose=verbose)
+
+
+@quest_command('add_kindred', TRANSACTION)
+def _cmd_add_kindred(replies, quest_config, args, db=None, defer=None, verbose=False):
+    # DEPRECATED: Kindred is now detected automatically via mutual follows in jetstream_hub.py
+    # Keeping this as a no-op for backward compatibility with existing quests
+    if verbose:
+        print(f"   ℹ️ add_kindred is deprecated - kindred now detected via mutual follows")
+    return {'success': True, 'deprecated': True}
+
+
+@quest_command('mod_spectrum', TRANSACTION)
+def _cmd_mod_spectrum(replies, quest_config, args, db=None, defer=None, verbose=False):
+    multiplier = float(args[0]) if args and args[0] else 1.0
+    return mod_spectrum(replies, quest_config, multiplier=multiplier, verbose=verbose, db=db)
+
+
+@quest_command('add_canon', TRANSACTION, min_args=2)
+def _cmd_add_canon(replies, quest_config, args, db=None, defer=None, verbose=False):
+    # Expect args: [key, event, type, rowstyle?]
+    canon_type = args[2] if len(args) > 2 else 'event'
+    canon_rowstyle = args[3] if len(args) > 3 else None
+    return add_canon(replies, quest_config, args[0], args[1], canon_type, canon_rowstyle,
+                     verbose=verbose, db=db)
+
+
+@quest_command('award_souvenir', TRANSACTION, min_args=1)
+def _cmd_award_souvenir(replies, quest_config, args, db=None, defer=None, verbose=False):
+    return award_souvenir(replies, quest_config, args[0], verbose=verbose, db=db)
+
+
+@quest_command('record_trespass', TRANSACTION)
+def _cmd_record_trespass(replies, quest_config, args, db=None, defer=None, verbose=False):
+    return record_trespass(replies, quest_config, verbose=verbose, db=db)
+
+
+@quest_command('like_post', AFTER_COMMIT)
+def _cmd_like_post(replies, quest_config, args, db=None, defer=None, verbose=False):
+    return like_post(replies, quest_config, verbose=verbose)
+
+
+@quest_command('reply_origin_spectrum', AFTER_COMMIT)
+def _cmd_reply_origin_spectrum(replies, quest_config, args, db=None, defer=None, verbose=False):
+    return reply_origin_spectrum(replies, quest_config, verbose=verbose)
+
+
+# Alias for reply_origin_spectrum - replies to user with their spectrum coordinates
+COMMAND_REGISTRY['declare_origin'] = QuestCommand('declare_origin', _cmd_reply_origin_spectrum, AFTER_COMMIT)
+
+
+@quest_command('greet_newcomer', AFTER_COMMIT)
+def _cmd_greet_newcomer(replies, quest_config, args, db=None, defer=None, verbose=False):
+    from ops.commands.greet_newcomer import greet_newcomer
+    return greet_newcomer(replies, quest_config, verbose=verbose)
+
+
+@quest_command('disable_quest', AFTER_COMMIT)
+def _cmd_disable_quest(replies, quest_config, args, db=None, defer=None, verbose=False):
+    return disable_quest(replies, quest_config, verbose=verbose)
+
+
+def _rebuild_caddy(verbose: bool = False):
+    """Rebuild Caddy so dreamer subdomains follow name changes."""
+    try:
+        import subprocess
+        subprocess.run(['python3', '/srv/caddy/caddybuilder.py'], 
+                     capture_output=True, timeout=30)
+        if verbose:
+            print(f"   ✅ Caddy rebuilt for subdomains")
+    except Exception as e:
+        if verbose:
+            print(f"   ⚠️  Caddy rebuild error: {e}")
+
+
+def _like_replies(replies: List[Dict], quest_config: Dict, verbose: bool = False):
+    """Like the reply posts, reporting failures only in verbose mode."""
+    try:
+        like_result = like_post(replies, quest_config, verbose=verbose)
+        if not like_result.get('success') and verbose:
+            print(f"   ⚠️  Failed to like posts: {like_result.get('errors')}")
+    except Exception as e:
+        if verbose:
+            print(f"   ⚠️  Error liking posts: {e}")
+
+
 def _queue_quest_celebration(replies: List[Dict], quest_config: Dict, commands_executed: List[str]):
     """
     Queue a celebration for successful quest completion.
@@ -274,7 +550,8 @@ def _queue_quest_celebration(replies: List[Dict], quest_config: Dict, commands_e
         logging.getLogger('command_executor').warning(f"Celebration queue failed: {e}")
 
 
-def name_dreamer(replies: List[Dict], quest_config: Dict, forced_name: str = None, verbose: bool = False) -> Dict:
+def name_dreamer(replies: List[Dict], quest_config: Dict, forced_name: str = None, verbose: bool = False,
+                 defer: Optional[Callable] = None) -> Dict:
     """
     Extract name from reply and register/update dreamer (namegiver quest).
     
@@ -288,6 +565,8 @@ def name_dreamer(replies: List[Dict], quest_config: Dict, forced_name: str = Non
     
     Args:
         forced_name: If provided, use this name instead of extracting from reply.
+        defer: If provided, the like and Caddy rebuild are handed to it to run
+               after the quest's database work commits.
     """
     result = {'success': False, 'errors': []}
     
@@ -525,15 +804,10 @@ def name_dreamer(replies: List[Dict], quest_config: Dict, forced_name: str = Non
             
             # Rebuild Caddy for subdomain changes
             if proposed_name != current_name:
-                try:
-                    import subprocess
-                    subprocess.run(['python3', '/srv/caddy/caddybuilder.py'], 
-                                 capture_output=True, timeout=30)
-                    if verbose:
-                        print(f"   ✅ Caddy rebuilt for subdomains")
-                except Exception as e:
-                    if verbose:
-                        print(f"   ⚠️  Caddy rebuild error: {e}")
+                if defer:
+                    defer(_rebuild_caddy, verbose, key='caddy')
+                else:
+                    _rebuild_caddy(verbose)
             
             result['success'] = True
             
@@ -544,13 +818,10 @@ def name_dreamer(replies: List[Dict], quest_config: Dict, forced_name: str = Non
                 traceback.print_exc()
     
     # Try to like the reply posts
-    try:
-        like_result = like_post(replies, quest_config, verbose=verbose)
-        if not like_result.get('success') and verbose:
-            print(f"   ⚠️  Failed to like posts: {like_result.get('errors')}")
-    except Exception as e:
-        if verbose:
-            print(f"   ⚠️  Error liking posts: {e}")
+    if defer:
+        defer(_like_replies, replies, quest_config, verbose)
+    else:
+        _like_replies(replies, quest_config, verbose)
     
     return result
 
@@ -682,9 +953,11 @@ def add_kindred(replies: List[Dict], quest_config: Dict, verbose: bool = False)
 
 
 def mod_spectrum(replies: List[Dict], quest_config: Dict, 
-                multiplier: float = 1.0, verbose: bool = False) -> Dict:
+                multiplier: float = 1.0, verbose: bool = False, db=None) -> Dict:
     """
     Analyze reply text and modify spectrum based on content.
+    
+    db: Open quest transaction (defaults to autocommitting DatabaseManager)
     """
     result = {'success': False, 'errors': []}
     
@@ -694,7 +967,7 @@ def mod_spectrum(replies: List[Dict], quest_config: Dict,
         result['errors'].append("Spectrum utilities not available")
         return result
     
-    db = DatabaseManager()
+    db = db or DatabaseManager()
     spectrum_mgr = SpectrumManager(db)
     
     for reply in replies:
@@ -719,7 +992,7 @@ def mod_spectrum(replies: List[Dict], quest_config: Dict,
                 values = []
                 for axis, change in modifications.items():
                     new_value = (current[axis] or 0) + change
-                    updates.append(f"{axis} = ?")
+                    updates.append(f"{axis} = %s")
                     values.append(new_value)
                 
                 values.append(int(time.time()))
@@ -836,7 +1109,7 @@ def like_post(replies: List[Dict], quest_config: Dict, verbose: bool = False) ->
 
 def add_canon(replies: List[Dict], quest_config: Dict, canon_key: str, 
               canon_event: str, canon_type: str = 'event', canon_rowstyle: str = None, 
-              verbose: bool = False) -> Dict:
+              verbose: bool = False, db=None) -> Dict:
     """
     Add canon entry for quest reply authors.
     IDEMPOTENT: Won't create duplicates if same type/key already exists for dreamer.
@@ -846,10 +1119,11 @@ def add_canon(replies: List[Dict], quest_config: Dict, canon_key: str,
         canon_event: The event description (e.g., 'answered the call', 'received a letter')
         canon_type: The canon type (e.g., 'event', 'souvenir') - defaults to 'event'
         canon_rowstyle: Optional rowstyle override (e.g., 'octant', 'adaptive', 'canon')
+        db: Open quest transaction (defaults to autocommitting DatabaseManager)
     """
     result = {'success': False, 'errors': []}
     
-    db = DatabaseManager()
+    db = db or DatabaseManager()
     
     for reply in replies:
         try:
@@ -921,7 +1195,7 @@ def add_canon(replies: List[Dict], quest_config: Dict, canon_key: str,
 
 
 def add_name(replies: List[Dict], quest_config: Dict, new_name: str, 
-             verbose: bool = False) -> Dict:
+             verbose: bool = False, defer: Optional[Callable] = None) -> Dict:
     """
     Quest reward: Add a new name to a dreamer (pushes old name to alts).
     NO RESTRICTIONS - can be used multiple times for quest rewards.
@@ -930,6 +1204,7 @@ def add_name(replies: List[Dict], quest_config: Dict, new_name: str,
     
     Args:
         new_name: The new name to grant (e.g., 'watson', 'seeker')
+        defer: If provided, the Caddy rebuild is handed to it to run after commit
     """
     result = {'success': False, 'errors': []}
     
@@ -997,13 +1272,10 @@ def add_name(replies: List[Dict], quest_config: Dict, new_name: str,
                     print(f"   ✨ Registered new dreamer: {new_name}")
                 
                 # Rebuild Caddy for new subdomain
-                try:
-                    import subprocess
-                    subprocess.run(['python3', '/srv/caddy/caddybuilder.py'], 
-                                 capture_output=True, timeout=30)
-                except Exception as e:
-                    if verbose:
-                        print(f"   ⚠️  Caddy rebuild error: {e}")
+                if defer:
+                    defer(_rebuild_caddy, verbose, key='caddy')
+                else:
+                    _rebuild_caddy(verbose)
                 
                 result['success'] = True
                 continue
@@ -1070,15 +1342,10 @@ def add_name(replies: List[Dict], quest_config: Dict, new_name: str,
                 print(f"      Old name preserved in alts: {new_alts}")
             
             # Rebuild Caddy for updated subdomains
-            try:
-                import subprocess
-                subprocess.run(['python3', '/srv/caddy/caddybuilder.py'], 
-                             capture_output=True, timeout=30)
-                if verbose:
-                    print(f"   ✅ Caddy rebuilt - {new_name}.reverie.house and {current_name}.reverie.house both active")
-            except Exception as e:
-                if verbose:
-                    print(f"   ⚠️  Caddy rebuild error: {e}")
+            if defer:
+                defer(_rebuild_caddy, verbose, key='caddy')
+            else:
+                _rebuild_caddy(verbose)
             
             result['success'] = True
             
@@ -1125,17 +1392,18 @@ def disable_quest(replies: List[Dict], quest_config: Dict, verbose: bool = False
 
 
 def award_souvenir(replies: List[Dict], quest_config: Dict, souvenir_key: str, 
-                  verbose: bool = False) -> Dict:
+                  verbose: bool = False, db=None) -> Dict:
     """
     Award a souvenir to quest participants.
     Idempotent: INSERT OR IGNORE ensures no duplicates.
     
     Args:
         souvenir_key: The souvenir key to grant (e.g., 'letter')
+        db: Open quest transaction (defaults to autocommitting DatabaseManager)
     """
     result = {'success': False, 'errors': []}
     
-    db = DatabaseManager()
+    db = db or DatabaseManager()
     
     for reply in replies:
         try:
@@ -1407,7 +1675,7 @@ def reply_origin_spectrum(replies: List[Dict], quest_config: Dict, verbose: bool
     return result
 
 
-def record_trespass(replies: List[Dict], quest_config: Dict, verbose: bool = False) -> Dict:
+def record_trespass(replies: List[Dict], quest_config: Dict, verbose: bool = False, db=None) -> Dict:
     """
     Record a trespass event in reverie.house's canon system.
     
@@ -1421,13 +1689,14 @@ def record_trespass(replies: List[Dict], quest_config: Dict, verbose: bool = Fal
         replies: List of reply objects containing author info and post URI
         quest_config: Quest configuration
         verbose: Enable verbose output
+        db: Open quest transaction (defaults to autocommitting DatabaseManager)
         
     Returns:
         {'success': bool, 'errors': []}
     """
     result = {'success': True, 'errors': []}
     
-    db = DatabaseManager()
+    db = db or DatabaseManager()
     
     for reply in replies:
         try:
@@ -1446,39 +1715,42 @@ def record_trespass(replies: List[Dict], quest_config: Dict, verbose: bool = Fal
             
             # Check if this dreamer exists in reverie.house
             cursor = db.execute(
-                "SELECT id, name, handle FROM dreamers WHERE did = %s",
+                "SELECT did, name, handle FROM dreamers WHERE did = %s",
                 (author_did,)
             )
             dreamer = cursor.fetchone()
             
             if dreamer:
                 # Add canon entry for existing dreamer
-                dreamer_id = dreamer['id']
                 dreamer_name = dreamer.get('name') or dreamer.get('handle') or author_handle
                 
                 # Check if they already have a trespass canon entry
                 cursor = db.execute(
-                    "SELECT id FROM canon WHERE dreamer_id = %s AND key = %s",
-                    (dreamer_id, 'trespassed_flawed_center')
+                    "SELECT id FROM events WHERE did = %s AND type = %s AND key = %s",
+                    (author_did, 'trespass', 'trespassed_flawed_center')
                 )
                 existing = cursor.fetchone()
                 
                 if not existing:
                     # Add the canon entry
                     event_time = iso_to_unix(post_created_at) if post_created_at else int(time.time())
+                    post_url = post_uri.replace('at://', 'https://bsky.app/profile/').replace('/app.bsky.feed.post/', '/post/')
                     
-                    db.execute(
-                        """INSERT INTO canon (dreamer_id, key, event, type, event_time, post_uri)
-                           VALUES (%s, %s, %s, %s, %s, %s)""",
-                        (
-                            dreamer_id,
-                            'trespassed_flawed_center',
-                            f'{dreamer_name} confessed to trespassing upon flawed.center',
-                            'trespass',
-                            event_time,
-                            post_uri
-                        )
-                    )
+                    db.execute("""
+                        INSERT INTO events (did, event, type, key, uri, url, epoch, created_at, color_source, color_intensity)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    """, (
+                        author_did,
+                        'confessed to trespassing upon flawed.center',
+                        'trespass',
+                        'trespassed_flawed_center',
+                        post_uri,
+                        post_url,
+                        event_time,
+                        int(time.time()),
+                        'user',
+                        'highlight'
+                    ))
                     
                     if verbose:
                         print(f"   ✅ Canon recorded: {dreamer_name} trespassed flawed.center")
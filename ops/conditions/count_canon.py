@@ -12,11 +12,38 @@ Examples:
   - count_canon:early_access<=10  (only first 10 people)
 """
 
-from core.database import DatabaseManager
 import re
-from typing import Dict
+from typing import Dict, Optional, Tuple
+from .facts import ConditionFacts
 
-def count_canon(thread_result: Dict, quest_config: Dict, canon_condition: str) -> Dict:
+COMPARISON_OPERATORS = ['>=', '<=', '==', '!=', '>', '<']
+
+
+def parse_canon_condition(canon_condition: str) -> Optional[Tuple[str, str, int]]:
+    """
+    Split "key<operator><threshold>" into (key, operator, threshold).
+    
+    Returns:
+        The parts, or None if the condition isn't in that format
+    """
+    # Check longest operators first to avoid false matches
+    for op in COMPARISON_OPERATORS:
+        if op in canon_condition:
+            parts = canon_condition.split(op, 1)
+            if len(parts) == 2:
+                canon_key = parts[0].strip()
+                try:
+                    threshold = int(parts[1].strip())
+                except ValueError:
+                    continue
+                if canon_key:
+                    return canon_key, op, threshold
+                return None
+    return None
+
+
+def count_canon(thread_result: Dict, quest_config: Dict, canon_condition: str,
+                facts: Optional[ConditionFacts] = None) -> Dict:
     """
     Check how many dreamers have a canon key and compare with a threshold.
     
@@ -29,6 +56,7 @@ def count_canon(thread_result: Dict, quest_config: Dict, canon_condition: str) -
         thread_result: Dictionary with 'replies' list
         quest_config: Quest configuration dict
         canon_condition: The condition string (e.g., 'found_glinda<1', 'completed>=5')
+        facts: Shared lookups for this evaluation (one is made if omitted)
         
     Returns:
         {
@@ -60,25 +88,9 @@ def count_canon(thread_result: Dict, quest_config: Dict, canon_condition: str) -
         }
     
     # Parse the condition: key<operator><threshold>
-    # Operators: >=, <=, ==, !=, >, <
-    # Check longest operators first to avoid false matches
-    canon_key = None
-    operator = None
-    threshold = None
+    parsed = parse_canon_condition(canon_condition)
     
-    for op in ['>=', '<=', '==', '!=', '>', '<']:
-        if op in canon_condition:
-            parts = canon_condition.split(op, 1)
-            if len(parts) == 2:
-                canon_key = parts[0].strip()
-                operator = op
-                try:
-                    threshold = int(parts[1].strip())
-                    break
-                except ValueError:
-                    pass
-    
-    if not canon_key or operator is None or threshold is None:
+    if parsed is None:
         return {
             'success': False,
             'count': 0,
@@ -87,38 +99,30 @@ def count_canon(thread_result: Dict, quest_config: Dict, canon_condition: str) -
             'reason': f'Invalid condition format: "{canon_condition}". Expected: key<operator><number> (e.g., found_glinda<1, completed>=5)'
         }
     
-    # Connect to database to check how many users have this canon entry
-    db = DatabaseManager()
-    try:
-        # Count how many distinct users have this canon key
-        result = db.fetch_one(
-            "SELECT COUNT(DISTINCT did) as count FROM canon WHERE key = %s",
-            (canon_key,)
-        )
-        
-        global_count = result['count'] if result else 0
-        
-        # Evaluate the comparison
-        if operator == '<':
-            success = (global_count < threshold)
-        elif operator == '<=':
-            success = (global_count <= threshold)
-        elif operator == '==':
-            success = (global_count == threshold)
-        elif operator == '!=':
-            success = (global_count != threshold)
-        elif operator == '>=':
-            success = (global_count >= threshold)
-        elif operator == '>':
-            success = (global_count > threshold)
-        else:
-            success = False
-        
-        # If condition passes, all replies are valid candidates
-        matching_replies = replies if success else []
+    canon_key, operator, threshold = parsed
+    
+    # Count how many distinct users have this canon key (once per evaluation)
+    facts = facts or ConditionFacts()
+    global_count = facts.canon_count(canon_key)
+    
+    # Evaluate the comparison
+    if operator == '<':
+        success = (global_count < threshold)
+    elif operator == '<=':
+        success = (global_count <= threshold)
+    elif operator == '==':
+        success = (global_count == threshold)
+    elif operator == '!=':
+        success = (global_count != threshold)
+    elif operator == '>=':
+        success = (global_count >= threshold)
+    elif operator == '>':
+        success = (global_count > threshold)
+    else:
+        success = False
     
-    finally:
-        pass
+    # If condition passes, all replies are valid candidates
+    matching_replies = replies if success else []
     
     return {
         'success': success,
@@ -4,28 +4,26 @@ Quest Condition: dreamer_replies
 Check for replies from existing dreamers (users IN the database).
 """
 
-from typing import Dict
-from core.database import DatabaseManager
+from typing import Dict, Optional
+from .facts import ConditionFacts
 
 
-def dreamer_replies(thread_result: Dict, quest_config: Dict) -> Dict:
+def dreamer_replies(thread_result: Dict, quest_config: Dict, facts: Optional[ConditionFacts] = None) -> Dict:
     """
     Check for replies from existing dreamers (users IN the database).
     This is used for quests that only registered users can participate in.
     """
     replies = thread_result.get('replies', [])
     
-    db = DatabaseManager()
-    rows = db.fetch_all("SELECT did, handle FROM dreamers")
-    
-    known_dids = {row['did'] for row in rows} if rows else set()
+    facts = facts or ConditionFacts()
+    facts.load_dreamers(replies)
     
     matching_replies = []
     
     for reply in replies:
         author_did = reply.get('author', {}).get('did')
         
-        if author_did and author_did in known_dids:
+        if author_did and facts.is_dreamer_did(author_did):
             matching_replies.append(reply)
     
     return {
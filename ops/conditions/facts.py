@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+🌜 REVERIE ESSENTIAL
+Quest Condition Facts - per-evaluation lookups shared by condition modules
+
+One ConditionFacts lives for one evaluation of a quest's conditions. The
+condition plan prefetches everything its conditions will ask about for the
+replies being evaluated (latest canon events, souvenirs, dreamer membership,
+global canon/souvenir counts) in one query per kind, and conditions read the
+answers from memory. Anything not prefetched is loaded on first use and
+remembered, so a condition module called on its own still works.
+
+biblio.bond lookups (books, stamps) are HTTP calls; they're fetched once per
+author and shared by every has_read / has_biblio_stamp condition.
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from core.database import DatabaseManager
+
+
+class ConditionFacts:
+    """Memoised database and biblio.bond facts for one condition evaluation."""
+
+    def __init__(self, db: Optional[DatabaseManager] = None):
+        self._db = db
+        # (did, key) -> latest event text; pairs checked but absent are in _canon_checked only
+        self._canon: Dict[Tuple[str, str], Optional[str]] = {}
+        self._canon_checked: Set[Tuple[str, str]] = set()
+        self._souvenirs: Set[Tuple[str, str]] = set()
+        self._souvenirs_checked: Set[Tuple[str, str]] = set()
+        self._canon_counts: Dict[str, int] = {}
+        self._souvenir_counts: Dict[str, int] = {}
+        self._dreamer_dids: Set[str] = set()
+        self._dreamer_handles: Set[str] = set()
+        self._dreamers_checked: Set[str] = set()
+        self._books: Dict[str, Optional[List[Dict]]] = {}
+        self._stamps: Dict[str, Optional[List[Dict]]] = {}
+
+    @property
+    def db(self) -> DatabaseManager:
+        if self._db is None:
+            self._db = DatabaseManager()
+        return self._db
+
+    # ------------------------------------------------------------------
+    # Batched loading
+    # ------------------------------------------------------------------
+
+    def load_canon(self, dids: Iterable[str], keys: Iterable[str]):
+        """Load the latest event for every (did, key) pair not already known."""
+        pairs = {(did, key) for did in dids for key in keys} - self._canon_checked
+        if not pairs:
+            return
+        rows = self.db.fetch_all("""
+            SELECT DISTINCT ON (did, key) did, key, event
+            FROM events
+            WHERE did = ANY(%s) AND key = ANY(%s)
+            ORDER BY did, key, epoch DESC
+        """, (sorted({did for did, _ in pairs}), sorted({key for _, key in pairs})))
+        for row in rows or []:
+            self._canon[(row['did'], row['key'])] = row['event']
+        self._canon_checked |= pairs
+
+    def load_souvenirs(self, dids: Iterable[str], keys: Iterable[str]):
+        """Load which of the given dreamers hold which of the given souvenirs."""
+        pairs = {(did, key) for did in dids for key in keys} - self._souvenirs_checked
+        if not pairs:
+            return
+        rows = self.db.fetch_all("""
+            SELECT did, souvenir_key FROM dreamer_souvenirs
+            WHERE did = ANY(%s) AND souvenir_key = ANY(%s)
+        """, (sorted({did for did, _ in pairs}), sorted({key for _, key in pairs})))
+        for row in rows or []:
+            self._souvenirs.add((row['did'], row['souvenir_key']))
+        self._souvenirs_checked |= pairs
+
+    def load_canon_counts(self, keys: Iterable[str]):
+        """Load how many distinct dreamers hold each canon key."""
+        keys = sorted(set(keys) - set(self._canon_counts))
+        if not keys:
+            return
+        rows = self.db.fetch_all("""
+            SELECT key, COUNT(DISTINCT did) AS count FROM canon
+            WHERE key = ANY(%s) GROUP BY key
+        """, (keys,))
+        self._canon_counts.update({key: 0 for key in keys})
+        self._canon_counts.update({row['key']: row['count'] for row in rows or []})
+
+    def load_souvenir_counts(self, keys: Iterable[str]):
+        """Load how many times each souvenir has been earned."""
+        keys = sorted(set(keys) - set(self._souvenir_counts))
+        if not keys:
+            return
+        rows = self.db.fetch_all("""
+            SELECT souvenir_key, COUNT(*) AS count FROM dreamer_souvenirs
+            WHERE souvenir_key = ANY(%s) GROUP BY souvenir_key
+        """, (keys,))
+        self._souvenir_counts.update({key: 0 for key in keys})
+        self._souvenir_counts.update({row['souvenir_key']: row['count'] for row in rows or []})
+
+    def load_dreamers(self, replies: List[Dict]):
+        """Load which reply authors are dreamers, by DID or handle."""
+        authors = [reply.get('author', {}) for reply in replies]
+        dids = {a.get('did') for a in authors if a.get('did')}
+        handles = {a.get('handle') for a in authors if a.get('handle')}
+        wanted = (dids | {f"@{h}" for h in handles}) - self._dreamers_checked
+        if not wanted:
+            return
+        rows = self.db.fetch_all("""
+            SELECT did, handle FROM dreamers WHERE did = ANY(%s) OR handle = ANY(%s)
+        """, (sorted(dids), sorted(handles)))
+        for row in rows or []:
+            self._dreamer_dids.add(row['did'])
+            if row['handle']:
+                self._dreamer_handles.add(row['handle'])
+        self._dreamers_checked |= wanted
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def has_canon(self, did: str, key: str) -> bool:
+        self.load_canon([did], [key])
+        return (did, key) in self._canon
+
+    def latest_canon(self, did: str, key: str) -> Optional[str]:
+        """Event text of the dreamer's most recent entry for a key, or None."""
+        self.load_canon([did], [key])
+        return self._canon.get((did, key))
+
+    def has_souvenir(self, did: str, key: str) -> bool:
+        self.load_souvenirs([did], [key])
+        return (did, key) in self._souvenirs
+
+    def canon_count(self, key: str) -> int:
+        self.load_canon_counts([key])
+        return self._canon_counts[key]
+
+    def souvenir_count(self, key: str) -> int:
+        self.load_souvenir_counts([key])
+        return self._souvenir_counts[key]
+
+    def is_dreamer_did(self, did: str) -> bool:
+        if did not in self._dreamers_checked:
+            self.load_dreamers([{'author': {'did': did}}])
+        return did in self._dreamer_dids
+
+    def is_dreamer_handle(self, handle: str) -> bool:
+        if f"@{handle}" not in self._dreamers_checked:
+            self.load_dreamers([{'author': {'handle': handle}}])
+        return handle in self._dreamer_handles
+
+    def books(self, did: str) -> Optional[List[Dict]]:
+        """The author's biblio.bond books, or None if they couldn't be fetched."""
+        if did not in self._books:
+            from .has_read import fetch_user_books
+            self._books[did] = fetch_user_books(did)
+        return self._books[did]
+
+    def stamps(self, did: str) -> Optional[List[Dict]]:
+        """The author's biblio.bond stamps, or None if they couldn't be fetched."""
+        if did not in self._stamps:
+            from .has_biblio_stamp import fetch_user_stamps
+            self._stamps[did] = fetch_user_stamps(did)
+        return self._stamps[did]
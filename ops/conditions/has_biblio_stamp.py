@@ -8,12 +8,44 @@ Usage: has_biblio_stamp:at://did:plc:librarian/biblio.bond.list/3m6723l4dj22c
 """
 
 import requests
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 BSKY_CACHE = 'http://127.0.0.1:2847'
 
 
-def evaluate(thread_result: Dict, quest_config: Dict, list_identifier: str) -> Dict:
+def fetch_user_stamps(author_did: str) -> Optional[List[Dict]]:
+    """
+    Fetch all of a user's biblio.bond stamps.
+    
+    Tries the biblio.bond API, then the user's stamp records over AT Protocol.
+    
+    Returns:
+        List of stamp dicts, or None if the API request failed
+    """
+    try:
+        # Query biblio.bond API for user's stamps
+        # Note: This endpoint may need to be created on biblio.bond
+        url = f'https://biblio.bond/api/stamps/{author_did}'
+        response = requests.get(url, timeout=5)
+        
+        if response.status_code == 404:
+            # Try alternate endpoint structure
+            url = f'https://biblio.bond/api/users/{author_did}/stamps'
+            response = requests.get(url, timeout=5)
+        
+        if not response.ok:
+            # If API doesn't exist yet, try direct AT Protocol query
+            return _list_stamp_records(author_did)
+        
+        return response.json() or []
+    
+    except Exception as e:
+        # Log error but continue checking other replies
+        print(f"has_biblio_stamp: Error checking {author_did}: {e}")
+        return None
+
+
+def evaluate(thread_result: Dict, quest_config: Dict, list_identifier: str, facts=None) -> Dict:
     """
     Check if user has a biblio.bond stamp for a specific list.
     
@@ -21,6 +53,7 @@ def evaluate(thread_result: Dict, quest_config: Dict, list_identifier: str) -> D
         thread_result: Dict with 'replies' list
         quest_config: Quest configuration dict
         list_identifier: Either full AT-URI or just the rkey of the list
+        facts: ConditionFacts shared by this evaluation (stamps are fetched once per author)
         
     Returns:
         Dict with success, count, matching_replies, reason
@@ -57,43 +90,19 @@ def evaluate(thread_result: Dict, quest_config: Dict, list_identifier: str) -> D
         if not author_did:
             continue
         
-        try:
-            # Query biblio.bond API for user's stamps
-            # Note: This endpoint may need to be created on biblio.bond
-            url = f'https://biblio.bond/api/stamps/{author_did}'
-            response = requests.get(url, timeout=5)
-            
-            if response.status_code == 404:
-                # Try alternate endpoint structure
-                url = f'https://biblio.bond/api/users/{author_did}/stamps'
-                response = requests.get(url, timeout=5)
-            
-            if not response.ok:
-                # If API doesn't exist yet, try direct AT Protocol query
-                # Query for biblio.bond.stamps collection
-                stamps = _query_stamps_via_atproto(author_did, rkey)
-                if stamps:
-                    matching_replies.append(reply)
-                continue
-            
-            stamps = response.json()
-            
-            if not stamps:
-                continue
-            
-            # Check if any stamp matches the list
-            for stamp in stamps:
-                stamp_list_uri = stamp.get('list', '')
-                
-                # Match by rkey or full URI
-                if rkey in stamp_list_uri or (list_uri and stamp_list_uri == list_uri):
-                    matching_replies.append(reply)
-                    break  # Found a match for this user
-                    
-        except Exception as e:
-            # Log error but continue checking other replies
-            print(f"has_biblio_stamp: Error checking {author_did}: {e}")
+        stamps = facts.stamps(author_did) if facts else fetch_user_stamps(author_did)
+        
+        if not stamps:
             continue
+        
+        # Check if any stamp matches the list
+        for stamp in stamps:
+            stamp_list_uri = stamp.get('list', '')
+            
+            # Match by rkey or full URI
+            if rkey in stamp_list_uri or (list_uri and stamp_list_uri == list_uri):
+                matching_replies.append(reply)
+                break  # Found a match for this user
     
     success = len(matching_replies) > 0
     
@@ -105,26 +114,9 @@ def evaluate(thread_result: Dict, quest_config: Dict, list_identifier: str) -> D
     }
 
 
-def _query_stamps_via_atproto(did: str, list_rkey: str) -> List[Dict]:
-    """
-    Query stamps directly via AT Protocol.
-    
-    This is a fallback if biblio.bond doesn't have an API endpoint yet.
-    Uses AT Protocol's listRecords to query the user's biblio.bond.stamps collection.
-    
-    Args:
-        did: User's DID
-        list_rkey: The rkey of the list to check
-        
-    Returns:
-        List of matching stamp records
-    """
+def _list_stamp_records(did: str) -> List[Dict]:
+    """All biblio.bond stamp record values in a user's repo (via the Bluesky cache)."""
     try:
-        # Query via PDS API
-        # Note: This assumes the user's PDS is accessible and we know the endpoint
-        # In practice, you'd need to resolve the DID to find the PDS endpoint
-        
-        # For now, use the public Bluesky PDS as a fallback
         url = f'{BSKY_CACHE}/xrpc/com.atproto.repo.listRecords'
         params = {
             'repo': did,
@@ -142,25 +134,33 @@ def _query_stamps_via_atproto(did: str, list_rkey: str) -> List[Dict]:
         if not response.ok:
             return []
         
-        data = response.json()
-        records = data.get('records', [])
-        
-        # Filter for matching list
-        matching = []
-        for record in records:
-            value = record.get('value', {})
-            list_uri = value.get('list', '')
-            
-            if list_rkey in list_uri:
-                matching.append(value)
-        
-        return matching
-        
+        return [record.get('value', {}) for record in response.json().get('records', [])]
+    
     except Exception as e:
-        print(f"_query_stamps_via_atproto: Error querying {did}: {e}")
+        print(f"_list_stamp_records: Error querying {did}: {e}")
         return []
 
 
+def _query_stamps_via_atproto(did: str, list_rkey: str) -> List[Dict]:
+    """
+    Query stamps directly via AT Protocol.
+    
+    This is a fallback if biblio.bond doesn't have an API endpoint yet.
+    Uses AT Protocol's listRecords to query the user's biblio.bond.stamps collection.
+    
+    Args:
+        did: User's DID
+        list_rkey: The rkey of the list to check
+        
+    Returns:
+        List of matching stamp records
+    """
+    return [
+        value for value in _list_stamp_records(did)
+        if not list_rkey or list_rkey in value.get('list', '')
+    ]
+
+
 def query_user_stamps(did: str, list_rkey: str = None) -> Dict:
     """
     Standalone helper to query a user's biblio.bond stamps.
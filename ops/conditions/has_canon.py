@@ -7,10 +7,11 @@ Checks if the replying user has a specific canon entry (by key).
 Useful for checking quest completion or milestone tracking.
 """
 
-from core.database import DatabaseManager
-from typing import Dict
+from typing import Dict, Optional
+from .facts import ConditionFacts
 
-def has_canon(thread_result: Dict, quest_config: Dict, canon_key: str) -> Dict:
+def has_canon(thread_result: Dict, quest_config: Dict, canon_key: str,
+              facts: Optional[ConditionFacts] = None) -> Dict:
     """
     Check if the replying user has a specific canon entry.
     
@@ -18,6 +19,7 @@ def has_canon(thread_result: Dict, quest_config: Dict, canon_key: str) -> Dict:
         thread_result: Dictionary with 'replies' list
         quest_config: Quest configuration dict
         canon_key: The canon key to check for
+        facts: Shared lookups for this evaluation (one is made if omitted)
         
     Returns:
         {
@@ -47,24 +49,17 @@ def has_canon(thread_result: Dict, quest_config: Dict, canon_key: str) -> Dict:
     
     matching_replies = []
     
-    # Connect to database to check canon entries
-    db = DatabaseManager()
-    try:
-        for reply in replies:
-            author_did = reply.get('author', {}).get('did')
-            if not author_did:
-                continue
-            
-            # Check if this user has a canon entry with this key
-            # Note: add_canon writes to the EVENTS table, not the canon table
-            if db.fetch_one(
-                "SELECT 1 FROM events WHERE did = %s AND key = %s",
-                (author_did, canon_key)
-            ):
-                matching_replies.append(reply)
+    facts = facts or ConditionFacts()
     
-    finally:
-        pass  # DatabaseManager auto-closes
+    for reply in replies:
+        author_did = reply.get('author', {}).get('did')
+        if not author_did:
+            continue
+        
+        # Check if this user has a canon entry with this key
+        # Note: add_canon writes to the EVENTS table, not the canon table
+        if facts.has_canon(author_did, canon_key):
+            matching_replies.append(reply)
     
     success = len(matching_replies) > 0
     
@@ -10,7 +10,25 @@ Usage: has_read:Earthsea
 import requests
 
 
-def evaluate(thread_result, quest_config, book_title):
+def fetch_user_books(author_did):
+    """
+    Fetch a user's books from biblio.bond.
+    
+    Returns:
+        List of book dicts, or None if the request failed
+    """
+    try:
+        url = f'https://biblio.bond/api/books/{author_did}'
+        response = requests.get(url, timeout=5)
+        if not response.ok:
+            return None
+        return response.json() or []
+    except Exception as e:
+        print(f"has_read: Error checking {author_did}: {e}")
+        return None
+
+
+def evaluate(thread_result, quest_config, book_title, facts=None):
     """
     Check if user has read a book matching the given title.
     
@@ -18,6 +36,7 @@ def evaluate(thread_result, quest_config, book_title):
         thread_result: Dict with 'replies' list
         quest_config: Quest configuration dict
         book_title: Book title to search for
+        facts: ConditionFacts shared by this evaluation (books are fetched once per author)
         
     Returns:
         Dict with success, count, matching_replies, reason
@@ -42,30 +61,17 @@ def evaluate(thread_result, quest_config, book_title):
         if not author_did:
             continue
         
-        try:
-            # Query biblio.bond API for user's books
-            url = f'https://biblio.bond/api/books/{author_did}'
-            response = requests.get(url, timeout=5)
-            
-            if not response.ok:
-                continue
-            
-            books = response.json()
-            
-            if not books:
-                continue
-            
-            # Case-insensitive partial match on title
-            for book in books:
-                book_title_check = book.get('title', '').lower()
-                if title_lower in book_title_check:
-                    matching_replies.append(reply)
-                    break  # Found a match for this user, move to next reply
-                    
-        except Exception as e:
-            # Log error but continue checking other replies
-            print(f"has_read: Error checking {author_did}: {e}")
+        books = facts.books(author_did) if facts else fetch_user_books(author_did)
+        
+        if not books:
             continue
+        
+        # Case-insensitive partial match on title
+        for book in books:
+            book_title_check = book.get('title', '').lower()
+            if title_lower in book_title_check:
+                matching_replies.append(reply)
+                break  # Found a match for this user, move to next reply
     
     success = len(matching_replies) > 0
     
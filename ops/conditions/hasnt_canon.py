@@ -7,9 +7,11 @@ Checks if the replying user does NOT have a specific canon entry (inverse of has
 Useful for first-time quest triggers and preventing duplicates.
 """
 
-from typing import Dict
+from typing import Dict, Optional
+from .facts import ConditionFacts
 
-def hasnt_canon(thread_result: Dict, quest_config: Dict, canon_key: str) -> Dict:
+def hasnt_canon(thread_result: Dict, quest_config: Dict, canon_key: str,
+                facts: Optional[ConditionFacts] = None) -> Dict:
     """
     Check if the replying user does NOT have a specific canon entry.
     
@@ -17,6 +19,7 @@ def hasnt_canon(thread_result: Dict, quest_config: Dict, canon_key: str) -> Dict
         thread_result: Dictionary with 'replies' list
         quest_config: Quest configuration dict
         canon_key: The canon key to check for absence
+        facts: Shared lookups for this evaluation (one is made if omitted)
         
     Returns:
         {
@@ -46,9 +49,7 @@ def hasnt_canon(thread_result: Dict, quest_config: Dict, canon_key: str) -> Dict
     
     matching_replies = []
     
-    # Use DatabaseManager to get proper connection
-    from core.database import DatabaseManager
-    db = DatabaseManager()
+    facts = facts or ConditionFacts()
     
     try:
         for reply in replies:
@@ -58,10 +59,7 @@ def hasnt_canon(thread_result: Dict, quest_config: Dict, canon_key: str) -> Dict
             
             # Check if this user does NOT have a canon entry with this key
             # Note: add_canon writes to the EVENTS table, not the canon table
-            if not db.fetch_one(
-                "SELECT 1 FROM events WHERE did = %s AND key = %s",
-                (author_did, canon_key)
-            ):
+            if not facts.has_canon(author_did, canon_key):
                 # User does NOT have the canon entry - this is what we want
                 matching_replies.append(reply)
     
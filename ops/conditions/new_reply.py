@@ -4,22 +4,20 @@ Quest Condition: new_reply
 Check for replies from users NOT in the dreamers database.
 """
 
-from typing import Dict
-from core.database import DatabaseManager
+from typing import Dict, Optional
+from .facts import ConditionFacts
 
 
-def new_reply(thread_result: Dict, quest_config: Dict) -> Dict:
+def new_reply(thread_result: Dict, quest_config: Dict, facts: Optional[ConditionFacts] = None) -> Dict:
     """
     Check for replies from users NOT in the dreamers database.
     This is used for registration/onboarding quests.
     """
     replies = thread_result.get('replies', [])
     
-    db = DatabaseManager()
-    rows = db.fetch_all("SELECT did, handle FROM dreamers")
-    
-    known_dids = {row['did'] for row in rows} if rows else set()
-    known_handles = {row['handle'] for row in rows} if rows else set()
+    # Only the reply authors are looked up, not the whole dreamers table
+    facts = facts or ConditionFacts()
+    facts.load_dreamers(replies)
     
     matching_replies = []
     
@@ -30,8 +28,8 @@ def new_reply(thread_result: Dict, quest_config: Dict) -> Dict:
         is_new = (
             author_did and 
             author_handle and 
-            author_did not in known_dids and
-            author_handle not in known_handles
+            not facts.is_dreamer_did(author_did) and
+            not facts.is_dreamer_handle(author_handle)
         )
         
         if is_new:
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+🌜 REVERIE ESSENTIAL
+Quest Condition Plans - conditions parsed once, facts fetched in batches
+
+A ConditionPlan is built once per distinct conditions array: every condition
+string is dispatched to its evaluator and its arguments are split up front,
+and the plan records which canon keys, souvenirs and global counts its
+conditions will need. Evaluating the plan prefetches those facts for all the
+replies at once (ConditionFacts), then runs each condition from memory.
+
+Plans are cached by the conditions' JSON, so a busy quest pays for parsing
+once rather than on every reply.
+"""
+
+import copy
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set
+
+from .facts import ConditionFacts
+from .any_reply import any_reply
+from .new_reply import new_reply
+from .dreamer_replies import dreamer_replies
+from .reply_contains import reply_contains
+from .contains_hashtags import contains_hashtags
+from .contains_mentions import contains_mentions
+from .user_has_souvenir import user_has_souvenir
+from .user_missing_souvenir import user_missing_souvenir
+from .souvenir_exists_anywhere import souvenir_exists_anywhere
+from .has_canon import has_canon
+from .hasnt_canon import hasnt_canon
+from .count_canon import count_canon, parse_canon_condition
+from .user_canon_equals import user_canon_equals
+from .user_canon_not_equals import user_canon_not_equals
+from .user_in_canon_list import user_in_canon_list
+from .has_read import evaluate as has_read
+from .has_biblio_stamp import evaluate as has_biblio_stamp
+
+
+PLAN_CACHE_SIZE = 256
+
+
+def _failure(reason: str) -> Dict:
+    return {
+        'success': False,
+        'count': 0,
+        'matching_replies': [],
+        'reason': reason
+    }
+
+
+class CompiledCondition:
+    """One condition string resolved to its evaluator and the facts it reads."""
+
+    __slots__ = ('condition', 'evaluator', 'canon_keys', 'souvenir_keys',
+                 'canon_counts', 'souvenir_counts', 'needs_dreamers')
+
+    def __init__(self, condition: str, evaluator: Callable[..., Dict], canon_keys=(), souvenir_keys=(),
+                 canon_counts=(), souvenir_counts=(), needs_dreamers: bool = False):
+        self.condition = condition
+        self.evaluator = evaluator
+        self.canon_keys = frozenset(k for k in canon_keys if k)
+        self.souvenir_keys = frozenset(k for k in souvenir_keys if k)
+        self.canon_counts = frozenset(k for k in canon_counts if k)
+        self.souvenir_counts = frozenset(k for k in souvenir_counts if k)
+        self.needs_dreamers = needs_dreamers
+
+    def run(self, thread_result: Dict, quest_config: Dict, facts: Optional[ConditionFacts] = None) -> Dict:
+        if not thread_result.get('replies', []):
+            return _failure('No replies found')
+        return self.evaluator(thread_result, quest_config, facts=facts)
+
+
+def _bind(evaluator: Callable[..., Dict], *args, uses_facts: bool = True) -> Callable[..., Dict]:
+    """Fix a condition's arguments; the result is called as f(thread_result, quest_config, facts=...)."""
+    if uses_facts:
+        return lambda thread_result, quest_config, facts=None: evaluator(thread_result, quest_config, *args, facts=facts)
+    return lambda thread_result, quest_config, facts=None: evaluator(thread_result, quest_config, *args)
+
+
+def _fail_with(reason: str) -> Callable[..., Dict]:
+    return lambda thread_result, quest_config, facts=None: _failure(reason)
+
+
+def compile_condition(condition: str) -> CompiledCondition:
+    """Resolve a condition string (e.g. 'reply_contains:text') to a CompiledCondition."""
+    # Argument-taking conditions are "name:arg"; bare names only match exactly
+    name, sep, arg = condition.partition(':')
+    if not sep:
+        name = None
+
+    if condition == 'any_reply':
+        return CompiledCondition(condition, _bind(any_reply, uses_facts=False))
+    elif condition == 'new_reply':
+        return CompiledCondition(condition, _bind(new_reply), needs_dreamers=True)
+    elif condition == 'dreamer_replies':
+        return CompiledCondition(condition, _bind(dreamer_replies), needs_dreamers=True)
+    elif name == 'reply_contains':
+        return CompiledCondition(condition, _bind(reply_contains, arg, uses_facts=False))
+    elif name == 'contains_hashtags':
+        return CompiledCondition(condition, _bind(contains_hashtags, arg.split(','), uses_facts=False))
+    elif name == 'contains_mentions':
+        return CompiledCondition(condition, _bind(contains_mentions, arg.split(','), uses_facts=False))
+    elif name == 'user_has_souvenir':
+        return CompiledCondition(condition, _bind(user_has_souvenir, arg), souvenir_keys=[arg])
+    elif name == 'user_missing_souvenir':
+        return CompiledCondition(condition, _bind(user_missing_souvenir, arg), souvenir_keys=[arg])
+    elif name == 'souvenir_exists_anywhere':
+        return CompiledCondition(condition, _bind(souvenir_exists_anywhere, arg), souvenir_counts=[arg])
+    elif name == 'has_canon':
+        return CompiledCondition(condition, _bind(has_canon, arg), canon_keys=[arg])
+    elif name == 'hasnt_canon':
+        return CompiledCondition(condition, _bind(hasnt_canon, arg), canon_keys=[arg])
+    elif name == 'count_canon':
+        parsed = parse_canon_condition(arg)
+        return CompiledCondition(condition, _bind(count_canon, arg),
+                                 canon_counts=[parsed[0]] if parsed else [])
+    elif name in ('user_canon_equals', 'user_canon_not_equals'):
+        # Format: user_canon_equals:key=value
+        if '=' not in arg:
+            return CompiledCondition(condition, _fail_with(f'Invalid format: use {name}:key=value'))
+        canon_key, canon_value = arg.split('=', 1)
+        evaluator = user_canon_equals if name == 'user_canon_equals' else user_canon_not_equals
+        return CompiledCondition(condition, _bind(evaluator, canon_key, canon_value), canon_keys=[canon_key])
+    elif name == 'user_in_canon_list':
+        # Format: user_in_canon_list:key=value1,value2,value3
+        if '=' not in arg:
+            return CompiledCondition(condition, _fail_with('Invalid format: use user_in_canon_list:key=value1,value2'))
+        canon_key, values_str = arg.split('=', 1)
+        canon_values = [v.strip() for v in values_str.split(',')]
+        return CompiledCondition(condition, _bind(user_in_canon_list, canon_key, canon_values), canon_keys=[canon_key])
+    elif name == 'has_read':
+        # Format: has_read:Book Title
+        return CompiledCondition(condition, _bind(has_read, arg))
+    elif name == 'has_biblio_stamp':
+        # Format: has_biblio_stamp:list_rkey or has_biblio_stamp:at://did:plc:xxx/biblio.bond.list/rkey
+        return CompiledCondition(condition, _bind(has_biblio_stamp, arg))
+
+    return CompiledCondition(condition, _fail_with(f'Unknown condition: {condition}'))
+
+
+class ConditionPlan:
+    """A quest's conditions array, compiled once and evaluated with batched prefetch."""
+
+    def __init__(self, conditions: List[Dict], operator: str = 'AND'):
+        self.operator = operator
+        self.steps = []  # (index, condition object, CompiledCondition) for enabled conditions
+
+        for idx, cond_obj in enumerate(conditions):
+            # Skip disabled conditions
+            if cond_obj.get('disabled', False):
+                continue
+
+            # Expect canonical condition object with 'condition' and 'args'
+            cond_name = cond_obj.get('condition')
+            if not cond_name:
+                raise RuntimeError(
+                    "Found non-canonical condition object; run migration to canonical schema: tools/migrate_quests_to_canonical.py"
+                )
+
+            # Join args with comma to form the single-condition string (e.g. reply_contains:foo)
+            args = cond_obj.get('args', []) or []
+            condition_str = f"{cond_name}:{','.join(str(a) for a in args)}" if args else cond_name
+
+            self.steps.append((idx, copy.deepcopy(cond_obj), compile_condition(condition_str)))
+
+        compiled = [step[2] for step in self.steps]
+        self.canon_keys: Set[str] = set().union(*(c.canon_keys for c in compiled))
+        self.souvenir_keys: Set[str] = set().union(*(c.souvenir_keys for c in compiled))
+        self.canon_counts: Set[str] = set().union(*(c.canon_counts for c in compiled))
+        self.souvenir_counts: Set[str] = set().union(*(c.souvenir_counts for c in compiled))
+        self.needs_dreamers = any(c.needs_dreamers for c in compiled)
+
+    def prefetch(self, replies: List[Dict], facts: ConditionFacts):
+        """Load every fact the plan's conditions read for these replies, one query per kind."""
+        dids = {reply.get('author', {}).get('did') for reply in replies} - {None, ''}
+        if dids and self.canon_keys:
+            facts.load_canon(dids, self.canon_keys)
+        if dids and self.souvenir_keys:
+            facts.load_souvenirs(dids, self.souvenir_keys)
+        if self.canon_counts:
+            facts.load_canon_counts(self.canon_counts)
+        if self.souvenir_counts:
+            facts.load_souvenir_counts(self.souvenir_counts)
+        if self.needs_dreamers:
+            facts.load_dreamers(replies)
+
+    def evaluate(self, thread_result: Dict, quest_config: Dict,
+                 facts: Optional[ConditionFacts] = None) -> Dict:
+        """Evaluate the plan; same result shape as evaluate_conditions()."""
+        facts = facts or ConditionFacts()
+        replies = thread_result.get('replies', [])
+        if replies:
+            try:
+                self.prefetch(replies, facts)
+            except Exception as e:
+                # Conditions load what they need themselves if the batch failed
+                print(f"⚠️  Condition prefetch failed: {e}")
+
+        results = []
+        all_matching_replies = []
+        all_custom_commands = []
+        matched_once_only_indices = []  # Track once-only conditions that matched
+
+        for idx, cond_obj, compiled in self.steps:
+            result = compiled.run(thread_result, quest_config, facts)
+            results.append(result)
+
+            # If this condition matched, collect its custom commands
+            if result['success']:
+                custom_cmds = cond_obj.get('custom_commands', [])
+                if custom_cmds:
+                    all_custom_commands.extend(custom_cmds)
+
+                # If this is a once-only condition, mark it for disabling
+                if cond_obj.get('once_only', False):
+                    matched_once_only_indices.append(idx)
+
+                # Collect matching replies
+                if result.get('matching_replies'):
+                    all_matching_replies.extend(result['matching_replies'])
+
+        # Deduplicate replies by URI
+        seen_uris = set()
+        unique_replies = []
+        for reply in all_matching_replies:
+            uri = reply.get('uri', '')
+            if uri and uri not in seen_uris:
+                seen_uris.add(uri)
+                unique_replies.append(reply)
+
+        # Group conditions by their individual operator field
+        and_results = []
+        or_results = []
+        not_results = []
+
+        for (_, cond_obj, _), result in zip(self.steps, results):
+            cond_operator = cond_obj.get('operator', self.operator)  # Use condition's operator or global
+            if cond_operator == 'OR':
+                or_results.append(result)
+            elif cond_operator == 'NOT':
+                not_results.append(result)
+            else:
+                and_results.append(result)  # AND, or default to AND
+
+        success, reason = _combine(self.operator, results, and_results, or_results, not_results)
+
+        # If any once-only conditions matched, add disable command at the END
+        # (so it happens after all other commands)
+        if matched_once_only_indices:
+            indices_str = ','.join(str(i) for i in matched_once_only_indices)
+            all_custom_commands.append(f'disable_condition_group:{indices_str}')
+
+        return {
+            'success': success,
+            'count': len(unique_replies),
+            'matching_replies': unique_replies,
+            'reason': reason,
+            'condition_results': results,  # Include individual results for debugging
+            'custom_commands': all_custom_commands  # Commands to execute before common commands
+        }
+
+
+def _combine(operator: str, results: List[Dict], and_results: List[Dict],
+             or_results: List[Dict], not_results: List[Dict]):
+    """Combine per-condition results into (success, reason)."""
+    and_pass = all(r['success'] for r in and_results) if and_results else True
+    or_pass = any(r['success'] for r in or_results) if or_results else True
+    not_pass = not any(r['success'] for r in not_results) if not_results else True
+
+    if and_results and or_results:
+        # Mixed mode: AND conditions must pass AND at least one OR condition
+        success = and_pass and or_pass and not_pass
+        return success, ('All AND conditions and at least one OR condition matched' if success else
+                         'Missing required AND conditions or no OR conditions matched')
+    if and_results:
+        success = and_pass and not_pass
+        return success, 'All conditions matched' if success else 'Not all conditions matched'
+    if or_results:
+        success = or_pass and not_pass
+        return success, 'At least one condition matched' if success else 'No conditions matched'
+
+    # Fallback to global operator for backward compatibility
+    if operator == 'OR':
+        success = any(r['success'] for r in results)
+        return success, 'At least one condition matched' if success else 'No conditions matched'
+    if operator == 'AND':
+        success = all(r['success'] for r in results)
+        return success, 'All conditions matched' if success else 'Not all conditions matched'
+    if operator == 'NOT':
+        success = not any(r['success'] for r in results)
+        return success, 'No conditions matched (as expected)' if success else 'Some conditions matched (NOT failed)'
+    if operator == 'XOR':
+        success_count = sum(1 for r in results if r['success'])
+        success = success_count == 1
+        return success, 'Exactly one condition matched' if success else \
+            f'{success_count} conditions matched (XOR requires exactly 1)'
+    success = all(r['success'] for r in results)
+    return success, 'All conditions matched (default AND)' if success else 'Not all conditions matched'
+
+
+_plan_cache: 'OrderedDict[str, ConditionPlan]' = OrderedDict()
+_plan_lock = threading.Lock()
+
+
+def get_plan(conditions: List[Dict], operator: str = 'AND') -> ConditionPlan:
+    """Return the compiled plan for a conditions array, building it on first use."""
+    key = json.dumps([conditions, operator], sort_keys=True, default=str)
+    with _plan_lock:
+        plan = _plan_cache.get(key)
+        if plan is not None:
+            _plan_cache.move_to_end(key)
+            return plan
+
+    plan = ConditionPlan(conditions, operator)
+    with _plan_lock:
+        _plan_cache[key] = plan
+        while len(_plan_cache) > PLAN_CACHE_SIZE:
+            _plan_cache.popitem(last=False)
+    return plan
@@ -7,10 +7,11 @@ Checks if ANY user in the system has earned a specific souvenir.
 Useful for unlocking quests after the first person completes something.
 """
 
-from core.database import DatabaseManager
-from typing import Dict
+from typing import Dict, Optional
+from .facts import ConditionFacts
 
-def souvenir_exists_anywhere(thread_result: Dict, quest_config: Dict, souvenir_key: str) -> Dict:
+def souvenir_exists_anywhere(thread_result: Dict, quest_config: Dict, souvenir_key: str,
+                             facts: Optional[ConditionFacts] = None) -> Dict:
     """
     Check if ANY user has earned a specific souvenir.
     
@@ -18,6 +19,7 @@ def souvenir_exists_anywhere(thread_result: Dict, quest_config: Dict, souvenir_k
         thread_result: Dictionary with 'replies' list
         quest_config: Quest configuration dict
         souvenir_key: The souvenir key to check for
+        facts: Shared lookups for this evaluation (one is made if omitted)
         
     Returns:
         {
@@ -45,22 +47,14 @@ def souvenir_exists_anywhere(thread_result: Dict, quest_config: Dict, souvenir_k
             'reason': 'No souvenir key specified'
         }
     
-    # Connect to database to check if souvenir exists anywhere
-    db = DatabaseManager()
-    try:
-        # Check if anyone has this souvenir
-        result = db.fetch_one(
-            "SELECT COUNT(*) as count FROM dreamer_souvenirs WHERE souvenir_key = %s",
-            (souvenir_key,)
-        )
-        
-        count = result['count'] if result else 0
-        exists = count > 0
-        
-    finally:
-        # If the souvenir exists anywhere, match all replies
-        # This allows the quest to trigger for anyone when global condition is met
-        matching_replies = replies if exists else []
+    # Check if anyone has this souvenir (counted once per evaluation)
+    facts = facts or ConditionFacts()
+    count = facts.souvenir_count(souvenir_key)
+    exists = count > 0
+    
+    # If the souvenir exists anywhere, match all replies
+    # This allows the quest to trigger for anyone when global condition is met
+    matching_replies = replies if exists else []
     
     return {
         'success': exists,
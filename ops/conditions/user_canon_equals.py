@@ -7,10 +7,11 @@ Checks if the replying user has a canon entry with a specific key AND value.
 Useful for gating quests by canon state (e.g., zone membership, quest completion stages).
 """
 
-from core.database import DatabaseManager
-from typing import Dict
+from typing import Dict, Optional
+from .facts import ConditionFacts
 
-def user_canon_equals(thread_result: Dict, quest_config: Dict, canon_key: str, canon_value: str) -> Dict:
+def user_canon_equals(thread_result: Dict, quest_config: Dict, canon_key: str, canon_value: str,
+                      facts: Optional[ConditionFacts] = None) -> Dict:
     """
     Check if the replying user has a canon entry with a specific key=value pair.
     
@@ -19,6 +20,7 @@ def user_canon_equals(thread_result: Dict, quest_config: Dict, canon_key: str, c
         quest_config: Quest configuration dict
         canon_key: The canon key to check
         canon_value: The expected value for that key
+        facts: Shared lookups for this evaluation (one is made if omitted)
         
     Returns:
         {
@@ -56,8 +58,7 @@ def user_canon_equals(thread_result: Dict, quest_config: Dict, canon_key: str, c
     
     matching_replies = []
     
-    # Connect to database to check canon entries
-    db = DatabaseManager()
+    facts = facts or ConditionFacts()
     try:
         for reply in replies:
             author_did = reply.get('author', {}).get('did')
@@ -65,12 +66,9 @@ def user_canon_equals(thread_result: Dict, quest_config: Dict, canon_key: str, c
                 continue
             
             # Check if this user has an event entry with this key=value
-            result = db.fetch_one(
-                "SELECT event FROM events WHERE did = %s AND key = %s ORDER BY epoch DESC LIMIT 1",
-                (author_did, canon_key)
-            )
+            latest = facts.latest_canon(author_did, canon_key)
             
-            if result and result['event'] == canon_value:
+            if latest == canon_value:
                 matching_replies.append(reply)
     
     finally:
@@ -7,10 +7,11 @@ Checks if the replying user does NOT have a canon entry with a specific key=valu
 Useful for excluding certain canon states from quest eligibility.
 """
 
-from core.database import DatabaseManager
-from typing import Dict
+from typing import Dict, Optional
+from .facts import ConditionFacts
 
-def user_canon_not_equals(thread_result: Dict, quest_config: Dict, canon_key: str, canon_value: str) -> Dict:
+def user_canon_not_equals(thread_result: Dict, quest_config: Dict, canon_key: str, canon_value: str,
+                          facts: Optional[ConditionFacts] = None) -> Dict:
     """
     Check if the replying user does NOT have a canon entry with key=value.
     
@@ -19,6 +20,7 @@ def user_canon_not_equals(thread_result: Dict, quest_config: Dict, canon_key: st
         quest_config: Quest configuration dict
         canon_key: The canon key to check
         canon_value: The value to exclude
+        facts: Shared lookups for this evaluation (one is made if omitted)
         
     Returns:
         {
@@ -56,8 +58,7 @@ def user_canon_not_equals(thread_result: Dict, quest_config: Dict, canon_key: st
     
     matching_replies = []
     
-    # Connect to database to check canon entries
-    db = DatabaseManager()
+    facts = facts or ConditionFacts()
     try:
         for reply in replies:
             author_did = reply.get('author', {}).get('did')
@@ -65,13 +66,10 @@ def user_canon_not_equals(thread_result: Dict, quest_config: Dict, canon_key: st
                 continue
             
             # Check if this user's event entry has a DIFFERENT value or doesn't exist
-            result = db.fetch_one(
-                "SELECT event FROM events WHERE did = %s AND key = %s ORDER BY epoch DESC LIMIT 1",
-                (author_did, canon_key)
-            )
+            latest = facts.latest_canon(author_did, canon_key)
             
             # Match if: no entry exists, OR entry exists but has different value
-            if not result or result['event'] != canon_value:
+            if latest != canon_value:
                 matching_replies.append(reply)
     
     finally:
@@ -6,10 +6,11 @@ Condition: user_has_souvenir
 Checks if the replying user has earned a specific souvenir.
 """
 
-from core.database import DatabaseManager
-from typing import Dict
+from typing import Dict, Optional
+from .facts import ConditionFacts
 
-def user_has_souvenir(thread_result: Dict, quest_config: Dict, souvenir_key: str) -> Dict:
+def user_has_souvenir(thread_result: Dict, quest_config: Dict, souvenir_key: str,
+                      facts: Optional[ConditionFacts] = None) -> Dict:
     """
     Check if the replying user has a specific souvenir.
     
@@ -17,6 +18,7 @@ def user_has_souvenir(thread_result: Dict, quest_config: Dict, souvenir_key: str
         thread_result: Dictionary with 'replies' list
         quest_config: Quest configuration dict
         souvenir_key: The souvenir key to check for
+        facts: Shared lookups for this evaluation (one is made if omitted)
         
     Returns:
         {
@@ -46,23 +48,18 @@ def user_has_souvenir(thread_result: Dict, quest_config: Dict, souvenir_key: str
     
     matching_replies = []
     
-    # Connect to database to check souvenirs
-    db = DatabaseManager()
-    try:
-        for reply in replies:
-            author_did = reply.get('author', {}).get('did')
-            if not author_did:
-                continue
-            
-            # Check if this user has the souvenir
-            if db.fetch_one(
-                "SELECT 1 FROM dreamer_souvenirs WHERE did = %s AND souvenir_key = %s",
-                (author_did, souvenir_key)
-            ):
-                matching_replies.append(reply)
+    facts = facts or ConditionFacts()
     
-    finally:
-        success = len(matching_replies) > 0
+    for reply in replies:
+        author_did = reply.get('author', {}).get('did')
+        if not author_did:
+            continue
+        
+        # Check if this user has the souvenir
+        if facts.has_souvenir(author_did, souvenir_key):
+            matching_replies.append(reply)
+    
+    success = len(matching_replies) > 0
     
     return {
         'success': success,
@@ -7,10 +7,11 @@ Checks if the replying user's canon value is in a list of allowed values.
 Useful for multi-zone quests or quests that apply to several canon states.
 """
 
-from core.database import DatabaseManager
-from typing import Dict, List
+from typing import Dict, List, Optional
+from .facts import ConditionFacts
 
-def user_in_canon_list(thread_result: Dict, quest_config: Dict, canon_key: str, canon_values: List[str]) -> Dict:
+def user_in_canon_list(thread_result: Dict, quest_config: Dict, canon_key: str, canon_values: List[str],
+                       facts: Optional[ConditionFacts] = None) -> Dict:
     """
     Check if the replying user has a canon entry with key in a list of values.
     
@@ -19,6 +20,7 @@ def user_in_canon_list(thread_result: Dict, quest_config: Dict, canon_key: str,
         quest_config: Quest configuration dict
         canon_key: The canon key to check
         canon_values: List of acceptable values
+        facts: Shared lookups for this evaluation (one is made if omitted)
         
     Returns:
         {
@@ -56,8 +58,7 @@ def user_in_canon_list(thread_result: Dict, quest_config: Dict, canon_key: str,
     
     matching_replies = []
     
-    # Connect to database to check canon entries
-    db = DatabaseManager()
+    facts = facts or ConditionFacts()
     try:
         for reply in replies:
             author_did = reply.get('author', {}).get('did')
@@ -65,12 +66,9 @@ def user_in_canon_list(thread_result: Dict, quest_config: Dict, canon_key: str,
                 continue
             
             # Check if this user's event value is in the allowed list
-            result = db.fetch_one(
-                "SELECT event FROM events WHERE did = %s AND key = %s ORDER BY epoch DESC LIMIT 1",
-                (author_did, canon_key)
-            )
+            latest = facts.latest_canon(author_did, canon_key)
             
-            if result and result['event'] in canon_values:
+            if latest in canon_values:
                 matching_replies.append(reply)
     
     finally:
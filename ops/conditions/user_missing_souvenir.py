@@ -7,10 +7,11 @@ Checks if the replying user does NOT have a specific souvenir (inverse of user_h
 Useful for one-time quest rewards.
 """
 
-from core.database import DatabaseManager
-from typing import Dict
+from typing import Dict, Optional
+from .facts import ConditionFacts
 
-def user_missing_souvenir(thread_result: Dict, quest_config: Dict, souvenir_key: str) -> Dict:
+def user_missing_souvenir(thread_result: Dict, quest_config: Dict, souvenir_key: str,
+                          facts: Optional[ConditionFacts] = None) -> Dict:
     """
     Check if the replying user does NOT have a specific souvenir.
     
@@ -18,6 +19,7 @@ def user_missing_souvenir(thread_result: Dict, quest_config: Dict, souvenir_key:
         thread_result: Dictionary with 'replies' list
         quest_config: Quest configuration dict
         souvenir_key: The souvenir key to check for absence
+        facts: Shared lookups for this evaluation (one is made if omitted)
         
     Returns:
         {
@@ -47,24 +49,19 @@ def user_missing_souvenir(thread_result: Dict, quest_config: Dict, souvenir_key:
     
     matching_replies = []
     
-    # Connect to database to check souvenirs
-    db = DatabaseManager()
-    try:
-        for reply in replies:
-            author_did = reply.get('author', {}).get('did')
-            if not author_did:
-                continue
-            
-            # Check if this user does NOT have the souvenir
-            if not db.fetch_one(
-                "SELECT 1 FROM dreamer_souvenirs WHERE did = %s AND souvenir_key = %s",
-                (author_did, souvenir_key)
-            ):
-                # User does NOT have the souvenir - this is what we want
-                matching_replies.append(reply)
+    facts = facts or ConditionFacts()
     
-    finally:
-        success = len(matching_replies) > 0
+    for reply in replies:
+        author_did = reply.get('author', {}).get('did')
+        if not author_did:
+            continue
+        
+        # Check if this user does NOT have the souvenir
+        if not facts.has_souvenir(author_did, souvenir_key):
+            # User does NOT have the souvenir - this is what we want
+            matching_replies.append(reply)
+    
+    success = len(matching_replies) > 0
     
     return {
         'success': success,
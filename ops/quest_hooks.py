@@ -14,6 +14,7 @@ from typing import Dict, List, Optional, Set
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from ops.quests import QuestManager
+from ops.quest_registry import quest_registry
 from core.database import DatabaseManager
 
 
@@ -25,9 +26,7 @@ def get_quest_uris() -> List[str]:
         List of AT Protocol URIs for active quests
     """
     try:
-        manager = QuestManager()
-        uris = manager.get_quest_uris()
-        return list(uris)
+        return list(quest_registry.reply_uris())
     except Exception as e:
         print(f"⚠️  Error loading quest URIs: {e}")
         return []
@@ -57,7 +56,8 @@ def process_quest_reply(reply_uri: str, author_did: str, author_handle: str,
             'commands_executed': List[str],
             'skipped': bool,
             'skip_reason': str,
-            'errors': List[str]
+            'errors': List[str],
+            'retryable': bool   # failed before any command ran; safe to retry
         }
     """
     result = {
@@ -66,23 +66,19 @@ def process_quest_reply(reply_uri: str, author_did: str, author_handle: str,
         'commands_executed': [],
         'skipped': False,
         'skip_reason': None,
-        'errors': []
+        'errors': [],
+        'retryable': False
     }
+    commands_started = False
     
     try:
-        manager = QuestManager()
-        quests = manager.get_enabled_quests()
+        compiled = quest_registry.get_by_uri(quest_uri)
         
-        matching_quest = None
-        for quest in quests:
-            if quest['uri'] == quest_uri:
-                matching_quest = quest
-                break
-        
-        if not matching_quest:
+        if not compiled:
             result['errors'].append(f"No enabled quest found for URI: {quest_uri}")
             return result
         
+        matching_quest = compiled.as_dict()
         result['quest_title'] = matching_quest['title']
         
         if verbose:
@@ -137,6 +133,7 @@ def process_quest_reply(reply_uri: str, author_did: str, author_handle: str,
         # Execute custom commands first (e.g., personalized replies), then common commands
         all_commands = custom_commands + common_commands
         
+        commands_started = True
         command_result = execute_quest_commands(
             all_commands,
             matching_replies,
@@ -156,6 +153,7 @@ def process_quest_reply(reply_uri: str, author_did: str, author_handle: str,
         
     except Exception as e:
         result['errors'].append(f"Quest processing error: {e}")
+        result['retryable'] = not commands_started
         if verbose:
             print(f"   ❌ Error: {e}")
             import traceback
@@ -176,7 +174,7 @@ class QuestHooks:
     
     def get_quest_uris(self) -> Set[str]:
         """Get set of quest URIs to monitor."""
-        return self.manager.get_quest_uris()
+        return quest_registry.reply_uris()
     
     def process_reply(self, reply_uri: str, author_did: str, author_handle: str,
                      post_text: str, post_created_at: str, quest_uri: str) -> Dict:
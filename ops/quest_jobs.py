@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+🌜 REVERIE ESSENTIAL
+Quest Jobs - Durable queue for quest evaluation
+
+The firehose consumers (jetstream hub, phrase scanner, bibliohose) used to run
+quest evaluation on a small in-process thread pool, so queued work vanished on
+restart and at most two replies were evaluated at once. They now insert a row
+into quest_jobs and move on; QuestJobWorker threads claim rows with
+FOR UPDATE SKIP LOCKED, run them, and record the outcome.
+
+- Each job has an idempotency key (quest + reply URI, or quest + record), so a
+  replayed Jetstream cursor doesn't queue the same reply twice.
+- A job that raises is retried with exponential backoff up to MAX_ATTEMPTS.
+  Handlers only raise before any quest command has run, so a retry never
+  repeats a reply or canon write.
+- At most QUEST_WORKERS_PER_QUEST jobs of one quest run at once (checked at
+  claim time, so across processes it is best-effort).
+- Running jobs are heartbeated (locked_at) by their process's maintenance
+  thread. Jobs whose worker died mid-run stop heartbeating and are returned
+  to the queue after JOB_TIMEOUT, or failed if they have used MAX_ATTEMPTS.
+
+Workers start inside the consumer process by default. To scale them
+independently of the websocket consumers, set QUEST_WORKERS_EXTERNAL=1 and
+run `python3 ops/quest_jobs.py` (ops/quest-worker.service).
+"""
+
+import hashlib
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.database import DatabaseManager
+
+
+QUEST_WORKERS = int(os.getenv('QUEST_WORKERS', '4'))
+QUEST_WORKERS_PER_QUEST = int(os.getenv('QUEST_WORKERS_PER_QUEST', '2'))
+QUEST_WORKERS_EXTERNAL = os.getenv('QUEST_WORKERS_EXTERNAL', '') == '1'
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 15
+BACKOFF_MAX_SECONDS = 30 * 60
+JOB_TIMEOUT = 10 * 60           # a running job not heartbeated for this long lost its worker
+IDLE_POLL_SECONDS = 1.0
+MAINTENANCE_SECONDS = 60        # also the heartbeat interval, well inside JOB_TIMEOUT
+KEEP_FINISHED_SECONDS = 7 * 24 * 60 * 60
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+# Set by enqueue so in-process workers pick new jobs up without waiting a poll
+_wake = threading.Event()
+
+
+def _ensure_schema(db: DatabaseManager):
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS quest_jobs (
+                id BIGSERIAL PRIMARY KEY,
+                kind TEXT NOT NULL,
+                quest_title TEXT NOT NULL,
+                idempotency_key TEXT UNIQUE NOT NULL,
+                payload JSONB NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                run_after INTEGER NOT NULL,
+                locked_by TEXT,
+                locked_at INTEGER,
+                last_error TEXT,
+                created_at INTEGER NOT NULL,
+                finished_at INTEGER
+            )
+        """)
+        db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_quest_jobs_pending
+            ON quest_jobs(run_after, id) WHERE status = 'pending'
+        """)
+        db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_quest_jobs_running
+            ON quest_jobs(quest_title) WHERE status = 'running'
+        """)
+        _schema_ready = True
+
+
+def record_key(record: Dict) -> str:
+    """Stable idempotency key for a record without a usable URI."""
+    return hashlib.sha256(json.dumps(record, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:32]
+
+
+def enqueue_job(kind: str, quest_title: str, idempotency_key: str, payload: Dict,
+                db: Optional[DatabaseManager] = None) -> bool:
+    """
+    Queue a quest job. Returns False if a job with this key already exists.
+
+    Args:
+        kind: Handler name in JOB_HANDLERS ('reply', 'phrase', 'biblio')
+        quest_title: Quest the job belongs to (for per-quest concurrency)
+        idempotency_key: Unique key; duplicates are ignored
+        payload: JSON-serialisable handler arguments
+    """
+    db = db or DatabaseManager()
+    _ensure_schema(db)
+    now = int(time.time())
+    job_id = db.insert("""
+        INSERT INTO quest_jobs (kind, quest_title, idempotency_key, payload, run_after, created_at)
+        VALUES (%s, %s, %s, %s::jsonb, %s, %s)
+        ON CONFLICT (idempotency_key) DO NOTHING
+        RETURNING id
+    """, (kind, quest_title, idempotency_key, json.dumps(payload), now, now))
+    if job_id:
+        _wake.set()
+    return job_id is not None
+
+
+def get_queue_stats(db: Optional[DatabaseManager] = None) -> Dict[str, int]:
+    """Job counts by status."""
+    db = db or DatabaseManager()
+    _ensure_schema(db)
+    rows = db.fetch_all("SELECT status, COUNT(*) AS count FROM quest_jobs GROUP BY status")
+    return {row['status']: row['count'] for row in rows or []}
+
+
+# ============================================================================
+# Handlers
+# ============================================================================
+
+class RetryableJobError(Exception):
+    """Raised by a handler when the job failed before any command ran."""
+
+
+def _run_reply_job(payload: Dict, verbose: bool):
+    """A direct reply to a bsky_reply quest post."""
+    from ops.quest_hooks import process_quest_reply
+
+    result = process_quest_reply(verbose=verbose, **payload)
+    if result.get('retryable'):
+        raise RetryableJobError('; '.join(result.get('errors', [])))
+
+    if result.get('success') and not result.get('skipped'):
+        commands = result.get('commands_executed', [])
+        print(f"✅ Quest '{result.get('quest_title')}' triggered for {payload['author_did'][:30]}...")
+        if verbose and commands:
+            print(f"   Commands: {', '.join(commands)}")
+
+
+def _run_phrase_job(payload: Dict, verbose: bool):
+    """A post matching a firehose_phrase quest."""
+    from ops.quest_registry import quest_registry
+    from ops.conditions import evaluate_conditions
+    from ops.command_executor import execute_quest_commands
+
+    compiled = quest_registry.get_by_title(payload['quest_title'])
+    if not compiled:
+        print(f"⏭️  Quest '{payload['quest_title']}' is no longer enabled")
+        return
+    quest = compiled.as_dict()
+    reply_obj = payload['reply']
+
+    conditions = quest.get('conditions', [])
+    if conditions:
+        cond_result = evaluate_conditions(
+            conditions, quest.get('condition_operator', 'AND'), {'replies': [reply_obj]}, quest
+        )
+        if not cond_result.get('success'):
+            if verbose:
+                print(f"   ⏭️  Conditions not met: {cond_result.get('reason', 'unknown')}")
+            return
+
+    commands = quest.get('commands', [])
+    if not commands:
+        return
+    if verbose:
+        print(f"   🎯 Executing quest '{quest['title']}' commands (phrase: {payload.get('matched_phrase')})")
+
+    try:
+        result = execute_quest_commands(commands, [reply_obj], quest, verbose=verbose)
+    except Exception as e:
+        print(f"⚠️  Error executing quest '{quest['title']}': {e}")
+        return
+    if result.get('success'):
+        print(f"✅ Quest '{quest['title']}' triggered for {reply_obj['author']['did'][:30]}...")
+    else:
+        print(f"❌ Quest execution errors: {result.get('errors', [])}")
+
+
+def _run_biblio_job(payload: Dict, verbose: bool):
+    """A biblio.bond record that activated a bibliohose quest."""
+    from ops.quest_registry import quest_registry
+    from ops.triggers import get_trigger_handler
+    from core.bibliowatch import trigger_quest_for_context
+
+    compiled = quest_registry.get_by_title(payload['quest_title'])
+    if not compiled:
+        print(f"⏭️  Quest '{payload['quest_title']}' is no longer enabled")
+        return
+    quest = compiled.as_dict()
+    trigger = get_trigger_handler('bibliohose', quest)
+    eval_context = trigger.get_evaluation_context(payload['record'])
+    trigger_quest_for_context(quest, eval_context, verbose=verbose)
+
+
+JOB_HANDLERS: Dict[str, Callable[[Dict, bool], None]] = {
+    'reply': _run_reply_job,
+    'phrase': _run_phrase_job,
+    'biblio': _run_biblio_job,
+}
+
+
+# ============================================================================
+# Workers
+# ============================================================================
+
+class QuestJobWorker:
+    """Pool of threads that claim and run quest jobs."""
+
+    def __init__(self, workers: int = QUEST_WORKERS, per_quest: int = QUEST_WORKERS_PER_QUEST,
+                 verbose: bool = False, db: Optional[DatabaseManager] = None):
+        self.workers = max(1, workers)
+        self.per_quest = max(1, per_quest)
+        self.verbose = verbose
+        self.db = db or DatabaseManager()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.running = False
+        self._threads: List[threading.Thread] = []
+        self._running_ids: Set[int] = set()
+        self._running_lock = threading.Lock()
+        self.stats = {'done': 0, 'retried': 0, 'failed': 0}
+
+    def start(self):
+        """Start worker threads and the maintenance thread (daemon threads)."""
+        if self.running:
+            return
+        _ensure_schema(self.db)
+        self.running = True
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work_loop, name=f'quest-job-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._maintenance_loop, name='quest-job-maint', daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        print(f"⚙️  Quest job workers started ({self.workers} threads, {self.per_quest} per quest)")
+
+    def stop(self):
+        self.running = False
+        _wake.set()
+
+    def run_forever(self):
+        self.start()
+        try:
+            while self.running:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            self.stop()
+
+    def _work_loop(self):
+        while self.running:
+            try:
+                job = self._claim()
+            except Exception as e:
+                print(f"⚠️  Quest job claim failed: {e}")
+                time.sleep(IDLE_POLL_SECONDS * 5)
+                continue
+            if job is None:
+                _wake.wait(IDLE_POLL_SECONDS)
+                _wake.clear()
+                continue
+            with self._running_lock:
+                self._running_ids.add(job['id'])
+            try:
+                self._run(job)
+            except Exception as e:
+                # Recording the outcome failed; maintenance requeues the job once it times out
+                print(f"❌ Quest job {job['id']} ({job['quest_title']}) crashed its worker: {e}")
+            finally:
+                with self._running_lock:
+                    self._running_ids.discard(job['id'])
+
+    def _claim(self) -> Optional[Dict]:
+        now = int(time.time())
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE quest_jobs
+                SET status = 'running', locked_by = %s, locked_at = %s, attempts = attempts + 1
+                WHERE id = (
+                    SELECT j.id FROM quest_jobs j
+                    WHERE j.status = 'pending' AND j.run_after <= %s
+                      AND (SELECT COUNT(*) FROM quest_jobs r
+                           WHERE r.status = 'running' AND r.quest_title = j.quest_title) < %s
+                    ORDER BY j.run_after, j.id
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, kind, quest_title, payload, attempts
+            """, (self.worker_id, now, now, self.per_quest))
+            return cursor.fetchone()
+
+    def _run(self, job: Dict):
+        handler = JOB_HANDLERS.get(job['kind'])
+        payload = job['payload']
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+        if handler is None:
+            self._fail(job, ValueError(f"Unknown job kind: {job['kind']}"), retry=False)
+            return
+        try:
+            handler(payload, self.verbose)
+        except Exception as e:
+            self._fail(job, e, retry=True)
+            return
+        self.db.execute("""
+            UPDATE quest_jobs SET status = 'done', finished_at = %s, locked_by = NULL
+            WHERE id = %s
+        """, (int(time.time()), job['id']))
+        self.stats['done'] += 1
+
+    def _fail(self, job: Dict, error: Exception, retry: bool):
+        now = int(time.time())
+        if retry and job['attempts'] < MAX_ATTEMPTS:
+            delay = min(BACKOFF_BASE_SECONDS * 2 ** (job['attempts'] - 1), BACKOFF_MAX_SECONDS)
+            self.db.execute("""
+                UPDATE quest_jobs SET status = 'pending', run_after = %s, last_error = %s, locked_by = NULL
+                WHERE id = %s
+            """, (now + delay, str(error)[:1000], job['id']))
+            self.stats['retried'] += 1
+            print(f"⚠️  Quest job {job['id']} ({job['quest_title']}) failed, retrying in {delay}s: {error}")
+        else:
+            self.db.execute("""
+                UPDATE quest_jobs SET status = 'failed', finished_at = %s, last_error = %s, locked_by = NULL
+                WHERE id = %s
+            """, (now, str(error)[:1000], job['id']))
+            self.stats['failed'] += 1
+            print(f"❌ Quest job {job['id']} ({job['quest_title']}) failed after {job['attempts']} attempt(s): {error}")
+
+    def _maintenance_loop(self):
+        while self.running:
+            try:
+                now = int(time.time())
+                with self._running_lock:
+                    running_ids = list(self._running_ids)
+                if running_ids:
+                    self.db.execute("""
+                        UPDATE quest_jobs SET locked_at = %s
+                        WHERE id = ANY(%s) AND status = 'running' AND locked_by = %s
+                    """, (now, running_ids, self.worker_id))
+                self.db.execute("""
+                    UPDATE quest_jobs SET status = 'failed', locked_by = NULL, finished_at = %s,
+                        last_error = 'worker lost'
+                    WHERE status = 'running' AND locked_at < %s AND attempts >= %s
+                """, (now, now - JOB_TIMEOUT, MAX_ATTEMPTS))
+                self.db.execute("""
+                    UPDATE quest_jobs SET status = 'pending', locked_by = NULL, run_after = %s,
+                        last_error = 'worker lost'
+                    WHERE status = 'running' AND locked_at < %s
+                """, (now, now - JOB_TIMEOUT))
+                self.db.execute("""
+                    DELETE FROM quest_jobs WHERE status IN ('done', 'failed') AND finished_at < %s
+                """, (now - KEEP_FINISHED_SECONDS,))
+            except Exception as e:
+                print(f"⚠️  Quest job maintenance failed: {e}")
+            time.sleep(MAINTENANCE_SECONDS)
+
+
+_worker: Optional[QuestJobWorker] = None
+_worker_lock = threading.Lock()
+
+
+def start_workers(verbose: bool = False) -> Optional[QuestJobWorker]:
+    """Start the in-process worker pool once, unless workers run as their own service."""
+    global _worker
+    if QUEST_WORKERS_EXTERNAL:
+        return None
+    with _worker_lock:
+        if _worker is None:
+            _worker = QuestJobWorker(verbose=verbose)
+            _worker.start()
+    return _worker
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Quest Jobs - run queued quest evaluations')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
+    parser.add_argument('--workers', type=int, default=QUEST_WORKERS, help='Worker threads')
+    parser.add_argument('--per-quest', type=int, default=QUEST_WORKERS_PER_QUEST,
+                        help='Max concurrent jobs per quest')
+    parser.add_argument('--stats', action='store_true', help='Print queue counts and exit')
+    args = parser.parse_args()
+
+    if args.stats:
+        for status, count in sorted(get_queue_stats().items()):
+            print(f"{status:10} {count}")
+        return
+
+    QuestJobWorker(workers=args.workers, per_quest=args.per_quest, verbose=args.verbose).run_forever()
+
+
+if __name__ == '__main__':
+    main()
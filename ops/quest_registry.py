@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+🌜 REVERIE ESSENTIAL
+Quest Registry - In-memory compiled quests shared by every quest consumer
+
+Enabled quest rows are parsed once (commands, conditions, trigger config,
+phrases) into immutable CompiledQuest objects and indexed by URI, trigger
+type and phrase. The firehose handlers, phrase scanner and bibliohose read
+from the registry instead of querying the quests table themselves.
+
+QuestManager sends NOTIFY quests_changed after every write. A background
+thread LISTENs on a dedicated connection and reloads as soon as one arrives,
+so quest edits go live within a second instead of on the next poll. If the
+listener is down, or a notification was missed while reconnecting, a cheap
+fingerprint of the table is compared every POLL_SECONDS instead.
+"""
+
+import copy
+import select
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Set, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.database import DatabaseManager
+from ops.quests import QuestManager, NOTIFY_CHANNEL
+
+
+POLL_SECONDS = 60
+RECONNECT_SECONDS = 5
+NOTIFY_SETTLE_SECONDS = 0.2     # coalesce bursts of notifications into one reload
+
+
+@dataclass(frozen=True)
+class CompiledQuest:
+    """One enabled quest, parsed once per registry reload."""
+    id: int
+    title: str
+    uri: str
+    trigger_type: str
+    hose_service: str
+    commands: Tuple[str, ...]
+    conditions: Tuple[Dict, ...]
+    condition_operator: str
+    phrases: Tuple[str, ...]
+    case_sensitive: bool
+    exclude_reposts: bool
+    config: Mapping
+
+    def as_dict(self) -> Dict:
+        """Quest config dict in QuestManager format; a fresh copy the caller may modify."""
+        return copy.deepcopy(dict(self.config))
+
+
+@dataclass(frozen=True)
+class QuestSnapshot:
+    """Immutable view of all enabled quests at one registry version."""
+    version: int
+    quests: Tuple[CompiledQuest, ...]
+    by_uri: Mapping[str, CompiledQuest]
+    by_title: Mapping[str, CompiledQuest]
+    by_trigger: Mapping[str, Tuple[CompiledQuest, ...]]
+
+
+EMPTY_SNAPSHOT = QuestSnapshot(0, (), MappingProxyType({}), MappingProxyType({}), MappingProxyType({}))
+
+
+def compile_quest(quest: Dict) -> CompiledQuest:
+    """Build a CompiledQuest from a QuestManager quest dict."""
+    trigger_config = quest.get('trigger_config') or {}
+    if not isinstance(trigger_config, dict):
+        trigger_config = {}
+
+    phrases = trigger_config.get('phrases', [])
+    if isinstance(phrases, str):
+        phrases = [p.strip() for p in phrases.split(',') if p.strip()]
+
+    return CompiledQuest(
+        id=quest['id'],
+        title=quest['title'],
+        uri=quest.get('uri') or '',
+        trigger_type=quest.get('trigger_type') or 'bsky_reply',
+        hose_service=quest.get('hose_service') or '',
+        commands=tuple(quest.get('commands') or ()),
+        conditions=tuple(quest.get('conditions') or ()),
+        condition_operator=quest.get('condition_operator') or 'AND',
+        phrases=tuple(phrases),
+        case_sensitive=bool(trigger_config.get('case_sensitive', False)),
+        exclude_reposts=bool(trigger_config.get('exclude_reposts', True)),
+        config=MappingProxyType(copy.deepcopy(quest)),
+    )
+
+
+class QuestRegistry:
+    """Process-wide registry of enabled quests, refreshed on NOTIFY."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._db: Optional[DatabaseManager] = None
+        self._snapshot = EMPTY_SNAPSHOT
+        self._fingerprint = None
+        self._loaded = False
+        self._checked_at = 0.0
+        self._listening = False
+        self._listener: Optional[threading.Thread] = None
+        self._subscribers: List[Callable[[QuestSnapshot], None]] = []
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> QuestSnapshot:
+        """Current snapshot, loading it (and starting the listener) on first use."""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._reload(force=True)
+                    self._loaded = True
+                    self._start_listener()
+        elif not self._listening and time.time() - self._checked_at > POLL_SECONDS:
+            self.refresh()
+        return self._snapshot
+
+    def get_by_uri(self, uri: str) -> Optional[CompiledQuest]:
+        return self.snapshot().by_uri.get(uri)
+
+    def get_by_title(self, title: str) -> Optional[CompiledQuest]:
+        return self.snapshot().by_title.get(title)
+
+    def with_trigger(self, trigger_type: str) -> Tuple[CompiledQuest, ...]:
+        return self.snapshot().by_trigger.get(trigger_type, ())
+
+    def reply_uris(self) -> Set[str]:
+        """URIs of enabled bsky_reply quests."""
+        return {quest.uri for quest in self.with_trigger('bsky_reply') if quest.uri}
+
+    def subscribe(self, callback: Callable[[QuestSnapshot], None]):
+        """
+        Call callback(snapshot) after every reload that changed the quests.
+
+        Callbacks run on the registry's listener thread and should only swap
+        in state derived from the snapshot.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload if the quests table changed. Returns True if it did."""
+        with self._lock:
+            changed = self._reload(force)
+            subscribers = list(self._subscribers) if changed else []
+            snapshot = self._snapshot
+        for callback in subscribers:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"⚠️  Quest registry subscriber error: {e}")
+        return changed
+
+    def _get_db(self) -> DatabaseManager:
+        if self._db is None:
+            self._db = DatabaseManager()
+        return self._db
+
+    def _reload(self, force: bool) -> bool:
+        """Rebuild the snapshot (lock held). Returns True if it changed."""
+        db = self._get_db()
+        self._checked_at = time.time()
+        try:
+            row = db.fetch_one("""
+                SELECT COUNT(*) AS count,
+                       COALESCE(MAX(updated_at), 0) AS updated,
+                       COALESCE(SUM(id), 0) AS ids
+                FROM quests
+            """)
+            fingerprint = (row['count'], row['updated'], row['ids']) if row else None
+            if not force and fingerprint == self._fingerprint:
+                return False
+
+            compiled = []
+            for quest in QuestManager(db).get_enabled_quests():
+                try:
+                    compiled.append(compile_quest(quest))
+                except Exception as e:
+                    print(f"⚠️  Skipping quest '{quest.get('title')}': {e}")
+        except Exception as e:
+            print(f"❌ Quest registry reload failed: {e}")
+            return False
+
+        by_uri: Dict[str, CompiledQuest] = {}
+        by_title: Dict[str, CompiledQuest] = {}
+        by_trigger: Dict[str, List[CompiledQuest]] = {}
+        for quest in compiled:
+            if quest.uri:
+                by_uri.setdefault(quest.uri, quest)
+            by_title[quest.title] = quest
+            by_trigger.setdefault(quest.trigger_type, []).append(quest)
+
+        self._snapshot = QuestSnapshot(
+            version=self._snapshot.version + 1,
+            quests=tuple(compiled),
+            by_uri=MappingProxyType(by_uri),
+            by_title=MappingProxyType(by_title),
+            by_trigger=MappingProxyType({k: tuple(v) for k, v in by_trigger.items()}),
+        )
+        self._fingerprint = fingerprint
+        return True
+
+    # ------------------------------------------------------------------
+    # Change notifications
+    # ------------------------------------------------------------------
+
+    def _start_listener(self):
+        if self._listener is None:
+            self._listener = threading.Thread(target=self._listen, name='quest-registry', daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        """LISTEN for quest changes on a dedicated connection, reconnecting on failure."""
+        while True:
+            db = self._get_db()
+            conn = None
+            try:
+                conn = db._get_connection()
+                conn.autocommit = True
+                conn.cursor().execute(f"LISTEN {NOTIFY_CHANNEL}")
+                self._listening = True
+                # Pick up anything that changed while we weren't listening
+                self.refresh()
+
+                while True:
+                    readable, _, _ = select.select([conn], [], [], POLL_SECONDS)
+                    if not readable:
+                        self.refresh()
+                        continue
+                    conn.poll()
+                    if not conn.notifies:
+                        continue
+                    time.sleep(NOTIFY_SETTLE_SECONDS)
+                    conn.poll()
+                    titles = {n.payload for n in conn.notifies if n.payload}
+                    conn.notifies.clear()
+                    if self.refresh(force=True):
+                        print(f"🔄 Quest registry reloaded ({', '.join(sorted(titles)) or 'quests changed'})")
+            except Exception as e:
+                print(f"⚠️  Quest registry listener error: {e}")
+            finally:
+                self._listening = False
+                if conn is not None:
+                    try:
+                        db.pg_pool.putconn(conn, close=True)
+                    except Exception:
+                        pass
+            time.sleep(RECONNECT_SECONDS)
+
+
+quest_registry = QuestRegistry()
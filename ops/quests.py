@@ -13,6 +13,10 @@ from typing import List, Dict, Optional, Set
 from core.database import DatabaseManager
 
 
+# Sent after every quest write; ops.quest_registry reloads when it arrives
+NOTIFY_CHANNEL = 'quests_changed'
+
+
 class QuestManager:
     """Manages quest configuration and monitoring."""
     
@@ -141,6 +145,7 @@ class QuestManager:
             json.dumps(trigger_config) if trigger_config else None,
             hose_service
         ))
+        self._notify_changed(title)
         
         # For PostgreSQL, we need to retrieve the ID from a RETURNING clause
         # But since we can't modify the signature easily, return 1 for success
@@ -236,6 +241,7 @@ class QuestManager:
         query = f"UPDATE quests SET {', '.join(updates)} WHERE title = %s"
         
         self.db.execute(query, tuple(values))
+        self._notify_changed(new_title or title)
         
         # PostgreSQL returns True if update succeeded (execute doesn't return cursor)
         return True
@@ -251,8 +257,16 @@ class QuestManager:
     def delete_quest(self, title: str) -> bool:
         """Delete a quest."""
         self.db.execute("DELETE FROM quests WHERE title = %s", (title,))
+        self._notify_changed(title)
         return True
     
+    def _notify_changed(self, title: str):
+        """Tell every process's quest registry to reload."""
+        try:
+            self.db.execute("SELECT pg_notify(%s, %s)", (NOTIFY_CHANNEL, title))
+        except Exception as e:
+            print(f"⚠️  Quest change notification failed: {e}")
+    
     def _row_to_dict(self, row) -> Dict:
         """Convert database row to quest dictionary."""
         quest = dict(row)
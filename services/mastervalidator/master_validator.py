@@ -10,6 +10,12 @@ This service runs periodically to:
 2. Create/update actor.rpg.master records in the @reverie.house account
 3. Users whose rpg.actor stats match these records are "pre-validated"
 
+All changes are computed up front and submitted through com.atproto.repo.applyWrites
+in batches. A content hash per player is kept in master_record_sync; --incremental
+skips players whose hash is unchanged without building their record and only looks
+at spectrum rows updated since the last successful sync. A full sync compares every
+player against the records listed on the PDS.
+
 The records are stored at:
     at://did:plc:yauphjufk7phkwurn266ybx2/actor.rpg.master/<tid>
 
@@ -23,10 +29,12 @@ import os
 import sys
 import time
 import json
+import random
+import hashlib
 import logging
 import requests
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
 # Add parent directories to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -54,6 +62,29 @@ REVERIE_HOUSE_DID = 'did:plc:yauphjufk7phkwurn266ybx2'
 REVERIE_HOUSE_HANDLE = 'reverie.house'
 PDS_URL = 'https://reverie.house'
 COLLECTION = 'actor.rpg.master'
+APPLY_WRITES_BATCH_SIZE = 100   # PDS caps applyWrites at 200 operations
+RECORD_FORMAT_VERSION = 2       # Bump when build_master_record output changes shape
+WATERMARK_KEY = 'master_validator_watermark'
+WATERMARK_MARGIN_SECONDS = 300  # Rows stamped shortly before a sync may commit after it reads
+STAT_KEYS = ['oblivion', 'authority', 'skeptic', 'receptive', 'liberty', 'entropy', 'octant']
+
+TID_CHARS = '234567abcdefghijklmnopqrstuvwxyz'
+_last_tid = 0
+
+
+def generate_tid() -> str:
+    """Generate an atproto TID record key (monotonic within this process)."""
+    global _last_tid
+    value = (int(time.time() * 1_000_000) << 10) | random.getrandbits(10)
+    if value <= _last_tid:
+        value = _last_tid + 1
+    _last_tid = value
+    
+    chars = []
+    for _ in range(13):
+        chars.append(TID_CHARS[value & 31])
+        value >>= 5
+    return ''.join(reversed(chars))
 
 
 class MasterValidator:
@@ -63,6 +94,62 @@ class MasterValidator:
         self.db = DatabaseManager()
         self.session = None
         self.access_jwt = None
+        self._ensure_sync_table()
+    
+    def _ensure_sync_table(self):
+        """Create the per-player sync state table if it doesn't exist."""
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS master_record_sync (
+                player_did TEXT PRIMARY KEY,
+                rkey TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                created_at TEXT,
+                synced_at INTEGER NOT NULL
+            )
+        """)
+    
+    def load_sync_state(self) -> Dict[str, Dict]:
+        """Load the last synced rkey and content hash for every player."""
+        cursor = self.db.execute("SELECT player_did, rkey, content_hash, created_at FROM master_record_sync")
+        return {row['player_did']: dict(row) for row in cursor.fetchall()}
+    
+    def save_sync_state(self, rows: List[Tuple[str, str, str, Optional[str]]]):
+        """Upsert (player_did, rkey, content_hash, created_at) sync state rows."""
+        if not rows:
+            return
+        now = int(time.time())
+        self.db.execute_many("""
+            INSERT INTO master_record_sync (player_did, rkey, content_hash, created_at, synced_at)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (player_did) DO UPDATE SET
+                rkey = EXCLUDED.rkey,
+                content_hash = EXCLUDED.content_hash,
+                created_at = COALESCE(EXCLUDED.created_at, master_record_sync.created_at),
+                synced_at = EXCLUDED.synced_at
+        """, [row + (now,) for row in rows])
+    
+    def delete_sync_state(self, player_dids: List[str]):
+        """Forget sync state for players whose records were deleted."""
+        if player_dids:
+            self.db.execute("DELETE FROM master_record_sync WHERE player_did = ANY(%s)", (player_dids,))
+    
+    def content_hash(self, user: Dict) -> str:
+        """Hash the spectrum values a master record is built from."""
+        values = [RECORD_FORMAT_VERSION] + [user[key] or (0 if key != 'octant' else 'unknown') for key in STAT_KEYS]
+        return hashlib.sha256(json.dumps(values).encode()).hexdigest()
+    
+    def get_watermark(self) -> int:
+        """Return the spectrum updated_at covered by the last successful sync."""
+        cursor = self.db.execute("SELECT value FROM _metadata WHERE key = %s", (WATERMARK_KEY,))
+        row = cursor.fetchone()
+        return int(row['value']) if row and row['value'] else 0
+    
+    def set_watermark(self, value: int):
+        self.db.execute("""
+            INSERT INTO _metadata (key, value, updated_at)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, updated_at = EXCLUDED.updated_at
+        """, (WATERMARK_KEY, str(value), int(time.time())))
         
     def authenticate(self) -> bool:
         """Authenticate as @reverie.house using stored app password."""
@@ -103,8 +190,8 @@ class MasterValidator:
             logger.error(f"Authentication error: {e}")
             return False
     
-    def get_all_spectrum_users(self) -> List[Dict]:
-        """Fetch all users with spectrum data from the database."""
+    def get_all_spectrum_users(self, updated_since: Optional[int] = None) -> List[Dict]:
+        """Fetch all users with spectrum data, optionally only those updated at or after a time."""
         cursor = self.db.execute('''
             SELECT s.did, d.handle, d.name, 
                    s.oblivion, s.authority, s.skeptic, 
@@ -113,11 +200,19 @@ class MasterValidator:
             FROM spectrum s
             JOIN dreamers d ON s.did = d.did
             WHERE s.did != %s
+              AND (%s IS NULL OR s.updated_at >= %s)
             ORDER BY d.handle
-        ''', (REVERIE_HOUSE_DID,))  # Exclude reverie.house itself
+        ''', (REVERIE_HOUSE_DID, updated_since, updated_since))  # Exclude reverie.house itself
         
         return cursor.fetchall()
     
+    def get_spectrum_dids(self) -> set:
+        """Fetch the DIDs of every user who should have a master record."""
+        cursor = self.db.execute(
+            "SELECT did FROM spectrum WHERE did != %s", (REVERIE_HOUSE_DID,)
+        )
+        return {row['did'] for row in cursor.fetchall()}
+    
     def get_existing_master_records(self) -> Dict[str, Dict]:
         """Fetch all existing master records from the PDS."""
         try:
@@ -296,8 +391,124 @@ class MasterValidator:
             logger.error(f"Delete error: {e}")
             return False
     
-    def sync_all(self) -> Dict[str, int]:
-        """Synchronize all master records with database."""
+    def apply_writes(self, writes: List[Dict]) -> bool:
+        """Submit a batch of create/update/delete operations atomically."""
+        try:
+            response = requests.post(
+                f'{PDS_URL}/xrpc/com.atproto.repo.applyWrites',
+                headers={
+                    'Authorization': f'Bearer {self.access_jwt}',
+                    'Content-Type': 'application/json'
+                },
+                json={
+                    'repo': REVERIE_HOUSE_DID,
+                    'writes': writes
+                },
+                timeout=60
+            )
+            
+            if response.ok:
+                return True
+            logger.error(f"applyWrites failed: {response.status_code} - {response.text}")
+            return False
+            
+        except Exception as e:
+            logger.error(f"applyWrites error: {e}")
+            return False
+    
+    def plan_sync(self, users: List[Dict], state: Dict[str, Dict],
+                  existing: Optional[Dict[str, Dict]], keep_dids: set) -> Tuple[List[Dict], int]:
+        """
+        Work out every write needed to bring the PDS in line with the database.
+        
+        Args:
+            users: Spectrum rows to consider
+            state: Persisted sync state by player DID
+            existing: Records currently on the PDS by player DID, or None to trust
+                the persisted state (incremental mode). When given, every player is
+                compared against their listed record and stored hashes are ignored,
+                so records edited or lost on the PDS are rewritten.
+            keep_dids: Players who should still have a record; any other record is deleted
+        
+        Returns:
+            (operations, unchanged count). Each operation carries the applyWrites
+            entry plus the bookkeeping needed to update sync state.
+        """
+        operations = []
+        unchanged = 0
+        
+        for user in users:
+            player_did = user['did']
+            digest = self.content_hash(user)
+            synced = state.get(player_did)
+            current = existing.get(player_did) if existing is not None else (
+                {'rkey': synced['rkey'], 'value': {'createdAt': synced.get('created_at')}} if synced else None
+            )
+            
+            in_sync = bool(synced and current and synced['content_hash'] == digest
+                           and synced['rkey'] == current['rkey'])
+            if in_sync and existing is None:
+                unchanged += 1
+                continue
+            
+            new_record = self.build_master_record(user)
+            
+            if current:
+                if existing is not None and self.records_match(current, new_record):
+                    if in_sync:
+                        unchanged += 1
+                        continue
+                    # Record is already correct, only our bookkeeping was missing
+                    operations.append({'action': 'adopt', 'did': player_did, 'handle': user['handle'],
+                                       'rkey': current['rkey'], 'hash': digest,
+                                       'created_at': current['value'].get('createdAt')})
+                    continue
+                
+                # Preserve original createdAt
+                new_record['createdAt'] = current['value'].get('createdAt') or new_record['createdAt']
+                operations.append({'action': 'update', 'did': player_did, 'handle': user['handle'],
+                                   'rkey': current['rkey'], 'hash': digest,
+                                   'created_at': new_record['createdAt'],
+                                   'write': {
+                                       '$type': 'com.atproto.repo.applyWrites#update',
+                                       'collection': COLLECTION,
+                                       'rkey': current['rkey'],
+                                       'value': new_record
+                                   }})
+            else:
+                rkey = generate_tid()
+                operations.append({'action': 'create', 'did': player_did, 'handle': user['handle'],
+                                   'rkey': rkey, 'hash': digest,
+                                   'created_at': new_record['createdAt'],
+                                   'write': {
+                                       '$type': 'com.atproto.repo.applyWrites#create',
+                                       'collection': COLLECTION,
+                                       'rkey': rkey,
+                                       'value': new_record
+                                   }})
+        
+        # Delete records for users no longer in database
+        records = existing if existing is not None else state
+        for player_did, record_info in records.items():
+            if player_did not in keep_dids:
+                operations.append({'action': 'delete', 'did': player_did, 'handle': player_did,
+                                   'rkey': record_info['rkey'],
+                                   'write': {
+                                       '$type': 'com.atproto.repo.applyWrites#delete',
+                                       'collection': COLLECTION,
+                                       'rkey': record_info['rkey']
+                                   }})
+        
+        return operations, unchanged
+    
+    def sync_all(self, incremental: bool = False) -> Dict[str, int]:
+        """
+        Synchronize all master records with database.
+        
+        Full mode lists every record on the PDS and checks each player against
+        it, whatever the stored hashes say. Incremental mode trusts the persisted sync state and only considers
+        spectrum rows updated since the last successful sync.
+        """
         stats = {
             'created': 0,
             'updated': 0,
@@ -312,56 +523,55 @@ class MasterValidator:
             return stats
         
         # Get current data
-        users = self.get_all_spectrum_users()
-        existing = self.get_existing_master_records()
+        started = int(time.time())
+        state = self.load_sync_state()
+        watermark = self.get_watermark()
         
-        logger.info(f"Processing {len(users)} users with spectrum data")
+        if incremental:
+            users = self.get_all_spectrum_users(updated_since=watermark)
+            keep_dids = self.get_spectrum_dids()
+            existing = None
+            logger.info(f"Incremental sync: {len(users)} users updated since {watermark}")
+        else:
+            users = self.get_all_spectrum_users()
+            keep_dids = {user['did'] for user in users}
+            existing = self.get_existing_master_records()
+            logger.info(f"Processing {len(users)} users with spectrum data")
         
-        # Track which DIDs we've processed
-        processed_dids = set()
+        operations, stats['unchanged'] = self.plan_sync(users, state, existing, keep_dids)
         
-        for user in users:
-            player_did = user['did']
-            processed_dids.add(player_did)
+        adopted = [op for op in operations if op['action'] == 'adopt']
+        self.save_sync_state([(op['did'], op['rkey'], op['hash'], op['created_at']) for op in adopted])
+        stats['unchanged'] += len(adopted)
+        
+        writes = [op for op in operations if op['action'] != 'adopt']
+        logger.info(f"Submitting {len(writes)} writes in batches of {APPLY_WRITES_BATCH_SIZE}")
+        
+        for i in range(0, len(writes), APPLY_WRITES_BATCH_SIZE):
+            batch = writes[i:i + APPLY_WRITES_BATCH_SIZE]
             
-            try:
-                new_record = self.build_master_record(user)
-                
-                if player_did in existing:
-                    # Check if update needed
-                    if self.records_match(existing[player_did], new_record):
-                        stats['unchanged'] += 1
-                        logger.debug(f"Unchanged: {user['handle']}")
-                    else:
-                        # Preserve original createdAt
-                        new_record['createdAt'] = existing[player_did]['value'].get('createdAt', new_record['createdAt'])
-                        
-                        if self.update_record(existing[player_did]['rkey'], new_record):
-                            stats['updated'] += 1
-                            logger.info(f"Updated: {user['handle']}")
-                        else:
-                            stats['errors'] += 1
-                else:
-                    # Create new record
-                    uri = self.create_record(new_record)
-                    if uri:
-                        stats['created'] += 1
-                        logger.info(f"Created: {user['handle']} -> {uri}")
-                    else:
-                        stats['errors'] += 1
-                        
-            except Exception as e:
-                logger.error(f"Error processing {user['handle']}: {e}")
-                stats['errors'] += 1
+            if not self.apply_writes([op['write'] for op in batch]):
+                stats['errors'] += len(batch)
+                continue
+            
+            self.save_sync_state([
+                (op['did'], op['rkey'], op['hash'], op['created_at'])
+                for op in batch if op['action'] != 'delete'
+            ])
+            self.delete_sync_state([op['did'] for op in batch if op['action'] == 'delete'])
+            
+            for op in batch:
+                stats[{'create': 'created', 'update': 'updated', 'delete': 'deleted'}[op['action']]] += 1
+                logger.info(f"{op['action'].capitalize()}d: {op['handle']}")
         
-        # Delete records for users no longer in database
-        for player_did, record_info in existing.items():
-            if player_did not in processed_dids:
-                if self.delete_record(record_info['rkey']):
-                    stats['deleted'] += 1
-                    logger.info(f"Deleted record for removed user: {player_did}")
-                else:
-                    stats['errors'] += 1
+        if stats['errors'] == 0:
+            # The next run re-reads from the watermark inclusive, held back by a
+            # margin for rows stamped before we read them but committed after;
+            # rows it sees again are skipped by their content hash.
+            latest = max((user['updated_at'] or 0 for user in users), default=0)
+            latest = min(latest, started - WATERMARK_MARGIN_SECONDS)
+            if latest > watermark:
+                self.set_watermark(latest)
         
         return stats
     
@@ -421,6 +631,8 @@ class MasterValidator:
                     new_record['createdAt'] = existing[player_did]['value'].get('createdAt', new_record['createdAt'])
                     
                     if self.update_record(existing[player_did]['rkey'], new_record):
+                        self.save_sync_state([(player_did, existing[player_did]['rkey'],
+                                               self.content_hash(user), new_record['createdAt'])])
                         result['success'] = True
                         result['action'] = 'updated'
                         result['uri'] = existing[player_did]['uri']
@@ -430,6 +642,8 @@ class MasterValidator:
             else:
                 uri = self.create_record(new_record)
                 if uri:
+                    self.save_sync_state([(player_did, uri.split('/')[-1],
+                                           self.content_hash(user), new_record['createdAt'])])
                     result['success'] = True
                     result['action'] = 'created'
                     result['uri'] = uri
@@ -451,6 +665,8 @@ def main():
     parser = argparse.ArgumentParser(description='Sync actor.rpg.master records with reverie.house database')
     parser.add_argument('--user', '-u', type=str, help='Sync only a specific user (DID or handle)')
     parser.add_argument('--quiet', '-q', action='store_true', help='Suppress info logging')
+    parser.add_argument('--incremental', '-i', action='store_true',
+                        help='Only sync users whose spectrum changed since the last successful sync')
     args = parser.parse_args()
     
     if args.quiet:
@@ -482,7 +698,7 @@ def main():
         logger.info(f"Result: {result['action']} - {result['message']}")
         return 0 if result['success'] else 1
     else:
-        stats = validator.sync_all()
+        stats = validator.sync_all(incremental=args.incremental)
         
         logger.info("-" * 60)
         logger.info("Sync complete:")
@@ -0,0 +1,18 @@
+-- Events Timeline Indexes
+-- Upgrade for existing databases: the keyset-paginated timelines
+-- (core/events.py, /api/events, /api/canon) page on
+-- (COALESCE(epoch, 0) DESC, id DESC). Fresh databases get these indexes
+-- from sql/init/03_schema_corrected.sql.
+--
+-- CONCURRENTLY builds without blocking writes to events, but cannot run
+-- inside a transaction block - run with plain psql (no -1 / --single-transaction):
+--   psql -d reverie_house -f sql/events_timeline_indexes.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_events_epoch_id
+    ON events ((COALESCE(epoch, 0)) DESC, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_events_type_epoch_id
+    ON events (type, (COALESCE(epoch, 0)) DESC, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_events_did_epoch_id
+    ON events (did, (COALESCE(epoch, 0)) DESC, id DESC);
@@ -113,6 +113,9 @@ CREATE INDEX idx_events_did ON events(did);
 CREATE INDEX idx_events_key ON events(key);
 CREATE INDEX idx_events_did_key ON events(did, key);
 CREATE INDEX idx_events_epoch ON events(epoch DESC);
+CREATE INDEX idx_events_epoch_id ON events((COALESCE(epoch, 0)) DESC, id DESC);
+CREATE INDEX idx_events_type_epoch_id ON events(type, (COALESCE(epoch, 0)) DESC, id DESC);
+CREATE INDEX idx_events_did_epoch_id ON events(did, (COALESCE(epoch, 0)) DESC, id DESC);
 CREATE INDEX idx_events_type_key ON events(type, key);
 CREATE INDEX idx_events_quantities ON events USING GIN (quantities) WHERE quantities IS NOT NULL;
 CREATE INDEX idx_events_type_quantities ON events(type) WHERE type = 'order' AND quantities IS NOT NULL;
@@ -398,11 +401,15 @@ CREATE TABLE spectrum_snapshots (
     total_dreamers INTEGER,
     snapshot_data TEXT NOT NULL,
     created_at INTEGER NOT NULL,
-    notes TEXT
+    notes TEXT,
+    kind TEXT NOT NULL DEFAULT 'full',   -- 'key' (full JSON), 'delta' (changes since base_id), 'full' (legacy)
+    base_id INTEGER,
+    positions BYTEA                      -- delta rows: packed (roster index, 6 axes) records
 );
 
 CREATE INDEX idx_spectrum_snapshots_epoch ON spectrum_snapshots(epoch);
 CREATE INDEX idx_spectrum_snapshots_created ON spectrum_snapshots(created_at);
+CREATE INDEX idx_spectrum_snapshots_keyframes ON spectrum_snapshots(id) WHERE kind <> 'delta';
 
 CREATE TABLE world_snapshots (
     id SERIAL PRIMARY KEY,
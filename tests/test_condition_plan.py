@@ -0,0 +1,249 @@
+"""
+Quest Condition Plan Tests
+==========================
+
+Pure-Python checks of ops.conditions.plan (no database):
+- _combine with mixed AND/OR/NOT groups and the global-operator fallback
+- ConditionPlan skipping disabled conditions
+- compile_condition dispatching exactly like the string dispatcher it replaced
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ops.conditions.plan as plan
+from ops.conditions.plan import ConditionPlan, _combine, compile_condition
+
+
+def ok():
+    return {'success': True, 'count': 1, 'matching_replies': [], 'reason': 'ok'}
+
+
+def no():
+    return {'success': False, 'count': 0, 'matching_replies': [], 'reason': 'no'}
+
+
+def reply(uri, text):
+    return {'uri': uri, 'author': {'did': f'did:plc:{uri}'}, 'record': {'text': text}}
+
+
+THREAD = {'replies': [reply('a', 'hello dreamer'), reply('b', 'goodbye')]}
+
+
+# =============================================================================
+# _combine
+# =============================================================================
+
+@pytest.mark.unit
+class TestCombine:
+    """Per-condition operators take precedence over the global operator."""
+
+    @pytest.mark.parametrize('and_results, or_results, not_results, expected', [
+        ([ok()], [no(), ok()], [], True),
+        ([ok()], [no(), no()], [], False),
+        ([no()], [ok()], [], False),
+        ([ok()], [ok()], [ok()], False),
+        ([ok()], [ok()], [no()], True),
+        ([ok(), ok()], [], [no()], True),
+        ([ok(), no()], [], [], False),
+        ([], [no(), ok()], [no()], True),
+        ([], [no()], [], False),
+        ([], [ok()], [ok()], False),
+    ])
+    def test_grouped_operators(self, and_results, or_results, not_results, expected):
+        results = and_results + or_results + not_results
+        success, _ = _combine('AND', results, and_results, or_results, not_results)
+        assert success is expected
+
+    def test_mixed_mode_reason(self):
+        success, reason = _combine('AND', [ok(), ok()], [ok()], [ok()], [])
+        assert success
+        assert reason == 'All AND conditions and at least one OR condition matched'
+
+    @pytest.mark.parametrize('operator, outcomes, expected', [
+        ('NOT', [no(), no()], True),
+        ('NOT', [no(), ok()], False),
+        ('XOR', [ok(), no()], True),
+        ('XOR', [ok(), ok()], False),
+        ('SOMETHING', [ok(), ok()], True),
+    ])
+    def test_global_operator_fallback(self, operator, outcomes, expected):
+        # Only NOT-grouped conditions: the global operator decides
+        success, _ = _combine(operator, outcomes, [], [], outcomes)
+        assert success is expected
+
+
+@pytest.mark.unit
+class TestConditionPlan:
+    """Plans built from condition objects, evaluated on in-memory replies."""
+
+    def test_disabled_conditions_are_skipped(self):
+        conditions = [
+            {'condition': 'reply_contains', 'args': ['hello']},
+            {'condition': 'reply_contains', 'args': ['missing'], 'disabled': True},
+            {'condition': 'reply_contains', 'args': ['goodbye'], 'operator': 'OR'},
+        ]
+        result = ConditionPlan(conditions).evaluate(THREAD, {})
+
+        assert [step[0] for step in ConditionPlan(conditions).steps] == [0, 2]
+        assert result['success']
+        assert len(result['condition_results']) == 2
+        assert {r['uri'] for r in result['matching_replies']} == {'a', 'b'}
+
+    def test_not_condition_blocks_match(self):
+        conditions = [
+            {'condition': 'any_reply'},
+            {'condition': 'reply_contains', 'args': ['goodbye'], 'operator': 'NOT'},
+        ]
+        assert not ConditionPlan(conditions).evaluate(THREAD, {})['success']
+
+        conditions[1]['disabled'] = True
+        assert ConditionPlan(conditions).evaluate(THREAD, {})['success']
+
+    def test_once_only_and_custom_commands(self):
+        conditions = [
+            {'condition': 'reply_contains', 'args': ['hello'], 'once_only': True,
+             'custom_commands': ['add_canon:greeted']},
+            {'condition': 'reply_contains', 'args': ['absent'], 'operator': 'OR',
+             'custom_commands': ['never']},
+            {'condition': 'any_reply', 'operator': 'OR'},
+        ]
+        result = ConditionPlan(conditions).evaluate(THREAD, {})
+
+        assert result['success']
+        assert result['custom_commands'] == ['add_canon:greeted', 'disable_condition_group:0']
+
+    def test_non_canonical_condition_is_rejected(self):
+        with pytest.raises(RuntimeError):
+            ConditionPlan([{'type': 'condition'}])
+
+
+# =============================================================================
+# compile_condition parity with the previous string dispatcher
+# =============================================================================
+
+EVALUATOR_NAMES = [
+    'any_reply', 'new_reply', 'dreamer_replies', 'reply_contains', 'contains_hashtags',
+    'contains_mentions', 'user_has_souvenir', 'user_missing_souvenir', 'souvenir_exists_anywhere',
+    'has_canon', 'hasnt_canon', 'count_canon', 'user_canon_equals', 'user_canon_not_equals',
+    'user_in_canon_list', 'has_read', 'has_biblio_stamp',
+]
+
+
+def _invalid(reason):
+    return {'success': False, 'count': 0, 'matching_replies': [], 'reason': reason}
+
+
+def legacy_dispatch(condition, thread_result, quest_config):
+    """The string dispatcher compile_condition replaced, calling plan's evaluators."""
+    if not thread_result.get('replies', []):
+        return _invalid('No replies found')
+
+    if condition == 'any_reply':
+        return plan.any_reply(thread_result, quest_config)
+    elif condition == 'new_reply':
+        return plan.new_reply(thread_result, quest_config)
+    elif condition == 'dreamer_replies':
+        return plan.dreamer_replies(thread_result, quest_config)
+    elif condition.startswith('reply_contains:'):
+        return plan.reply_contains(thread_result, quest_config, condition.split(':', 1)[1])
+    elif condition.startswith('contains_hashtags:'):
+        return plan.contains_hashtags(thread_result, quest_config, condition.split(':', 1)[1].split(','))
+    elif condition.startswith('contains_mentions:'):
+        return plan.contains_mentions(thread_result, quest_config, condition.split(':', 1)[1].split(','))
+    elif condition.startswith('user_has_souvenir:'):
+        return plan.user_has_souvenir(thread_result, quest_config, condition.split(':', 1)[1])
+    elif condition.startswith('user_missing_souvenir:'):
+        return plan.user_missing_souvenir(thread_result, quest_config, condition.split(':', 1)[1])
+    elif condition.startswith('souvenir_exists_anywhere:'):
+        return plan.souvenir_exists_anywhere(thread_result, quest_config, condition.split(':', 1)[1])
+    elif condition.startswith('has_canon:'):
+        return plan.has_canon(thread_result, quest_config, condition.split(':', 1)[1])
+    elif condition.startswith('hasnt_canon:'):
+        return plan.hasnt_canon(thread_result, quest_config, condition.split(':', 1)[1])
+    elif condition.startswith('count_canon:'):
+        return plan.count_canon(thread_result, quest_config, condition.split(':', 1)[1])
+    elif condition.startswith('user_canon_equals:') or condition.startswith('user_canon_not_equals:'):
+        name, parts = condition.split(':', 1)
+        if '=' not in parts:
+            return _invalid(f'Invalid format: use {name}:key=value')
+        canon_key, canon_value = parts.split('=', 1)
+        return getattr(plan, name)(thread_result, quest_config, canon_key, canon_value)
+    elif condition.startswith('user_in_canon_list:'):
+        parts = condition.split(':', 1)[1]
+        if '=' not in parts:
+            return _invalid('Invalid format: use user_in_canon_list:key=value1,value2')
+        canon_key, values_str = parts.split('=', 1)
+        return plan.user_in_canon_list(thread_result, quest_config, canon_key,
+                                       [v.strip() for v in values_str.split(',')])
+    elif condition.startswith('has_read:'):
+        return plan.has_read(thread_result, quest_config, condition.split(':', 1)[1])
+    elif condition.startswith('has_biblio_stamp:'):
+        return plan.has_biblio_stamp(thread_result, quest_config, condition.split(':', 1)[1])
+    return _invalid(f'Unknown condition: {condition}')
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    """Replace plan's evaluators with stubs that record the arguments they get."""
+    calls = []
+
+    def recorder(name):
+        def evaluator(thread_result, quest_config, *args, facts=None):
+            calls.append((name, args))
+            return {'success': True, 'count': 0, 'matching_replies': [], 'reason': name}
+        return evaluator
+
+    for name in EVALUATOR_NAMES:
+        monkeypatch.setattr(plan, name, recorder(name))
+    return calls
+
+
+PARITY_CONDITIONS = [
+    'any_reply', 'new_reply', 'dreamer_replies',
+    'reply_contains:hello|hi there', 'reply_contains:a:b', 'reply_contains:',
+    'contains_hashtags:dream,reverie', 'contains_mentions:reverie.house',
+    'user_has_souvenir:bell', 'user_missing_souvenir:bell', 'souvenir_exists_anywhere:bell',
+    'has_canon:arrival', 'hasnt_canon:arrival', 'count_canon:arrival>=3', 'count_canon:junk',
+    'user_canon_equals:role=keeper', 'user_canon_equals:url=a=b', 'user_canon_equals:role',
+    'user_canon_not_equals:role=keeper', 'user_canon_not_equals:role',
+    'user_in_canon_list:role=keeper, guide ,dreamer', 'user_in_canon_list:role',
+    'has_read:Seeker\'s Reverie', 'has_biblio_stamp:at://did:plc:xyz/biblio.bond.list/abc',
+    'unknown_condition', 'any_reply:extra', 'reply_contains', 'has_canon',
+]
+
+
+@pytest.mark.unit
+class TestCompileConditionParity:
+    """compile_condition picks the same evaluator, arguments and failures as before."""
+
+    @pytest.mark.parametrize('condition', PARITY_CONDITIONS)
+    def test_matches_legacy_dispatch(self, recorded, condition):
+        quest_config = {'title': 'test quest'}
+
+        expected = legacy_dispatch(condition, THREAD, quest_config)
+        expected_calls = list(recorded)
+        recorded.clear()
+
+        actual = compile_condition(condition).run(THREAD, quest_config)
+
+        assert actual == expected
+        assert recorded == expected_calls
+
+    @pytest.mark.parametrize('condition', ['any_reply', 'has_canon:arrival', 'nonsense'])
+    def test_no_replies(self, recorded, condition):
+        empty = {'replies': []}
+        assert compile_condition(condition).run(empty, {}) == legacy_dispatch(condition, empty, {})
+        assert recorded == []
+
+    def test_fact_keys(self):
+        assert compile_condition('has_canon:arrival').canon_keys == {'arrival'}
+        assert compile_condition('user_canon_equals:role=keeper').canon_keys == {'role'}
+        assert compile_condition('user_has_souvenir:bell').souvenir_keys == {'bell'}
+        assert compile_condition('souvenir_exists_anywhere:bell').souvenir_counts == {'bell'}
+        assert compile_condition('new_reply').needs_dreamers
+        assert not compile_condition('reply_contains:x').canon_keys
@@ -0,0 +1,160 @@
+"""
+Spectrum Snapshot Delta Tests
+=============================
+
+Round-trips dreamer lists through SnapshotStore's delta encoding and replay,
+using an in-memory stand-in for spectrum_snapshots (no database needed).
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.snapshots as snapshots
+from core.snapshots import SnapshotStore, summarize_dreamers
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeSnapshotDB:
+    """Answers the two reads _replay makes against a list of stored rows."""
+
+    def __init__(self):
+        self.rows = []
+
+    def add(self, kind, data, base_id=None, positions=None):
+        row_id = len(self.rows) + 1
+        self.rows.append({
+            'id': row_id, 'epoch': row_id, 'operation': 'test', 'total_dreamers': 0,
+            'snapshot_data': json.dumps(data), 'created_at': row_id, 'notes': None,
+            'kind': kind, 'base_id': base_id, 'positions': positions,
+        })
+        return row_id
+
+    def execute(self, query, params=()):
+        if "kind <> 'delta'" in query and 'ORDER BY id DESC' in query:
+            keyframes = [r for r in self.rows if r['id'] <= params[0] and r['kind'] != 'delta']
+            return FakeResult([{'id': keyframes[-1]['id']}] if keyframes else [])
+        if 'WHERE id > %s AND id <= %s' in query:
+            after_id, end_id, limit = params
+            return FakeResult([r for r in self.rows if after_id < r['id'] <= end_id][:limit])
+        return FakeResult([])
+
+
+def spectrum(*values):
+    return dict(zip(['entropy', 'oblivion', 'liberty', 'authority', 'receptive', 'skeptic'], values))
+
+
+def by_did(dreamers):
+    return {d['did']: d for d in dreamers}
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setattr(snapshots, '_schema_ready', True)
+    return SnapshotStore(FakeSnapshotDB())
+
+
+def store_sequence(store, generations):
+    """Store the first generation as a keyframe and each later one as a delta."""
+    db = store.db
+    ids = [db.add('key', {'dreamers': generations[0]})]
+    for dreamers in generations[1:]:
+        roster = None
+        for _, roster in store._replay(ids[-1], ids[-1]):
+            pass
+        header, positions = store._encode_delta(roster, dreamers)
+        ids.append(db.add('delta', header, ids[-1], positions))
+    return ids
+
+
+@pytest.mark.unit
+class TestDeltaRoundTrip:
+    """Each replayed snapshot equals the dreamer list that was encoded."""
+
+    def test_spectrum_and_meta_changes(self, store):
+        generations = [
+            [
+                {'did': 'did:a', 'handle': 'a.test', 'heading': 'entropy', 'spectrum': spectrum(1, 2, 3, 4, 5, 6), 'octant': 'x'},
+                {'did': 'did:b', 'handle': 'b.test', 'heading': None},
+            ],
+            [
+                {'did': 'did:a', 'handle': 'a.renamed', 'heading': 'drift', 'spectrum': spectrum(2, 2, 3, 4, 5, -6), 'octant': 'y'},
+                {'did': 'did:b', 'handle': 'b.test', 'heading': 'home', 'spectrum': spectrum(0, 0, 0, 0, 0, 0), 'octant': None},
+                {'did': 'did:c', 'handle': 'c.test', 'heading': None},
+            ],
+        ]
+        ids = store_sequence(store, generations)
+
+        for snapshot, dreamers in zip(store.iter_snapshots(ids[0], ids[-1]), generations):
+            assert by_did(snapshot['data']['dreamers']) == by_did(dreamers)
+
+    def test_removed_fields_are_dropped_not_nulled(self, store):
+        generations = [
+            [{'did': 'did:a', 'handle': 'a.test', 'heading': 'entropy', 'spectrum': spectrum(1, 1, 1, 1, 1, 1), 'octant': 'x'}],
+            [{'did': 'did:a'}],
+            [{'did': 'did:a', 'heading': None, 'octant': None}],
+        ]
+        ids = store_sequence(store, generations)
+
+        replayed = list(store.iter_snapshots(ids[0], ids[-1]))
+        assert replayed[1]['data']['dreamers'] == [{'did': 'did:a'}]
+        assert replayed[2]['data']['dreamers'] == [{'did': 'did:a', 'heading': None, 'octant': None}]
+
+    def test_removed_and_readded_dreamers(self, store):
+        a = {'did': 'did:a', 'handle': 'a.test', 'heading': None}
+        b = {'did': 'did:b', 'handle': 'b.test', 'heading': None, 'spectrum': spectrum(9, 8, 7, 6, 5, 4), 'octant': 'z'}
+        generations = [[a, b], [b], [b, a]]
+        ids = store_sequence(store, generations)
+
+        for snapshot, dreamers in zip(store.iter_snapshots(ids[0], ids[-1]), generations):
+            assert by_did(snapshot['data']['dreamers']) == by_did(dreamers)
+
+    def test_delta_with_wrong_base_is_rejected(self, store):
+        db = store.db
+        key = db.add('key', {'dreamers': []})
+        db.add('delta', {'added': [], 'removed': [], 'meta': {}, 'unset': {}}, key)
+        db.add('delta', {'added': [], 'removed': [], 'meta': {}, 'unset': {}}, key)
+
+        with pytest.raises(ValueError):
+            list(store.iter_snapshots(key, 3))
+
+
+@pytest.mark.unit
+class TestSummary:
+    """Summary figures stored with every snapshot for the database listings."""
+
+    def test_summarize_dreamers(self):
+        previous = [{'did': 'did:a', 'spectrum': spectrum(0, 0, 0, 0, 0, 0)}, None]
+        dreamers = [
+            {'did': 'did:a', 'spectrum': spectrum(3, 4, 0, 0, 0, 0)},
+            {'did': 'did:b', 'spectrum': spectrum(0, 0, 0, 0, 0, 10)},
+            {'did': 'did:c'},
+        ]
+        summary = summarize_dreamers(dreamers, previous)
+
+        assert summary['dreamers_with_spectrum'] == 2
+        assert summary['statistics'] == {
+            'total_distance_from_origin': 15.0,
+            'avg_distance_from_origin': 7.5,
+            'total_distance_traveled': 5.0,
+        }
+
+    def test_no_previous_roster(self):
+        summary = summarize_dreamers([{'did': 'did:a'}])
+        assert summary['dreamers_with_spectrum'] == 0
+        assert summary['statistics']['avg_distance_from_origin'] == 0
+        assert summary['statistics']['total_distance_traveled'] == 0
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Avatar Cache
+Content-addressed local copies of dreamer avatars from cdn.bsky.app.
+
+Avatar URLs embed the blob CID (.../img/avatar/plain/<did>/<cid>@jpeg), and a
+CID's bytes never change, so each image is downloaded once into
+blobs/<cid>.jpg. The served path stays /assets/cached/avatars/<did>.jpg: it is
+a hard link to the dreamer's current blob, swapped atomically when the avatar
+changes. Thumbnails for the dreamer lists are generated alongside
+(<cid>@<size>.jpg, linked as <did>@<size>.jpg) when Pillow is available.
+
+avatar_blobs keeps the validators (ETag / Last-Modified) used to revalidate
+an avatar with a conditional GET instead of a HEAD or a full download, and
+the last-used time for LRU eviction. avatar_links records which blob each
+dreamer's path points at; only blobs no dreamer references any more (old
+avatars) are evicted, so archived avatars of departed dreamers are kept.
+"""
+
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Optional
+
+import requests
+
+from core.database import DatabaseManager
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+# Inside Docker: /srv/reverie.house → /srv
+AVATAR_CACHE_DIR = '/srv/site/assets/cached/avatars'
+AVATAR_URL_PREFIX = '/assets/cached/avatars'
+BLOB_DIR = os.path.join(AVATAR_CACHE_DIR, 'blobs')
+
+THUMBNAIL_SIZES = (64, 128)
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+MIN_AVATAR_BYTES = 100
+
+_CID_PATTERN = re.compile(r'/img/(?:avatar|banner)[^/]*/plain/[^/]+/([a-z0-9]+)')
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def _ensure_schema(db: DatabaseManager):
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS avatar_blobs (
+                cid TEXT PRIMARY KEY,
+                url TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                bytes INTEGER NOT NULL DEFAULT 0,
+                fetched_at INTEGER,
+                last_used_at INTEGER
+            )
+        """)
+        db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_avatar_blobs_last_used ON avatar_blobs(last_used_at)
+        """)
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS avatar_links (
+                did TEXT PRIMARY KEY,
+                cid TEXT NOT NULL,
+                linked_at INTEGER
+            )
+        """)
+        db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_avatar_links_cid ON avatar_links(cid)
+        """)
+        os.makedirs(BLOB_DIR, exist_ok=True)
+        if not db.fetch_one("SELECT 1 AS linked FROM avatar_links LIMIT 1"):
+            _backfill_links(db)
+        _schema_ready = True
+
+
+def _backfill_links(db: DatabaseManager):
+    """Record links made before avatar_links existed, matched by inode."""
+    blobs = {}
+    for name in os.listdir(BLOB_DIR):
+        if name.endswith('.jpg') and '@' not in name:
+            st = os.stat(os.path.join(BLOB_DIR, name))
+            blobs[(st.st_dev, st.st_ino)] = name[:-len('.jpg')]
+    now = int(time.time())
+    for name in os.listdir(AVATAR_CACHE_DIR):
+        if not name.endswith('.jpg') or '@' in name or name.startswith('.'):
+            continue
+        st = os.stat(os.path.join(AVATAR_CACHE_DIR, name))
+        key = blobs.get((st.st_dev, st.st_ino))
+        if key:
+            did = name[:-len('.jpg')].replace('_', ':', 2)
+            db.execute("""
+                INSERT INTO avatar_links (did, cid, linked_at) VALUES (%s, %s, %s)
+                ON CONFLICT (did) DO NOTHING
+            """, (did, key, now))
+
+
+def avatar_key(avatar_url: str) -> str:
+    """Blob CID from a CDN avatar URL, or a hash of the URL if it has none."""
+    match = _CID_PATTERN.search(avatar_url)
+    if match:
+        return match.group(1)
+    return 'u' + hashlib.sha256(avatar_url.encode('utf-8')).hexdigest()[:40]
+
+
+def _safe_did(did: str) -> str:
+    return did.replace(':', '_')
+
+
+def _blob_path(key: str, size: Optional[int] = None) -> str:
+    suffix = f"@{size}" if size else ''
+    return os.path.join(BLOB_DIR, f"{key}{suffix}.jpg")
+
+
+def _did_path(did: str, size: Optional[int] = None) -> str:
+    suffix = f"@{size}" if size else ''
+    return os.path.join(AVATAR_CACHE_DIR, f"{_safe_did(did)}{suffix}.jpg")
+
+
+def _write_atomic(path: str, data: bytes):
+    """Write via a temp file in the same directory and rename into place."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _link_atomic(src: str, dst: str):
+    """Point dst at src (hard link), replacing any existing file atomically."""
+    try:
+        if os.path.exists(dst) and os.path.samefile(src, dst):
+            return
+    except OSError:
+        pass
+    tmp = f"{dst}.tmp-{os.getpid()}-{threading.get_ident()}"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        # Filesystem without hard links - fall back to a copy
+        with open(src, 'rb') as f:
+            _write_atomic(dst, f.read())
+        return
+    os.replace(tmp, dst)
+
+
+def _make_thumbnails(key: str, data: bytes) -> int:
+    """Write thumbnail sizes for a blob; returns bytes written."""
+    if Image is None:
+        return 0
+    written = 0
+    try:
+        source = Image.open(io.BytesIO(data))
+        source = source.convert('RGB')
+    except Exception:
+        return 0
+    for size in THUMBNAIL_SIZES:
+        thumb = source.copy()
+        thumb.thumbnail((size, size))
+        buffer = io.BytesIO()
+        thumb.save(buffer, format='JPEG', quality=85)
+        _write_atomic(_blob_path(key, size), buffer.getvalue())
+        written += buffer.tell()
+    return written
+
+
+def _link_did(db: DatabaseManager, did: str, key: str):
+    """Point the dreamer's paths at a blob and record the reference."""
+    _link_atomic(_blob_path(key), _did_path(did))
+    for size in THUMBNAIL_SIZES:
+        if os.path.exists(_blob_path(key, size)):
+            _link_atomic(_blob_path(key, size), _did_path(did, size))
+        else:
+            # No thumbnail for this blob - don't keep serving the old avatar's
+            try:
+                os.unlink(_did_path(did, size))
+            except FileNotFoundError:
+                pass
+    db.execute("""
+        INSERT INTO avatar_links (did, cid, linked_at) VALUES (%s, %s, %s)
+        ON CONFLICT (did) DO UPDATE SET cid = EXCLUDED.cid, linked_at = EXCLUDED.linked_at
+    """, (did, key, int(time.time())))
+
+
+def _store_blob(db: DatabaseManager, key: str, url: str, resp) -> bool:
+    data = resp.content
+    if len(data) <= MIN_AVATAR_BYTES:
+        return False
+    _write_atomic(_blob_path(key), data)
+    total = len(data) + _make_thumbnails(key, data)
+    now = int(time.time())
+    db.execute("""
+        INSERT INTO avatar_blobs (cid, url, etag, last_modified, bytes, fetched_at, last_used_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT (cid) DO UPDATE SET
+            url = EXCLUDED.url, etag = EXCLUDED.etag, last_modified = EXCLUDED.last_modified,
+            bytes = EXCLUDED.bytes, fetched_at = EXCLUDED.fetched_at, last_used_at = EXCLUDED.last_used_at
+    """, (key, url, resp.headers.get('ETag'), resp.headers.get('Last-Modified'), total, now, now))
+    return True
+
+
+def cache_avatar(did: str, avatar_url: str, verbose: bool = False) -> bool:
+    """
+    Make sure a dreamer's CDN avatar is cached locally.
+
+    Downloads only when the blob isn't already stored; otherwise just links
+    the dreamer's path to it.
+
+    Returns:
+        True if the avatar is cached
+    """
+    if not avatar_url or not avatar_url.startswith('https://cdn.bsky.app/'):
+        return False
+    try:
+        db = DatabaseManager()
+        _ensure_schema(db)
+        key = avatar_key(avatar_url)
+
+        if os.path.exists(_blob_path(key)):
+            _link_did(db, did, key)
+            db.execute("UPDATE avatar_blobs SET last_used_at = %s WHERE cid = %s", (int(time.time()), key))
+            return True
+
+        resp = requests.get(avatar_url, timeout=10)
+        if resp.status_code != 200 or not _store_blob(db, key, avatar_url, resp):
+            if verbose:
+                print(f"   ⚠️  Avatar cache failed: HTTP {resp.status_code}")
+            return False
+
+        _link_did(db, did, key)
+        if verbose:
+            print(f"   💾 Cached avatar locally ({len(resp.content)} bytes)")
+        evict(db)
+        return True
+    except Exception as e:
+        if verbose:
+            print(f"   ⚠️  Avatar cache error: {e}")
+    return False
+
+
+def revalidate_avatar(did: str, avatar_url: str) -> Optional[int]:
+    """
+    Check a CDN avatar is still served, using a conditional GET.
+
+    A 304 answers from the stored validators without transferring the image;
+    a 200 (no validators yet, or changed) is stored as the current blob.
+
+    Returns:
+        The HTTP status code, or None on a network error
+    """
+    try:
+        db = DatabaseManager()
+        _ensure_schema(db)
+        key = avatar_key(avatar_url)
+        headers = {}
+        if os.path.exists(_blob_path(key)):
+            row = db.fetch_one("SELECT etag, last_modified FROM avatar_blobs WHERE cid = %s", (key,))
+            if row and row['etag']:
+                headers['If-None-Match'] = row['etag']
+            if row and row['last_modified']:
+                headers['If-Modified-Since'] = row['last_modified']
+
+        resp = requests.get(avatar_url, headers=headers, timeout=8, allow_redirects=True)
+        if resp.status_code == 304:
+            db.execute("UPDATE avatar_blobs SET last_used_at = %s WHERE cid = %s", (int(time.time()), key))
+        elif resp.status_code == 200 and _store_blob(db, key, avatar_url, resp):
+            _link_did(db, did, key)
+        return resp.status_code
+    except Exception:
+        return None
+
+
+def get_cached_avatar_path(did: str, size: Optional[int] = None) -> str:
+    """Return the local cached avatar URL path if it exists, else empty string."""
+    if os.path.exists(_did_path(did, size)):
+        suffix = f"@{size}" if size else ''
+        return f"{AVATAR_URL_PREFIX}/{_safe_did(did)}{suffix}.jpg"
+    return ''
+
+
+def evict(db: Optional[DatabaseManager] = None, max_bytes: int = CACHE_MAX_BYTES) -> int:
+    """
+    Delete least recently used blobs no dreamer links to until the store
+    fits in max_bytes. Returns the number of blobs removed.
+
+    References come from avatar_links rather than the blob's link count, which
+    stays at 1 when a filesystem without hard links forced a copy.
+    """
+    db = db or DatabaseManager()
+    _ensure_schema(db)
+
+    total = db.fetch_one("SELECT COALESCE(SUM(bytes), 0) AS total FROM avatar_blobs")['total']
+    if total <= max_bytes:
+        return 0
+
+    removed = 0
+    unreferenced = db.fetch_all("""
+        SELECT b.cid, b.bytes FROM avatar_blobs b
+        WHERE NOT EXISTS (SELECT 1 FROM avatar_links l WHERE l.cid = b.cid)
+        ORDER BY b.last_used_at ASC NULLS FIRST
+    """)
+    for row in unreferenced:
+        if total <= max_bytes:
+            break
+        try:
+            for size in (None,) + THUMBNAIL_SIZES:
+                try:
+                    os.unlink(_blob_path(row['cid'], size))
+                except FileNotFoundError:
+                    pass
+        except OSError:
+            continue
+        db.execute("DELETE FROM avatar_blobs WHERE cid = %s", (row['cid'],))
+        total -= row['bytes']
+        removed += 1
+
+    return removed
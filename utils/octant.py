@@ -9,6 +9,7 @@ Note: As of database migration (2025), octants are stored as lowercase names
 (flow, experiment, etc.) rather than symbolic codes (+++, ++-, etc.)
 """
 
+import time
 from typing import Dict, Optional, Tuple
 
 
@@ -205,10 +206,11 @@ def update_octant_in_db(db, did: str, spectrum: Dict[str, int]) -> Optional[str]
     octant_name = calculate_octant_code(spectrum)
     
     if octant_name:
+        # Bump updated_at so incremental master record syncs see the change
         db.execute("""
             UPDATE spectrum
-            SET octant = ?
-            WHERE did = ?
-        """, (octant_name, did))
+            SET octant = ?, updated_at = ?
+            WHERE did = ? AND octant IS DISTINCT FROM ?
+        """, (octant_name, int(time.time()), did, octant_name))
     
     return octant_name
@@ -5,9 +5,10 @@ Refreshes profile data (avatar, display name, description) and designation
 from Bluesky for dreamers with outdated information.
 """
 
-import os
 import sys
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 sys.path.insert(0, '/srv/reverie.house')
 
 from core.database import DatabaseManager
@@ -15,42 +16,255 @@ from core.database import DatabaseManager
 # AppView cache proxy (local)
 BSKY_CACHE = 'http://127.0.0.1:2847'
 
-# Inside Docker: /srv/reverie.house → /srv
-AVATAR_CACHE_DIR = '/srv/site/assets/cached/avatars'
 from core.network import NetworkClient
+from utils.avatar_cache import cache_avatar, get_cached_avatar_path, revalidate_avatar
 from datetime import datetime, timedelta
 
+# Bulk refresh pipeline
+PROFILES_PER_REQUEST = 25     # app.bsky.actor.getProfiles maximum
+PROFILE_FETCH_WORKERS = 4     # concurrent getProfiles calls
+AVATAR_WORKERS = 8            # concurrent avatar downloads / health checks
+DESIGNATION_WORKERS = 4
+APPVIEW_RATE = 10.0           # appview requests per second (token bucket)
+APPVIEW_BURST = 10
 
-def cache_avatar(did: str, avatar_url: str, verbose: bool = False) -> bool:
-    """Download and cache a CDN avatar locally for posterity."""
-    if not avatar_url or not avatar_url.startswith('https://cdn.bsky.app/'):
-        return False
-    try:
-        import requests
-        safe_did = did.replace(':', '_')
-        cache_path = os.path.join(AVATAR_CACHE_DIR, f"{safe_did}.jpg")
-        resp = requests.get(avatar_url, timeout=10)
-        if resp.status_code == 200 and len(resp.content) > 100:
-            with open(cache_path, 'wb') as f:
-                f.write(resp.content)
-            if verbose:
-                print(f"   💾 Cached avatar locally ({len(resp.content)} bytes)")
-            return True
-        elif verbose:
-            print(f"   ⚠️  Avatar cache failed: HTTP {resp.status_code}")
-    except Exception as e:
+
+class TokenBucket:
+    """Thread-safe token bucket: acquire() blocks until a token is available."""
+    
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def profile_updates(did: str, profile: dict) -> dict:
+    """
+    Map a Bluesky profile onto dreamers columns.
+    
+    Only non-empty values are included, so an empty response never
+    overwrites valid data (description may legitimately be empty).
+    """
+    from utils.identity import normalize_avatar_url
+    
+    updates = {}
+    
+    if 'displayName' in profile and profile['displayName']:
+        updates['display_name'] = profile['displayName']
+    
+    if 'description' in profile:
+        # Description can legitimately be empty, so always update
+        updates['description'] = profile['description']
+    
+    if 'avatar' in profile and profile['avatar']:
+        updates['avatar'] = normalize_avatar_url(profile['avatar'], did, 'avatar')
+    
+    if 'banner' in profile and profile['banner']:
+        updates['banner'] = normalize_avatar_url(profile['banner'], did, 'banner')
+    
+    if 'followersCount' in profile:
+        updates['followers_count'] = profile['followersCount']
+    
+    if 'followsCount' in profile:
+        updates['follows_count'] = profile['followsCount']
+    
+    if 'postsCount' in profile:
+        updates['posts_count'] = profile['postsCount']
+    
+    return updates
+
+
+def check_avatar_health(did: str, avatar: str, verbose: bool = False):
+    """
+    Return a local fallback avatar if a CDN avatar is gone, else None.
+    
+    Used when a profile can't be fetched: if the CDN returns an error for the
+    stored avatar, use the local cache or the default instead.
+    """
+    if not avatar or not avatar.startswith('https://cdn.bsky.app/'):
+        return None
+    status = revalidate_avatar(did, avatar)
+    if status is not None and status >= 400:
+        fallback = get_cached_avatar_path(did) or '/assets/avatars/avatar001.png'
         if verbose:
-            print(f"   ⚠️  Avatar cache error: {e}")
-    return False
+            print(f"   🔄 CDN avatar gone (HTTP {status}), fell back to {fallback}")
+        return fallback
+    return None  # Alive, or a network issue — leave as-is, will retry next cycle
 
 
-def get_cached_avatar_path(did: str) -> str:
-    """Return the local cached avatar path if it exists, else empty string."""
-    safe_did = did.replace(':', '_')
-    path = os.path.join(AVATAR_CACHE_DIR, f"{safe_did}.jpg")
-    if os.path.exists(path):
-        return f"/assets/cached/avatars/{safe_did}.jpg"
-    return ''
+def fetch_profiles(dids: list, bucket: TokenBucket, verbose: bool = False) -> dict:
+    """
+    Fetch profiles with app.bsky.actor.getProfiles, 25 actors per call.
+    
+    Calls run concurrently, paced by the token bucket. DIDs the appview
+    doesn't return are absent from the result; a failed call leaves its
+    whole batch absent.
+    """
+    import requests as _req
+    
+    def fetch_batch(batch):
+        bucket.acquire()
+        try:
+            resp = _req.get(
+                f"{BSKY_CACHE}/xrpc/app.bsky.actor.getProfiles",
+                params={'actors': batch},
+                timeout=15
+            )
+            if resp.status_code == 429:
+                # Back off and retry once
+                time.sleep(int(resp.headers.get('Retry-After', 5)))
+                bucket.acquire()
+                resp = _req.get(
+                    f"{BSKY_CACHE}/xrpc/app.bsky.actor.getProfiles",
+                    params={'actors': batch},
+                    timeout=15
+                )
+            if resp.status_code != 200:
+                if verbose:
+                    print(f"   ⚠️  getProfiles failed: HTTP {resp.status_code}")
+                return []
+            return resp.json().get('profiles', [])
+        except Exception as e:
+            if verbose:
+                print(f"   ⚠️  getProfiles error: {e}")
+            return []
+    
+    batches = [dids[i:i + PROFILES_PER_REQUEST] for i in range(0, len(dids), PROFILES_PER_REQUEST)]
+    profiles = {}
+    with ThreadPoolExecutor(max_workers=PROFILE_FETCH_WORKERS) as pool:
+        for batch_profiles in pool.map(fetch_batch, batches):
+            for profile in batch_profiles:
+                profiles[profile.get('did')] = profile
+    return profiles
+
+
+def refresh_dreamers(dreamers: list, verbose: bool = True, refresh_designation: bool = True) -> tuple:
+    """
+    Refresh a set of dreamers from Bluesky in bulk.
+    
+    Profiles come from batched getProfiles calls, all changed rows are
+    written in one UPDATE, new avatars are downloaded by a bounded pool and
+    designations are recalculated concurrently.
+    
+    Args:
+        dreamers: Rows with did, handle, avatar and server
+        verbose: Print progress
+        refresh_designation: Also recalculate designations
+    
+    Returns:
+        (success_count, fail_count)
+    """
+    if not dreamers:
+        return 0, 0
+    
+    db = DatabaseManager()
+    bucket = TokenBucket(APPVIEW_RATE, APPVIEW_BURST)
+    
+    profiles = fetch_profiles([d['did'] for d in dreamers], bucket, verbose=verbose)
+    
+    if verbose:
+        print(f"📥 Fetched {len(profiles)}/{len(dreamers)} profiles")
+    
+    now = int(time.time())
+    columns = ['display_name', 'description', 'avatar', 'banner',
+               'followers_count', 'follows_count', 'posts_count']
+    rows = {column: [] for column in ['did'] + columns}
+    new_avatars = []
+    unreachable = []
+    
+    for dreamer in dreamers:
+        did = dreamer['did']
+        profile = profiles.get(did)
+        if not profile:
+            unreachable.append(dreamer)
+            continue
+        
+        updates = profile_updates(did, profile)
+        rows['did'].append(did)
+        for column in columns:
+            rows[column].append(updates.get(column))
+        
+        avatar = updates.get('avatar')
+        if avatar and (avatar != dreamer.get('avatar') or not get_cached_avatar_path(did)):
+            new_avatars.append((did, avatar))
+        
+        if verbose and updates.get('display_name') and updates['display_name'] != dreamer.get('display_name'):
+            print(f"   ✏️  @{dreamer['handle']}: name → {updates['display_name']}")
+    
+    # One UPDATE for every refreshed row; NULL means "keep the current value"
+    if rows['did']:
+        db.execute("""
+            UPDATE dreamers d SET
+                display_name = COALESCE(v.display_name, d.display_name),
+                description = COALESCE(v.description, d.description),
+                avatar = COALESCE(v.avatar, d.avatar),
+                banner = COALESCE(v.banner, d.banner),
+                followers_count = COALESCE(v.followers_count, d.followers_count),
+                follows_count = COALESCE(v.follows_count, d.follows_count),
+                posts_count = COALESCE(v.posts_count, d.posts_count),
+                updated_at = %s
+            FROM unnest(
+                %s::text[], %s::text[], %s::text[], %s::text[], %s::text[],
+                %s::integer[], %s::integer[], %s::integer[]
+            ) AS v(did, display_name, description, avatar, banner,
+                   followers_count, follows_count, posts_count)
+            WHERE d.did = v.did
+        """, (now, rows['did'], rows['display_name'], rows['description'], rows['avatar'],
+              rows['banner'], rows['followers_count'], rows['follows_count'], rows['posts_count']))
+    
+    with ThreadPoolExecutor(max_workers=AVATAR_WORKERS) as pool:
+        # Cache new avatars locally for posterity
+        cached = sum(pool.map(lambda item: cache_avatar(item[0], item[1]), new_avatars))
+        
+        # Unreachable profiles: fall back from dead CDN avatars
+        fallbacks = [
+            (d['did'], fallback)
+            for d, fallback in zip(unreachable, pool.map(
+                lambda d: check_avatar_health(d['did'], d.get('avatar') or '', verbose), unreachable))
+            if fallback
+        ]
+    
+    if fallbacks:
+        db.execute("""
+            UPDATE dreamers d SET avatar = v.avatar
+            FROM unnest(%s::text[], %s::text[]) AS v(did, avatar)
+            WHERE d.did = v.did
+        """, ([did for did, _ in fallbacks], [avatar for _, avatar in fallbacks]))
+    
+    if verbose:
+        print(f"💾 Cached {cached} new avatars locally")
+        for dreamer in unreachable:
+            print(f"   ❌ Could not fetch profile for @{dreamer['handle']}")
+    
+    if refresh_designation and rows['did']:
+        from utils.designation import Designation
+        refreshed = [d for d in dreamers if d['did'] in profiles]
+        
+        def designate(dreamer):
+            try:
+                Designation.calculate_and_save(dreamer['did'], dreamer['handle'], dreamer.get('server'))
+            except Exception as e:
+                if verbose:
+                    print(f"   ⚠️  Could not refresh designation for @{dreamer['handle']}: {e}")
+        
+        with ThreadPoolExecutor(max_workers=DESIGNATION_WORKERS) as pool:
+            list(pool.map(designate, refreshed))
+    
+    return len(rows['did']), len(unreachable)
 
 
 def refresh_profile(did: str, handle: str, verbose: bool = True, refresh_designation: bool = True) -> bool:
@@ -93,51 +307,15 @@ def refresh_profile(did: str, handle: str, verbose: bool = True, refresh_designa
             existing = db.fetch_one(
                 "SELECT avatar FROM dreamers WHERE did = %s", (did,)
             )
-            existing_avatar = (existing or {}).get('avatar', '')
-            if existing_avatar and existing_avatar.startswith('https://cdn.bsky.app/'):
-                import requests as _req
-                try:
-                    head = _req.head(existing_avatar, timeout=8, allow_redirects=True)
-                    if head.status_code >= 400:
-                        cached = get_cached_avatar_path(did)
-                        fallback = cached or '/assets/avatars/avatar001.png'
-                        db.execute(
-                            "UPDATE dreamers SET avatar = %s WHERE did = %s",
-                            (fallback, did)
-                        )
-                        if verbose:
-                            print(f"   🔄 CDN avatar gone (HTTP {head.status_code}), fell back to {fallback}")
-                except Exception:
-                    pass  # Network issue — leave as-is, will retry next cycle
+            fallback = check_avatar_health(did, (existing or {}).get('avatar', ''), verbose)
+            if fallback:
+                db.execute(
+                    "UPDATE dreamers SET avatar = %s WHERE did = %s",
+                    (fallback, did)
+                )
             return False
         
-        # Extract fields - only update if values are non-empty
-        # This prevents overwriting valid data with empty responses
-        updates = {}
-        
-        if 'displayName' in profile and profile['displayName']:
-            updates['display_name'] = profile['displayName']
-        
-        if 'description' in profile:
-            # Description can legitimately be empty, so always update
-            updates['description'] = profile['description']
-        
-        from utils.identity import normalize_avatar_url
-        
-        if 'avatar' in profile and profile['avatar']:
-            updates['avatar'] = normalize_avatar_url(profile['avatar'], did, 'avatar')
-        
-        if 'banner' in profile and profile['banner']:
-            updates['banner'] = normalize_avatar_url(profile['banner'], did, 'banner')
-        
-        if 'followersCount' in profile:
-            updates['followers_count'] = profile['followersCount']
-        
-        if 'followsCount' in profile:
-            updates['follows_count'] = profile['followsCount']
-        
-        if 'postsCount' in profile:
-            updates['posts_count'] = profile['postsCount']
+        updates = profile_updates(did, profile)
         
         if not updates:
             if verbose:
@@ -220,7 +398,7 @@ def refresh_all_profiles(days_old: int = 7, limit: int = None, verbose: bool = T
     # Also always include dreamers with NULL/empty avatars — they may have set one
     # after registration and we want to pick it up promptly.
     query = """
-        SELECT did, handle, name, updated_at
+        SELECT did, handle, name, display_name, avatar, server, updated_at
         FROM dreamers
         WHERE ((updated_at < %s OR updated_at IS NULL)
                OR (avatar IS NULL OR avatar = ''))
@@ -243,21 +421,7 @@ def refresh_all_profiles(days_old: int = 7, limit: int = None, verbose: bool = T
     print(f"   Cutoff: {days_old} days ago (timestamp: {cutoff_timestamp})")
     print()
     
-    success_count = 0
-    fail_count = 0
-    
-    for i, dreamer in enumerate(dreamers, 1):
-        if verbose:
-            print(f"[{i}/{len(dreamers)}] ", end='')
-        
-        if refresh_profile(dreamer['did'], dreamer['handle'], verbose):
-            success_count += 1
-        else:
-            fail_count += 1
-        
-        # Small delay to avoid rate limiting
-        if i < len(dreamers):
-            time.sleep(0.5)
+    success_count, fail_count = refresh_dreamers(dreamers, verbose)
     
     print()
     print("="*70)
@@ -279,32 +443,20 @@ def refresh_specific_dreamers(handles: list, verbose: bool = True):
     print(f"📋 Refreshing {len(handles)} specific dreamers")
     print()
     
-    success_count = 0
-    fail_count = 0
+    # Look up DIDs
+    dreamers = db.fetch_all("""
+        SELECT did, handle, name, display_name, avatar, server
+        FROM dreamers
+        WHERE handle = ANY(%s) AND (deactivated IS NULL OR deactivated = FALSE)
+    """, (list(handles),)) or []
     
-    for i, handle in enumerate(handles, 1):
-        # Look up DID
-        dreamer = db.fetch_one(
-            "SELECT did, handle FROM dreamers WHERE handle = %s",
-            (handle,)
-        )
-        
-        if not dreamer:
-            print(f"[{i}/{len(handles)}] ❌ @{handle} not found in database")
-            fail_count += 1
-            continue
-        
-        if verbose:
-            print(f"[{i}/{len(handles)}] ", end='')
-        
-        if refresh_profile(dreamer['did'], dreamer['handle'], verbose):
-            success_count += 1
-        else:
-            fail_count += 1
-        
-        # Small delay
-        if i < len(handles):
-            time.sleep(0.5)
+    found = {d['handle'] for d in dreamers}
+    missing = [handle for handle in handles if handle not in found]
+    for handle in missing:
+        print(f"❌ @{handle} not found in database (or deactivated)")
+    
+    success_count, fail_count = refresh_dreamers(dreamers, verbose)
+    fail_count += len(missing)
     
     print()
     print("="*70)
@@ -463,11 +615,8 @@ def check_account_health(verbose: bool = True) -> dict:
                 avatar = d.get('avatar') or ''
                 avatar_gone = False
                 if avatar.startswith('https://cdn.bsky.app/'):
-                    try:
-                        head = _req.head(avatar, timeout=8, allow_redirects=True)
-                        avatar_gone = head.status_code >= 400
-                    except Exception:
-                        pass
+                    status = revalidate_avatar(did, avatar)
+                    avatar_gone = status is not None and status >= 400
 
                 if avatar_gone:
                     # Avatar CDN is dead — cache if possible, set local fallback
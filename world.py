@@ -433,6 +433,7 @@ def cmd_move(args):
 def cmd_snapshots(args):
     """View spectrum snapshots."""
     from core.database import DatabaseManager
+    from core.snapshots import SnapshotStore
     from datetime import datetime
     
     if len(args) == 0 or args[0] == 'list':
@@ -480,18 +481,12 @@ def cmd_snapshots(args):
             print("Invalid snapshot ID")
             sys.exit(1)
         
-        db = DatabaseManager()
-        cursor = db.execute("""
-            SELECT id, epoch, operation, snapshot_data, created_at, notes
-            FROM spectrum_snapshots WHERE id = %s
-        """, (snapshot_id,))
-        
-        snap = cursor.fetchone()
+        snap = SnapshotStore().get_snapshot(snapshot_id)
         if not snap:
             print(f"Snapshot {snapshot_id} not found")
             sys.exit(1)
         
-        data = json.loads(snap['snapshot_data'])
+        data = snap['data']
         dt = datetime.fromtimestamp(snap['created_at'])
         
         print(f"📸 Snapshot #{snap['id']}  |  {dt.strftime('%Y-%m-%d %H:%M:%S')}")
@@ -526,15 +521,14 @@ def cmd_snapshots(args):
             print("Invalid snapshot IDs")
             sys.exit(1)
         
-        db = DatabaseManager()
+        store = SnapshotStore()
         snaps = {}
         for sid in (id_a, id_b):
-            cursor = db.execute("SELECT snapshot_data FROM spectrum_snapshots WHERE id = %s", (sid,))
-            row = cursor.fetchone()
-            if not row:
+            snap = store.get_snapshot(sid)
+            if not snap:
                 print(f"Snapshot {sid} not found")
                 sys.exit(1)
-            snaps[sid] = json.loads(row['snapshot_data'])
+            snaps[sid] = snap['data']
         
         # Index by DID
         axes = ['entropy', 'oblivion', 'liberty', 'authority', 'receptive', 'skeptic']